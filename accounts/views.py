@@ -5,7 +5,6 @@ from django.conf import settings
 from django.db.models import Count, Q
 from .models import PlayerProfile
 import uuid
-import random
 
 
 # Credenciais globais (pode ser movido para settings.py)
@@ -17,6 +16,7 @@ class HomeView(View):
     """Home page com estatísticas e conteúdo em destaque"""
 
     def get(self, request):
+        from cards import sampling
         from cards.models import Card
         from decks.models import Deck
         from lobby.models import Lobby
@@ -41,25 +41,10 @@ class HomeView(View):
 
         # Se não tiver commanders populares, pegar alguns legendários aleatórios
         if not popular_commanders.exists():
-            legendary_creatures = list(Card.objects.filter(
-                type_line__icontains='Legendary Creature',
-                image_normal__isnull=False
-            ).exclude(image_normal='')[:50])
-
-            if legendary_creatures:
-                popular_commanders = random.sample(
-                    legendary_creatures,
-                    min(8, len(legendary_creatures))
-                )
+            popular_commanders = sampling.sample('legendary_creature', 8)
 
         # Cartas em destaque (míticas aleatórias)
-        featured_cards = list(Card.objects.filter(
-            rarity='mythic',
-            image_normal__isnull=False
-        ).exclude(image_normal='')[:30])
-
-        if featured_cards:
-            featured_cards = random.sample(featured_cards, min(6, len(featured_cards)))
+        featured_cards = sampling.sample('mythic', 6)
 
         # Lobbies recentes aguardando jogadores
         recent_lobbies = Lobby.objects.filter(
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Card
+from .canonical import refresh_canonical
+from .models import Card, CardDataVersion
 
 
 @admin.register(Card)
@@ -8,3 +9,27 @@ class CardAdmin(admin.ModelAdmin):
     list_filter = ['rarity', 'set_code', 'colors']
     search_fields = ['name', 'oracle_text', 'type_line']
     readonly_fields = ['scryfall_id']
+
+    def save_model(self, request, obj, form, change):
+        # Carta nova ou renomeada: impressao canonica dos nomes envolvidos
+        names = {obj.name}
+        if change and 'name' in form.changed_data:
+            names.add(form.initial['name'])
+        super().save_model(request, obj, form, change)
+        if not change or 'name' in form.changed_data:
+            self.refresh_names(names)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.refresh_names({obj.name})
+
+    def delete_queryset(self, request, queryset):
+        names = set(queryset.values_list('name', flat=True))
+        super().delete_queryset(request, queryset)
+        self.refresh_names(names)
+
+    def refresh_names(self, names):
+        marked, unmarked = refresh_canonical(names)
+        if marked or unmarked:
+            # Indices em memoria (autocomplete, sorteio...) passam a ver a mudanca
+            CardDataVersion.bump()
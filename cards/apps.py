@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CardsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cards'
+
+    def ready(self):
+        # AddField no SQLite recria cards_card e apaga os triggers do full-text (cards/search.py)
+        from django.db.models.signals import post_migrate
+        from .search import repair_after_migrate
+        post_migrate.connect(repair_after_migrate, sender=self)
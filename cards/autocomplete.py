@@ -0,0 +1,166 @@
+"""Indice em memoria para o autocomplete de nomes de cartas.
+
+Uma entrada por carta canonica (sem reimpressoes), com os nomes das faces de
+cartas dupla-face. As chaves normalizadas (minusculas, sem acento) ficam em
+listas ordenadas e a busca por prefixo e um ``bisect``:
+
+1. prefixo do nome (ou de uma das faces);
+2. prefixo de uma palavra do nome ("ring" acha "Sol Ring");
+3. substring em qualquer ponto (o antigo ``icontains``), so se faltar resultado.
+
+Dentro de cada grupo a ordem e por popularidade (quantos decks usam a carta),
+nome mais curto e nome. O indice e montado uma vez por processo e
+reconstruido quando a ``CardDataVersion`` muda; quando so a ``DeckDataVersion``
+muda (deck criado, editado ou apagado) so a ordem e refeita. As versoes sao
+checadas no maximo a cada ``VERSION_CHECK_SECONDS``.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+LIMIT = 15
+MIN_QUERY = 2
+VERSION_CHECK_SECONDS = 5
+
+FIELDS = ('id', 'name', 'mana_cost', 'type_line', 'image_small')
+WORD_START_RE = re.compile(r'(?<![a-z0-9])[a-z0-9]')
+
+_lock = threading.Lock()
+_cache = {'version': None, 'deck_version': None, 'index': None, 'checked_at': 0.0}
+
+
+def normalize(text):
+    """'Lim-Dûl' -> 'lim-dul'"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def popularity():
+    """{nome: decks que usam a carta (no deck ou como comandante)}"""
+    from decks.models import Deck, DeckCard
+    counts = Counter(DeckCard.objects.values_list('card__name', flat=True))
+    counts.update(Deck.objects.values_list('commander__name', flat=True))
+    counts.update(n for n in Deck.objects.values_list('partner_commander__name', flat=True) if n)
+    return counts
+
+
+class AutocompleteIndex:
+    """Nomes canonicos em arrays ordenados para busca por prefixo"""
+
+    def __init__(self, rows, popular=None):
+        # rows: FIELDS + back_face_name
+        self.rows = [dict(zip(FIELDS, row[:len(FIELDS)])) for row in rows]
+        self.rerank(popular)
+
+        names = []
+        words = []
+        for i, row in enumerate(self.rows):
+            back_face = rows[i][len(FIELDS)] if len(rows[i]) > len(FIELDS) else None
+            full = normalize(row['name'])
+            keys = {full}
+            keys.update(normalize(face) for face in full.split(' // '))
+            if back_face:
+                keys.add(normalize(back_face))
+            names.extend((key, i) for key in keys if key)
+            # Sufixos a partir de cada palavra (exceto a primeira): prefixo de palavra
+            words.extend((full[m.start():], i) for m in WORD_START_RE.finditer(full) if m.start() > 0)
+        names.sort()
+        words.sort()
+        self.name_keys = [key for key, _ in names]
+        self.name_rows = [i for _, i in names]
+        self.word_keys = [key for key, _ in words]
+        self.word_rows = [i for _, i in words]
+
+        # Todos os nomes num texto so: a busca de substring roda em C (str.find)
+        self.starts = []
+        parts = []
+        offset = 0
+        for row in self.rows:
+            self.starts.append(offset)
+            part = normalize(row['name'])
+            parts.append(part)
+            offset += len(part) + 1
+        self.blob = '\n'.join(parts)
+
+    def rerank(self, popular=None):
+        """rank = posicao por popularidade/tamanho/nome (trocado de uma vez, sem refazer as chaves)"""
+        popular = popular or {}
+        order = sorted(
+            range(len(self.rows)),
+            key=lambda i: (-popular.get(self.rows[i]['name'], 0), len(self.rows[i]['name']), self.rows[i]['name']),
+        )
+        rank = [0] * len(self.rows)
+        for position, i in enumerate(order):
+            rank[i] = position
+        self.rank = rank
+
+    @classmethod
+    def build(cls):
+        from .models import Card
+        rows = Card.objects.canonical().order_by().values_list(*FIELDS, 'back_face_name')
+        return cls(list(rows), popularity())
+
+    def _prefix_rows(self, keys, rows, q):
+        lo = bisect_left(keys, q)
+        hi = bisect_left(keys, q + '\uffff', lo)
+        return {rows[j] for j in range(lo, hi)}
+
+    def _substring_rows(self, q, limit):
+        found = set()
+        position = self.blob.find(q)
+        while position != -1 and len(found) < limit:
+            found.add(bisect_right(self.starts, position) - 1)
+            position = self.blob.find(q, position + 1)
+        return found
+
+    def lookup(self, q, limit=LIMIT):
+        """Ate ``limit`` cartas: prefixo do nome, prefixo de palavra, substring"""
+        q = normalize(q)
+        if len(q) < MIN_QUERY:
+            return []
+        results = []
+        seen = set()
+        groups = (
+            lambda: self._prefix_rows(self.name_keys, self.name_rows, q),
+            lambda: self._prefix_rows(self.word_keys, self.word_rows, q),
+            # Substring: amostra limitada (o ranking so ordena o que foi achado)
+            lambda: self._substring_rows(q, limit * 20),
+        )
+        for group in groups:
+            if len(results) >= limit:
+                break
+            candidates = group() - seen
+            best = heapq.nsmallest(limit - len(results), candidates, key=self.rank.__getitem__)
+            seen.update(best)
+            results.extend(self.rows[i] for i in best)
+        return results
+
+
+def get_index():
+    """Indice do processo, reconstruido quando as cartas mudam e reordenado quando os decks mudam"""
+    from decks.models import DeckDataVersion
+    from .models import CardDataVersion
+    now = time.monotonic()
+    if _cache['index'] is not None and now - _cache['checked_at'] < VERSION_CHECK_SECONDS:
+        return _cache['index']
+    version = CardDataVersion.current()
+    deck_version = DeckDataVersion.current()
+    with _lock:
+        if _cache['index'] is None or _cache['version'] != version:
+            print(f"[Autocomplete] Montando indice (versao {version})...")
+            _cache['index'] = AutocompleteIndex.build()
+        elif _cache['deck_version'] != deck_version:
+            print(f"[Autocomplete] Reordenando por popularidade (decks v{deck_version})...")
+            _cache['index'].rerank(popularity())
+        _cache['version'] = version
+        _cache['deck_version'] = deck_version
+        _cache['checked_at'] = now
+        return _cache['index']
+
+
+def lookup(q, limit=LIMIT):
+    return get_index().lookup(q, limit)
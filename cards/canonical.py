@@ -0,0 +1,28 @@
+"""Impressao canonica por nome de carta.
+
+O banco guarda uma linha por impressao (Scryfall ``default_cards``), mas as
+telas de sugestao mostram cada carta uma vez. ``Card.is_canonical`` marca a
+impressao de menor id de cada nome (a mesma que o antigo
+``values('name').annotate(Min('id'))`` escolhia) e e recalculado no import
+e pelo admin (so os nomes salvos/apagados), nao no ``Card.save()``.
+"""
+from django.db.models import Min
+
+
+def canonical_ids(queryset=None):
+    """Subquery com o menor id de cada nome"""
+    from .models import Card
+    queryset = Card.objects.all() if queryset is None else queryset
+    return queryset.order_by().values('name').annotate(first_id=Min('id')).values('first_id')
+
+
+def refresh_canonical(names=None, using='default'):
+    """Recalcula a flag (de todos os nomes ou so de ``names``); retorna (marcadas, desmarcadas)"""
+    from .models import Card
+    cards = Card.objects.using(using)
+    if names is not None:
+        cards = cards.filter(name__in=list(names))
+    first_ids = canonical_ids(cards)
+    unmarked = cards.filter(is_canonical=True).exclude(id__in=first_ids).update(is_canonical=False)
+    marked = cards.filter(is_canonical=False, id__in=first_ids).update(is_canonical=True)
+    return marked, unmarked
@@ -0,0 +1,338 @@
+"""Plano de consulta do catalogo.
+
+``filter_cards(params)`` monta o queryset dos filtros da query string (o
+mesmo para o catalogo e para a API de busca). Cada pagina faz uma unica
+varredura filtrada: o queryset e montado uma vez, a pagina sai de um slice
+dele e o total de resultados vem do cache (chave = filtros normalizados +
+``CardDataVersion``). Sem cache, o total sai da mesma query da pagina
+(``COUNT(*) OVER ()``). O import incrementa a versao, o que invalida todas as
+contagens. As facetas da sidebar sao a excecao: uma query agrupada propria,
+em cache pela mesma chave (ver cards/facets.py).
+
+Nas ordenacoes por campo indexado (``KEYSET_FIELDS``) a pagina seguinte usa um
+cursor opaco (``after=``) com a chave da ultima carta: a query e um range no
+indice (campo, id) com LIMIT, sem OFFSET nem COUNT, entao o custo por pagina
+nao cresce com a profundidade. O total nesse modo e o do cache, ou um minimo
+(cartas ja vistas) quando ainda nao foi contado.
+"""
+import base64
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Count, Q, Window
+from django.http import Http404
+
+CACHE_TIMEOUT = 60 * 60
+
+# Parametros que nao mudam o conjunto de resultados
+NON_FILTER_PARAMS = ('page', 'after', 'order', 'dir', 'view', 'fields', 'limit')
+
+# Colunas expostas pela API e pela exportacao (sem os campos derivados internos)
+PUBLIC_FIELDS = (
+    'id', 'scryfall_id', 'name', 'mana_cost', 'cmc', 'type_line', 'oracle_text',
+    'colors', 'color_identity', 'set_code', 'set_name', 'rarity',
+    'image_small', 'image_normal', 'image_large', 'power', 'toughness', 'loyalty', 'layout',
+    'back_face_name', 'back_face_mana_cost', 'back_face_type_line', 'back_face_oracle_text',
+    'back_face_power', 'back_face_toughness', 'back_face_loyalty',
+    'back_face_image_small', 'back_face_image_normal', 'back_face_image_large',
+)
+
+# Ordenacoes com cursor: parametro order -> campo (indices (campo, id) em Card.Meta)
+KEYSET_FIELDS = {'name': 'name', 'cmc': 'cmc', 'set': 'set_code', 'rarity': 'rarity'}
+
+
+class FilterError(ValueError):
+    """Filtro com valor invalido (mensagem para o usuario)"""
+
+
+class InvalidCursor(Http404):
+    """Cursor after= corrompido ou de outra ordenacao (404 no HTML, 400 na API)"""
+
+
+def parse_number(params, name, kind=float):
+    """Numero do parametro (None se vazio); FilterError se invalido"""
+    value = params.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        number = kind(value)
+    except ValueError:
+        raise FilterError(f'Valor invalido para {name}: "{value}"')
+    if not math.isfinite(number):
+        raise FilterError(f'Valor invalido para {name}: "{value}"')
+    return number
+
+
+def parse_fields(value, default=PUBLIC_FIELDS):
+    """'id,name' -> ['id', 'name'] (vazio = default); ValueError se houver campo fora de PUBLIC_FIELDS"""
+    fields = [f.strip() for f in (value or '').split(',') if f.strip()] or list(default)
+    unknown = [f for f in fields if f not in PUBLIC_FIELDS]
+    if unknown:
+        raise ValueError(f'Campos desconhecidos: {", ".join(unknown)}')
+    return fields
+
+
+def data_version():
+    from .models import CardDataVersion
+    return CardDataVersion.current()
+
+
+def cache_key(name, version):
+    return f'cards:{name}:v{version}'
+
+
+def cached(name, build, version=None, timeout=CACHE_TIMEOUT):
+    """Valor derivado das cartas, recalculado quando a versao dos dados muda"""
+    version = data_version() if version is None else version
+    key = cache_key(name, version)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+def filter_key(params, ignore=NON_FILTER_PARAMS, only=None):
+    """Hash dos filtros da query string (ordem dos parametros e valores vazios nao importam).
+
+    only: considera so esses parametros (os demais nao mudam o resultado).
+    """
+    items = []
+    for name in sorted(params):
+        if name in ignore or (only is not None and name not in only):
+            continue
+        values = sorted(v.strip() for v in params.getlist(name) if v.strip())
+        if values:
+            items.append((name, values))
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+class CountedPaginator(Paginator):
+    """Paginator com o total ja conhecido (nao roda COUNT)"""
+
+    def __init__(self, object_list, per_page, count, approximate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+        self.approximate = approximate  # True: count e so o minimo (modo cursor sem total em cache)
+
+
+class KeysetPage(Page):
+    """Pagina lida por cursor: has_next vem da linha extra do LIMIT, nao do total"""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+def keyset_order(field, descending=False):
+    """order_by deterministico para o cursor (id desempata)"""
+    return [f'-{field}', '-id'] if descending else [field, 'id']
+
+
+def encode_cursor(order, card, seen):
+    """Token opaco com a chave da ultima carta da pagina e quantas ja foram vistas"""
+    field = KEYSET_FIELDS[order]
+    data = json.dumps([order, getattr(card, field), card.id, seen], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, order):
+    """(valor, id, vistas) do token; None se invalido ou de outra ordenacao"""
+    from .models import Card
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        token_order, value, last_id, seen = data
+        if token_order != order:
+            return None
+        value = Card._meta.get_field(KEYSET_FIELDS[order]).to_python(value)
+        return value, int(last_id), max(int(seen), 0)
+    except (ValueError, TypeError, KeyError, ValidationError):
+        return None
+
+
+def keyset_q(field, descending, value, last_id):
+    """Cartas depois de (value, last_id) na ordem (field, id); o >= inicial deixa o banco usar o indice"""
+    if descending:
+        return Q(**{f'{field}__lte': value}) & (Q(**{f'{field}__lt': value}) | Q(id__lt=last_id))
+    return Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | Q(id__gt=last_id))
+
+
+def keyset_for(params):
+    """(order, desc) quando a ordenacao permite cursor (after=), senao None"""
+    order = params.get('order', 'name')
+    if order not in KEYSET_FIELDS:
+        return None
+    return order, params.get('dir', 'asc') == 'desc'
+
+
+def filter_cards(params):
+    """(queryset, erro da busca avancada ou None) com os filtros e a ordenacao do catalogo.
+
+    FilterError se um filtro numerico (cmc, power, toughness) nao for numero.
+    """
+    from . import query
+    from .colors import color_q
+    from .models import Card
+    from .stats import order_by_stat, range_q
+
+    queryset = Card.objects.all()
+
+    # Busca por nome/texto ou sintaxe Scryfall (c<=wu t:creature ...), ver cards/query.py
+    search = params.get('q', '').strip()
+    order = params.get('order', 'name')
+    query_error = None
+    if search:
+        try:
+            queryset = query.parse(search).apply(queryset, ranked=(order == 'relevance'))
+        except query.QueryError as e:
+            # Sintaxe invalida: busca o texto inteiro, como antes
+            query_error = str(e)
+            queryset = queryset.search(search, ranked=(order == 'relevance'))
+
+    # Filtro de cores - multiplas cores
+    colors = params.getlist('color')
+    color_mode = params.get('color_mode', 'include')  # include, exact, at_most
+
+    if colors:
+        # include (default), exact ou at_most: um filtro indexado na mascara (cards/colors.py)
+        queryset = queryset.filter(color_q(colors, color_mode))
+
+    # Filtro colorless
+    if 'C' in colors or params.get('colorless'):
+        queryset = queryset.filter(color_identity_mask=0)
+
+    # Filtro de tipo
+    card_type = params.get('type', '').strip()
+    if card_type:
+        queryset = queryset.search(card_type, fields=('type_line', 'back_face_type_line'))
+
+    # Filtro de subtipo
+    subtype = params.get('subtype', '').strip()
+    if subtype:
+        queryset = queryset.search(subtype, fields=('type_line', 'back_face_type_line'))
+
+    # Filtro de CMC (custo de mana convertido)
+    cmc_min = parse_number(params, 'cmc_min')
+    cmc_max = parse_number(params, 'cmc_max')
+    if cmc_min is not None:
+        queryset = queryset.filter(cmc__gte=cmc_min)
+    if cmc_max is not None:
+        queryset = queryset.filter(cmc__lte=cmc_max)
+
+    # Filtro de poder (para criaturas)
+    power_min = parse_number(params, 'power_min', int)
+    power_max = parse_number(params, 'power_max', int)
+    if power_min is not None or power_max is not None:
+        queryset = queryset.filter(range_q('power_value', power_min, power_max))
+
+    # Filtro de resistencia (para criaturas)
+    tough_min = parse_number(params, 'tough_min', int)
+    tough_max = parse_number(params, 'tough_max', int)
+    if tough_min is not None or tough_max is not None:
+        queryset = queryset.filter(range_q('toughness_value', tough_min, tough_max))
+
+    # Filtro de raridade
+    rarity = params.getlist('rarity')
+    if rarity:
+        queryset = queryset.filter(rarity__in=rarity)
+
+    # Filtro de set/colecao
+    set_code = params.get('set', '').strip().lower()
+    if set_code:
+        queryset = queryset.filter(set_code=set_code)
+
+    # Busca no texto do oracle (keywords)
+    oracle_text = params.get('oracle', '').strip()
+    if oracle_text:
+        queryset = queryset.search(oracle_text, fields=('oracle_text', 'back_face_oracle_text'))
+
+    # Ordenacao (relevancia ja vem ordenada pelo rank da busca)
+    order_dir = params.get('dir', 'asc')
+
+    stat_fields = {
+        'power': 'power_value',
+        'toughness': 'toughness_value',
+    }
+
+    if order in stat_fields:
+        # Numerico, com valores variaveis (*) no fim
+        queryset = order_by_stat(queryset, stat_fields[order], order_dir == 'desc')
+    elif order in KEYSET_FIELDS:
+        # (campo, id): ordem estavel para o cursor after=
+        queryset = queryset.order_by(*keyset_order(KEYSET_FIELDS[order], order_dir == 'desc'))
+
+    return queryset, query_error
+
+
+def paginate(queryset, params, per_page, page_kwarg='page', version=None, keyset=None, scope='catalog'):
+    """(paginator, page) do queryset com uma varredura filtrada.
+
+    keyset: (order, descending) quando o queryset esta em keyset_order; habilita o
+    cursor ``after=`` e preenche ``page.next_cursor``.
+    scope: separa as contagens de views cujos parametros significam coisas diferentes.
+    """
+    count_name = f'{scope}-count:{filter_key(params)}'
+    version = data_version() if version is None else version
+    count = cache.get(cache_key(count_name, version))
+
+    if keyset and params.get('after'):
+        cursor = decode_cursor(params['after'], keyset[0])
+        if cursor is None:
+            # Token corrompido ou de outra ordenacao: nao volta em silencio para a pagina 1
+            raise InvalidCursor('Cursor invalido')
+        return keyset_paginate(queryset, per_page, keyset, cursor, count)
+
+    page_number = params.get(page_kwarg) or 1
+    # bm25 da busca ranqueada nao pode ser usado junto com window function no SQLite
+    if count is None and (page_number == 'last' or queryset.query.extra_select):
+        count = cached(count_name, queryset.count, version)
+    rows = None
+    if count is None:
+        try:
+            number = max(int(page_number), 1)
+        except ValueError:
+            raise Http404('Pagina invalida')
+        offset = (number - 1) * per_page
+        rows = list(queryset.annotate(full_count=Window(Count('id')))[offset:offset + per_page])
+        if rows:
+            count = rows[0].full_count
+        elif number == 1:
+            count = 0
+        else:
+            count = queryset.count()
+        cache.set(cache_key(count_name, version), count, CACHE_TIMEOUT)
+
+    paginator = CountedPaginator(queryset, per_page, count)
+    try:
+        page = paginator.page(paginator.num_pages if page_number == 'last' else page_number)
+    except InvalidPage as e:
+        raise Http404(f'Pagina invalida: {e}')
+    page.object_list = list(page.object_list) if rows is None else rows
+    page.next_cursor = None
+    if keyset and page.has_next() and page.object_list:
+        page.next_cursor = encode_cursor(keyset[0], page.object_list[-1], page.end_index())
+    return paginator, page
+
+
+def keyset_paginate(queryset, per_page, keyset, cursor, count=None):
+    """Pagina depois do cursor: um range no indice com LIMIT per_page + 1"""
+    order, descending = keyset
+    value, last_id, seen = cursor
+    rows = list(queryset.filter(keyset_q(KEYSET_FIELDS[order], descending, value, last_id))[:per_page + 1])
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    approximate = count is None
+    if approximate:
+        count = seen + len(rows) + (1 if has_next else 0)
+    paginator = CountedPaginator(queryset, per_page, max(count, seen + len(rows)), approximate)
+    page = KeysetPage(rows, seen // per_page + 1, paginator, has_next)
+    page.next_cursor = encode_cursor(order, rows[-1], seen + len(rows)) if has_next else None
+    return paginator, page
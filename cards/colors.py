@@ -0,0 +1,61 @@
+"""Cores como mascara de 5 bits (WUBRG).
+
+``Card.colors_mask`` e ``Card.color_identity_mask`` guardam as cores como bits.
+Como so existem 32 mascaras possiveis, cada filtro (inclui, exato, no maximo,
+exclui) vira a lista de mascaras que o satisfazem e um ``__in`` indexado.
+"""
+from django.db.models import Q
+
+COLOR_ORDER = ('W', 'U', 'B', 'R', 'G')
+COLOR_BITS = {c: 1 << i for i, c in enumerate(COLOR_ORDER)}
+ALL_COLORS = (1 << len(COLOR_ORDER)) - 1
+ALL_MASKS = range(ALL_COLORS + 1)
+
+
+def to_mask(colors):
+    """'W,U' / 'WU' / ['W', 'U'] -> mascara; letras desconhecidas (ex: 'C') sao ignoradas"""
+    if not colors:
+        return 0
+    if isinstance(colors, str):
+        colors = colors.replace(',', '')
+    mask = 0
+    for c in colors:
+        mask |= COLOR_BITS.get(c.strip().upper(), 0)
+    return mask
+
+
+def from_mask(mask):
+    return [c for c in COLOR_ORDER if mask & COLOR_BITS[c]]
+
+
+def masks_including(colors):
+    """Mascaras que contem todas as cores (superconjuntos)"""
+    required = to_mask(colors)
+    return [m for m in ALL_MASKS if m & required == required]
+
+
+def masks_at_most(colors):
+    """Mascaras contidas nas cores (subconjuntos, inclui incolor)"""
+    allowed = to_mask(colors)
+    return [m for m in ALL_MASKS if m & ~allowed == 0]
+
+
+def masks_excluding(colors):
+    """Mascaras sem nenhuma das cores"""
+    excluded = to_mask(colors)
+    return [m for m in ALL_MASKS if m & excluded == 0]
+
+
+def color_q(colors, mode='include', field='color_identity_mask'):
+    """Q para o filtro de cores: include, exact, at_most ou exclude"""
+    if mode == 'exact':
+        return Q(**{field: to_mask(colors)})
+    if mode == 'at_most':
+        masks = masks_at_most(colors)
+    elif mode == 'exclude':
+        masks = masks_excluding(colors)
+    else:
+        masks = masks_including(colors)
+    if len(masks) == len(ALL_MASKS):
+        return Q()
+    return Q(**{f'{field}__in': masks})
@@ -0,0 +1,80 @@
+"""Exportacao do catalogo em NDJSON ou CSV, em streaming.
+
+As linhas saem de ``values_list(...).iterator(chunk_size=...)``: nenhum
+objeto ``Card`` e criado e o queryset nunca e carregado inteiro, entao a
+memoria fica constante qualquer que seja o tamanho da exportacao. As linhas
+sao agrupadas em blocos (``BLOCK_SIZE``) antes de sair e podem passar por um
+compressor gzip incremental.
+
+Usado pelo endpoint ``/cards/api/export/`` (``StreamingHttpResponse``) e pelo
+comando ``export_cards``. Os filtros sao os do catalogo (``catalog.filter_cards``).
+"""
+import csv
+import io
+import json
+import zlib
+
+CHUNK_SIZE = 2000
+BLOCK_SIZE = 64 * 1024
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+
+def rows(queryset, fields, chunk_size=CHUNK_SIZE):
+    """Tuplas com as colunas pedidas, lidas do banco em lotes"""
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def ndjson_lines(rows, fields):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), ensure_ascii=False, default=str) + '\n'
+
+
+def csv_lines(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Sem linhas: so o cabecalho
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def blocks(lines, size=BLOCK_SIZE):
+    """Junta as linhas em blocos de ~size bytes (menos writes/chunks HTTP)"""
+    parts = []
+    length = 0
+    for line in lines:
+        data = line.encode()
+        parts.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(parts)
+            parts = []
+            length = 0
+    if parts:
+        yield b''.join(parts)
+
+
+def gzipped(chunks):
+    """Compressao gzip incremental dos blocos"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(queryset, fields, fmt='ndjson', gzip=False, chunk_size=CHUNK_SIZE):
+    """Blocos de bytes da exportacao"""
+    lines = ndjson_lines if fmt == 'ndjson' else csv_lines
+    chunks = blocks(lines(rows(queryset, fields, chunk_size), fields))
+    return gzipped(chunks) if gzip else chunks
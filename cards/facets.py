@@ -0,0 +1,98 @@
+"""Contagens por faceta da sidebar do catalogo.
+
+Cada carta guarda codigos de faceta precomputados: cores na
+``color_identity_mask`` (cards/colors.py), tipos principais na ``type_mask``
+(um bit por tipo, ver ``TYPE_BITS``), raridade, set e cmc. Todas as
+contagens ("Creature (12,301)") saem de uma unica query agrupada por set
+sobre o conjunto filtrado, com um ``COUNT`` condicional por valor de faceta;
+o total por set e a propria linha do grupo. O resultado fica no cache por
+filtros normalizados + ``CardDataVersion`` (cards/catalog.py).
+
+As contagens sao do resultado atual (nao "quantos teria se trocasse o
+filtro"). Subtipos nao sao facetados: o conjunto e aberto e caro de contar.
+
+Excecao a "uma varredura filtrada por pagina" do cards/catalog.py: na falta
+do cache esta e uma segunda varredura, alem da query da pagina. As facetas
+nao saem da mesma query do ``COUNT(*) OVER ()``: a contagem por set precisa
+de um GROUP BY sobre todos os sets (uma window so devolve valores nas linhas
+da pagina), a pagina por cursor e a busca ranqueada (bm25) nem rodam a
+window, e a pagina teria que carregar ~30 colunas de contagem em cada linha.
+Com o cache (mesma chave de filtros das contagens), as outras paginas e as
+outras ordenacoes do mesmo filtro nao repetem a varredura.
+"""
+from django.db.models import Count, F, Q
+from django.db.models.lookups import GreaterThan
+
+from .colors import COLOR_BITS, COLOR_ORDER
+from .similarity import MAIN_TYPES
+
+# Bits da type_mask: tipos principais na ordem de MAIN_TYPES, depois supertipos
+TYPE_NAMES = MAIN_TYPES + ('legendary',)
+TYPE_BITS = {name: 1 << bit for bit, name in enumerate(TYPE_NAMES)}
+
+RARITIES = ('common', 'uncommon', 'rare', 'mythic')
+# Faixas de cmc: 0..6 e 7+ (rotulo, cmc_min, cmc_max), iguais ao filtro da sidebar
+CMC_BUCKETS = tuple((str(n), n, n) for n in range(7)) + (('7+', 7, None),)
+
+
+def type_mask(*type_lines):
+    """'Legendary Creature — Elf' -> bits de creature e legendary (todas as faces)"""
+    words = set()
+    for type_line in type_lines:
+        words.update((type_line or '').lower().split())
+    mask = 0
+    for name, bit in TYPE_BITS.items():
+        if name in words:
+            mask |= bit
+    return mask
+
+
+def _has_bit(field, bit):
+    return GreaterThan(F(field).bitand(bit), 0)
+
+
+def type_q(name):
+    """Q das cartas com o tipo (nome de TYPE_NAMES) em alguma face"""
+    return Q(_has_bit('type_mask', TYPE_BITS[name]))
+
+
+def _aggregates():
+    """COUNT condicional por valor de faceta (nome da coluna -> agregado)"""
+    aggregates = {'total': Count('id')}
+    for color in COLOR_ORDER:
+        aggregates[f'color_{color}'] = Count('id', filter=_has_bit('color_identity_mask', COLOR_BITS[color]))
+    aggregates['color_C'] = Count('id', filter=Q(color_identity_mask=0))
+    for name, bit in TYPE_BITS.items():
+        aggregates[f'type_{name}'] = Count('id', filter=_has_bit('type_mask', bit))
+    for rarity in RARITIES:
+        aggregates[f'rarity_{rarity}'] = Count('id', filter=Q(rarity=rarity))
+    for label, low, high in CMC_BUCKETS:
+        q = Q(cmc__gte=low) if high is None else Q(cmc__gte=low, cmc__lte=high)
+        aggregates[f'cmc_{label}'] = Count('id', filter=q)
+    return aggregates
+
+
+def facet_counts(queryset):
+    """{faceta: {valor: contagem}} do queryset filtrado, numa query.
+
+    Facetas: color (W U B R G C), type (nomes de TYPE_NAMES), rarity, cmc
+    (rotulos de CMC_BUCKETS) e set (set_code).
+    """
+    from .models import Card
+    if queryset.query.extra_select:
+        # Busca ranqueada (bm25 via extra): o rank nao entra no GROUP BY
+        queryset = Card.objects.filter(id__in=queryset.values('id'))
+    rows = queryset.order_by().values('set_code').annotate(**_aggregates())
+
+    facets = {'color': {}, 'type': {}, 'rarity': {}, 'cmc': {}, 'set': {}}
+    for row in rows:
+        facets['set'][row.pop('set_code')] = row.pop('total')
+        for column, count in row.items():
+            facet, value = column.split('_', 1)
+            facets[facet][value] = facets[facet].get(value, 0) + count
+    # Valores sem nenhuma carta tambem aparecem (com 0)
+    for column in _aggregates():
+        if column != 'total':
+            facet, value = column.split('_', 1)
+            facets[facet].setdefault(value, 0)
+    return facets
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from cards import pages
+
+
+class Command(BaseCommand):
+    help = 'Atualiza os dados precomputados das paginas de cartas (impressoes, relacionados, decks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Monta tambem as paginas das cartas ainda nao visitadas'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Refaz todas as paginas, nao so as desatualizadas'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        refreshed = pages.refresh_pages(rebuild=options['rebuild'], stdout=self.stdout)
+        built = pages.build_missing(stdout=self.stdout) if options['all'] else 0
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Concluido! Paginas atualizadas: {refreshed}, novas: {built} ({time.perf_counter() - started:.1f}s)'
+        ))
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from cards import pages, similarity
+
+
+class Command(BaseCommand):
+    help = 'Precalcula o top-K de cartas similares de cada carta canonica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=similarity.TOP_K,
+            help=f'Similares guardados por carta (default: {similarity.TOP_K})'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recalcula todas as listas, nao so as pendentes'
+        )
+
+    def handle(self, *args, **options):
+        if not similarity.available():
+            raise CommandError('numpy nao disponivel (pip install numpy)')
+
+        started = time.perf_counter()
+        updated = similarity.refresh_similar(
+            top_k=options['top_k'],
+            rebuild=options['rebuild'],
+            stdout=self.stdout,
+        )
+
+        # Cards relacionados das paginas ja montadas
+        if updated:
+            refreshed = pages.refresh_pages(rebuild=True)
+            self.stdout.write(f'Paginas de cartas atualizadas: {refreshed}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Concluido! Listas atualizadas: {updated} ({time.perf_counter() - started:.1f}s)'
+        ))
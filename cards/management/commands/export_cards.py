@@ -0,0 +1,74 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from cards import catalog, export
+
+
+class Command(BaseCommand):
+    help = 'Exporta o catalogo (filtrado) em NDJSON ou CSV, em streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=sorted(export.FORMATS),
+            default='ndjson',
+            help='Formato de saida (default: ndjson)'
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Arquivo de saida (default: stdout)'
+        )
+        parser.add_argument(
+            '--fields',
+            default='',
+            help='Colunas separadas por virgula (default: todas as publicas)'
+        )
+        parser.add_argument(
+            '--filter',
+            default='',
+            help='Filtros do catalogo como query string (ex: "q=t:creature c<=wu&set=neo")'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Comprime a saida com gzip'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=export.CHUNK_SIZE,
+            help=f'Linhas lidas do banco por lote (default: {export.CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fields = catalog.parse_fields(options['fields'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        try:
+            queryset, query_error = catalog.filter_cards(QueryDict(options['filter']))
+        except catalog.FilterError as e:
+            raise CommandError(str(e))
+        if query_error:
+            self.stderr.write(self.style.WARNING(f'Busca avancada invalida ({query_error}); usando busca por texto'))
+
+        chunks = export.stream(queryset, fields, options['format'], options['gzip'], options['chunk_size'])
+        started = time.perf_counter()
+        written = 0
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f'Concluido! {written / 1024 / 1024:.1f} MB ({time.perf_counter() - started:.1f}s)'
+        ))
@@ -3,7 +3,10 @@ import requests
 import tempfile
 import os
 from django.core.management.base import BaseCommand
-from cards.models import Card
+from cards.models import Card, CardDataVersion
+from cards import search
+from cards.canonical import refresh_canonical
+from cards import pages, similarity, tagging
 
 
 class Command(BaseCommand):
@@ -21,6 +24,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Limpa todas as cartas antes de importar'
         )
+        parser.add_argument(
+            '--rebuild-search',
+            action='store_true',
+            help='Reconstroi o indice full-text inteiro no fim (os triggers ja indexam as cartas novas)'
+        )
 
     def handle(self, *args, **options):
         batch_size = options['batch_size']
@@ -80,6 +88,10 @@ class Command(BaseCommand):
             existing_ids = set(Card.objects.values_list('scryfall_id', flat=True))
             self.stdout.write(f'IDs existentes carregados: {len(existing_ids)}')
 
+            # Os triggers indexam as cartas inseridas; se sumiram, recria e reindexa antes
+            if search.ensure_index():
+                self.stdout.write(self.style.WARNING('Triggers do indice de busca recriados, indice reconstruido.'))
+
             cards_to_create = []
             processed = 0
             inserted = 0
@@ -196,6 +208,14 @@ class Command(BaseCommand):
                 Card.objects.bulk_create(cards_to_create, ignore_conflicts=True)
                 inserted += len(cards_to_create)
 
+            self._refresh_derived(inserted)
+
+            # Triggers ja indexaram as cartas novas; reconstruir so se pedido
+            if options['rebuild_search'] and search.rebuild_index():
+                self.stdout.write('Indice de busca reconstruido.')
+            if search.optimize_index():
+                self.stdout.write('Indice de busca otimizado.')
+
             total_in_db = Card.objects.count()
             self.stdout.write(
                 self.style.SUCCESS(
@@ -211,6 +231,32 @@ class Command(BaseCommand):
                 os.remove(tmp_path)
                 self.stdout.write('Arquivo temporario removido.')
 
+    def _refresh_derived(self, inserted):
+        """Canonicas, tags, similares e paginas; a versao dos dados sobe so no fim, com tudo pronto"""
+        # Uma impressao por nome para as telas de sugestao
+        marked, unmarked = refresh_canonical()
+        self.stdout.write(f'Impressoes canonicas: +{marked} / -{unmarked}')
+
+        # Tags de mecanicas/keywords das cartas canonicas novas
+        tagged = tagging.refresh_tags()
+        self.stdout.write(f'Cartas tagueadas: {tagged}')
+
+        if not (inserted or marked or unmarked or tagged):
+            return
+
+        # Top-K de similares: so as cartas novas e as listas em que elas entram
+        if similarity.available():
+            updated = similarity.refresh_similar()
+            self.stdout.write(f'Listas de similares atualizadas: {updated}')
+
+        # Impressoes/relacionados das paginas ja montadas, marcadas com a versao que vai entrar
+        version = CardDataVersion.current() + 1
+        refreshed = pages.refresh_pages(version=version)
+        self.stdout.write(f'Paginas de cartas atualizadas: {refreshed}')
+
+        # Invalida caches derivados das cartas (autocomplete, sorteio, indice de similares...)
+        CardDataVersion.bump()
+
     def _process_card(self, card_data, existing_ids):
         """Processa uma carta e retorna o objeto Card ou None/skip"""
         # Pular tipos indesejados
@@ -255,7 +301,7 @@ class Command(BaseCommand):
         toughness = card_data.get('toughness') or front_face.get('toughness')
         loyalty = card_data.get('loyalty') or front_face.get('loyalty')
 
-        return Card(
+        card = Card(
             scryfall_id=card_data['id'],
             name=card_data.get('name', ''),
             mana_cost=mana_cost,
@@ -286,3 +332,6 @@ class Command(BaseCommand):
             back_face_image_normal=back_face_image_uris.get('normal'),
             back_face_image_large=back_face_image_uris.get('large'),
         )
+        # bulk_create nao chama save(): calcular mascaras de cor etc. aqui
+        card.populate_derived_fields()
+        return card
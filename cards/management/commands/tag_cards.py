@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from cards.canonical import refresh_canonical
+from cards.models import CardDataVersion
+from cards import tagging
+
+
+class Command(BaseCommand):
+    help = 'Calcula as tags (mecanicas, keywords) das cartas canonicas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Retagueia todas as cartas, nao so as pendentes'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=tagging.CHUNK_SIZE,
+            help=f'Cartas por transacao (default: {tagging.CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        marked, unmarked = refresh_canonical()
+        self.stdout.write(f'Impressoes canonicas: +{marked} / -{unmarked}')
+
+        tagged = tagging.refresh_tags(
+            rebuild=options['rebuild'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+
+        if marked or unmarked or tagged:
+            CardDataVersion.bump()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Concluido! Cartas tagueadas: {tagged} ({time.perf_counter() - started:.1f}s)'
+        ))
@@ -1,7 +1,8 @@
 import requests
 import time
 from django.core.management.base import BaseCommand
-from cards.models import Card
+from cards.models import Card, CardDataVersion
+from cards import pages, similarity, tagging
 
 
 class Command(BaseCommand):
@@ -82,6 +83,9 @@ class Command(BaseCommand):
                         card.back_face_image_normal = back_images.get('normal')
                         card.back_face_image_large = back_images.get('large')
 
+                        # Oracle pode ter mudado: retaguear e recalcular similares
+                        card.tagged_version = 0
+                        card.similar_version = 0
                         card.save()
                         updated += 1
 
@@ -102,6 +106,14 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f'  Erro ao atualizar {card.name}: {e}'))
                 errors += 1
 
+        if updated:
+            # Dados derivados primeiro; a versao sobe so no fim (ver import_cards)
+            tagging.refresh_tags()
+            if similarity.available():
+                similarity.refresh_similar()
+            pages.refresh_pages(version=CardDataVersion.current() + 1)
+            CardDataVersion.bump()
+
         self.stdout.write(self.style.SUCCESS(
             f'Concluido! Atualizadas: {updated}, Erros: {errors}'
         ))
@@ -0,0 +1,160 @@
+"""Classificacao de texto por varios patterns de uma vez.
+
+Os catalogos de patterns (mecanicas, arquetipos de comandante, temas de deck,
+categorias do deck builder/analyzer) eram aplicados com ``re.search`` pattern a
+pattern. ``Matcher`` compila um catalogo uma vez: de cada pattern sai o trecho
+literal obrigatorio mais longo, e todos os literais viram uma unica regex em
+forma de trie. Uma passada no texto encontra os literais presentes e so os
+patterns candidatos sao confirmados com a regex original, entao o resultado e
+identico ao loop de ``re.search``.
+
+``compiled(nome, build)`` guarda os matchers por nome para reuso no import e
+nas requests.
+"""
+import re
+
+META = set('.^$*+?{}[]\\|()')
+QUANTIFIER_RE = re.compile(r'\{\d*(,\d*)?\}')
+
+_compiled = {}
+
+
+def compiled(name, build):
+    """Matcher do catalogo ``name``, construido uma vez com ``build()``"""
+    matcher = _compiled.get(name)
+    if matcher is None:
+        matcher = _compiled[name] = build()
+    return matcher
+
+
+def required_literals(pattern):
+    """Trechos literais que toda ocorrencia do pattern contem (vazio se nao da para saber)"""
+    if '|' in pattern or '(' in pattern or '[' in pattern:
+        return []
+    pieces = []
+    current = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if not escaped or escaped.isalnum():
+                # \b, \d, \w...: classe ou ancora, nao literal
+                pieces.append(current)
+                current = ''
+            else:
+                current += escaped
+            i += 2
+            continue
+        if char == '{' and not QUANTIFIER_RE.match(pattern, i):
+            current += char
+        elif char == '}' and '{' in current:
+            current += char
+        elif char in '*?' or (char == '{'):
+            # Quantificador que pode zerar o caractere anterior
+            pieces.append(current[:-1])
+            current = ''
+            if char == '{':
+                i = QUANTIFIER_RE.match(pattern, i).end()
+                continue
+        elif char == '+':
+            pieces.append(current)
+            current = ''
+        elif char in META:
+            pieces.append(current)
+            current = ''
+        else:
+            current += char
+        i += 1
+    pieces.append(current)
+    return [p for p in pieces if p]
+
+
+def trie_regex(literals):
+    """Alternation em forma de trie: no maximo um caminho tentado por posicao"""
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        end = node.get('') is True
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if end:
+            # Guloso: tenta o literal mais longo, aceita o mais curto se falhar
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class Matcher:
+    """Conjunto de patterns (chave, regex) aplicado numa passada.
+
+    ``search(text)`` retorna as chaves cujos patterns casam com ``re.search(p, text, re.IGNORECASE)``.
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        self.always = []  # patterns sem literal obrigatorio: sempre verificados
+        by_literal = {}
+        for key, pattern in rules:
+            regex = re.compile(pattern, re.IGNORECASE)
+            index = len(self.rules)
+            self.rules.append((key, regex))
+            literals = required_literals(pattern)
+            if not literals:
+                self.always.append(index)
+                continue
+            anchor = max(literals, key=len).lower()
+            by_literal.setdefault(anchor, []).append(index)
+
+        self.by_literal = by_literal
+        # Literais que sao prefixo de outros casam na mesma posicao
+        self.prefixes = {
+            literal: [literal[:n] for n in range(1, len(literal) + 1) if literal[:n] in by_literal]
+            for literal in by_literal
+        }
+        self.scan = re.compile('(?=(' + trie_regex(by_literal) + '))') if by_literal else None
+
+    def candidates(self, text):
+        """Indices dos patterns cujo literal obrigatorio aparece no texto"""
+        found = set(self.always)
+        if self.scan is not None:
+            seen = set()
+            for literal in self.scan.findall(text.lower()):
+                if literal and literal not in seen:
+                    seen.add(literal)
+                    for prefix in self.prefixes[literal]:
+                        found.update(self.by_literal[prefix])
+        return found
+
+    def search(self, text):
+        """Chaves de todos os patterns que casam com o texto"""
+        if not text:
+            return set()
+        return {
+            self.rules[index][0] for index in self.candidates(text)
+            if self.rules[index][1].search(text)
+        }
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        """Matcher de {tag: [patterns]}; as chaves sao (tag, indice do pattern)"""
+        return cls(
+            ((tag, index), pattern)
+            for tag, patterns in catalog.items()
+            for index, pattern in enumerate(patterns)
+        )
+
+    def counts(self, text):
+        """{tag: quantos patterns do tag casaram} (para catalogos de from_catalog)"""
+        result = {}
+        for tag, index in self.search(text):
+            result[tag] = result.get(tag, 0) + 1
+        return result
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    from cards import search
+    if search.fts5_supported(schema_editor.connection):
+        search.create_index(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    from cards import search
+    if schema_editor.connection.vendor == 'sqlite':
+        search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """Indice full-text (FTS5) de cartas; no-op fora do SQLite"""
+
+    dependencies = [
+        ('cards', '0002_card_back_face_image_large_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:45
+
+from django.db import migrations, models
+
+
+def backfill_masks(apps, schema_editor):
+    from cards.colors import to_mask
+    Card = apps.get_model('cards', 'Card')
+    # Poucas combinacoes distintas de cor: um UPDATE por valor
+    for field in ('colors', 'color_identity'):
+        for value in Card.objects.values_list(field, flat=True).distinct():
+            Card.objects.filter(**{field: value}).update(**{f'{field}_mask': to_mask(value)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_card_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='color_identity_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='colors_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:48
+
+from django.db import migrations, models
+
+
+def backfill_stats(apps, schema_editor):
+    from cards.stats import parse_stat
+    Card = apps.get_model('cards', 'Card')
+    # Poucos valores distintos ('0'..'20', '*', ...): um UPDATE por valor
+    for field in ('power', 'toughness', 'loyalty'):
+        values = Card.objects.exclude(**{f'{field}__isnull': True}).values_list(field, flat=True).distinct()
+        for value in values:
+            Card.objects.filter(**{field: value}).update(**{f'{field}_value': parse_stat(value)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0004_card_color_masks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='loyalty_value',
+            field=models.SmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='power_value',
+            field=models.SmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='toughness_value',
+            field=models.SmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:49
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def mark_canonical(apps, schema_editor):
+    Card = apps.get_model('cards', 'Card')
+    first_ids = Card.objects.order_by().values('name').annotate(first_id=Min('id')).values('first_id')
+    Card.objects.filter(id__in=first_ids).update(is_canonical=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_card_stat_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='is_canonical',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.RunPython(mark_canonical, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0006_card_is_canonical'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='tagged_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='CardTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('mechanic', 'Mecanica'), ('keyword', 'Keyword')], max_length=20)),
+                ('tag', models.CharField(max_length=50)),
+                ('score', models.SmallIntegerField(default=0)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='cards.card')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'tag', 'score'], name='cards_cardt_kind_cb7f05_idx')],
+                'unique_together': {('card', 'kind', 'tag')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_card_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='similar_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='CardSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.SmallIntegerField()),
+                ('reasons', models.PositiveSmallIntegerField(default=0)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_cards', to='cards.card')),
+                ('similar', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cards.card')),
+            ],
+            options={
+                'unique_together': {('card', 'rank')},
+            },
+        ),
+    ]
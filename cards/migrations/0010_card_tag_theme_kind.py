@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0009_card_similarity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cardtag',
+            name='kind',
+            field=models.CharField(choices=[('mechanic', 'Mecanica'), ('keyword', 'Keyword'), ('theme', 'Tema')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0010_card_tag_theme_kind'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cardtag',
+            name='kind',
+            field=models.CharField(choices=[('mechanic', 'Mecanica'), ('keyword', 'Keyword'), ('theme', 'Tema'), ('archetype', 'Arquetipo')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0011_card_tag_archetype_kind'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['name', 'id'], name='cards_card_name_f509d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['cmc', 'id'], name='cards_card_cmc_30808d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['set_code', 'id'], name='cards_card_set_cod_974a89_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['rarity', 'id'], name='cards_card_rarity_9b842d_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:21
+
+from django.db import migrations, models
+
+
+def backfill_type_mask(apps, schema_editor):
+    from cards.facets import type_mask
+    Card = apps.get_model('cards', 'Card')
+    # Um UPDATE por type line distinto (bem menos que o numero de cartas)
+    pairs = Card.objects.values_list('type_line', 'back_face_type_line').distinct()
+    for type_line, back_face_type_line in pairs:
+        Card.objects.filter(type_line=type_line, back_face_type_line=back_face_type_line).update(
+            type_mask=type_mask(type_line, back_face_type_line)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0012_card_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='type_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_type_mask, migrations.RunPython.noop),
+    ]
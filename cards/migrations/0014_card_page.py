@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0013_card_type_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('name_key', models.CharField(db_index=True, max_length=255)),
+                ('printings', models.JSONField(default=list)),
+                ('printing_count', models.PositiveIntegerField(default=0)),
+                ('related', models.JSONField(default=list)),
+                ('cards_version', models.PositiveIntegerField(default=0)),
+                ('deck_count', models.PositiveIntegerField(default=0)),
+                ('copies', models.PositiveIntegerField(default=0)),
+                ('top_decks', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cards.card')),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def recreate_fts(apps, schema_editor):
+    # 0004, 0005, 0006 e 0013 recriaram cards_card no SQLite e os triggers do
+    # indice sumiram junto: recria os triggers e reindexa as cartas
+    from cards import search
+    if search.fts5_supported(schema_editor.connection):
+        search.create_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """Triggers do indice full-text apos as migrations que recriam cards_card"""
+
+    dependencies = [
+        ('cards', '0014_card_page'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0015_card_fts_triggers'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cardsimilarity',
+            name='reasons',
+        ),
+    ]
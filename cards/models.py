@@ -1,6 +1,32 @@
 from django.db import models
 
 
+class CardQuerySet(models.QuerySet):
+    def search(self, text, fields=None, ranked=False):
+        """Busca full-text (FTS5) em nome/tipo/oracle/face traseira; ver cards/search.py"""
+        from .search import search
+        return search(self, text, fields=fields, ranked=ranked)
+
+    def search_any(self, phrases, fields=None):
+        """Cartas que contem qualquer uma das frases"""
+        from .search import search_any
+        return search_any(self, phrases, fields=fields)
+
+    def canonical(self):
+        """Uma impressao por nome de carta (ver cards/canonical.py)"""
+        return self.filter(is_canonical=True)
+
+    def with_tags(self, *tags, kind=None):
+        """Cartas com todas as tags (ex: with_tags('landfall', 'tokens', kind='mechanic'))"""
+        queryset = self
+        for tag in tags:
+            tagged = CardTag.objects.filter(tag=tag)
+            if kind:
+                tagged = tagged.filter(kind=kind)
+            queryset = queryset.filter(id__in=tagged.values('card_id'))
+        return queryset
+
+
 class Card(models.Model):
     RARITY_CHOICES = [
         ('common', 'Common'),
@@ -53,6 +79,20 @@ class Card(models.Model):
     back_face_image_normal = models.URLField(max_length=500, blank=True, null=True)
     back_face_image_large = models.URLField(max_length=500, blank=True, null=True)
 
+    # Campos derivados (populate_derived_fields), para filtros indexados
+    colors_mask = models.PositiveSmallIntegerField(default=0, db_index=True)  # bits WUBRG, ver cards/colors.py
+    color_identity_mask = models.PositiveSmallIntegerField(default=0, db_index=True)
+    type_mask = models.PositiveSmallIntegerField(default=0, db_index=True)  # bits dos tipos principais, ver cards/facets.py
+    power_value = models.SmallIntegerField(blank=True, null=True, db_index=True)  # NULL = variavel (*), ver cards/stats.py
+    toughness_value = models.SmallIntegerField(blank=True, null=True, db_index=True)
+    loyalty_value = models.SmallIntegerField(blank=True, null=True, db_index=True)
+    # Impressao canonica do nome (menor id), recalculada no import
+    is_canonical = models.BooleanField(default=False, db_index=True)
+    # Versao das regras de tagging ja aplicada (ver cards/tagging.py)
+    tagged_version = models.PositiveSmallIntegerField(default=0)
+    # Versao do top-K de similares ja calculado (ver cards/similarity.py)
+    similar_version = models.PositiveSmallIntegerField(default=0)
+
     def is_double_faced(self):
         """Retorna True se a carta tem duas faces"""
         return self.layout in self.DOUBLE_FACED_LAYOUTS
@@ -65,8 +105,52 @@ class Card(models.Model):
         """Retorna True se e MDFC (escolhe qual lado jogar)"""
         return self.layout == 'modal_dfc'
 
+    def populate_derived_fields(self):
+        """Calcula os campos derivados; chamado no save() e no import (bulk_create nao chama save)"""
+        from .colors import to_mask
+        from .facets import type_mask
+        from .stats import parse_stat
+        self.colors_mask = to_mask(self.colors)
+        self.color_identity_mask = to_mask(self.color_identity)
+        self.type_mask = type_mask(self.type_line, self.back_face_type_line)
+        self.power_value = parse_stat(self.power)
+        self.toughness_value = parse_stat(self.toughness)
+        self.loyalty_value = parse_stat(self.loyalty)
+
+    # Campo derivado -> campos de origem
+    DERIVED_FIELDS = {
+        'colors_mask': ('colors',),
+        'color_identity_mask': ('color_identity',),
+        'type_mask': ('type_line', 'back_face_type_line'),
+        'power_value': ('power',),
+        'toughness_value': ('toughness',),
+        'loyalty_value': ('loyalty',),
+    }
+
+    def save(self, *args, **kwargs):
+        self.populate_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for derived, sources in self.DERIVED_FIELDS.items():
+                if update_fields.intersection(sources):
+                    update_fields.add(derived)
+            kwargs['update_fields'] = update_fields
+        # is_canonical e a CardDataVersion ficam com quem grava em lote (import,
+        # update_dfcs) e com o admin (cards/canonical.py)
+        super().save(*args, **kwargs)
+
+    objects = CardQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Ordenacoes do catalogo com cursor (cards/catalog.py, KEYSET_FIELDS)
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['cmc', 'id']),
+            models.Index(fields=['set_code', 'id']),
+            models.Index(fields=['rarity', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.set_code.upper()})"
@@ -76,3 +160,85 @@ class Card(models.Model):
             return 'Colorless'
         color_map = {'W': 'White', 'U': 'Blue', 'B': 'Black', 'R': 'Red', 'G': 'Green'}
         return ', '.join(color_map.get(c, c) for c in self.colors.split(',') if c)
+
+
+class CardTag(models.Model):
+    """Tag precomputada de uma carta canonica (mecanica, keyword...), gerada por cards/tagging.py"""
+    KIND_CHOICES = [
+        ('mechanic', 'Mecanica'),
+        ('keyword', 'Keyword'),
+        ('theme', 'Tema'),  # rules.DECK_THEMES, score = relevancia
+        ('archetype', 'Arquetipo'),  # rules.COMMANDER_ARCHETYPES (so comandantes), score = forca
+    ]
+
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='tags')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    tag = models.CharField(max_length=50)
+    score = models.SmallIntegerField(default=0)  # peso da mecanica, forca do tema...
+
+    class Meta:
+        unique_together = ['card', 'kind', 'tag']
+        indexes = [
+            models.Index(fields=['kind', 'tag', 'score']),
+        ]
+
+    def __str__(self):
+        return f"{self.card_id} {self.kind}:{self.tag} ({self.score})"
+
+
+class CardSimilarity(models.Model):
+    """Top-K cartas similares de uma carta canonica (comando build_similar_cards)"""
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='similar_cards')
+    # SET_NULL: a linha orfa marca a lista para ser recalculada no proximo refresh
+    similar = models.ForeignKey(Card, on_delete=models.SET_NULL, null=True, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.SmallIntegerField()
+
+    class Meta:
+        unique_together = ['card', 'rank']
+
+    def __str__(self):
+        return f"{self.card_id} #{self.rank} -> {self.similar_id} ({self.score})"
+
+
+class CardPage(models.Model):
+    """Dados precomputados da pagina de uma carta (um por nome), mantidos por cards/pages.py"""
+    name = models.CharField(max_length=255, unique=True)
+    name_key = models.CharField(max_length=255, db_index=True)  # nome em minusculas (URL por nome)
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='+')  # impressao canonica
+
+    # Parte das cartas: refeita no import / build_similar_cards
+    printings = models.JSONField(default=list)  # [{id, name, set_code, set_name, image_small}]
+    printing_count = models.PositiveIntegerField(default=0)
+    related = models.JSONField(default=list)  # [{id, name, image_small}]
+    cards_version = models.PositiveIntegerField(default=0)  # CardDataVersion quando foi montada
+
+    # Parte dos decks: refeita quando um deck com a carta e salvo ou apagado
+    deck_count = models.PositiveIntegerField(default=0)
+    copies = models.PositiveIntegerField(default=0)
+    top_decks = models.JSONField(default=list)  # [{id, name, commander, commander_image, owner}]
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.printing_count} impressoes, {self.deck_count} decks)"
+
+
+class CardDataVersion(models.Model):
+    """Versao dos dados de cartas (linha unica); incrementada por import/tagging para invalidar caches"""
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        cls.objects.get_or_create(pk=1)
+        from django.utils import timezone
+        cls.objects.filter(pk=1).update(version=models.F('version') + 1, updated_at=timezone.now())
+        return cls.current()
+
+    def __str__(self):
+        return f"v{self.version}"
@@ -0,0 +1,220 @@
+"""Dados precomputados da pagina de detalhes de uma carta.
+
+Um ``CardPage`` por nome de carta (as impressoes compartilham a pagina) guarda
+o que o ``CardDetailView`` antes consultava a cada request: as impressoes
+(reprints), os cards relacionados (top similares precomputados, ou um sorteio
+do mesmo set/tipo) e o uso em decks (quantos decks, copias e os decks mais
+recentes). A pagina renderiza com a carta (pk) + o ``CardPage`` (nome unico).
+
+Atualizacao incremental:
+- a pagina e montada na primeira visita a carta;
+- salvar/apagar um deck refaz so a parte de decks das cartas dele
+  (``refresh_decks``);
+- o import e o ``build_similar_cards`` refazem a parte das cartas das paginas
+  ja existentes (``refresh_pages``); a ``CardDataVersion`` marca as que estao
+  desatualizadas, e uma pagina desatualizada visitada antes disso e refeita
+  na hora (``page_for``). O import so sobe a versao depois de refazer as
+  paginas, que ja ficam marcadas com a versao nova.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import DenseRank
+
+from .catalog import data_version
+
+PRINTINGS_LIMIT = 11  # 10 outras versoes + a propria impressao
+RELATED_LIMIT = 8
+TOP_DECKS = 10
+BATCH_SIZE = 500
+
+CARD_FIELDS = ('card', 'printings', 'printing_count', 'related', 'cards_version')
+DECK_FIELDS = ('deck_count', 'copies', 'top_decks')
+
+
+def _printings(name):
+    from .models import Card
+    printings = Card.objects.filter(name=name).order_by('-set_code', 'id').values(
+        'id', 'name', 'set_code', 'set_name', 'image_small'
+    )
+    return list(printings[:PRINTINGS_LIMIT]), printings.count()
+
+
+def _related(card):
+    """Top similares precomputados, ou sorteio do mesmo set/tipo se ainda nao calculados"""
+    from . import sampling, similarity
+    stored = similarity.similar_for(card, limit=RELATED_LIMIT)
+    if stored:
+        cards = [row.similar for row in stored]
+    else:
+        cards = sampling.sample(
+            [f'set:{card.set_code}', f'type:{sampling.main_type(card.type_line)}'], RELATED_LIMIT, exclude=[card.id]
+        )
+    return [{'id': c.id, 'name': c.name, 'image_small': c.image_small} for c in cards]
+
+
+def _deck_usage(names):
+    """{nome: (decks, copias, top decks)} das cartas (qualquer impressao), em duas queries"""
+    from decks.models import DeckCard
+    usage = {name: (0, 0, []) for name in names}
+    rows = DeckCard.objects.filter(card__name__in=list(names))
+    totals = rows.values('card__name').annotate(decks=Count('deck', distinct=True), copies=Sum('quantity'))
+
+    # Top decks de todos os nomes numa query: DENSE_RANK por nome (reprints no mesmo deck empatam)
+    ranked = rows.annotate(
+        rank=Window(DenseRank(), partition_by=F('card__name'), order_by=[F('deck__updated_at').desc(), F('deck_id')])
+    ).filter(rank__lte=TOP_DECKS).select_related('card', 'deck__owner', 'deck__commander').only(
+        'card__name', 'deck__name', 'deck__owner__nickname', 'deck__commander__name', 'deck__commander__image_small'
+    ).order_by('card__name', 'rank')
+    top = {}
+    seen = set()
+    for row in ranked:
+        if (row.card.name, row.deck_id) in seen:
+            continue
+        seen.add((row.card.name, row.deck_id))
+        deck = row.deck
+        top.setdefault(row.card.name, []).append({
+            'id': str(deck.id),
+            'name': deck.name,
+            'commander': deck.commander.name,
+            'commander_image': deck.commander.image_small,
+            'owner': deck.owner.nickname,
+        })
+
+    for row in totals:
+        usage[row['card__name']] = (row['decks'], row['copies'], top.get(row['card__name'], []))
+    return usage
+
+
+def _fill_cards(page, card, version):
+    page.card = card
+    page.printings, page.printing_count = _printings(card.name)
+    page.related = _related(card)
+    page.cards_version = version
+
+
+def _canonical(name):
+    from .models import Card
+    cards = Card.objects.filter(name=name)
+    return cards.filter(is_canonical=True).first() or cards.order_by('id').first()
+
+
+def build_page(card):
+    """Monta e grava a pagina do nome da carta"""
+    from .models import CardPage
+    canonical = card if card.is_canonical else (_canonical(card.name) or card)
+    page = CardPage(name=card.name, name_key=card.name.lower())
+    _fill_cards(page, canonical, data_version())
+    page.deck_count, page.copies, page.top_decks = _deck_usage([card.name])[card.name]
+    try:
+        with transaction.atomic():
+            page.save()
+    except IntegrityError:
+        # Outro request montou a mesma pagina ao mesmo tempo
+        return CardPage.objects.get(name=card.name)
+    return page
+
+
+def page_for(card, page=None):
+    """Pagina da carta (ou a ja lida), montada na primeira visita; a parte das cartas e refeita se desatualizada"""
+    from .models import CardPage
+    if page is None:
+        page = CardPage.objects.filter(name=card.name).first()
+    if page is None:
+        return build_page(card)
+    version = data_version()
+    if page.cards_version != version:
+        # Import/build_similar_cards mudou as cartas e a pagina ainda nao foi refeita
+        _fill_cards(page, _canonical(card.name) or card, version)
+        page.save(update_fields=CARD_FIELDS)
+    return page
+
+
+def page_by_name(name):
+    """Pagina (com a carta canonica) pelo nome da URL, sem diferenciar maiusculas; ou None"""
+    from .models import CardPage
+    return CardPage.objects.select_related('card').filter(name_key=name.lower()).first()
+
+
+def other_versions(page, card):
+    """Impressoes da pagina, sem a carta exibida"""
+    return [p for p in page.printings if p['id'] != card.id][:PRINTINGS_LIMIT - 1]
+
+
+def refresh_decks(names):
+    """Refaz o uso em decks das paginas ja montadas dos nomes; retorna quantas mudaram.
+
+    Chamado depois de qualquer mudanca em decks: sobe tambem a ``DeckDataVersion``
+    (popularidade do autocomplete).
+    """
+    from decks.models import DeckDataVersion
+    from .models import CardPage
+    DeckDataVersion.bump()
+    pages = list(CardPage.objects.filter(name__in=set(names)).only('id', 'name'))
+    if not pages:
+        return 0
+    usage = _deck_usage([page.name for page in pages])
+    for page in pages:
+        page.deck_count, page.copies, page.top_decks = usage[page.name]
+    CardPage.objects.bulk_update(pages, DECK_FIELDS, batch_size=BATCH_SIZE)
+    return len(pages)
+
+
+def refresh_pages(rebuild=False, version=None, stdout=None):
+    """Refaz a parte das cartas das paginas desatualizadas (ou de todas, com rebuild).
+
+    ``version`` e a versao dos dados que as paginas passam a ter (default: a
+    atual); o import passa a proxima, ja que so sobe a versao depois de refazer
+    tudo. Paginas de nomes que sumiram do banco sao apagadas. Retorna quantas
+    foram refeitas.
+    """
+    from .models import CardPage
+    version = data_version() if version is None else version
+    pending = CardPage.objects.all()
+    if not rebuild:
+        pending = pending.exclude(cards_version=version)
+    pending = pending.only('id', 'name').order_by('id')
+
+    done = 0
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        updated, gone = [], []
+        for page in batch:
+            card = _canonical(page.name)
+            if card is None:
+                gone.append(page.id)
+                continue
+            _fill_cards(page, card, version)
+            updated.append(page)
+        with transaction.atomic():
+            CardPage.objects.bulk_update(updated, CARD_FIELDS)
+            CardPage.objects.filter(id__in=gone).delete()
+        done += len(updated)
+        if stdout is not None:
+            stdout.write(f'Paginas: {done} cartas...')
+    return done
+
+
+def build_missing(stdout=None):
+    """Monta as paginas das cartas canonicas que ainda nao tem uma; retorna quantas"""
+    from .models import Card, CardPage
+    missing = Card.objects.canonical().exclude(
+        name__in=CardPage.objects.values('name')
+    ).order_by('id')
+
+    done = 0
+    last_id = 0
+    while True:
+        batch = list(missing.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for card in batch:
+            build_page(card)
+        done += len(batch)
+        if stdout is not None:
+            stdout.write(f'Paginas: {done} cartas...')
+    return done
@@ -0,0 +1,408 @@
+"""Linguagem de busca no estilo Scryfall.
+
+``c<=wu t:creature cmc<=3 o:"draw a card" r:mythic`` e convertido num unico
+``Q`` sobre os campos indexados da carta, em vez de varios ``icontains``:
+
+- ``c``/``color`` e ``id``/``identity``: ``colors_mask`` / ``color_identity_mask``
+  (a condicao vira a lista de mascaras que a satisfazem, ver cards/colors.py);
+- ``t``/``type``: bit da ``type_mask`` para tipos principais e ``legendary``,
+  indice full-text para subtipos;
+- ``o``/``oracle``, ``name`` e palavras soltas: indice full-text;
+- ``cmc``/``mv``, ``pow``, ``tou``, ``loy``: colunas numericas;
+- ``r``/``rarity`` e ``s``/``set``: igualdade indexada;
+- ``kw``/``keyword``: tags precomputadas (cards/tagging.py);
+- ``is:commander``, ``is:dfc``, ``is:mdfc``.
+
+Termos sao combinados com AND; ``or``, parenteses e ``-`` (negacao) tambem
+funcionam. Palavras soltas consecutivas formam uma frase e vao para a busca
+full-text da view (que pode ranquear por relevancia), entao uma busca sem
+nenhum operador se comporta como antes.
+
+``parse(texto)`` retorna um ``Query`` (``phrases`` + ``q``) e
+``Query.explain(queryset)`` descreve o plano: predicado de cada termo, SQL e o
+``EXPLAIN QUERY PLAN`` do banco.
+"""
+import re
+
+from django.db.models import Q
+
+from . import facets
+from .colors import ALL_MASKS, COLOR_BITS
+
+TOKEN_RE = re.compile(
+    r'(?P<neg>-)?(?:(?P<key>[a-zA-Z]+)(?P<op>>=|<=|!=|:|=|<|>))?'
+    r'(?P<value>"[^"]*"?|!"[^"]*"?|[^\s()"]+)?'
+)
+
+COLOR_NAMES = {
+    'white': 'w', 'blue': 'u', 'black': 'b', 'red': 'r', 'green': 'g', 'colorless': 'c',
+    'azorius': 'wu', 'dimir': 'ub', 'rakdos': 'br', 'gruul': 'rg', 'selesnya': 'gw',
+    'orzhov': 'wb', 'izzet': 'ur', 'golgari': 'bg', 'boros': 'rw', 'simic': 'gu',
+    'bant': 'gwu', 'esper': 'wub', 'grixis': 'ubr', 'jund': 'brg', 'naya': 'rgw',
+    'abzan': 'wbg', 'jeskai': 'urw', 'sultai': 'bgu', 'mardu': 'rwb', 'temur': 'gur',
+}
+
+RARITY_ORDER = ('common', 'uncommon', 'rare', 'mythic')
+RARITY_ALIASES = {'c': 'common', 'u': 'uncommon', 'r': 'rare', 'm': 'mythic'}
+EXTRA_RARITIES = ('special', 'bonus')
+
+TEXT_FIELDS = {
+    'name': ('name', 'back_face_name'),
+    'oracle': ('oracle_text', 'back_face_oracle_text'),
+    'type': ('type_line', 'back_face_type_line'),
+}
+
+# Aliases -> chave canonica
+KEYS = {
+    'c': 'color', 'color': 'color',
+    'id': 'identity', 'identity': 'identity', 'ci': 'identity',
+    't': 'type', 'type': 'type',
+    'o': 'oracle', 'oracle': 'oracle',
+    'n': 'name', 'name': 'name',
+    'cmc': 'cmc', 'mv': 'cmc', 'manavalue': 'cmc',
+    'pow': 'power', 'power': 'power',
+    'tou': 'toughness', 'toughness': 'toughness',
+    'loy': 'loyalty', 'loyalty': 'loyalty',
+    'r': 'rarity', 'rarity': 'rarity',
+    's': 'set', 'set': 'set', 'e': 'set', 'edition': 'set',
+    'kw': 'keyword', 'keyword': 'keyword',
+    'is': 'is',
+}
+
+NUMERIC_FIELDS = {
+    'cmc': 'cmc',
+    'power': 'power_value',
+    'toughness': 'toughness_value',
+    'loyalty': 'loyalty_value',
+}
+
+LOOKUPS = {':': 'exact', '=': 'exact', '!=': 'exact', '<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte'}
+
+
+class QueryError(ValueError):
+    """Busca com sintaxe invalida (mensagem para o usuario)"""
+
+
+class Term:
+    """Um filtro ``chave op valor`` (chave None = palavra solta)"""
+
+    def __init__(self, key, op, value, quoted=False):
+        self.key = key
+        self.op = op
+        self.value = value
+        self.quoted = quoted
+
+    def __str__(self):
+        value = f'"{self.value}"' if self.quoted else self.value
+        return f'{self.key}{self.op}{value}' if self.key else value
+
+
+def tokenize(text):
+    """Tokens: '(', ')', 'or', ('-', Term) / Term"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        char = text[position]
+        if char.isspace():
+            position += 1
+        elif char in '()':
+            tokens.append(char)
+            position += 1
+        elif char == '-' and text[position + 1:position + 2] == '(':
+            tokens.append('not')
+            position += 1
+        else:
+            match = TOKEN_RE.match(text, position)
+            if not match.group('value'):
+                raise QueryError(f'Valor faltando em "{text[position:match.end() or position + 1]}"')
+            position = match.end()
+            key, op, value = match.group('key'), match.group('op'), match.group('value')
+            quoted = value.startswith('"') or value.startswith('!"')
+            if key is None and not quoted and value.lower() in ('or', 'and') and not match.group('neg'):
+                if value.lower() == 'or':
+                    tokens.append('or')
+                continue
+            exact = value.startswith('!') and key is None
+            value = value.lstrip('!').strip('"') if quoted or exact else value
+            if quoted and not value.strip():
+                raise QueryError(f'Texto vazio entre aspas: {match.group(0)}')
+            if key is not None:
+                canonical = KEYS.get(key.lower())
+                if canonical is None:
+                    raise QueryError(f'Campo desconhecido: "{key}"')
+                key = canonical
+            elif exact:
+                key, op = 'name', '='
+            if match.group('neg'):
+                tokens.append('not')
+            tokens.append(Term(key, op, value, quoted))
+    return tokens
+
+
+class Parser:
+    """Descida recursiva: or_expr := and_expr ('or' and_expr)*"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.or_expr()
+        if self.peek() is not None:
+            raise QueryError('Parentese ")" sem abertura')
+        return node
+
+    def or_expr(self):
+        nodes = [self.and_expr()]
+        while self.peek() == 'or':
+            self.next()
+            nodes.append(self.and_expr())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def and_expr(self):
+        nodes = []
+        while self.peek() not in (None, ')', 'or'):
+            nodes.append(self.unary())
+        if not nodes:
+            raise QueryError('Expressao vazia')
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def unary(self):
+        token = self.next()
+        if token == 'not':
+            return ('not', self.unary())
+        if token == '(':
+            node = self.or_expr()
+            if self.next() != ')':
+                raise QueryError('Parentese "(" sem fechamento')
+            return node
+        return token
+
+
+def _colors(value):
+    """'wu' / 'azorius' -> mascara; None para valores numericos"""
+    value = COLOR_NAMES.get(value.lower(), value.lower())
+    if value.isdigit():
+        return None
+    if value in ('m', 'multicolor'):
+        return 'multicolor'
+    mask = 0
+    for char in value:
+        if char == 'c':
+            continue
+        if char.upper() not in COLOR_BITS:
+            raise QueryError(f'Cor invalida: "{value}"')
+        mask |= COLOR_BITS[char.upper()]
+    return mask
+
+
+def _compare(a, op, b):
+    return {
+        ':': a == b, '=': a == b, '!=': a != b,
+        '<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b,
+    }[op]
+
+
+def color_masks(value, op, default_op):
+    """Mascaras que satisfazem ``op valor`` (':' usa default_op)"""
+    target = _colors(value)
+    if op == ':':
+        # c:c (incolor) e c:2 (numero de cores) sao exatos
+        op = '=' if target in (0, None) else default_op
+    if target is None:
+        # Numero de cores: c=2, id>=3
+        return [m for m in ALL_MASKS if _compare(bin(m).count('1'), op, int(value))]
+    if target == 'multicolor':
+        return [m for m in ALL_MASKS if bin(m).count('1') >= 2]
+    subset = {
+        '=': lambda m: m == target,
+        '!=': lambda m: m != target,
+        '>=': lambda m: m & target == target,
+        '>': lambda m: m & target == target and m != target,
+        '<=': lambda m: m & ~target == 0,
+        '<': lambda m: m & ~target == 0 and m != target,
+    }[op]
+    return [m for m in ALL_MASKS if subset(m)]
+
+
+def _text_q(value, fields, term):
+    from .search import match_q
+    q = match_q(value, fields)
+    if q is None:
+        raise QueryError(f'Texto vazio em "{term}"')
+    return q
+
+
+def compile_term(term):
+    """(Q, descricao do predicado) de um termo"""
+    key, op, value = term.key, term.op, term.value
+
+    if key is None:
+        return _text_q(value, None, term), 'full-text (nome/oracle)'
+
+    if key in ('color', 'identity'):
+        field = 'colors_mask' if key == 'color' else 'color_identity_mask'
+        # c: = pelo menos essas cores; id: = cabe nessa identidade (como no Scryfall)
+        masks = color_masks(value, op, '>=' if key == 'color' else '<=')
+        if len(masks) == len(ALL_MASKS):
+            return Q(), f'{field}: todas as mascaras (sem filtro)'
+        return Q(**{f'{field}__in': masks}), f'{field} IN ({len(masks)} mascaras)'
+
+    if key in NUMERIC_FIELDS:
+        field = NUMERIC_FIELDS[key]
+        try:
+            number = float(value) if key == 'cmc' else int(value)
+        except ValueError:
+            raise QueryError(f'Numero invalido em "{term}"')
+        q = Q(**{f'{field}__{LOOKUPS[op]}': number})
+        return (~q if op == '!=' else q), f'{field} {"=" if op == ":" else op} {number} (indice)'
+
+    if key == 'rarity':
+        rarity = RARITY_ALIASES.get(value.lower(), value.lower())
+        if rarity in EXTRA_RARITIES and op in (':', '=', '!='):
+            rarities = [rarity]
+        elif rarity in RARITY_ORDER:
+            rank = RARITY_ORDER.index(rarity)
+            rarities = [r for i, r in enumerate(RARITY_ORDER) if _compare(i, '=' if op in (':', '!=') else op, rank)]
+        else:
+            raise QueryError(f'Raridade invalida: "{value}"')
+        q = Q(rarity__in=rarities)
+        return (~q if op == '!=' else q), f'rarity IN ({", ".join(rarities)})'
+
+    if op not in (':', '='):
+        raise QueryError(f'Operador "{op}" nao suportado em "{term}"')
+
+    if key == 'set':
+        return Q(set_code=value.lower()), f'set_code = {value.lower()} (indice)'
+
+    if key == 'type':
+        if value.lower() in facets.TYPE_BITS:
+            return facets.type_q(value.lower()), f'type_mask & {facets.TYPE_BITS[value.lower()]}'
+        return _text_q(value, TEXT_FIELDS['type'], term), 'full-text (type line)'
+
+    if key == 'name' and op == '=':
+        return Q(name__iexact=value), 'name = (exato)'
+
+    if key in TEXT_FIELDS:
+        return _text_q(value, TEXT_FIELDS[key], term), f'full-text ({key})'
+
+    if key == 'keyword':
+        from .models import CardTag
+        tagged = CardTag.objects.filter(kind='keyword', tag=value.lower()).values('card_id')
+        return Q(id__in=tagged), f'CardTag keyword = {value.lower()} (indice kind/tag)'
+
+    if key == 'is':
+        flag = value.lower()
+        if flag == 'commander':
+            q = (facets.type_q('legendary') & facets.type_q('creature')) | _text_q(
+                'can be your commander', TEXT_FIELDS['oracle'], term
+            )
+            return q, 'type_mask legendary+creature OU full-text "can be your commander"'
+        if flag == 'dfc':
+            from .models import Card
+            return Q(layout__in=Card.DOUBLE_FACED_LAYOUTS), 'layout IN (dupla face)'
+        if flag == 'mdfc':
+            return Q(layout='modal_dfc'), 'layout = modal_dfc'
+        if flag in facets.TYPE_BITS:
+            return facets.type_q(flag), f'type_mask & {facets.TYPE_BITS[flag]}'
+        raise QueryError(f'Valor desconhecido para is: "{value}"')
+
+    raise QueryError(f'Campo nao suportado: "{key}"')
+
+
+class Query:
+    """Busca compilada: ``phrases`` (busca full-text da view) + ``q`` (demais filtros)"""
+
+    def __init__(self, text, tree):
+        self.text = text
+        self.tree = tree
+        self.phrases = []
+        self.plan = []
+        nodes = tree[1] if isinstance(tree, tuple) and tree[0] == 'and' else [tree]
+        rest = []
+        run = []
+        for node in nodes:
+            # Palavras soltas consecutivas no nivel de cima: uma frase so
+            if isinstance(node, Term) and node.key is None:
+                if node.quoted:
+                    # Frase entre aspas fecha a frase de palavras soltas anterior
+                    if run:
+                        self.phrases.append(' '.join(run))
+                        run = []
+                    self.phrases.append(node.value)
+                else:
+                    run.append(node.value)
+                continue
+            if run:
+                self.phrases.append(' '.join(run))
+                run = []
+            rest.append(node)
+        if run:
+            self.phrases.append(' '.join(run))
+        for phrase in self.phrases:
+            self.plan.append(f'"{phrase}" -> full-text (nome/oracle, ranqueavel)')
+        self.q = Q()
+        for node in rest:
+            self.q &= self._compile(node, 0)
+
+    def _compile(self, node, depth):
+        indent = '  ' * depth
+        if isinstance(node, Term):
+            q, description = compile_term(node)
+            self.plan.append(f'{indent}{node} -> {description}')
+            return q
+        kind, children = node
+        if kind == 'not':
+            self.plan.append(f'{indent}NOT')
+            q = self._compile(children, depth + 1)
+            # NOT de "sem filtro" (todas as cartas) = nenhuma carta
+            return ~q if q else Q(pk__in=[])
+        self.plan.append(f'{indent}{kind.upper()}')
+        compiled_children = [self._compile(child, depth + 1) for child in children]
+        if kind == 'or' and not all(compiled_children):
+            return Q()
+        q = Q()
+        for child in compiled_children:
+            if not q:
+                q = child
+            elif kind == 'or':
+                q |= child
+            else:
+                q &= child
+        return q
+
+    def apply(self, queryset, ranked=False):
+        """Queryset filtrado (ranked: ordena as frases por relevancia)"""
+        if self.phrases:
+            queryset = queryset.search(self.phrases, ranked=ranked)
+        return queryset.filter(self.q) if self.q else queryset
+
+    def explain(self, queryset):
+        """Plano da busca: predicados por termo, SQL e plano do banco"""
+        try:
+            db_plan = queryset.explain()
+        except Exception as e:
+            db_plan = f'indisponivel: {e}'
+        return {
+            'query': self.text,
+            'predicates': self.plan,
+            'sql': str(queryset.query),
+            'db_plan': db_plan,
+        }
+
+
+def parse(text):
+    """Query compilada do texto; QueryError se a sintaxe for invalida"""
+    tokens = tokenize(text or '')
+    if not tokens:
+        return Query(text, ('and', []))
+    return Query(text, Parser(tokens).parse())
@@ -0,0 +1,190 @@
+"""Cache de resultados das paginas de descoberta.
+
+``CommanderIdeasView``, ``ArchetypeFinderView``, ``CardAssistantView`` e as
+sugestoes do ``DeckBuilderView`` dependem so dos parametros GET e das cartas.
+O resultado (dados, nao HTML) fica em cache com chave = nome da pagina +
+parametros da pagina normalizados + ``CardDataVersion``; parametros que a
+pagina nao conhece (aba, utm, ``?x=<aleatorio>``) nao geram chaves novas. O
+contexto do jogador (navbar) e montado a cada request, fora do cache.
+
+Dois niveis:
+- memoria: LRU limitado em bytes (``CARD_RESULT_CACHE_MAX_BYTES``), com os
+  valores serializados (cada hit devolve uma copia);
+- arquivo (opcional, ``CARD_RESULT_CACHE_DIR``): sobrevive a restart e e
+  compartilhado entre processos. Arquivos de versoes antigas sao apagados
+  quando a versao muda, e os mais antigos quando passa de
+  ``CARD_RESULT_CACHE_MAX_FILES``.
+"""
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .catalog import data_version, filter_key
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_FILES = 2000
+
+
+class LRUCache:
+    """Valores serializados, os menos usados saem quando passa de max_bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.version = None  # versao dos dados das entradas
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class FileCache:
+    """Um arquivo por chave: v<versao>-<chave>.pkl, no maximo max_files arquivos"""
+
+    def __init__(self, directory, max_files=DEFAULT_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self.version = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, version):
+        return os.path.join(self.directory, f'v{version}-{key}.pkl')
+
+    def get(self, key, version):
+        try:
+            with open(self.path(key, version), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key, version, data):
+        if version != self.version:
+            self.prune(version)
+        # Escrita atomica: outro processo nunca le um arquivo pela metade
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.path(key, version))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.trim()
+
+    def prune(self, version):
+        """Apaga os arquivos de outras versoes dos dados"""
+        prefix = f'v{version}-'
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl') and not name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        self.version = version
+
+    def trim(self):
+        """Apaga os arquivos mais antigos quando passa de max_files"""
+        names = [name for name in os.listdir(self.directory) if name.endswith('.pkl')]
+        if len(names) <= self.max_files:
+            return
+        paths = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                paths.append((os.path.getmtime(path), path))
+            except OSError:
+                pass  # outro processo ja apagou
+        paths.sort()
+        for _, path in paths[:len(paths) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_lock = threading.Lock()
+_tiers = {}
+stats = {'hits': 0, 'file_hits': 0, 'misses': 0}
+
+
+def memory_tier():
+    with _lock:
+        if 'memory' not in _tiers:
+            _tiers['memory'] = LRUCache(getattr(settings, 'CARD_RESULT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        return _tiers['memory']
+
+
+def file_tier():
+    """FileCache do diretorio configurado, ou None"""
+    directory = getattr(settings, 'CARD_RESULT_CACHE_DIR', None)
+    if not directory:
+        return None
+    with _lock:
+        if _tiers.get('file') is None or _tiers['file'].directory != str(directory):
+            _tiers['file'] = FileCache(str(directory), getattr(settings, 'CARD_RESULT_CACHE_MAX_FILES', DEFAULT_MAX_FILES))
+        return _tiers['file']
+
+
+def clear():
+    memory_tier().clear()
+
+
+def cached_result(name, params, fields, build, version=None):
+    """Resultado de ``build()`` para os parametros, reaproveitado ate a versao dos dados mudar.
+
+    fields: parametros GET que mudam o resultado da pagina; so eles entram na chave.
+    """
+    version = data_version() if version is None else version
+    key = f'{name}-{filter_key(params, ignore=(), only=fields)}'
+    memory = memory_tier()
+    files = file_tier()
+    if memory.version != version:
+        # Import/retag mudou as cartas: nada do cache antigo serve mais
+        memory.clear()
+        memory.version = version
+
+    data = memory.get(key)
+    if data is not None:
+        stats['hits'] += 1
+        return pickle.loads(data)
+    if files is not None:
+        data = files.get(key, version)
+        if data is not None:
+            stats['file_hits'] += 1
+            memory.set(key, data)
+            return pickle.loads(data)
+
+    stats['misses'] += 1
+    value = build()
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    memory.set(key, data)
+    if files is not None:
+        files.set(key, version, data)
+    return value
@@ -0,0 +1,1089 @@
+"""Regras de classificacao de cartas por texto (tabelas de patterns).
+
+Compartilhadas entre as telas (``cards/views.py``, ``decks/views.py``) e o
+tagging do import (``cards/tagging.py``, ``cards/similarity.py``); cada
+catalogo vira um ``Matcher`` compilado uma vez (``cards/matcher.py``). Mudar
+as regras de mecanicas, keywords, arquetipos ou temas pede incrementar
+``tagging.TAGS_VERSION`` para as cartas serem retagueadas.
+"""
+
+# ===== Assistente de cartas (CardAssistantView) =====
+
+# Keywords mecanicos para matching (nome, patterns, peso)
+# Peso maior = mecanica mais especifica/importante
+MECHANIC_KEYWORDS = [
+    # ===== CRIATURAS MODIFICADAS (tema especifico) =====
+    ('modified_creatures', ['modified creature', 'modified permanent', 'each modified', 'modified you control'], 15),
+    ('equipment_synergy', ['equipped creature', 'equip cost', 'whenever .* becomes equipped', 'equipment you control', 'equip \\{', 'attach', 'equipped with'], 12),
+    ('aura_synergy', ['enchanted creature', 'enchant creature', 'whenever .* becomes enchanted', 'auras you control', 'aura spell', 'enchanted permanent'], 12),
+    ('counter_plus', ['\\+1/\\+1 counter', 'put .* counter', 'with .* counter', 'enters .* counter', 'additional .* counter'], 10),
+    ('counter_minus', ['-1/-1 counter', 'remove .* counter'], 8),
+    ('counter_other', ['loyalty counter', 'charge counter', 'time counter', 'verse counter', 'lore counter'], 7),
+
+    # ===== TRIGGERS DE ZONA =====
+    ('etb', ['enters the battlefield', 'enters play', 'when .* enters', 'whenever .* enters'], 8),
+    ('etb_tapped', ['enters .* tapped'], 5),
+    ('ltb', ['leaves the battlefield', 'whenever .* leaves'], 7),
+    ('death_trigger', ['when .* dies', 'whenever .* dies', 'whenever another .* dies', 'if .* would die'], 9),
+    ('graveyard_trigger', ['whenever .* put into .* graveyard', 'card is put into your graveyard'], 8),
+    ('cast_trigger', ['whenever you cast', 'when you cast', 'whenever .* casts'], 7),
+    ('spell_trigger', ['whenever .* spell', 'instant or sorcery'], 6),
+
+    # ===== RECURSAO/GRAVEYARD =====
+    ('self_recursion', ['return .* from your graveyard to the battlefield', 'return this card from your graveyard', 'return .* from your graveyard to your hand'], 12),
+    ('creature_recursion', ['return .* creature .* from .* graveyard', 'creature card from your graveyard', 'return target creature card'], 10),
+    ('reanimator', ['put .* from .* graveyard .* onto the battlefield', 'reanimate'], 11),
+    ('graveyard_matters', ['cards in your graveyard', 'for each card in your graveyard', 'graveyard have', 'exile .* from .* graveyard'], 8),
+    ('escape_recursion', ['escape', 'from your graveyard'], 7),
+    ('flashback', ['flashback', 'cast .* from your graveyard'], 8),
+    ('unearth', ['unearth'], 7),
+
+    # ===== COMBATE =====
+    ('attack_trigger', ['whenever .* attacks', 'when .* attacks', 'attacking creature', 'attacks alone', 'attack each', 'must attack'], 8),
+    ('combat_damage', ['deals combat damage', 'combat damage to a player', 'combat damage to an opponent'], 9),
+    ('block_trigger', ['whenever .* blocks', 'when .* blocks', 'blocking creature', 'can block', "can't block"], 7),
+    ('combat_phase', ['beginning of combat', 'end of combat', 'declare attackers', 'declare blockers'], 6),
+    ('extra_combat', ['additional combat', 'extra combat phase'], 10),
+    ('goad', ['goad', 'goaded'], 8),
+    ('battalion', ['battalion', 'attacks with .* other'], 7),
+    ('exalted', ['exalted', 'attacks alone'], 7),
+    ('double_strike', ['double strike'], 8),
+    ('first_strike', ['first strike'], 5),
+    ('vigilance', ['vigilance'], 4),
+    ('haste', ['haste'], 5),
+
+    # ===== EVASAO =====
+    ('flying', ['flying', 'has flying'], 5),
+    ('trample', ['trample'], 5),
+    ('menace', ['menace'], 5),
+    ('unblockable', ["can't be blocked", 'unblockable', 'is unblockable'], 7),
+    ('skulk', ['skulk'], 5),
+    ('shadow', ['shadow'], 6),
+    ('fear_intimidate', ['fear', 'intimidate', "can't be blocked except"], 6),
+    ('reach', ['reach'], 4),
+
+    # ===== DRAW/CARD ADVANTAGE =====
+    ('draw', ['draw a card', 'draw cards', 'draws a card', 'draw two', 'draw three'], 7),
+    ('draw_trigger', ['whenever you draw', 'when you draw', 'draw .* additional'], 9),
+    ('looting', ['draw .* then discard', 'discard .* then draw'], 8),
+    ('rummaging', ['discard .* draw'], 7),
+    ('impulse_draw', ['exile .* top .* you may play', 'exile .* top .* you may cast', 'play .* from exile'], 9),
+    ('card_selection', ['scry', 'look at the top', 'surveil', 'explore'], 6),
+    ('tutor', ['search your library for', 'search your library .* put .* hand'], 9),
+    ('tutor_top', ['search .* library .* put .* top'], 8),
+    ('wheel', ['each player .* draws', 'each player discards .* hand', 'wheel'], 10),
+
+    # ===== RAMP/MANA =====
+    ('land_ramp', ['search .* library .* land', 'land .* onto the battlefield', 'put .* land .* onto'], 8),
+    ('mana_dork', ['add .* mana', 'tap: add', '{t}: add'], 6),
+    ('mana_rock', ['mana of any', 'any color', 'add one mana'], 5),
+    ('treasure', ['treasure token', 'create .* treasure', 'treasures you control'], 7),
+    ('cost_reduction', ['cost .* less', 'costs .* less', 'reduce .* cost', 'without paying'], 8),
+    ('extra_land', ['play .* additional land', 'put .* land .* from your hand'], 8),
+    ('landfall', ['landfall', 'whenever a land enters', 'land enters the battlefield'], 9),
+
+    # ===== REMOVAL =====
+    ('destroy', ['destroy target', 'destroy all', 'destroys'], 6),
+    ('exile_removal', ['exile target', 'exile all', 'exiles'], 7),
+    ('damage_removal', ['deals .* damage to', 'deal .* damage', 'damage to each'], 6),
+    ('bounce', ['return .* to .* owner', "return .* to .* hand", 'bounce'], 6),
+    ('tuck', ['put .* on the bottom', 'shuffle .* into'], 7),
+    ('board_wipe', ['destroy all creature', 'exile all creature', 'all creatures get -', '-X/-X until'], 10),
+    ('spot_removal', ['destroy target creature', 'exile target creature', 'target creature gets -'], 7),
+    ('artifact_removal', ['destroy .* artifact', 'exile .* artifact'], 6),
+    ('enchantment_removal', ['destroy .* enchantment', 'exile .* enchantment'], 6),
+    ('planeswalker_removal', ['destroy .* planeswalker', 'damage to .* planeswalker'], 6),
+    ('fight', ['fight', 'fights'], 6),
+    ('deathtouch', ['deathtouch'], 6),
+
+    # ===== COUNTERSPELLS/CONTROL =====
+    ('counterspell', ['counter target spell', 'counter that spell', 'counter target .* spell'], 9),
+    ('counter_creature', ['counter target creature'], 8),
+    ('counter_noncreature', ['counter target noncreature'], 8),
+    ('tax', ['pay .* more', 'costs .* more', 'unless .* pays'], 7),
+    ('stax', ["can't .* more than", "opponents can't", "each player can't", 'players can.t'], 9),
+    ('control_steal', ['gain control', 'exchange control', 'gains control', 'take control'], 9),
+    ('copy', ['copy', 'copies', 'create a copy', 'becomes a copy', 'clone'], 8),
+    ('redirect', ['change .* target', 'new target'], 6),
+
+    # ===== PROTECTION =====
+    ('hexproof', ['hexproof'], 7),
+    ('shroud', ['shroud'], 6),
+    ('indestructible', ['indestructible', 'gains indestructible'], 8),
+    ('protection', ['protection from', 'has protection'], 7),
+    ('ward', ['ward'], 6),
+    ('regenerate', ['regenerate'], 5),
+    ('totem_armor', ['totem armor'], 7),
+    ('phase_out', ['phase out', 'phases out'], 6),
+
+    # ===== TOKENS =====
+    ('token_creation', ['create .* token', 'creates .* token', 'put .* token', 'tokens onto'], 8),
+    ('token_copy', ['copy of .* creature', 'token .* copy'], 9),
+    ('token_anthem', ['tokens you control', 'each token'], 7),
+    ('populate', ['populate'], 8),
+    ('treasure_tokens', ['treasure', 'create .* treasure'], 7),
+    ('food_tokens', ['food', 'create .* food'], 6),
+    ('clue_tokens', ['clue', 'investigate', 'create .* clue'], 6),
+
+    # ===== LIFE/LIFEGAIN =====
+    ('lifegain', ['gain .* life', 'gains .* life', 'you gain life'], 6),
+    ('lifegain_trigger', ['whenever you gain life', 'when you gain life'], 9),
+    ('lifelink', ['lifelink'], 6),
+    ('life_payment', ['pay .* life', 'lose .* life'], 6),
+    ('drain', ['lose .* life and you gain', 'loses .* life .* you gain', 'each opponent loses'], 8),
+    ('extort', ['extort'], 7),
+
+    # ===== SACRIFICE =====
+    ('sacrifice_cost', ['sacrifice a', 'sacrifices a', 'as an additional cost.*sacrifice', ', sacrifice'], 8),
+    ('sacrifice_trigger', ['whenever you sacrifice', 'whenever .* is sacrificed', 'whenever .* sacrifices'], 10),
+    ('sacrifice_outlet', ['sacrifice another', 'you may sacrifice'], 8),
+    ('aristocrats', ['whenever .* creature .* dies', 'whenever another creature', 'blood artist', 'drain'], 9),
+    ('treasure_sac', ['sacrifice .* treasure', 'sacrifice a treasure'], 6),
+
+    # ===== DISCARD =====
+    ('discard', ['discard a card', 'discards a card', 'discard .* hand', 'discard .* cards'], 6),
+    ('discard_trigger', ['whenever you discard', 'when you discard', 'whenever .* discards'], 8),
+    ('madness', ['madness'], 9),
+    ('opponent_discard', ['target player discards', 'opponent discards', 'each opponent discards'], 8),
+    ('hand_attack', ['discard .* at random', "target opponent's hand", 'look at .* hand'], 7),
+
+    # ===== MILL =====
+    ('mill', ['mill', 'put .* cards .* into .* graveyard', 'cards from the top .* into'], 8),
+    ('self_mill', ['mill yourself', 'your own .* graveyard'], 7),
+    ('opponent_mill', ['target player mills', 'opponent mills', 'each opponent mills'], 7),
+
+    # ===== PUMP/STATS =====
+    ('power_boost', ['gets \\+', 'get \\+', '\\+1/\\+1', '\\+X/\\+X', '\\+2/\\+2'], 5),
+    ('anthem', ['creatures you control get', 'other creatures you control', 'creatures you control have'], 9),
+    ('lord', ['other .* get', 'other .* you control get'], 9),
+    ('power_matters', ['power .* or greater', 'power .* or more', 'with power', 'total power'], 7),
+    ('toughness_matters', ['toughness .* or greater', 'with toughness', 'total toughness'], 6),
+    ('base_stats', ['base power and toughness'], 6),
+
+    # ===== FLICKER/BLINK =====
+    ('flicker', ['exile .* return .* to the battlefield', 'exile .* then return', 'flicker'], 9),
+    ('blink', ['blink', 'exile .* return .* at', 'exile .* return .* next'], 9),
+    ('etb_abuse', ['enters the battlefield .* again', 'reenter'], 8),
+
+    # ===== SPELLSLINGER =====
+    ('spellslinger', ['instant or sorcery', 'noncreature spell', 'whenever you cast .* instant', 'whenever you cast .* sorcery'], 9),
+    ('prowess', ['prowess', 'whenever you cast a noncreature'], 8),
+    ('magecraft', ['magecraft', 'whenever you cast or copy'], 9),
+    ('storm', ['storm'], 10),
+    ('spell_copy', ['copy .* instant', 'copy .* sorcery', 'copy that spell'], 9),
+
+    # ===== TRIBAL =====
+    ('tribal_lord', ['other .* you control', 'each .* you control'], 8),
+    ('tribal_cost', ['.* spells .* cost .* less', '.* you cast cost'], 7),
+    ('changeling', ['changeling', 'is every creature type'], 8),
+    ('party', ['party', 'cleric.*rogue.*warrior.*wizard'], 8),
+
+    # ===== COMMANDER SPECIFIC =====
+    ('commander_matters', ['commander', 'command zone', 'commander tax', 'from the command zone'], 10),
+    ('partner', ['partner'], 8),
+    ('experience', ['experience counter'], 9),
+    ('background', ['background'], 7),
+
+    # ===== MISC THEMES =====
+    ('proliferate', ['proliferate'], 10),
+    ('untap', ['untap', 'untaps', 'doesn\'t untap'], 6),
+    ('tap_ability', ['\\{t\\}:', 'tap .* creature', 'tap target'], 5),
+    ('convoke', ['convoke'], 7),
+    ('affinity', ['affinity'], 8),
+    ('improvise', ['improvise'], 7),
+    ('cascade', ['cascade'], 10),
+    ('suspend', ['suspend'], 8),
+    ('morph', ['morph', 'face down', 'face up', 'megamorph', 'manifest'], 8),
+    ('mutate', ['mutate'], 9),
+    ('transform', ['transform', 'transformed'], 7),
+    ('meld', ['meld'], 8),
+    ('energy', ['energy', '{e}'], 9),
+    ('historic', ['historic', 'legendary .* artifact .* saga'], 7),
+    ('saga', ['saga', 'lore counter'], 7),
+    ('vehicles', ['vehicle', 'crew'], 8),
+    ('planeswalker_synergy', ['planeswalker', 'loyalty', 'activate .* loyalty'], 7),
+    ('ninjutsu', ['ninjutsu'], 9),
+    ('cipher', ['cipher'], 7),
+    ('overload', ['overload'], 7),
+    ('kicker', ['kicker', 'kicked'], 6),
+    ('flashback', ['flashback'], 8),
+    ('buyback', ['buyback'], 7),
+    ('retrace', ['retrace'], 7),
+    ('jump_start', ['jump-start'], 7),
+    ('foretell', ['foretell'], 7),
+    ('adventure', ['adventure'], 8),
+    ('companion', ['companion'], 8),
+]
+
+# Keywords que indicam estrategias/archetypes especificos (fora das mecanicas principais)
+KEYWORDS = [
+    # Habilidades de evasao/combate secundarias
+    'haste', 'vigilance', 'reach', 'deathtouch', 'first strike', 'double strike',
+    'flash', 'defender', 'prowess', 'skulk',
+    # Mechanics de set especificas que indicam sinergias
+    'landfall', 'cascade', 'storm', 'modular', 'persist', 'undying',
+    'evolve', 'exploit', 'fabricate', 'convoke', 'annihilator', 'infect',
+    'extort', 'heroic', 'constellation', 'ferocious', 'raid', 'enrage',
+    'explore', 'ascend', 'surveil', 'afterlife', 'adapt', 'mutate',
+    'escape', 'foretell', 'ward', 'training', 'connive', 'alliance',
+    'toxic', 'incubate', 'backup', 'bargain', 'offspring',
+]
+
+
+# ===== Ideias de comandante (CommanderIdeasView) =====
+
+# Arquetipos de comandantes com patterns de deteccao
+COMMANDER_ARCHETYPES = [
+    # (nome_exibicao, id, patterns, descricao)
+    ('Voltron', 'voltron', [
+        'equipped creature', 'equip', 'aura', 'enchanted creature',
+        'gets \\+', 'double strike', 'commander deals combat damage',
+        'hexproof', 'indestructible', 'protection from'
+    ], 'Foca em equipar/encantar o comandante para vencer com dano de comandante'),
+
+    ('Aristocrats', 'aristocrats', [
+        'whenever .* dies', 'sacrifice', 'when .* creature .* dies',
+        'blood artist', 'drain', 'lose .* life .* you gain',
+        'death trigger', 'whenever you sacrifice'
+    ], 'Sacrifica criaturas para gerar valor e drenar oponentes'),
+
+    ('Tokens', 'tokens', [
+        'create .* creature token', 'token creatures you control', 'populate',
+        'tokens you control get', 'for each token', 'for each creature token',
+        'creature tokens you control', 'number of creatures you control',
+        'create .* 1/1', 'create .* 2/2', 'army', 'convoke'
+    ], 'Gera muitos tokens para dominar o campo de batalha'),
+
+    ('Spellslinger', 'spellslinger', [
+        'instant or sorcery', 'whenever you cast .* instant', 'whenever you cast .* sorcery',
+        'magecraft', 'prowess', 'copy .* spell', 'storm', 'noncreature spell'
+    ], 'Foca em lancar muitas magicas instantaneas e feiticos'),
+
+    ('Tribal', 'tribal', [
+        'other .* you control get \\+', 'creature of the chosen type',
+        'creatures you control of the chosen type', 'share a creature type',
+        'changeling', 'each creature you control that shares a creature type',
+        'whenever another .* enters', 'creature type of your choice'
+    ], 'Sinergias com um tipo de criatura especifico'),
+
+    ('Control', 'control', [
+        'counter target spell', 'destroy target creature', 'exile target creature',
+        'return target .* to its owner', 'tap target .* doesn\'t untap',
+        "can't attack you", "can't cast .* spells", 'opponents can\'t',
+        'destroy all creatures', 'exile all'
+    ], 'Controla o jogo removendo ameacas e negando acoes'),
+
+    ('Combo', 'combo', [
+        'search your library', 'tutor', 'infinite', 'untap',
+        'whenever .* untaps', 'add .* mana', 'copy', 'extra turn'
+    ], 'Busca pecas de combo para vencer de forma explosiva'),
+
+    ('Reanimator', 'reanimator', [
+        'return .* from .* graveyard', 'reanimate', 'graveyard .* battlefield',
+        'mill', 'cards in your graveyard', 'flashback', 'unearth', 'escape'
+    ], 'Usa o cemiterio como recurso, reanimando criaturas'),
+
+    ('Aggro', 'aggro', [
+        'haste', 'whenever .* attacks', 'attack each combat', 'first strike',
+        'double strike', 'combat damage', 'additional combat', 'can\'t block'
+    ], 'Ataque rapido e agressivo para pressionar oponentes'),
+
+    ('Ramp/Big Mana', 'ramp', [
+        'search your library for .* land', 'put .* land .* onto the battlefield',
+        'add .* for each', 'double .* mana', 'mana of any color',
+        'costs .* less to cast', 'additional land', 'landfall',
+        'whenever a land enters .* add', 'for each land you control'
+    ], 'Acelera mana para jogar ameacas grandes rapidamente'),
+
+    ('Stax', 'stax', [
+        "can't .* more than", "opponents can't", "each player can't",
+        'costs .* more', 'tax', 'sacrifice .* permanent', "don't untap"
+    ], 'Restringe recursos e acoes dos oponentes'),
+
+    ('Group Hug', 'grouphug', [
+        'each player draws', 'each player may draw', 'each opponent draws',
+        'each other player draws', 'players each draw', 'all players draw',
+        'each player puts a land', 'each player gains .* life', 'each player may put',
+        'each player searches', 'opponents draw', 'each player untaps',
+        'whenever an opponent draws .* you', 'gift', 'tempting offer'
+    ], 'Distribui recursos entre todos, ganhando aliados'),
+
+    ('Mill', 'mill', [
+        'mill', 'cards .* into .* graveyard', 'library .* graveyard',
+        'exile .* library', 'cards in .* graveyard'
+    ], 'Vence fazendo oponentes comprarem de biblioteca vazia'),
+
+    ('Lifegain', 'lifegain', [
+        'gain .* life', 'whenever you gain life', 'lifelink',
+        'life .* or more', 'pay .* life', 'life total'
+    ], 'Ganha vida para ativar sinergias e sobreviver'),
+
+    ('+1/+1 Counters', 'counters', [
+        '\\+1/\\+1 counter', 'put .* counter', 'proliferate',
+        'counter on', 'with .* counters', 'modify', 'evolve', 'adapt'
+    ], 'Acumula marcadores +1/+1 para criaturas gigantes'),
+
+    ('Equipment', 'equipment', [
+        'equip', 'equipment', 'equipped creature', 'attach',
+        'for mirrodin', 'living weapon', 'reconfigure'
+    ], 'Sinergias com equipamentos e criaturas equipadas'),
+
+    ('Enchantress', 'enchantress', [
+        'enchantment', 'aura', 'enchanted', 'constellation',
+        'whenever .* enchantment', 'enchant'
+    ], 'Sinergias com encantamentos para gerar valor'),
+
+    ('Lands Matter', 'lands', [
+        'landfall', 'land enters', 'lands you control', 'sacrifice .* land',
+        'land .* graveyard', 'play .* additional land', 'land creature'
+    ], 'Usa terrenos como recurso principal de sinergia'),
+
+    ('Artifacts Matter', 'artifacts', [
+        'artifact', 'artifacts you control', 'metalcraft', 'affinity',
+        'improvise', 'treasure', 'clue', 'food', 'vehicle', 'crew'
+    ], 'Sinergias com artefatos e tokens de artefato'),
+
+    ('Draw/Card Advantage', 'draw', [
+        'whenever you draw', 'whenever .* draws a card', 'draw .* cards',
+        'cards in .* hand', 'no maximum hand size', 'draw two cards',
+        'draw three cards', 'draw cards equal', 'draw that many',
+        'for each card you\'ve drawn', 'second card you draw', 'draw .* then discard'
+    ], 'Foca em comprar muitas cartas para ter opcoes'),
+
+    ('Blink/Flicker', 'blink', [
+        'exile .* return', 'flicker', 'blink', 'enters the battlefield',
+        'etb', 'leave .* battlefield'
+    ], 'Pisca criaturas para reusar triggers de entrada'),
+
+    ('Graveyard', 'graveyard', [
+        'graveyard', 'from .* graveyard', 'mill', 'dredge', 'delve',
+        'escape', 'flashback', 'unearth', 'embalm', 'eternalize'
+    ], 'Usa o cemiterio como extensao da mao'),
+
+    ('Politics', 'politics', [
+        'vote', 'council', 'goad', 'monarch', 'choose .* opponent',
+        'an opponent of your choice', 'target opponent .* target opponent',
+        'deals combat damage to an opponent', 'for each opponent'
+    ], 'Manipula politica de mesa para ganhar vantagem'),
+
+    ('Theft', 'theft', [
+        'gain control', 'control of target', 'steal', 'exchange control',
+        'opponent controls .* you control', 'act of treason'
+    ], 'Rouba permanentes dos oponentes'),
+
+    ('Superfriends', 'superfriends', [
+        'planeswalker', 'loyalty', 'proliferate', 'each planeswalker',
+        'planeswalkers you control'
+    ], 'Foca em planeswalkers como principal estrategia'),
+
+    ('Chaos', 'chaos', [
+        'random', 'coin flip', 'chaos', 'each player .* random',
+        'at random', 'wheel of fortune'
+    ], 'Cria caos no jogo com efeitos aleatorios'),
+
+    ('Infect/Poison', 'infect', [
+        'infect', 'poison counter', 'toxic', 'proliferate',
+        'poisoned', 'corrupted'
+    ], 'Vence com 10 marcadores de veneno'),
+
+    ('Voltron Auras', 'auras', [
+        'enchanted creature', 'aura', 'enchant creature', 'bestow',
+        'totem armor', 'umbra'
+    ], 'Usa auras para tornar o comandante imbativel'),
+]
+
+
+# ===== Arquetipos de deck (ArchetypeFinderView) =====
+
+# Temas/Arquetipos com patterns de busca
+# (nome_exibicao, id, patterns[], descricao, categoria)
+# IMPORTANTE: patterns devem ter pelo menos 4 caracteres para evitar falsos positivos
+DECK_THEMES = [
+    # === Contadores ===
+    ('Energy', 'energy', [
+        'energy counter', 'energy counters', 'energy you have', 'spend energy',
+        'you get {e}', 'pay {e}{e}', 'an energy counter'
+    ], 'Marcadores de energia', 'Contadores'),
+
+    ('+1/+1 Counters', 'plus_counters', [
+        '+1/+1 counter', 'put a +1/+1', 'with +1/+1 counters', 'modify',
+        'evolve', 'adapt', 'proliferate', 'bolster', 'support', 'reinforce',
+        'outlast', 'mentor', 'counters on it', 'counter on each'
+    ], 'Marcadores +1/+1', 'Contadores'),
+
+    ('-1/-1 Counters', 'minus_counters', [
+        '-1/-1 counter', 'put a -1/-1', 'wither', 'persist', 'undying'
+    ], 'Marcadores -1/-1', 'Contadores'),
+
+    ('Poison/Toxic', 'poison', [
+        'poison counter', 'toxic', 'infect', 'corrupted', 'proliferate'
+    ], 'Veneno e toxico', 'Contadores'),
+
+    ('Charge Counters', 'charge', [
+        'charge counter', 'storage counter', 'verse counter'
+    ], 'Marcadores de carga', 'Contadores'),
+
+    ('Oil Counters', 'oil', [
+        'oil counter', 'compleated'
+    ], 'Marcadores de oleo (Phyrexia)', 'Contadores'),
+
+    ('Experience', 'experience', [
+        'experience counter', 'experience counters you have'
+    ], 'Marcadores de experiencia', 'Contadores'),
+
+    # === Tribais - Humanoides ===
+    ('Humans', 'humans', [
+        'human', 'humans you control', 'each human', 'nonhuman'
+    ], 'Humanos', 'Tribal'),
+
+    ('Soldiers', 'soldiers', [
+        'soldier', 'soldiers you control', 'soldier token'
+    ], 'Soldados', 'Tribal'),
+
+    ('Warriors', 'warriors', [
+        'warrior', 'warriors you control', 'warrior token'
+    ], 'Guerreiros', 'Tribal'),
+
+    ('Knights', 'knights', [
+        'knight', 'knights you control', 'knight token'
+    ], 'Cavaleiros', 'Tribal'),
+
+    ('Clerics', 'clerics', [
+        'cleric', 'clerics you control'
+    ], 'Clerigos', 'Tribal'),
+
+    ('Rogues', 'rogues', [
+        'rogue', 'rogues you control'
+    ], 'Ladinos', 'Tribal'),
+
+    ('Wizards', 'wizards', [
+        'wizard', 'wizards you control'
+    ], 'Magos', 'Tribal'),
+
+    ('Shamans', 'shamans', [
+        'shaman', 'shamans you control'
+    ], 'Xamas', 'Tribal'),
+
+    ('Pirates', 'pirates', [
+        'pirate', 'pirates you control', 'pirate token'
+    ], 'Piratas', 'Tribal'),
+
+    ('Ninjas', 'ninjas', [
+        'ninja', 'ninjas you control', 'ninjutsu'
+    ], 'Ninjas', 'Tribal'),
+
+    ('Samurai', 'samurai', [
+        'samurai', 'samurai you control'
+    ], 'Samurais', 'Tribal'),
+
+    ('Assassins', 'assassins', [
+        'assassin', 'assassins you control'
+    ], 'Assassinos', 'Tribal'),
+
+    ('Monks', 'monks', [
+        'monk', 'monks you control'
+    ], 'Monges', 'Tribal'),
+
+    ('Druids', 'druids', [
+        'druid', 'druids you control'
+    ], 'Druidas', 'Tribal'),
+
+    ('Artificers', 'artificers', [
+        'artificer', 'artificers you control'
+    ], 'Artificers', 'Tribal'),
+
+    # === Tribais - Elfos/Fadas ===
+    ('Elves', 'elves', [
+        'elf', 'elves you control', 'elf token', 'elf creature'
+    ], 'Elfos', 'Tribal'),
+
+    ('Faeries', 'faeries', [
+        'faerie', 'faeries you control', 'faerie token'
+    ], 'Fadas', 'Tribal'),
+
+    # === Tribais - Monstros Pequenos ===
+    ('Goblins', 'goblins', [
+        'goblin', 'goblins you control', 'goblin token'
+    ], 'Goblins', 'Tribal'),
+
+    ('Kobolds', 'kobolds', [
+        'kobold', 'kobolds you control'
+    ], 'Kobolds', 'Tribal'),
+
+    ('Rats', 'rats', [
+        'rat', 'rats you control', 'rat token'
+    ], 'Ratos', 'Tribal'),
+
+    ('Squirrels', 'squirrels', [
+        'squirrel', 'squirrels you control', 'squirrel token'
+    ], 'Esquilos', 'Tribal'),
+
+    # === Tribais - Mortos-Vivos ===
+    ('Zombies', 'zombies', [
+        'zombie', 'zombies you control', 'zombie token', 'decayed'
+    ], 'Zumbis', 'Tribal'),
+
+    ('Vampires', 'vampires', [
+        'vampire', 'vampires you control', 'blood token'
+    ], 'Vampiros', 'Tribal'),
+
+    ('Skeletons', 'skeletons', [
+        'skeleton', 'skeletons you control'
+    ], 'Esqueletos', 'Tribal'),
+
+    ('Spirits', 'spirits', [
+        'spirit', 'spirits you control', 'spirit token', 'soulshift'
+    ], 'Espiritos', 'Tribal'),
+
+    ('Horrors', 'horrors', [
+        'horror', 'horrors you control'
+    ], 'Horrores', 'Tribal'),
+
+    # === Tribais - Bestas/Criaturas ===
+    ('Beasts', 'beasts', [
+        'beast', 'beasts you control', 'beast token'
+    ], 'Bestas', 'Tribal'),
+
+    ('Cats', 'cats', [
+        'cat', 'cats you control', 'cat token'
+    ], 'Gatos', 'Tribal'),
+
+    ('Dogs', 'dogs', [
+        'dog', 'dogs you control', 'dog token', 'hound'
+    ], 'Cachorros', 'Tribal'),
+
+    ('Wolves', 'wolves', [
+        'wolf', 'wolves you control', 'wolf token', 'werewolf'
+    ], 'Lobos', 'Tribal'),
+
+    ('Bears', 'bears', [
+        'bear', 'bears you control', 'bear token'
+    ], 'Ursos', 'Tribal'),
+
+    ('Birds', 'birds', [
+        'bird', 'birds you control', 'bird token', 'flying creature'
+    ], 'Passaros', 'Tribal'),
+
+    ('Snakes', 'snakes', [
+        'snake', 'snakes you control', 'snake token'
+    ], 'Serpentes', 'Tribal'),
+
+    ('Spiders', 'spiders', [
+        'spider', 'spiders you control', 'reach'
+    ], 'Aranhas', 'Tribal'),
+
+    ('Insects', 'insects', [
+        'insect', 'insects you control', 'insect token'
+    ], 'Insetos', 'Tribal'),
+
+    # === Tribais - Aquaticos ===
+    ('Merfolk', 'merfolk', [
+        'merfolk', 'merfolk you control', 'islandwalk'
+    ], 'Tritoes', 'Tribal'),
+
+    ('Fish', 'fish', [
+        'fish', 'fishes you control', 'kraken', 'leviathan', 'octopus', 'serpent'
+    ], 'Peixes e criaturas marinhas', 'Tribal'),
+
+    ('Crabs', 'crabs', [
+        'crab', 'crabs you control'
+    ], 'Caranguejos', 'Tribal'),
+
+    # === Tribais - Grandes Criaturas ===
+    ('Dragons', 'dragons', [
+        'dragon', 'dragons you control', 'dragon token'
+    ], 'Dragoes', 'Tribal'),
+
+    ('Angels', 'angels', [
+        'angel', 'angels you control', 'angel token'
+    ], 'Anjos', 'Tribal'),
+
+    ('Demons', 'demons', [
+        'demon', 'demons you control', 'demon token'
+    ], 'Demonios', 'Tribal'),
+
+    ('Giants', 'giants', [
+        'giant', 'giants you control'
+    ], 'Gigantes', 'Tribal'),
+
+    ('Hydras', 'hydras', [
+        'hydra', 'hydras you control', 'x +1/+1 counters'
+    ], 'Hidras', 'Tribal'),
+
+    ('Wurms', 'wurms', [
+        'wurm', 'wurms you control', 'wurm token'
+    ], 'Vermes gigantes', 'Tribal'),
+
+    # === Tribais - Dinossauros/Prehistoricos ===
+    ('Dinosaurs', 'dinosaurs', [
+        'dinosaur', 'dinosaurs you control', 'enrage'
+    ], 'Dinossauros', 'Tribal'),
+
+    # === Tribais - Elementais ===
+    ('Elementals', 'elementals', [
+        'elemental', 'elementals you control', 'elemental token', 'evoke'
+    ], 'Elementais', 'Tribal'),
+
+    ('Phoenixes', 'phoenixes', [
+        'phoenix', 'phoenixes you control', 'return .* from .* graveyard'
+    ], 'Fenix', 'Tribal'),
+
+    # === Tribais - Arvores/Plantas ===
+    ('Treefolk', 'treefolk', [
+        'treefolk', 'treefolk you control'
+    ], 'Homens-arvore', 'Tribal'),
+
+    ('Plants', 'plants', [
+        'plant', 'plants you control', 'saproling'
+    ], 'Plantas e Saprolings', 'Tribal'),
+
+    ('Fungus', 'fungus', [
+        'fungus', 'fungi you control', 'saproling', 'spore counter'
+    ], 'Fungos', 'Tribal'),
+
+    # === Tribais - Construtos ===
+    ('Golems', 'golems', [
+        'golem', 'golems you control'
+    ], 'Golems', 'Tribal'),
+
+    ('Constructs', 'constructs', [
+        'construct', 'constructs you control', 'artifact creature'
+    ], 'Construtos', 'Tribal'),
+
+    ('Thopters', 'thopters', [
+        'thopter', 'thopters you control', 'thopter token'
+    ], 'Thopters', 'Tribal'),
+
+    ('Myrs', 'myrs', [
+        'myr', 'myrs you control', 'myr token'
+    ], 'Myrs', 'Tribal'),
+
+    # === Tribais - Especiais ===
+    ('Slivers', 'slivers', [
+        'sliver', 'slivers you control', 'all slivers'
+    ], 'Fractius', 'Tribal'),
+
+    ('Eldrazi', 'eldrazi', [
+        'eldrazi', 'colorless creature', 'annihilator', 'spawn', 'scion'
+    ], 'Eldrazi', 'Tribal'),
+
+    ('Phyrexians', 'phyrexians', [
+        'phyrexian', 'compleated', 'toxic', 'corrupted', 'oil counter'
+    ], 'Phyrexianos', 'Tribal'),
+
+    ('Changelings', 'changelings', [
+        'changeling', 'all creature types', 'is every creature type'
+    ], 'Metamorfos (todas tribos)', 'Tribal'),
+
+    ('Allies', 'allies', [
+        'ally', 'allies you control', 'rally'
+    ], 'Aliados', 'Tribal'),
+
+    ('Party', 'party', [
+        'full party', 'cleric, rogue, warrior, and wizard', 'party has'
+    ], 'Party (Clerico, Ladino, Guerreiro, Mago)', 'Tribal'),
+
+    # === Artefatos ===
+    ('Equipment', 'equipment', [
+        'equipment', 'equip', 'equipped creature', 'attach', 'living weapon',
+        'reconfigure', 'for mirrodin'
+    ], 'Equipamentos', 'Artefatos'),
+
+    ('Artifact Creatures', 'artifact_creatures', [
+        'artifact creature', 'artifacts you control', 'metalcraft', 'affinity',
+        'improvise', 'modular', 'fabricate'
+    ], 'Criaturas artefato', 'Artefatos'),
+
+    ('Vehicles', 'vehicles', [
+        'vehicle', 'crew', 'vehicles you control'
+    ], 'Veiculos', 'Artefatos'),
+
+    ('Treasures', 'treasures', [
+        'treasure', 'treasure token', 'create a treasure'
+    ], 'Tesouros', 'Artefatos'),
+
+    ('Clues', 'clues', [
+        'clue', 'clue token', 'investigate'
+    ], 'Pistas', 'Artefatos'),
+
+    ('Food', 'food', [
+        'food', 'food token', 'create a food'
+    ], 'Comida', 'Artefatos'),
+
+    ('Blood Tokens', 'blood_tokens', [
+        'blood token', 'create a blood'
+    ], 'Tokens de sangue', 'Artefatos'),
+
+    ('Powerstones', 'powerstones', [
+        'powerstone', 'powerstone token'
+    ], 'Pedras de poder', 'Artefatos'),
+
+    ('Maps', 'maps', [
+        'map token', 'create a map'
+    ], 'Mapas', 'Artefatos'),
+
+    # === Encantamentos ===
+    ('Enchantress', 'enchantress', [
+        'enchantment', 'constellation', 'whenever an enchantment',
+        'enchantments you control'
+    ], 'Sinergias com encantamentos', 'Encantamentos'),
+
+    ('Auras', 'auras', [
+        'aura', 'enchant creature', 'enchanted creature', 'bestow', 'totem armor'
+    ], 'Auras', 'Encantamentos'),
+
+    ('Sagas', 'sagas', [
+        'saga', 'lore counter', 'chapter'
+    ], 'Sagas', 'Encantamentos'),
+
+    ('Curses', 'curses', [
+        'curse', 'enchant player', 'cursed player'
+    ], 'Maldicoes', 'Encantamentos'),
+
+    ('Shrines', 'shrines', [
+        'shrine', 'shrines you control'
+    ], 'Santuarios', 'Encantamentos'),
+
+    ('Rooms', 'rooms', [
+        'room', 'unlock', 'door'
+    ], 'Salas (Duskmourn)', 'Encantamentos'),
+
+    # === Tokens/Aggro ===
+    ('Token Generation', 'tokens', [
+        'create a', 'creature token', 'populate', 'tokens you control'
+    ], 'Geracao de tokens', 'Tokens'),
+
+    ('Going Wide', 'go_wide', [
+        'creatures you control get', 'for each creature you control',
+        'creatures you control have', 'anthem'
+    ], 'Muitas criaturas (Go Wide)', 'Tokens'),
+
+    ('Convoke', 'convoke', [
+        'convoke', 'tap an untapped creature'
+    ], 'Convoke', 'Tokens'),
+
+    # === Cemiterio ===
+    ('Reanimator', 'reanimator', [
+        'return .* from .* graveyard', 'graveyard to the battlefield',
+        'reanimate', 'unearth', 'embalm', 'eternalize'
+    ], 'Reanimar criaturas', 'Cemiterio'),
+
+    ('Self-Mill', 'selfmill', [
+        'mill', 'cards into your graveyard', 'dredge', 'surveil'
+    ], 'Encher o cemiterio', 'Cemiterio'),
+
+    ('Flashback', 'flashback', [
+        'flashback', 'escape', 'retrace', 'aftermath', 'jumpstart',
+        'cast .* from .* graveyard'
+    ], 'Lancar do cemiterio', 'Cemiterio'),
+
+    ('Delve', 'delve', [
+        'delve', 'exile .* from your graveyard'
+    ], 'Delve', 'Cemiterio'),
+
+    # === Combate ===
+    ('Extra Combat', 'extra_combat', [
+        'additional combat', 'extra combat phase', 'untap all creatures'
+    ], 'Fases de combate extras', 'Combate'),
+
+    ('Double Strike', 'double_strike', [
+        'double strike', 'first strike'
+    ], 'Golpe duplo/primeiro', 'Combate'),
+
+    ('Evasion', 'evasion', [
+        'flying', 'trample', 'menace', 'fear', 'intimidate', 'shadow',
+        "can't be blocked", 'unblockable'
+    ], 'Evasao', 'Combate'),
+
+    ('Voltron', 'voltron', [
+        'equipped creature', 'enchanted creature gets', 'commander damage',
+        'hexproof', 'indestructible', 'protection from'
+    ], 'Voltron (1 criatura grande)', 'Combate'),
+
+    ('Attack Triggers', 'attack_triggers', [
+        'whenever .* attacks', 'attacking creature', 'attack each combat',
+        'attack with', 'myriad', 'battle cry'
+    ], 'Triggers de ataque', 'Combate'),
+
+    # === Mana/Ramp ===
+    ('Mana Ramp', 'ramp', [
+        'search your library for .* land', 'put .* land .* onto the battlefield',
+        'add one mana of any', 'land onto the battlefield'
+    ], 'Acelerar mana', 'Mana'),
+
+    ('Mana Dorks', 'mana_dorks', [
+        '{t}: add', 'add one mana', 'tap .* add'
+    ], 'Criaturas que dao mana', 'Mana'),
+
+    ('Lands Matter', 'lands_matter', [
+        'landfall', 'whenever a land enters', 'lands you control',
+        'play an additional land', 'land creature'
+    ], 'Sinergias com terrenos', 'Mana'),
+
+    ('Land Destruction', 'land_destruction', [
+        'destroy target land', 'sacrifice a land', 'land an opponent controls'
+    ], 'Destruir terrenos', 'Mana'),
+
+    # === Magicas ===
+    ('Spellslinger', 'spellslinger', [
+        'instant or sorcery', 'whenever you cast .* instant', 'magecraft',
+        'prowess', 'storm'
+    ], 'Magicas (Spellslinger)', 'Magicas'),
+
+    ('Cantrips', 'cantrips', [
+        'draw a card', 'scry', 'look at the top'
+    ], 'Cantrips', 'Magicas'),
+
+    ('Counterspells', 'counterspells', [
+        'counter target spell', 'counter target'
+    ], 'Anular magicas', 'Magicas'),
+
+    ('Burn', 'burn', [
+        'deals .* damage to any target', 'deals .* damage to each',
+        'damage to target creature or player'
+    ], 'Burn (dano direto)', 'Magicas'),
+
+    ('Copy Spells', 'copy_spells', [
+        'copy target', 'copy that spell', 'cast a copy'
+    ], 'Copiar magicas', 'Magicas'),
+
+    # === Vida ===
+    ('Lifegain', 'lifegain', [
+        'gain .* life', 'whenever you gain life', 'lifelink'
+    ], 'Ganho de vida', 'Vida'),
+
+    ('Life Drain', 'drain', [
+        'each opponent loses', 'lose life and you gain', 'extort'
+    ], 'Drenar vida', 'Vida'),
+
+    ('Life Matters', 'life_matters', [
+        'life total', 'pay .* life', 'your life total is'
+    ], 'Usar vida como recurso', 'Vida'),
+
+    # === Sacrificio ===
+    ('Sacrifice', 'sacrifice', [
+        'sacrifice a creature', 'whenever .* dies', 'when .* dies'
+    ], 'Sacrificar criaturas', 'Sacrificio'),
+
+    ('Aristocrats', 'aristocrats', [
+        'whenever a creature you control dies', 'each opponent loses 1 life',
+        'blood artist'
+    ], 'Aristocrats', 'Sacrificio'),
+
+    ('Treasure Sac', 'treasure_sac', [
+        'sacrifice a treasure', 'sacrifice an artifact'
+    ], 'Sacrificar artefatos', 'Sacrificio'),
+
+    # === Compra/Descarte ===
+    ('Draw Matters', 'draw_matters', [
+        'whenever you draw', 'draw a card', 'no maximum hand size',
+        'for each card you\'ve drawn'
+    ], 'Sinergias de compra', 'Compra'),
+
+    ('Discard Matters', 'discard_matters', [
+        'discard', 'madness', 'whenever you discard', 'hellbent'
+    ], 'Sinergias de descarte', 'Compra'),
+
+    ('Wheels', 'wheels', [
+        'each player discards', 'draw seven', 'wheel'
+    ], 'Rodas (Wheel)', 'Compra'),
+
+    ('Looting', 'looting', [
+        'draw .* then discard', 'discard .* then draw', 'cycling', 'rummage'
+    ], 'Looting/Rummaging', 'Compra'),
+
+    # === Controle ===
+    ('Removal', 'removal', [
+        'destroy target', 'exile target', 'destroy all creatures'
+    ], 'Remocao', 'Controle'),
+
+    ('Theft', 'theft', [
+        'gain control of target', 'control of target', 'exchange control'
+    ], 'Roubar permanentes', 'Controle'),
+
+    ('Blink', 'blink', [
+        'exile .* return .* to the battlefield', 'flicker',
+        'enters the battlefield'
+    ], 'Piscar criaturas', 'Controle'),
+
+    ('Stax', 'stax', [
+        "can't .* more than", "opponents can't", 'costs .* more',
+        'each player can only'
+    ], 'Stax (restringir oponentes)', 'Controle'),
+
+    ('Pillowfort', 'pillowfort', [
+        "can't attack you", "can't be attacked", 'propaganda',
+        'ghostly prison'
+    ], 'Pillowfort (protecao)', 'Controle'),
+
+    # === Especiais ===
+    ('Planeswalkers', 'planeswalkers', [
+        'planeswalker', 'loyalty', 'planeswalkers you control'
+    ], 'Planeswalkers', 'Especiais'),
+
+    ('Copy/Clone', 'copy', [
+        'copy of', 'clone', 'becomes a copy', "that's a copy"
+    ], 'Copiar criaturas', 'Especiais'),
+
+    ('Transform', 'transform', [
+        'transform', 'daybound', 'nightbound', 'disturb'
+    ], 'Transformar', 'Especiais'),
+
+    ('Cascade', 'cascade', [
+        'cascade', 'discover', 'cast .* without paying'
+    ], 'Cascade/Discover', 'Especiais'),
+
+    ('Extra Turns', 'extra_turns', [
+        'extra turn', 'additional turn', 'take an extra turn'
+    ], 'Turnos extras', 'Especiais'),
+
+    ('Topdeck Matters', 'topdeck', [
+        'top of your library', 'look at the top', 'miracle', 'hideaway'
+    ], 'Topo do deck', 'Especiais'),
+
+    ('X Spells', 'x_spells', [
+        'where x is', 'pay x', 'x damage', 'x +1/+1 counters'
+    ], 'Magicas com X', 'Especiais'),
+
+    ('Modal', 'modal', [
+        'choose one', 'choose two', 'choose any number', 'entwine'
+    ], 'Magicas modais', 'Especiais'),
+
+    ('Monarch', 'monarch', [
+        'monarch', 'become the monarch', 'you are the monarch'
+    ], 'Monarca', 'Especiais'),
+
+    ('Initiative', 'initiative', [
+        'initiative', 'take the initiative', 'undercity'
+    ], 'Iniciativa/Undercity', 'Especiais'),
+
+    ('Dungeons', 'dungeons', [
+        'venture into', 'dungeon', 'completed a dungeon'
+    ], 'Dungeons', 'Especiais'),
+]
+
+# Padroes de alta prioridade que indicam forte relevancia para o tema
+HIGH_PRIORITY_PATTERNS = {
+    # Contadores
+    'energy': ['energy counter', '{e}', 'energy you have', 'pay {e}'],
+    'plus_counters': ['+1/+1 counter', 'proliferate', 'modular', 'evolve', 'adapt'],
+    'minus_counters': ['-1/-1 counter', 'wither', 'persist'],
+    'poison': ['poison counter', 'toxic', 'infect', 'corrupted'],
+    'charge': ['charge counter', 'storage counter'],
+    'oil': ['oil counter', 'compleated'],
+    'experience': ['experience counter'],
+
+    # Tipos de carta
+    'artifacts': ['artifact creature', 'artifacts you control', 'artifact enters', 'noncreature artifact'],
+    'equipment': ['equipped creature', 'equip {', 'attach', 'equipment you control'],
+    'enchantments': ['enchantments you control', 'enchantment creature', 'constellation', 'aura'],
+    'vehicles': ['vehicle', 'crew', 'crewed'],
+    'planeswalkers': ['planeswalker', 'loyalty counter', 'loyalty ability'],
+
+    # Zones e recursos
+    'tokens': ['create a token', 'token creature', 'populate', 'tokens you control'],
+    'graveyard': ['from your graveyard', 'graveyard to the battlefield', 'mill', 'flashback', 'unearth'],
+    'sacrifice': ['sacrifice a creature', 'whenever you sacrifice', 'when this creature dies', 'death trigger'],
+    'lifegain': ['whenever you gain life', 'lifelink', 'you gain life equal', 'pay life'],
+    'discard': ['discard a card', 'whenever you discard', 'madness', 'hellbent'],
+    'draw': ['draw a card', 'whenever you draw', 'draw two', 'cards in hand'],
+    'landfall': ['landfall', 'land enters', 'whenever a land'],
+    'ramp': ['search your library for a land', 'add {', 'mana of any color'],
+
+    # Estrategias
+    'spellslinger': ['instant or sorcery', 'magecraft', 'storm', 'prowess', 'cast from exile'],
+    'blink': ['exile, then return', 'flicker', 'enters the battlefield', 'etb'],
+    'reanimator': ['return target creature', 'graveyard to the battlefield', 'reanimate'],
+    'voltron': ['equipped creature', 'enchanted creature', 'aura', 'commander damage'],
+    'aristocrats': ['whenever a creature dies', 'sacrifice a creature', 'blood artist'],
+    'control': ['counter target', 'destroy target', 'exile target'],
+    'aggro': ['haste', 'first strike', 'double strike', 'trample'],
+
+    # Tribais populares (alta prioridade para nomes no type_line)
+    'elves': ['elf', 'elves you control', 'elf creature'],
+    'goblins': ['goblin', 'goblins you control', 'goblin creature'],
+    'zombies': ['zombie', 'zombies you control', 'zombie creature'],
+    'vampires': ['vampire', 'vampires you control', 'blood token'],
+    'dragons': ['dragon', 'dragons you control', 'dragon creature'],
+    'angels': ['angel', 'angels you control', 'angel creature'],
+    'demons': ['demon', 'demons you control', 'demon creature'],
+    'merfolk': ['merfolk', 'merfolk you control', 'islandwalk'],
+    'pirates': ['pirate', 'pirates you control', 'treasure token'],
+    'dinosaurs': ['dinosaur', 'dinosaurs you control', 'enrage'],
+    'slivers': ['sliver', 'slivers you control', 'all slivers'],
+    'humans': ['human', 'humans you control', 'human creature'],
+    'wizards': ['wizard', 'wizards you control', 'wizard creature'],
+    'soldiers': ['soldier', 'soldiers you control', 'soldier token'],
+    'spirits': ['spirit', 'spirits you control', 'soulshift'],
+}
+
+# Palavras que indicam que NAO e relevante (falsos positivos)
+NEGATIVE_PATTERNS = {
+    'energy': ['synergy', 'synergies'],  # "synergy" contem "nergy"
+    'counter': ['counterattack', 'counterspell', 'counter target spell'],  # para themes de +1/+1
+    'elf': ['shelf', 'self', 'itself', 'yourself', 'himself', 'herself'],  # evitar matches falsos
+    'rat': ['rate', 'rated', 'rating', 'pirate'],  # pirate contem "rat"
+    'cat': ['locate', 'dedicated', 'replicate', 'syndicate'],  # evitar matches falsos
+    'ant': ['giant', 'instant', 'enchant', 'want', 'plant'],  # para insect tribal
+}
+
+
+# ===== Categorias de deck (DeckBuilderView, DeckAnalyzerView) =====
+
+# Categorias do deck builder: {id: {name, target, patterns, description}}
+DECK_BUILDER_CATEGORIES = {
+    'ramp': {
+        'name': 'Ramp',
+        'target': 10,
+        'patterns': [
+            'add .* mana', 'search your library for .* land',
+            'put .* land .* onto the battlefield', 'mana of any',
+            'treasure token', 'sol ring'
+        ],
+        'description': 'Aceleracao de mana'
+    },
+    'removal': {
+        'name': 'Removal',
+        'target': 8,
+        'patterns': [
+            'destroy target', 'exile target', 'destroy all',
+            'deals .* damage to', 'return .* to .* hand'
+        ],
+        'description': 'Remocao de ameacas'
+    },
+    'draw': {
+        'name': 'Card Draw',
+        'target': 10,
+        'patterns': [
+            'draw .* card', 'draws .* card', 'look at the top',
+            'reveal .* draw', 'scry'
+        ],
+        'description': 'Compra de cartas'
+    },
+    'board_wipe': {
+        'name': 'Board Wipes',
+        'target': 3,
+        'patterns': [
+            'destroy all creature', 'exile all creature',
+            'all creatures get -', 'deals .* damage to each creature'
+        ],
+        'description': 'Limpeza de campo'
+    },
+    'protection': {
+        'name': 'Protection',
+        'target': 5,
+        'patterns': [
+            'hexproof', 'indestructible', 'protection from',
+            'counter target spell'
+        ],
+        'description': 'Protecao de permanentes'
+    },
+}
+
+# Categorias do analisador: patterns por categoria (qualquer um casando no oracle text)
+DECK_ANALYZER_CATEGORIES = {
+    'ramp': ['add .* mana', 'search .* land', 'treasure'],
+    'removal': ['destroy target', 'exile target', 'deals .* damage to'],
+    'draw': ['draw .* card', 'draws .* card', 'scry'],
+    'board_wipe': ['destroy all', 'exile all'],
+}
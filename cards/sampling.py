@@ -0,0 +1,130 @@
+"""Amostragem aleatoria de cartas sem ``ORDER BY RANDOM()``.
+
+``order_by('?')`` ordena a tabela inteira a cada request. Aqui cada filtro
+usado pelos widgets aleatorios vira um array denso de ids (bucket), montado
+numa passada pelo catalogo; sortear k cartas e escolher k posicoes no array e
+buscar as cartas por id (``in_bulk``).
+
+Buckets:
+- ``all``: cartas canonicas;
+- ``set:<codigo>``: todas as impressoes do set;
+- ``type:<tipo>``: canonicas com o tipo principal (creature, land...);
+- ``legendary_creature`` e ``mythic``: canonicas com imagem (home).
+
+Reconstruido quando a ``CardDataVersion`` muda, como o indice de autocomplete.
+"""
+import random
+import threading
+import time
+from array import array
+
+from .similarity import MAIN_TYPES
+
+VERSION_CHECK_SECONDS = 5
+
+_lock = threading.Lock()
+_cache = {'version': None, 'index': None, 'checked_at': 0.0}
+
+
+def main_type(type_line):
+    """Primeiro tipo principal do type line ('Legendary Creature — Elf' -> 'creature')"""
+    words = (type_line or '').lower().split()
+    for word in words:
+        if word in MAIN_TYPES:
+            return word
+    return None
+
+
+class SamplingIndex:
+    """Arrays de ids por bucket"""
+
+    def __init__(self, rows):
+        buckets = {}
+
+        def add(name, card_id):
+            bucket = buckets.get(name)
+            if bucket is None:
+                bucket = buckets[name] = array('i')
+            bucket.append(card_id)
+
+        for card_id, set_code, type_line, rarity, image, canonical in rows:
+            add(f'set:{set_code}', card_id)
+            if not canonical:
+                continue
+            add('all', card_id)
+            lower = (type_line or '').lower()
+            for word in set(lower.split()) & set(MAIN_TYPES):
+                add(f'type:{word}', card_id)
+            if image:
+                if 'legendary creature' in lower:
+                    add('legendary_creature', card_id)
+                if rarity == 'mythic':
+                    add('mythic', card_id)
+        self.buckets = buckets
+
+    @classmethod
+    def build(cls):
+        from .models import Card
+        rows = Card.objects.order_by().values_list(
+            'id', 'set_code', 'type_line', 'rarity', 'image_normal', 'is_canonical'
+        )
+        return cls(rows.iterator(chunk_size=5000))
+
+    def size(self, bucket):
+        return len(self.buckets.get(bucket, ()))
+
+    def sample_ids(self, buckets, k, exclude=()):
+        """Ate k ids distintos dos buckets (uniao), fora de exclude; O(k)"""
+        arrays = [self.buckets[b] for b in buckets if self.buckets.get(b)]
+        total = sum(len(a) for a in arrays)
+        if not total:
+            return []
+        exclude = set(exclude)
+        picked = []
+        seen = set(exclude)
+        # Buckets podem se sobrepor: repete ate achar k distintos (com limite de tentativas)
+        for _ in range(k * 10 + 20):
+            if len(picked) >= k:
+                break
+            position = random.randrange(total)
+            for ids in arrays:
+                if position < len(ids):
+                    card_id = ids[position]
+                    break
+                position -= len(ids)
+            if card_id not in seen:
+                seen.add(card_id)
+                picked.append(card_id)
+        return picked
+
+
+def get_index():
+    """Indice do processo, reconstruido quando a versao dos dados muda"""
+    from .models import CardDataVersion
+    now = time.monotonic()
+    if _cache['index'] is not None and now - _cache['checked_at'] < VERSION_CHECK_SECONDS:
+        return _cache['index']
+    version = CardDataVersion.current()
+    with _lock:
+        if _cache['index'] is None or _cache['version'] != version:
+            print(f"[Sampling] Montando buckets (versao {version})...")
+            _cache['index'] = SamplingIndex.build()
+            _cache['version'] = version
+        _cache['checked_at'] = now
+        return _cache['index']
+
+
+def sample(buckets, k, exclude=()):
+    """k cartas aleatorias dos buckets (nome ou lista de nomes), na ordem sorteada"""
+    from .models import Card
+    if isinstance(buckets, str):
+        buckets = [buckets]
+    ids = get_index().sample_ids(buckets, k, exclude)
+    cards = Card.objects.in_bulk(ids)
+    # Ids removidos depois da montagem do indice simplesmente ficam de fora
+    return [cards[card_id] for card_id in ids if card_id in cards]
+
+
+def random_card(bucket='all'):
+    cards = sample(bucket, 1)
+    return cards[0] if cards else None
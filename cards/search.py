@@ -0,0 +1,260 @@
+"""Busca full-text de cartas (SQLite FTS5).
+
+O indice ``cards_card_fts`` e uma tabela FTS5 de conteudo externo sobre
+``cards_card`` (nome, tipo, oracle e os campos da face traseira), mantida por
+triggers: ``import_cards`` (bulk_create) e ``update_dfcs`` (save) atualizam o
+indice sem codigo extra. Em bancos sem FTS5 a busca cai para ``icontains``.
+
+No SQLite um ``AddField``/``AlterField`` em ``cards_card`` recria a tabela e
+apaga os triggers. Ao fim de todo ``migrate`` (``post_migrate``, ver
+``CardsConfig.ready``) ``ensure_index`` confere os triggers e, se algum sumiu,
+recria e reindexa; migrations novas nao precisam cuidar disso.
+
+Os termos sao tokenizados e buscados como frase com prefixo no ultimo termo,
+entao "lightning bo" encontra "Lightning Bolt" e "draw a card" continua sendo
+uma frase (como no icontains), mas via indice.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'cards_card_fts'
+
+# Colunas indexadas, na ordem da tabela virtual
+FTS_COLUMNS = (
+    'name', 'type_line', 'oracle_text',
+    'back_face_name', 'back_face_type_line', 'back_face_oracle_text',
+)
+
+# Pesos do bm25 por coluna (nome pesa mais que texto)
+FTS_WEIGHTS = (10.0, 3.0, 1.0, 8.0, 2.0, 1.0)
+
+# Campos usados quando a busca nao especifica colunas
+DEFAULT_FIELDS = ('name', 'oracle_text', 'back_face_name', 'back_face_oracle_text')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {', '.join(FTS_COLUMNS)},
+        content='cards_card', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS cards_card_fts_ai AFTER INSERT ON cards_card BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cards_card_fts_ad AFTER DELETE ON cards_card BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cards_card_fts_au AFTER UPDATE OF {', '.join(FTS_COLUMNS)} ON cards_card BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)});
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)});
+    END""",
+]
+
+TRIGGERS = ('cards_card_fts_ai', 'cards_card_fts_ad', 'cards_card_fts_au')
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS cards_card_fts_ai',
+    'DROP TRIGGER IF EXISTS cards_card_fts_ad',
+    'DROP TRIGGER IF EXISTS cards_card_fts_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+# Cache por alias de banco: o indice existe nesse banco?
+_available = {}
+
+
+def fts5_supported(connection):
+    """SQLite compilado com FTS5?"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Algumas builds trazem FTS5 sem registrar a opcao
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp._fts5_probe')
+            return True
+        except Exception:
+            return False
+
+
+def fts_available(using='default'):
+    if using not in _available:
+        connection = connections[using]
+        ready = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [FTS_TABLE])
+                ready = cursor.fetchone() is not None
+        _available[using] = ready
+    return _available[using]
+
+
+def create_index(connection):
+    """Cria tabela FTS + triggers e indexa as cartas existentes"""
+    with connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _available.pop(connection.alias, None)
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+    _available.pop(connection.alias, None)
+
+
+def rebuild_index(using='default'):
+    """Recria os triggers que faltarem e reconstroi o indice inteiro a partir de cards_card"""
+    if not fts_available(using):
+        return False
+    with connections[using].cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def missing_triggers(using='default'):
+    """Triggers do indice que nao existem no banco"""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND tbl_name='cards_card'")
+        found = {row[0] for row in cursor.fetchall()}
+    return [name for name in TRIGGERS if name not in found]
+
+
+def ensure_index(using='default'):
+    """Recria os triggers que sumiram e reindexa (cartas salvas sem eles nao estao no indice).
+
+    Retorna True se precisou reparar.
+    """
+    if not fts_available(using):
+        return False
+    missing = missing_triggers(using)
+    if not missing:
+        return False
+    print(f"[Search] Triggers ausentes ({', '.join(missing)}), recriando e reindexando")
+    return rebuild_index(using)
+
+
+def repair_after_migrate(sender, using='default', **kwargs):
+    """post_migrate: uma migration pode ter recriado cards_card sem os triggers"""
+    _available.pop(using, None)
+    ensure_index(using)
+
+
+def optimize_index(using='default'):
+    """Compacta os segmentos do indice (apos imports grandes)"""
+    if not fts_available(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return True
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def build_match(text, fields=None, prefix=True):
+    """Monta a expressao MATCH (frase, com prefixo no ultimo token) ou None"""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    phrase = '"' + ' '.join(tokens) + '"' + ('*' if prefix else '')
+    columns = [f for f in (fields or DEFAULT_FIELDS) if f in FTS_COLUMNS]
+    return '{' + ' '.join(columns) + '} : ' + phrase
+
+
+def build_match_any(phrases, fields=None):
+    """OR de varias frases (sem prefixo), para listas de padroes"""
+    parts = [build_match(p, fields, prefix=False) for p in phrases]
+    parts = [f'({p})' for p in parts if p]
+    return ' OR '.join(parts) or None
+
+
+def _icontains_q(text, fields):
+    q = Q()
+    for field in fields:
+        q |= Q(**{f'{field}__icontains': text})
+    return q
+
+
+def build_match_all(phrases, fields=None):
+    """AND de varias frases (cada uma com prefixo no ultimo token)"""
+    parts = [build_match(p, fields) for p in phrases]
+    parts = [f'({p})' for p in parts if p]
+    return ' AND '.join(parts) or None
+
+
+def match_q(text, fields=None, using='default'):
+    """Q de cartas que contem a frase (indice FTS ou icontains); None se a frase for vazia"""
+    fields = tuple(fields or DEFAULT_FIELDS)
+    match = build_match(text, fields)
+    if match is None:
+        return None
+    if not fts_available(using):
+        return _icontains_q(text.strip(), fields)
+    return Q(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+
+
+def search(queryset, text, fields=None, ranked=False):
+    """Filtra o queryset pela busca full-text (ou icontains sem FTS).
+
+    text: frase, ou lista de frases que devem aparecer todas.
+    """
+    fields = tuple(fields or DEFAULT_FIELDS)
+    phrases = [text] if isinstance(text, str) else [p for p in text if tokenize(p)]
+    match = build_match(phrases[0], fields) if len(phrases) == 1 else build_match_all(phrases, fields)
+    if match is None:
+        return queryset
+
+    if not fts_available(queryset.db):
+        for phrase in phrases:
+            queryset = queryset.filter(_icontains_q(phrase.strip(), fields))
+        return queryset
+
+    if ranked:
+        # Join com a tabela FTS: o MATCH roda uma vez e o bm25 sai da mesma varredura
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        return queryset.extra(
+            select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = cards_card.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        ).order_by('search_rank', 'name')
+
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+    ))
+
+
+def search_any(queryset, phrases, fields=None):
+    """Filtra cartas que contem qualquer uma das frases"""
+    fields = tuple(fields or DEFAULT_FIELDS)
+    phrases = [p for p in phrases if p and p.strip()]
+    if not phrases:
+        return queryset
+
+    match = build_match_any(phrases, fields)
+    if match is None or not fts_available(queryset.db):
+        q = Q()
+        for phrase in phrases:
+            q |= _icontains_q(phrase.strip(), fields)
+        return queryset.filter(q)
+
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+    ))
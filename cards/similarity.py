@@ -0,0 +1,375 @@
+"""Similaridade vetorizada (NumPy) para o CardAssistantView.
+
+Replica os criterios de ``CardAssistantView.calculate_similarity`` sobre
+arrays com as features de todas as cartas canonicas (pesos de mecanicas,
+keywords, mascara de cor, tipos principais, subtipos, cmc, P/T numericos e
+palavras do oracle). Subtipos e palavras usam indice invertido: o custo e
+proporcional as postings dos termos da carta de referencia, nao ao catalogo.
+
+O indice e montado uma vez por processo e reconstruido quando a
+``CardDataVersion`` muda. Sem NumPy instalado, ``available()`` retorna False e
+a view usa o loop em Python.
+"""
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .colors import to_mask
+from .rules import KEYWORDS, MECHANIC_KEYWORDS
+
+MAIN_TYPES = ('creature', 'instant', 'sorcery', 'enchantment', 'artifact', 'planeswalker', 'land')
+NON_SUBTYPES = set(MAIN_TYPES) | {'legendary', '—', '-'}
+IGNORED_WORDS = {'the', 'a', 'an', 'to', 'of', 'and', 'or', 'is', 'it', 'if', 'that', 'this', 'you', 'your'}
+
+_lock = threading.Lock()
+_cache = {'version': None, 'index': None}
+
+
+def available():
+    return np is not None
+
+
+def type_features(type_line):
+    """(mascara de tipos principais, subtipos) como no calculate_similarity"""
+    words = set(type_line.lower().split()) if type_line else set()
+    main_mask = 0
+    for bit, main in enumerate(MAIN_TYPES):
+        if main in words:
+            main_mask |= 1 << bit
+    return main_mask, words - NON_SUBTYPES
+
+
+def oracle_words(oracle_text):
+    if not oracle_text:
+        return set()
+    return set(oracle_text.lower().split()) - IGNORED_WORDS
+
+
+def _postings(sets):
+    """Indice invertido termo -> array de linhas"""
+    vocab = {}
+    rows, terms = [], []
+    for row, items in enumerate(sets):
+        for item in items:
+            rows.append(row)
+            terms.append(vocab.setdefault(item, len(vocab)))
+    rows = np.asarray(rows, dtype=np.int32)
+    terms = np.asarray(terms, dtype=np.int32)
+    order = np.argsort(terms, kind='stable')
+    rows, terms = rows[order], terms[order]
+    bounds = np.searchsorted(terms, np.arange(len(vocab) + 1))
+    return {term: rows[bounds[tid]:bounds[tid + 1]] for term, tid in vocab.items()}
+
+
+def _overlap(postings, items, size):
+    counts = np.zeros(size, dtype=np.int16)
+    for item in items:
+        rows = postings.get(item)
+        if rows is not None:
+            counts[rows] += 1
+    return counts
+
+
+class SimilarityIndex:
+    """Features de todas as cartas canonicas, na ordem do catalogo (nome)"""
+
+    def __init__(self, cards, tags, mechanic_weights, keywords):
+        from . import tagging
+
+        n = len(cards)
+        self.size = n
+        self.ids = np.fromiter((c.id for c in cards), dtype=np.int64, count=n)
+        self.row_of = {card_id: row for row, card_id in enumerate(self.ids.tolist())}
+        self.row_by_name = {c.name: row for row, c in enumerate(cards)}
+        self.mechanic_col = {name: col for col, name in enumerate(mechanic_weights)}
+        self.mechanic_weights = np.array(list(mechanic_weights.values()), dtype=np.int16)
+        self.keyword_col = {kw: col for col, kw in enumerate(keywords)}
+
+        self.mechanics = np.zeros((n, len(self.mechanic_col)), dtype=bool)
+        self.keywords = np.zeros((n, len(self.keyword_col)), dtype=bool)
+        self.colors = np.zeros(n, dtype=np.uint8)
+        self.main_types = np.zeros(n, dtype=np.uint8)
+        self.cmc = np.zeros(n, dtype=np.float32)
+        self.power = np.full(n, np.nan, dtype=np.float32)
+        self.toughness = np.full(n, np.nan, dtype=np.float32)
+        self.has_oracle = np.zeros(n, dtype=bool)
+        subtypes, words = [], []
+
+        for row, card in enumerate(cards):
+            card_tags = tags.get(card.id)
+            if card_tags is None:
+                # Ainda nao tagueada: mesmo calculo do refresh_tags
+                mechanics = tagging.extract_mechanics(card.oracle_text)
+                card_keywords = tagging.extract_keywords(card.oracle_text)
+            else:
+                mechanics = card_tags.get('mechanic', {})
+                card_keywords = card_tags.get('keyword', {})
+            for name in mechanics:
+                col = self.mechanic_col.get(name)
+                if col is not None:
+                    self.mechanics[row, col] = True
+            for kw in card_keywords:
+                col = self.keyword_col.get(kw)
+                if col is not None:
+                    self.keywords[row, col] = True
+
+            self.colors[row] = to_mask(card.color_identity)
+            main_mask, card_subtypes = type_features(card.type_line)
+            self.main_types[row] = main_mask
+            subtypes.append(card_subtypes)
+            self.cmc[row] = card.cmc or 0
+            if card.power_value is not None:
+                self.power[row] = card.power_value
+            if card.toughness_value is not None:
+                self.toughness[row] = card.toughness_value
+            self.has_oracle[row] = bool(card.oracle_text)
+            words.append(oracle_words(card.oracle_text))
+
+        self.subtype_postings = _postings(subtypes)
+        self.word_postings = _postings(words)
+
+    @classmethod
+    def build(cls):
+        from .models import Card
+        from . import tagging
+
+        cards = list(Card.objects.canonical().only(
+            'id', 'name', 'oracle_text', 'type_line', 'color_identity', 'cmc',
+            'power_value', 'toughness_value', 'tagged_version',
+        ))
+        tagged = [c.id for c in cards if c.tagged_version == tagging.TAGS_VERSION]
+        tags = tagging.load_tags(tagged, kinds=('mechanic', 'keyword'))
+        for card_id in tagged:
+            tags.setdefault(card_id, {})
+        mechanic_weights = {name: weight for name, _, weight in MECHANIC_KEYWORDS}
+        return cls(cards, tags, mechanic_weights, KEYWORDS)
+
+    def scores(self, reference, mechanics, keywords):
+        """Score de cada linha contra a carta de referencia (mesmos pesos do calculate_similarity)"""
+        n = self.size
+        score = np.zeros(n, dtype=np.int16)
+
+        def add(values):
+            score[:] += values.astype(np.int16)
+
+        # 1. Mecanicas: soma dos pesos das compartilhadas, cap 60
+        cols = [self.mechanic_col[m] for m in mechanics if m in self.mechanic_col]
+        if cols:
+            shared = self.mechanics[:, cols].astype(np.int16) @ self.mechanic_weights[cols]
+            add(np.minimum(shared, 60))
+
+        # 2. Keywords: 3 por keyword, cap 15
+        cols = [self.keyword_col[k] for k in keywords if k in self.keyword_col]
+        if cols:
+            shared = self.keywords[:, cols].sum(axis=1, dtype=np.int16)
+            add(np.minimum(shared * 3, 15))
+
+        # 3. Identidade de cor
+        ref_colors = to_mask(reference.color_identity)
+        if ref_colors:
+            common = self.colors & ref_colors
+            common_count = np.zeros(n, dtype=np.int16)
+            for bit in range(5):
+                common_count += (common >> bit) & 1
+            add(np.where(
+                self.colors == 0, 0,
+                np.where(self.colors == ref_colors, 15, common_count * 5),
+            ))
+
+        # 4. Tipo principal e subtipos
+        ref_main, ref_subtypes = type_features(reference.type_line)
+        add(np.where(
+            self.main_types == ref_main, 10,
+            np.where((self.main_types & ref_main) != 0, 5, 0),
+        ))
+        if ref_subtypes:
+            shared = _overlap(self.subtype_postings, ref_subtypes, n)
+            add(np.minimum(shared * 3, 5))
+
+        # 5. CMC
+        diff = np.abs(self.cmc - np.float32(reference.cmc or 0))
+        add(np.where(diff <= 1, 5, np.where(diff <= 2, 2, 0)))
+
+        # 6. Power/Toughness (NaN = variavel ou sem P/T)
+        if reference.power_value is not None:
+            add(np.where(np.abs(self.power - reference.power_value) <= 1, 3, 0))
+        if reference.toughness_value is not None:
+            add(np.where(np.abs(self.toughness - reference.toughness_value) <= 1, 2, 0))
+
+        # 7. Palavras do oracle em comum
+        ref_words = oracle_words(reference.oracle_text)
+        if ref_words:
+            shared = _overlap(self.word_postings, ref_words, n)
+            add(np.where(self.has_oracle & (shared > 5), np.minimum(shared // 2, 10), 0))
+
+        return score
+
+    def top(self, reference, mechanics, keywords, candidate_ids=None, exclude_name=None,
+            limit=48, threshold=10):
+        """[(card_id, score)] dos melhores candidatos, empate pela ordem do catalogo"""
+        score = self.scores(reference, mechanics, keywords)
+        eligible = score > threshold
+        if candidate_ids is not None:
+            mask = np.zeros(self.size, dtype=bool)
+            rows = [self.row_of[i] for i in candidate_ids if i in self.row_of]
+            mask[rows] = True
+            eligible &= mask
+        if exclude_name in self.row_by_name:
+            eligible[self.row_by_name[exclude_name]] = False
+        rows = np.flatnonzero(eligible)
+        order = np.argsort(-score[rows], kind='stable')[:limit]
+        return [(int(self.ids[r]), int(score[r])) for r in rows[order]]
+
+
+def get_index(rebuild=False):
+    """Indice do processo, reconstruido quando a versao dos dados muda (ou com rebuild)"""
+    from .models import CardDataVersion
+    version = CardDataVersion.current()
+    with _lock:
+        if rebuild or _cache['index'] is None or _cache['version'] != version:
+            print(f"[Similarity] Montando indice (versao {version})...")
+            _cache['index'] = SimilarityIndex.build()
+            _cache['version'] = version
+        return _cache['index']
+
+
+# Versao do calculo do top-K; incrementar quando os pesos mudarem
+SIMILAR_VERSION = 1
+TOP_K = 48
+
+REFERENCE_FIELDS = (
+    'id', 'name', 'oracle_text', 'type_line', 'color_identity', 'cmc',
+    'power_value', 'toughness_value',
+)
+
+
+def _card_terms(index, card):
+    """(mecanicas, keywords) da carta a partir da linha do indice"""
+    row = index.row_of[card.id]
+    mechanics = [m for m, col in index.mechanic_col.items() if index.mechanics[row, col]]
+    keywords = [k for k, col in index.keyword_col.items() if index.keywords[row, col]]
+    return mechanics, keywords
+
+
+def _write_lists(lists):
+    """Regrava as listas {card_id: [(similar_id, score)]}"""
+    from .models import CardSimilarity
+    owners = list(lists)
+    for start in range(0, len(owners), 500):
+        CardSimilarity.objects.filter(card_id__in=owners[start:start + 500]).delete()
+    CardSimilarity.objects.bulk_create([
+        CardSimilarity(card_id=owner, similar_id=similar_id, rank=rank, score=score)
+        for owner, entries in lists.items()
+        for rank, (similar_id, score) in enumerate(entries)
+    ], batch_size=500)
+
+
+def refresh_similar(top_k=TOP_K, rebuild=False, stdout=None):
+    """Atualiza o top-K das cartas canonicas.
+
+    Recalcula as listas das cartas novas/alteradas e das que apontavam para
+    elas; como o score e simetrico, o score de cada carta nova contra todas as
+    outras diz em quais listas existentes ela entra. Retorna quantas listas
+    foram recalculadas ou alteradas.
+    """
+    from django.db import transaction
+    from django.db.models import Count, Min, Q
+    from .models import Card, CardSimilarity
+
+    # Indice novo: quem chama (import, update_dfcs) so sobe a versao dos dados depois
+    index = get_index(rebuild=True)
+
+    # Cartas que deixaram de ser canonicas (ou foram apagadas) saem das listas
+    gone = Card.objects.filter(is_canonical=False, similar_version__gt=0)
+    affected = set(CardSimilarity.objects.filter(
+        Q(similar__in=gone) | Q(similar__isnull=True)
+    ).values_list('card_id', flat=True))
+    CardSimilarity.objects.filter(Q(card__in=gone) | Q(similar__in=gone) | Q(similar__isnull=True)).delete()
+    gone.update(similar_version=0)
+
+    canonical = Card.objects.canonical().only(*REFERENCE_FIELDS)
+    dirty_qs = canonical if rebuild else canonical.exclude(similar_version=SIMILAR_VERSION)
+    dirty = list(dirty_qs)
+    dirty_ids = {c.id for c in dirty}
+    if not rebuild and dirty:
+        affected |= set(CardSimilarity.objects.filter(
+            similar__in=dirty_qs
+        ).values_list('card_id', flat=True))
+    affected -= dirty_ids
+    recompute = dirty + list(canonical.filter(id__in=affected)) if affected else dirty
+    recompute = [c for c in recompute if c.id in index.row_of]
+    recompute_ids = {c.id for c in recompute}
+
+    # 1. Listas completas (cartas novas/alteradas e as que perderam itens)
+    done = 0
+    for start in range(0, len(recompute), 500):
+        lists = {}
+        for card in recompute[start:start + 500]:
+            mechanics, keywords = _card_terms(index, card)
+            lists[card.id] = index.top(card, mechanics, keywords, exclude_name=card.name, limit=top_k)
+        with transaction.atomic():
+            _write_lists(lists)
+            Card.objects.filter(id__in=list(lists)).update(similar_version=SIMILAR_VERSION)
+        done += len(lists)
+        if stdout is not None:
+            stdout.write(f'Similares: {done}/{len(recompute)} cartas...')
+
+    # 2. Cartas novas entram nas listas existentes que superam
+    if not rebuild and dirty and len(recompute_ids) < index.size:
+        size = np.zeros(index.size, dtype=np.int16)
+        lowest = np.zeros(index.size, dtype=np.int16)
+        stats = CardSimilarity.objects.values('card_id').annotate(n=Count('id'), low=Min('score'))
+        for row in stats:
+            r = index.row_of.get(row['card_id'])
+            if r is not None:
+                size[r], lowest[r] = row['n'], row['low']
+        skip = np.zeros(index.size, dtype=bool)
+        skip[[index.row_of[i] for i in recompute_ids]] = True
+
+        inserts = {}
+        for card in dirty:
+            if card.id not in index.row_of:
+                continue
+            mechanics, keywords = _card_terms(index, card)
+            score = index.scores(card, mechanics, keywords)
+            enters = (score > 10) & ~skip & ((size < top_k) | (score > lowest))
+            for r in np.flatnonzero(enters):
+                inserts.setdefault(int(index.ids[r]), []).append((card.id, int(score[r])))
+
+        if inserts:
+            current = {}
+            for owner, similar_id, score in CardSimilarity.objects.filter(
+                card_id__in=list(inserts)
+            ).order_by('rank').values_list('card_id', 'similar_id', 'score'):
+                current.setdefault(owner, []).append((similar_id, score))
+            lists = {}
+            for owner, entries in inserts.items():
+                merged = current.get(owner, []) + entries
+                # Mesmo criterio do top(): score e depois ordem do catalogo
+                merged.sort(key=lambda e: (-e[1], index.row_of.get(e[0], 0)))
+                lists[owner] = merged[:top_k]
+            with transaction.atomic():
+                _write_lists(lists)
+            done += len(lists)
+
+    return done
+
+
+def similar_for(card, limit=TOP_K):
+    """Lista precomputada da impressao canonica da carta (ou None se nao calculada)"""
+    from .models import Card, CardSimilarity
+    canonical_id = card.id if card.is_canonical else (
+        Card.objects.canonical().filter(name=card.name).values_list('id', flat=True).first()
+    )
+    if canonical_id is None:
+        return None
+    rows = list(CardSimilarity.objects.filter(
+        card_id=canonical_id, similar__isnull=False
+    ).select_related('similar').order_by('rank')[:limit])
+    if not rows:
+        built = Card.objects.filter(id=canonical_id, similar_version=SIMILAR_VERSION).exists()
+        return [] if built else None
+    return rows
@@ -0,0 +1,39 @@
+"""Power/toughness/loyalty numericos.
+
+Os campos originais sao texto ('3', '*', '1+*', 'X', '.5'), o que faz filtros
+e ordenacao compararem strings ('10' < '2'). ``Card.power_value`` e similares
+guardam o inteiro quando o valor e fixo e NULL quando e variavel.
+"""
+import re
+
+from django.db.models import F, Q
+
+INT_RE = re.compile(r'^[+-]?\d+$')
+
+
+def parse_stat(value):
+    """'3' -> 3, '-1' -> -1; '*', '1+*', 'X', '.5', '' -> None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not INT_RE.match(value):
+        return None
+    return int(value)
+
+
+def range_q(field, minimum=None, maximum=None):
+    """Filtro de faixa no campo numerico; limites invalidos sao ignorados"""
+    q = Q()
+    low = parse_stat(minimum)
+    high = parse_stat(maximum)
+    if low is not None:
+        q &= Q(**{f'{field}__gte': low})
+    if high is not None:
+        q &= Q(**{f'{field}__lte': high})
+    return q
+
+
+def order_by_stat(queryset, field, descending=False):
+    """Ordena pelo campo numerico com os variaveis (NULL) no fim"""
+    expression = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+    return queryset.order_by(expression, 'name')
@@ -0,0 +1,296 @@
+"""Tags precomputadas por carta (tabela ``CardTag``).
+
+As regras ficam em ``cards/rules.py``, compartilhadas com as views; aqui
+elas sao compiladas uma vez num ``Matcher`` (uma passada por texto) e
+aplicadas a cada carta canonica no import (``refresh_tags``), em vez de rodar
+os regex por candidato em cada request. ``TAGS_VERSION`` deve ser incrementado quando as regras
+mudam: as cartas com versao antiga sao retagueadas no proximo refresh.
+"""
+import re
+
+from .rules import (
+    COMMANDER_ARCHETYPES, DECK_THEMES, HIGH_PRIORITY_PATTERNS, KEYWORDS, MECHANIC_KEYWORDS, NEGATIVE_PATTERNS,
+)
+from .matcher import Matcher, compiled
+
+TAGS_VERSION = 3
+
+# Limite de parametros por query no SQLite
+CHUNK_SIZE = 900
+
+_compiled = {}
+
+
+def _mechanic_rules():
+    if 'mechanic' not in _compiled:
+        _compiled['mechanic'] = list(MECHANIC_KEYWORDS)
+    return _compiled['mechanic']
+
+
+def _keyword_rules():
+    if 'keyword' not in _compiled:
+        _compiled['keyword'] = list(KEYWORDS)
+    return _compiled['keyword']
+
+
+def _archetype_rules():
+    if 'archetype' not in _compiled:
+        _compiled['archetype'] = [
+            (archetype_id, patterns)
+            for name, archetype_id, patterns, description in COMMANDER_ARCHETYPES
+        ]
+    return _compiled['archetype']
+
+
+def _theme_rules():
+    """Regras por tema, na forma usada pelo calculate_theme_score: {tema: (negativos, alta prioridade, padroes, tribal)}"""
+    if 'theme' not in _compiled:
+        themes = {}
+        for name, theme_id, patterns, desc, category in DECK_THEMES:
+            if theme_id in themes:
+                continue
+            negatives = [
+                neg for key, neg_patterns in NEGATIVE_PATTERNS.items() if key in theme_id
+                for neg in neg_patterns
+            ]
+            high_priority = [hp.lower() for hp in HIGH_PRIORITY_PATTERNS.get(theme_id, [])]
+            cleaned = []
+            for pattern in patterns:
+                # Limpar pattern - manter texto e simbolos de mana
+                clean = pattern.replace('.*', ' ').replace('\\+', '+').replace('\\', '')
+                clean = re.sub(r'[^a-zA-Z0-9\s\'/+-{}]', '', clean).strip().lower()
+                # Exigir pelo menos 4 chars ou simbolo de mana
+                if len(clean) < 4 and '{' not in clean:
+                    continue
+                # Palavra curta: so como palavra completa
+                word = len(clean.split()) == 1 and len(clean) < 6
+                cleaned.append((clean, word))
+            tribal = theme_id.rstrip('s') if category == 'Tribal' else None
+            themes[theme_id] = (negatives, high_priority, cleaned, tribal)
+        _compiled['theme'] = themes
+    return _compiled['theme']
+
+
+def _build_oracle_matcher():
+    """Todos os catalogos aplicados ao oracle text (em minusculas) numa passada"""
+    rules = []
+    for index, (name, patterns, weight) in enumerate(_mechanic_rules()):
+        rules += [(('mechanic', index), p) for p in patterns]
+    rules += [(('keyword', kw), re.escape(kw)) for kw in _keyword_rules()]
+    for archetype_id, patterns in _archetype_rules():
+        rules += [(('archetype', archetype_id, i), p) for i, p in enumerate(patterns)]
+    negatives = set()
+    for theme_id, (theme_negatives, high_priority, cleaned, tribal) in _theme_rules().items():
+        negatives.update(theme_negatives)
+        rules += [(('theme_hp', theme_id, i), re.escape(hp)) for i, hp in enumerate(high_priority)]
+        rules += [
+            (('theme', theme_id, i), r'\b' + re.escape(clean) + r'\b' if word else re.escape(clean))
+            for i, (clean, word) in enumerate(cleaned)
+        ]
+    rules += [(('theme_neg', neg), re.escape(neg)) for neg in negatives]
+    return Matcher(rules)
+
+
+def _build_type_matcher():
+    """Patterns de tema aplicados ao type line"""
+    rules = []
+    for theme_id, (negatives, high_priority, cleaned, tribal) in _theme_rules().items():
+        rules += [(('theme_hp', theme_id, i), re.escape(hp)) for i, hp in enumerate(high_priority)]
+        rules += [
+            (('theme', theme_id, i), r'\b' + re.escape(clean) + r'\b' if word else re.escape(clean))
+            for i, (clean, word) in enumerate(cleaned)
+        ]
+        if tribal:
+            rules.append((('tribal', theme_id), r'\b' + re.escape(tribal) + r'\b'))
+    return Matcher(rules)
+
+
+def _build_name_matcher():
+    """Patterns de tema no nome da carta (substring simples)"""
+    return Matcher(
+        (('theme', theme_id, i), re.escape(clean))
+        for theme_id, (negatives, high_priority, cleaned, tribal) in _theme_rules().items()
+        for i, (clean, word) in enumerate(cleaned)
+    )
+
+
+def oracle_hits(oracle_text):
+    """Chaves dos patterns que casam com o oracle text"""
+    if not oracle_text:
+        return set()
+    return compiled('oracle', _build_oracle_matcher).search(oracle_text.lower())
+
+
+def extract_mechanics(oracle_text, hits=None):
+    """Mecanicas do texto -> {nome: peso}"""
+    hits = oracle_hits(oracle_text) if hits is None else hits
+    found = {}
+    for index, (name, patterns, weight) in enumerate(_mechanic_rules()):
+        if ('mechanic', index) in hits:
+            found[name] = weight
+    return found
+
+
+def extract_keywords(oracle_text, hits=None):
+    """Keywords de MTG presentes no texto"""
+    hits = oracle_hits(oracle_text) if hits is None else hits
+    return {key[1] for key in hits if key[0] == 'keyword'}
+
+
+def theme_score(theme_id, rule, oracle, type_line, name):
+    """Relevancia da carta para um tema (parte por tema do calculate_theme_score).
+
+    oracle/type_line/name: chaves casadas em cada texto.
+    """
+    negatives, high_priority, cleaned, tribal = rule
+
+    if any(('theme_neg', neg) in oracle for neg in negatives):
+        return 0
+
+    score = 0
+    matched = 0
+    high_priority_matched = False
+    for i in range(len(high_priority)):
+        key = ('theme_hp', theme_id, i)
+        if key in oracle or key in type_line:
+            score += 8
+            high_priority_matched = True
+            matched += 1
+
+    for i in range(len(cleaned)):
+        key = ('theme', theme_id, i)
+        if key in oracle:
+            score += 3
+            matched += 1
+        if key in type_line:
+            score += 5  # Type line match vale mais (tribais)
+            matched += 1
+        # Bonus para match no nome (carta dedicada ao tema)
+        if key in name:
+            score += 4
+            matched += 1
+
+    if ('tribal', theme_id) in type_line:
+        score += 6
+        matched += 1
+
+    # Bonus por multiplos patterns do mesmo tema e por alta prioridade
+    if matched >= 3:
+        score += matched * 3
+    elif matched >= 2:
+        score += matched * 2
+    if high_priority_matched:
+        score += 5
+    return score
+
+
+def theme_scores(card, theme_ids=None, hits=None):
+    """{tema: score} dos temas com score > 0"""
+    rules = _theme_rules()
+    oracle = oracle_hits(card.oracle_text) if hits is None else hits
+    type_line = compiled('type_line', _build_type_matcher).search((card.type_line or '').lower())
+    name = compiled('name', _build_name_matcher).search((card.name or '').lower())
+
+    # So os temas com algum match positivo podem pontuar
+    touched = {key[1] for hits_ in (oracle, type_line, name) for key in hits_ if key[0] in ('theme', 'theme_hp', 'tribal')}
+    if theme_ids is not None:
+        touched &= set(theme_ids)
+    scores = {}
+    for theme_id in touched:
+        score = theme_score(theme_id, rules[theme_id], oracle, type_line, name)
+        if score > 0:
+            scores[theme_id] = score
+    return scores
+
+
+def is_commander(card):
+    """Mesmo criterio da base do CommanderIdeasView"""
+    type_line = (card.type_line or '').lower()
+    oracle = (card.oracle_text or '').lower()
+    return ('legendary' in type_line and 'creature' in type_line) or 'can be your commander' in oracle
+
+
+def detect_archetypes(oracle_text, min_matches=1, hits=None):
+    """Arquetipos de comandante do texto -> {id: forca (patterns encontrados, max 5)}"""
+    hits = oracle_hits(oracle_text) if hits is None else hits
+    counts = {}
+    for key in hits:
+        if key[0] == 'archetype':
+            counts[key[1]] = counts.get(key[1], 0) + 1
+    return {
+        archetype_id: min(counts[archetype_id], 5)
+        for archetype_id, patterns in _archetype_rules()
+        if counts.get(archetype_id, 0) >= min_matches
+    }
+
+
+def compute_tags(card):
+    """Tags de uma carta: lista de (kind, tag, score)"""
+    hits = oracle_hits(card.oracle_text)
+    tags = [('mechanic', name, weight) for name, weight in extract_mechanics(None, hits).items()]
+    tags += [('keyword', kw, 1) for kw in sorted(extract_keywords(None, hits))]
+    tags += [('theme', theme_id, score) for theme_id, score in theme_scores(card, hits=hits).items()]
+    if is_commander(card):
+        tags += [('archetype', aid, strength) for aid, strength in detect_archetypes(None, hits=hits).items()]
+    return tags
+
+
+def tag_cards(cards):
+    """Regrava as tags das cartas e marca a versao aplicada"""
+    from .models import Card, CardTag
+    cards = list(cards)
+    if not cards:
+        return 0
+    ids = [c.id for c in cards]
+    rows = [
+        CardTag(card_id=card.id, kind=kind, tag=tag, score=score)
+        for card in cards
+        for kind, tag, score in compute_tags(card)
+    ]
+    CardTag.objects.filter(card_id__in=ids).delete()
+    CardTag.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+    Card.objects.filter(id__in=ids).update(tagged_version=TAGS_VERSION)
+    return len(rows)
+
+
+def refresh_tags(rebuild=False, batch_size=CHUNK_SIZE, stdout=None):
+    """Tagueia cartas canonicas pendentes e limpa as que deixaram de ser canonicas"""
+    from django.db import transaction
+    from .models import Card, CardTag
+
+    stale = Card.objects.filter(is_canonical=False, tagged_version__gt=0)
+    CardTag.objects.filter(card__in=stale).delete()
+    stale.update(tagged_version=0)
+
+    pending = Card.objects.canonical()
+    if not rebuild:
+        pending = pending.exclude(tagged_version=TAGS_VERSION)
+    pending = pending.only('id', 'name', 'type_line', 'oracle_text').order_by('id')
+
+    done = 0
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            tag_cards(batch)
+        done += len(batch)
+        last_id = batch[-1].id
+        if stdout is not None:
+            stdout.write(f'Tags: {done} cartas...')
+    return done
+
+
+def load_tags(card_ids, kinds=None):
+    """{card_id: {kind: {tag: score}}} para as cartas (em lotes)"""
+    from .models import CardTag
+    card_ids = list(card_ids)
+    result = {}
+    for start in range(0, len(card_ids), CHUNK_SIZE):
+        rows = CardTag.objects.filter(card_id__in=card_ids[start:start + CHUNK_SIZE])
+        if kinds:
+            rows = rows.filter(kind__in=kinds)
+        for card_id, kind, tag, score in rows.values_list('card_id', 'kind', 'tag', 'score'):
+            result.setdefault(card_id, {}).setdefault(kind, {})[tag] = score
+    return result
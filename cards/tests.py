@@ -1,3 +1,638 @@
-from django.test import TestCase
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import Http404, QueryDict
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .admin import CardAdmin
+from .canonical import refresh_canonical
+from .models import Card, CardDataVersion, CardPage
+from . import autocomplete, catalog, pages, query, results, search, similarity, tagging
+from .views import ArchetypeFinderView, CardAssistantView
+
+
+def build_card(name, **fields):
+    """Carta minima para os testes, sem gravar"""
+    defaults = {
+        'scryfall_id': uuid.uuid4(),
+        'type_line': 'Artifact',
+        'oracle_text': '',
+        'cmc': 0,
+        'colors': '',
+        'color_identity': '',
+        'set_code': 'tst',
+        'set_name': 'Test Set',
+        'rarity': 'common',
+    }
+    defaults.update(fields)
+    return Card(name=name, **defaults)
+
+
+def make_card(name, **fields):
+    """Carta minima gravada (save() calcula os campos derivados), canonica se for a primeira do nome"""
+    card = build_card(name, **fields)
+    card.save()
+    refresh_canonical([name])
+    card.refresh_from_db(fields=['is_canonical'])
+    return card
+
+
+def import_card(name, **fields):
+    """Carta gravada como no import_cards: bulk_create, canonicas/tags/versao no fim do import"""
+    card = build_card(name, **fields)
+    card.populate_derived_fields()
+    Card.objects.bulk_create([card])
+    return card
+
+
+def finish_import(inserted=1):
+    """Fim do import_cards (dados derivados e versao)"""
+    from io import StringIO
+    from .management.commands.import_cards import Command
+    Command(stdout=StringIO())._refresh_derived(inserted)
+
+
+class SearchIndexTests(TestCase):
+    """Os triggers do FTS precisam sobreviver as migrations que recriam cards_card"""
+
+    def setUp(self):
+        if not search.fts_available():
+            self.skipTest('SQLite sem FTS5')
+
+    def test_triggers_exist_after_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND name LIKE 'cards_card_fts_%'")
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(triggers, {'cards_card_fts_ai', 'cards_card_fts_ad', 'cards_card_fts_au'})
+
+    def test_card_saved_after_migrate_is_searchable(self):
+        card = make_card('Sol Ring', oracle_text='{T}: Add {C}{C}.')
+        self.assertEqual(list(Card.objects.search('sol')), [card])
+        self.assertEqual(list(Card.objects.search('add', fields=['oracle_text'])), [card])
+
+        card.name = 'Sol Talisman'
+        card.save()
+        self.assertEqual(list(Card.objects.search('talisman')), [card])
+        card.delete()
+        self.assertEqual(list(Card.objects.search('sol')), [])
+
+    def test_migrate_repairs_dropped_triggers(self):
+        # Como um AddField futuro no SQLite: cards_card recriada sem os triggers
+        with connection.cursor() as cursor:
+            for name in search.TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        lost = make_card('Sol Ring')
+        self.assertEqual(list(Card.objects.search('sol')), [])
+
+        call_command('migrate', verbosity=0, stdout=mock.Mock())
+        self.assertEqual(search.missing_triggers(), [])
+        self.assertEqual(list(Card.objects.search('sol')), [lost])
+        card = make_card('Arcane Signet')
+        self.assertEqual(list(Card.objects.search('signet')), [card])
+        self.assertFalse(search.ensure_index())
+
+
+class CanonicalTests(TestCase):
+
+    def setUp(self):
+        # O indice em memoria e por versao dos dados, que volta a 0 a cada teste
+        autocomplete._cache['index'] = None
+        self.admin = CardAdmin(Card, admin.site)
+
+    def admin_save(self, card, initial_name=None):
+        form = mock.Mock(initial={'name': initial_name}, changed_data=['name'] if initial_name else [])
+        self.admin.save_model(mock.Mock(), card, form, change=card.pk is not None)
+
+    def test_save_does_not_touch_canonical_or_version(self):
+        make_card('Sol Ring', set_code='c21')
+        version = CardDataVersion.current()
+        with self.assertNumQueries(1):
+            build_card('Arcane Signet').save()
+        self.assertEqual(CardDataVersion.current(), version)
+
+    def test_admin_marks_first_printing_canonical(self):
+        first = build_card('Sol Ring', set_code='c21')
+        self.admin_save(first)
+        self.admin_save(build_card('Sol Ring', set_code='cmr'))
+        self.assertEqual(list(Card.objects.canonical()), [first])
+        names = [row['name'] for row in self.client.get('/cards/api/autocomplete/', {'q': 'sol'}).json()['results']]
+        self.assertEqual(names, ['Sol Ring'])
+
+    def test_admin_rename_and_delete_move_canonical(self):
+        first = make_card('Sol Ring', set_code='c21')
+        reprint = make_card('Sol Ring', set_code='cmr')
+        version = CardDataVersion.current()
+
+        # Editar sem mudar o nome nao recalcula nada
+        reprint.rarity = 'uncommon'
+        self.admin_save(reprint)
+        self.assertEqual(CardDataVersion.current(), version)
+
+        first.name = 'Sol Talisman'
+        self.admin_save(first, initial_name='Sol Ring')
+        self.assertEqual(set(Card.objects.canonical()), {first, reprint})
+        self.assertEqual(CardDataVersion.current(), version + 1)
+
+        self.admin.delete_model(mock.Mock(), reprint)
+        self.assertEqual(list(Card.objects.canonical()), [first])
+
+
+class AutocompletePopularityTests(TestCase):
+
+    def setUp(self):
+        autocomplete._cache['index'] = None
+
+    def names(self, q):
+        # Sem esperar o intervalo entre checagens de versao
+        autocomplete._cache['checked_at'] = 0.0
+        return [row['name'] for row in autocomplete.lookup(q)]
+
+    def test_deck_changes_rerank_without_rebuild(self):
+        from accounts.models import PlayerProfile
+        from decks.models import Deck, DeckCard
+        commander = make_card('Krenko, Mob Boss', type_line='Legendary Creature — Goblin Warrior')
+        make_card('Sol Ring')
+        talisman = make_card('Sol Talisman')
+        self.assertEqual(self.names('sol'), ['Sol Ring', 'Sol Talisman'])
+        index = autocomplete._cache['index']
+
+        owner = PlayerProfile.objects.create(session_key='autocomplete-test', nickname='Tester')
+        deck = Deck.objects.create(owner=owner, name='Deck', commander=commander)
+        DeckCard.objects.create(deck=deck, card=talisman)
+        pages.refresh_decks(['Sol Talisman'])  # como no import de deck
+        self.assertEqual(self.names('sol'), ['Sol Talisman', 'Sol Ring'])
+        self.assertIs(autocomplete._cache['index'], index)
+
+        deck.delete()
+        pages.refresh_decks(['Sol Talisman'])
+        self.assertEqual(self.names('sol'), ['Sol Ring', 'Sol Talisman'])
+
+
+SIMILARITY_CARDS = [
+    # (nome, tipo, oracle, cmc, identidade, power, toughness)
+    ('Llanowar Elves', 'Creature — Elf Druid', '{T}: Add {G}.', 1, 'G', '1', '1'),
+    ('Elvish Mystic', 'Creature — Elf Druid', '{T}: Add {G}.', 1, 'G', '1', '1'),
+    ('Elvish Archdruid', 'Creature — Elf Druid', 'Other Elf creatures you control get +1/+1. {T}: Add {G} for each Elf you control.', 3, 'G', '2', '2'),
+    ('Sol Ring', 'Artifact', '{T}: Add {C}{C}.', 1, '', None, None),
+    ('Arcane Signet', 'Artifact', '{T}: Add one mana of any color in your commander\'s color identity.', 2, '', None, None),
+    ('Lightning Bolt', 'Instant', 'Lightning Bolt deals 3 damage to any target.', 1, 'R', None, None),
+    ('Shock', 'Instant', 'Shock deals 2 damage to any target.', 1, 'R', None, None),
+    ('Blood Artist', 'Creature — Vampire', 'Whenever Blood Artist or another creature dies, target player loses 1 life and you gain 1 life.', 2, 'B', '0', '1'),
+    ('Zulaport Cutthroat', 'Creature — Human Rogue Ally', 'Whenever Zulaport Cutthroat or another creature you control dies, each opponent loses 1 life and you gain 1 life.', 2, 'B', '1', '1'),
+    ('Rhystic Study', 'Enchantment', 'Whenever an opponent casts a spell, you may draw a card unless that player pays {1}.', 3, 'U', None, None),
+    ('Serra Angel', 'Creature — Angel', 'Flying, vigilance', 5, 'W', '4', '4'),
+    ('Baneslayer Angel', 'Creature — Angel', 'Flying, first strike, lifelink, protection from Demons and from Dragons', 5, 'W', '5', '5'),
+    ('Fire // Ice', 'Instant', 'Fire deals 2 damage divided as you choose among one or two targets.', 4, 'U,R', None, None),
+    ('Tarmogoyf', 'Creature — Lhurgoyf', "Tarmogoyf's power is equal to the number of card types among cards in all graveyards.", 2, 'G', '*', '1+*'),
+]
+
+
+@skipUnless(similarity.available(), 'numpy nao instalado')
+class VectorizedSimilarityTests(TestCase):
+    """O indice NumPy tem que dar o mesmo score do CardAssistantView.calculate_similarity"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name, type_line, oracle, cmc, identity, power, toughness in SIMILARITY_CARDS:
+            make_card(name, type_line=type_line, oracle_text=oracle, cmc=cmc, color_identity=identity,
+                      colors=identity, power=power, toughness=toughness)
+        # Metade tagueada (tags do banco), metade no fallback por regex
+        tagging.tag_cards(list(Card.objects.order_by('id')[:len(SIMILARITY_CARDS) // 2]))
+
+    def setUp(self):
+        similarity._cache['index'] = None
+
+    def test_scores_match_calculate_similarity(self):
+        view = CardAssistantView()
+        index = similarity.get_index()
+        cards = list(Card.objects.canonical())
+        view.attach_tags(cards)
+        by_id = {card.id: card for card in cards}
+        for reference in cards:
+            mechanics, keywords = view.card_tags(reference)
+            scores = index.scores(reference, mechanics, keywords)
+            for row, card_id in enumerate(index.ids.tolist()):
+                with self.subTest(reference=reference.name, candidate=by_id[card_id].name):
+                    expected, _ = view.calculate_similarity(reference, by_id[card_id], {})
+                    self.assertEqual(int(scores[row]), expected)
+
+    def test_reasons_match_python_fallback(self):
+        # Top-K guardado, indice NumPy e loop em Python: mesmos motivos para a mesma carta
+        similarity.refresh_similar()
+        filters = dict.fromkeys(('colors', 'type', 'subtype', 'cmc_min', 'cmc_max', 'power_min', 'power_max',
+                                 'rarity', 'oracle', 'exclude_colors', 'mechanics'), '')
+        view = CardAssistantView()
+        selected, stored = view.find_similar('Llanowar Elves', filters)
+        self.assertIsNotNone(similarity.similar_for(selected))
+        queryset = Card.objects.canonical().exclude(name=selected.name)
+        vectorized = view.rank_similar(selected, queryset, filters, filtered=False)
+        fallback = view.rank_similar_python(selected, queryset, filters)
+
+        def reasons(results):
+            return {item['card'].id: (item['score'], item['reasons']) for item in results}
+
+        self.assertEqual(reasons(stored), reasons(fallback))
+        self.assertEqual(reasons(vectorized), reasons(fallback))
+        mystic = next(item for item in stored if item['card'].name == 'Elvish Mystic')
+        self.assertIn('Cores identicas', mystic['reasons'])
+        self.assertIn('Subtipos: ', ' '.join(mystic['reasons']))
+
+    def test_import_refreshes_similar_before_bump(self):
+        similarity.refresh_similar()
+        llanowar = Card.objects.get(name='Llanowar Elves')
+        similarity.get_index()  # indice do processo na versao de antes do import
+        version = CardDataVersion.current()
+        fyndhorn = import_card('Fyndhorn Elves', type_line='Creature — Elf Druid', oracle_text='{T}: Add {G}.',
+                               cmc=1, color_identity='G', colors='G', power='1', toughness='1')
+
+        # Quem ve a versao nova ja encontra as listas refeitas
+        seen = []
+        real_bump = CardDataVersion.bump
+
+        def bump():
+            seen.append([row.similar_id for row in similarity.similar_for(llanowar)])
+            return real_bump()
+
+        with mock.patch.object(CardDataVersion, 'bump', side_effect=bump):
+            finish_import()
+        self.assertEqual(len(seen), 1)
+        self.assertIn(fyndhorn.id, seen[0])
+        self.assertEqual(CardDataVersion.current(), version + 1)
+
+
+THEME_CARDS = SIMILARITY_CARDS + [
+    ('Goblin Instigator', 'Creature — Goblin Rogue', 'When Goblin Instigator enters the battlefield, create a 1/1 red Goblin creature token.', 2, 'R', '1', '1'),
+    ('Krenko, Mob Boss', 'Legendary Creature — Goblin Warrior', '{T}: Create X 1/1 red Goblin creature tokens, where X is the number of Goblins you control.', 4, 'R', '3', '3'),
+    ('Goblin Bombardment', 'Enchantment', 'Sacrifice a creature: Goblin Bombardment deals 1 damage to any target.', 2, 'R', None, None),
+    ('Viscera Seer', 'Creature — Vampire Wizard', 'Sacrifice a creature: Scry 1.', 1, 'B', '1', '1'),
+    ('Grizzly Bears', 'Creature — Bear', '', 2, 'G', '2', '2'),
+    ('Skullclamp', 'Artifact — Equipment', 'Equipped creature gets +1/-1. Whenever equipped creature dies, draw two cards. Equip {1}', 1, '', None, None),
+    ('Elvish Warmaster', 'Creature — Elf Warrior', 'Whenever one or more other Elves enter the battlefield under your control, create a 1/1 green Elf Warrior creature token.', 2, 'G', '2', '2'),
+]
+
+
+class ArchetypeRankingTests(TestCase):
+    """Score/ordem/LIMIT em SQL tem que bater com o calculo em Python"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name, type_line, oracle, cmc, identity, power, toughness in THEME_CARDS:
+            make_card(name, type_line=type_line, oracle_text=oracle, cmc=cmc, color_identity=identity,
+                      colors=identity, power=power, toughness=toughness)
+        tagging.tag_cards(Card.objects.all())
+
+    def python_ranking(self, view, theme_ids):
+        tags = tagging.load_tags(Card.objects.values_list('id', flat=True), kinds=('theme',))
+        min_score = 5 + (len(theme_ids) - 1) * 3
+        scored = []
+        for card in Card.objects.all():
+            theme_scores = {t: v for t, v in tags.get(card.id, {}).get('theme', {}).items() if t in theme_ids}
+            if not theme_scores:
+                continue
+            score = view.calculate_theme_score(card, theme_ids, theme_scores)
+            text_len = len(card.oracle_text or '')
+            score += 2 if text_len > 100 else 1 if text_len > 50 else 0
+            if not card.oracle_text.strip() and 'creature' in card.type_line.lower():
+                score -= 3
+            if score >= min_score:
+                scored.append((score, card.name))
+        return [name for _, name in sorted(scored, key=lambda x: (-x[0], x[1]))]
+
+    def test_sql_ranking_matches_python(self):
+        view = ArchetypeFinderView()
+        for theme_ids in (['tokens'], ['sacrifice'], ['goblins'], ['tokens', 'sacrifice'],
+                          ['tokens', 'goblins', 'sacrifice'], ['elves', 'tokens']):
+            with self.subTest(themes=theme_ids):
+                expected = self.python_ranking(view, theme_ids)
+                cards = view.theme_cards(Card.objects.all(), theme_ids, 'relevance', 'desc')
+                self.assertEqual([c.name for c in cards], expected)
+                self.assertEqual([c.name for c in view.theme_cards(Card.objects.all(), theme_ids, 'relevance', 'desc', limit=2)],
+                                 expected[:2])
+        self.assertTrue(any(self.python_ranking(view, ['tokens', 'goblins'])))
+
+    def test_ordering_and_limit_in_sql(self):
+        view = ArchetypeFinderView()
+        expected = sorted(self.python_ranking(view, ['tokens']),
+                          key=lambda name: (Card.objects.get(name=name).cmc, name))
+        with self.assertNumQueries(2):
+            cards = view.theme_cards(Card.objects.all(), ['tokens'], 'cmc', 'asc')
+        self.assertEqual([c.name for c in cards], expected)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor after=: percorrer as paginas tem que dar a mesma ordem da query sem cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # cmc repetido (empates no valor da ordenacao) e nomes repetidos (reprints)
+        for i in range(7):
+            make_card(f'Card {i}', cmc=i % 3, set_code='aaa' if i % 2 else 'bbb')
+        for set_code in ('c21', 'cmr', 'lea'):
+            make_card('Sol Ring', cmc=1, set_code=set_code)
+
+    def setUp(self):
+        # Contagens em cache sao por versao dos dados, que volta a 0 a cada teste
+        cache.clear()
+
+    def walk(self, query, per_page=3):
+        """Cartas de todas as paginas seguindo next_cursor"""
+        params = QueryDict(query, mutable=True)
+        keyset = catalog.keyset_for(params)
+        names, pages = [], 0
+        while True:
+            queryset, _ = catalog.filter_cards(params)
+            _, page = catalog.paginate(queryset, params, per_page, keyset=keyset)
+            names += [(card.name, card.id) for card in page.object_list]
+            pages += 1
+            if not page.next_cursor:
+                self.assertFalse(page.has_next())
+                return names, pages
+            params['after'] = page.next_cursor
+
+    def test_cursor_walk_matches_full_order(self):
+        for query in ('order=name', 'order=name&dir=desc', 'order=cmc', 'order=cmc&dir=desc',
+                      'order=set&dir=desc', 'order=cmc&q=sol'):
+            with self.subTest(query=query):
+                queryset, _ = catalog.filter_cards(QueryDict(query))
+                expected = [(card.name, card.id) for card in queryset]
+                names, pages = self.walk(query)
+                self.assertEqual(names, expected)
+                self.assertEqual(len(set(names)), len(names))
+                self.assertEqual(pages, -(-len(expected) // 3))
+
+    def test_ties_on_sort_value_are_broken_by_id(self):
+        names, _ = self.walk('order=name', per_page=1)
+        sol_ids = [card_id for name, card_id in names if name == 'Sol Ring']
+        self.assertEqual(sol_ids, sorted(sol_ids))
+        names, _ = self.walk('order=cmc&dir=desc', per_page=2)
+        cmcs = list(Card.objects.values_list('id', 'cmc'))
+        keys = [(dict(cmcs)[card_id], card_id) for _, card_id in names]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_cursor_pages_count_seen_cards(self):
+        params = QueryDict('order=cmc', mutable=True)
+        queryset, _ = catalog.filter_cards(params)
+        paginator, page = catalog.paginate(queryset, params, 4, keyset=('cmc', False))
+        self.assertEqual(paginator.count, 10)
+        params['after'] = page.next_cursor
+        paginator, page = catalog.paginate(queryset, params, 4, keyset=('cmc', False))
+        self.assertEqual(page.number, 2)
+        self.assertEqual((page.start_index(), page.end_index()), (5, 8))
+        self.assertTrue(page.has_next())
+
+    def test_invalid_cursor_is_rejected(self):
+        queryset, _ = catalog.filter_cards(QueryDict('order=name'))
+        _, first = catalog.paginate(queryset, QueryDict('order=name'), 3, keyset=('name', False))
+        for token in ('lixo', 'W10', catalog.encode_cursor('cmc', first.object_list[-1], 3)):
+            with self.subTest(token=token):
+                with self.assertRaises(Http404):
+                    catalog.paginate(queryset, QueryDict(f'order=name&after={token}'), 3, keyset=('name', False))
+        self.assertEqual(self.client.get('/cards/', {'after': 'lixo'}).status_code, 404)
+
+
+class QueryParserTests(TestCase):
+    """Sintaxe Scryfall (cards/query.py): tokens, arvore, frases, erros e o filtro no banco"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bolt = make_card('Lightning Bolt', type_line='Instant', cmc=1, colors='R', color_identity='R')
+        cls.elves = make_card('Llanowar Elves', type_line='Creature — Elf Druid', cmc=1, colors='G',
+                              color_identity='G', power='1', toughness='1')
+        cls.angel = make_card('Baneslayer Angel', type_line='Creature — Angel', cmc=5, colors='W',
+                              color_identity='W', power='5', toughness='5', rarity='mythic')
+        cls.ring = make_card('Sol Ring', type_line='Artifact', cmc=1, rarity='uncommon')
+        cls.charm = make_card('Boros Charm', type_line='Instant', cmc=2, colors='R,W', color_identity='R,W',
+                              rarity='uncommon')
+
+    def tree(self, text):
+        return self.render(query.Parser(query.tokenize(text)).parse())
+
+    def render(self, node):
+        """Arvore em tuplas/strings para comparar"""
+        if isinstance(node, query.Term):
+            return str(node)
+        kind, children = node
+        if kind == 'not':
+            return ('not', self.render(children))
+        return (kind, [self.render(child) for child in children])
+
+    def names(self, text):
+        return sorted(query.parse(text).apply(Card.objects.all()).values_list('name', flat=True))
+
+    def test_operators_and_aliases(self):
+        terms = query.tokenize('mv>=3 pow<2 tou!=1 c:wu id<=esper r=m s:cmr')
+        self.assertEqual([(t.key, t.op, t.value) for t in terms], [
+            ('cmc', '>=', '3'), ('power', '<', '2'), ('toughness', '!=', '1'), ('color', ':', 'wu'),
+            ('identity', '<=', 'esper'), ('rarity', '=', 'm'), ('set', ':', 'cmr'),
+        ])
+        self.assertEqual(self.tree('!"sol ring"'), 'name="sol ring"')
+
+    def test_negation_or_and_parentheses(self):
+        self.assertEqual(self.tree('-t:creature'), ('not', 'type:creature'))
+        self.assertEqual(self.tree('t:instant or t:artifact cmc=1'),
+                         ('or', ['type:instant', ('and', ['type:artifact', 'cmc=1'])]))
+        self.assertEqual(self.tree('(t:instant or t:artifact) cmc=1'),
+                         ('and', [('or', ['type:instant', 'type:artifact']), 'cmc=1']))
+        self.assertEqual(self.tree('-(c:r or c:g) AND t:creature'),
+                         ('and', [('not', ('or', ['color:r', 'color:g'])), 'type:creature']))
+
+    def test_filters_in_database(self):
+        self.assertEqual(self.names('t:creature cmc<=2'), ['Llanowar Elves'])
+        self.assertEqual(self.names('-t:creature'), ['Boros Charm', 'Lightning Bolt', 'Sol Ring'])
+        self.assertEqual(self.names('c:r or c:g'), ['Boros Charm', 'Lightning Bolt', 'Llanowar Elves'])
+        self.assertEqual(self.names('c=r'), ['Lightning Bolt'])
+        self.assertEqual(self.names('id<=boros t:instant'), ['Boros Charm', 'Lightning Bolt'])
+        self.assertEqual(self.names('(t:instant or t:artifact) cmc=1'), ['Lightning Bolt', 'Sol Ring'])
+        self.assertEqual(self.names('-(t:instant or t:artifact) pow>=5'), ['Baneslayer Angel'])
+        self.assertEqual(self.names('r>=uncommon -r:mythic'), ['Boros Charm', 'Sol Ring'])
+        self.assertEqual(self.names('!"sol ring"'), ['Sol Ring'])
+
+    def test_loose_words_and_quoted_phrases(self):
+        self.assertEqual(query.parse('goblin "sol ring" elf').phrases, ['goblin', 'sol ring', 'elf'])
+        self.assertEqual(query.parse('lightning bolt t:instant').phrases, ['lightning bolt'])
+        self.assertEqual(query.parse('"sol ring"').phrases, ['sol ring'])
+        self.assertEqual(query.parse('').phrases, [])
+
+    def test_errors(self):
+        for text in ('"', 'o:""', '-"', 'cmc>=', '(t:creature', 't:creature)', '()', 'or', 'foo:bar',
+                     'cmc>=x', 'c:xyz', 'r:foo', 'is:foo', 't<creature', 's>cmr'):
+            with self.subTest(text=text):
+                with self.assertRaises(query.QueryError):
+                    query.parse(text)
+
+    def test_explain_restricted(self):
+        params = {'q': 't:instant', 'explain': '1'}
+        self.assertEqual(self.client.get('/cards/api/query/', params).status_code, 403)
+        self.assertNotIn('explain', self.client.get('/cards/api/query/', {'q': 't:instant'}).json())
+        with override_settings(DEBUG=True):
+            data = self.client.get('/cards/api/query/', params).json()
+        self.assertIn('sql', data['explain'])
+
+
+class ResultCacheTests(TestCase):
+    """Chave do cache de resultados so com os parametros da pagina; nivel em arquivo limitado"""
+
+    def setUp(self):
+        results.clear()
+
+    def test_key_uses_only_page_params(self):
+        build = mock.Mock(return_value=['ok'])
+        fields = ('theme', 'order')
+        for query_string in ('theme=tokens', 'theme=tokens&utm=1', 'tab=2&theme=tokens&x=42', 'order=&theme=tokens'):
+            self.assertEqual(results.cached_result('page', QueryDict(query_string), fields, build), ['ok'])
+        self.assertEqual(build.call_count, 1)
+        results.cached_result('page', QueryDict('theme=tokens&order=cmc'), fields, build)
+        results.cached_result('other', QueryDict('theme=tokens'), fields, build)
+        self.assertEqual(build.call_count, 3)
+
+    def test_view_ignores_unknown_params(self):
+        misses = results.stats['misses']
+        for junk in ('1', '2', '3'):
+            self.client.get('/cards/archetypes/', {'theme': 'tokens', 'junk': junk})
+        self.assertEqual(results.stats['misses'], misses + 1)
+
+    def test_file_tier_keeps_newest_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            files = results.FileCache(directory, max_files=3)
+            for i in range(5):
+                files.set(f'k{i}', 1, b'data')
+                # mtime crescente mesmo em sistemas de arquivo com resolucao de 1s
+                os.utime(files.path(f'k{i}', 1), (1000 + i, 1000 + i))
+            self.assertEqual(sorted(os.listdir(directory)), ['v1-k2.pkl', 'v1-k3.pkl', 'v1-k4.pkl'])
+            self.assertIsNone(files.get('k0', 1))
+            self.assertEqual(files.get('k4', 1), b'data')
+
+
+class FilterValidationTests(TestCase):
+    """Filtros numericos invalidos: 400 na API/exportacao, aviso no catalogo (nunca 500)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_card('Sol Ring', cmc=1)
+        make_card('Serra Angel', type_line='Creature — Angel', cmc=5, power='4', toughness='4')
+        make_card('Tarmogoyf', type_line='Creature — Lhurgoyf', cmc=2, power='*', toughness='1+*')
+
+    def names(self, query_string):
+        queryset, _ = catalog.filter_cards(QueryDict(query_string))
+        return sorted(queryset.values_list('name', flat=True))
+
+    def test_numeric_filters(self):
+        self.assertEqual(self.names('cmc_min=1.5'), ['Serra Angel', 'Tarmogoyf'])
+        self.assertEqual(self.names('cmc_max= 1 '), ['Sol Ring'])
+        self.assertEqual(self.names('power_min=2'), ['Serra Angel'])
+        self.assertEqual(self.names('tough_max=4&cmc_min='), ['Serra Angel'])
+        for query_string in ('cmc_min=abc', 'cmc_max=nan', 'cmc_min=inf', 'power_min=2.5', 'power_max=*',
+                             'tough_min=x'):
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(catalog.FilterError):
+                    catalog.filter_cards(QueryDict(query_string))
+
+    def test_api_and_export_reject_invalid_filters(self):
+        response = self.client.get('/cards/api/search/', {'cmc_min': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cmc_min', response.json()['error'])
+        self.assertEqual(self.client.get('/cards/api/search/', {'after': 'lixo'}).status_code, 400)
+        self.assertEqual(self.client.get('/cards/api/export/', {'cmc_max': 'abc'}).status_code, 400)
+        with self.assertRaises(CommandError):
+            call_command('export_cards', filter='power_min=abc', stdout=mock.Mock(), stderr=mock.Mock())
+
+    def test_catalog_shows_filter_error(self):
+        response = self.client.get('/cards/', {'cmc_min': 'abc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('cmc_min', response.context['filter_error'])
+        self.assertEqual(list(response.context['cards']), [])
+
+
+class CardPageTests(TestCase):
+    """Pagina precomputada da carta: uso em decks em queries fixas, parte das cartas sempre atual"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from accounts.models import PlayerProfile
+        from decks.models import Deck, DeckCard
+        commander = make_card('Krenko, Mob Boss', type_line='Legendary Creature — Goblin Warrior', cmc=4)
+        cls.ring = make_card('Sol Ring', set_code='c21')
+        cls.reprint = make_card('Sol Ring', set_code='cmr')
+        cls.signet = make_card('Arcane Signet')
+        owner = PlayerProfile.objects.create(session_key='pages-test', nickname='Tester')
+        now = timezone.now()
+        for i in range(14):
+            deck = Deck.objects.create(owner=owner, name=f'Deck {i}', commander=commander)
+            DeckCard.objects.create(deck=deck, card=cls.ring)
+            if i % 3 == 0:
+                # Duas impressoes do mesmo nome no mesmo deck
+                DeckCard.objects.create(deck=deck, card=cls.reprint, quantity=2)
+            if i % 2 == 0:
+                DeckCard.objects.create(deck=deck, card=cls.signet)
+            # Mais recentes = i maior, exceto o deck 5 (o mais recente de todos)
+            Deck.objects.filter(pk=deck.pk).update(updated_at=now - timedelta(hours=14 - i) + timedelta(days=i == 5))
+
+    def expected_usage(self, name):
+        from decks.models import Deck, DeckCard
+        rows = DeckCard.objects.filter(card__name=name)
+        decks = Deck.objects.filter(cards__card__name=name).distinct().order_by('-updated_at')
+        return (
+            decks.count(),
+            sum(row.quantity for row in rows),
+            [deck.name for deck in decks[:pages.TOP_DECKS]],
+        )
+
+    def test_deck_usage_in_fixed_queries(self):
+        names = ['Sol Ring', 'Arcane Signet', 'Krenko, Mob Boss']
+        with self.assertNumQueries(2):
+            usage = pages._deck_usage(names)
+        for name in names:
+            with self.subTest(name=name):
+                decks, copies, top = usage[name]
+                self.assertEqual((decks, copies, [deck['name'] for deck in top]), self.expected_usage(name))
+        self.assertEqual(usage['Sol Ring'][2][0], {
+            'id': usage['Sol Ring'][2][0]['id'], 'name': 'Deck 5', 'commander': 'Krenko, Mob Boss',
+            'commander_image': None, 'owner': 'Tester',
+        })
+        self.assertEqual(usage['Krenko, Mob Boss'], (0, 0, []))
+
+    def test_stale_page_is_rebuilt_on_visit(self):
+        page = pages.page_for(self.reprint)
+        self.assertEqual(page.card, self.ring)
+        self.assertEqual(page.printing_count, 2)
+        self.assertEqual(page.deck_count, 14)
+
+        make_card('Sol Ring', set_code='ltc')
+        CardDataVersion.bump()  # como no import
+        page = pages.page_for(self.ring)
+        self.assertEqual(page.printing_count, 3)
+        self.assertEqual(page.cards_version, CardDataVersion.current())
+        # Sem mudancas nas cartas: nada e refeito
+        with self.assertNumQueries(2):
+            pages.page_for(self.ring)
+
+    def test_import_refreshes_pages_before_bump(self):
+        pages.page_for(self.ring)
+        import_card('Sol Ring', set_code='ltc')
+        finish_import()
+        page = CardPage.objects.get(name='Sol Ring')
+        self.assertEqual(page.printing_count, 3)
+        self.assertEqual(page.cards_version, CardDataVersion.current())
+        # A versao nova nao deixa a pagina para ser refeita na visita
+        with self.assertNumQueries(2):
+            pages.page_for(self.ring)
+
+
+class CardListColorTests(TestCase):
+
+    def test_colorless_filter(self):
+        ring = make_card('Sol Ring')
+        bolt = make_card('Lightning Bolt', colors='R', color_identity='R')
+        boros = make_card('Boros Charm', colors='R,W', color_identity='R,W')
+        for color, expected in (('C', [ring]), ('c', [ring]), ('R', [boros, bolt]), ('', [boros, bolt, ring])):
+            with self.subTest(color=color):
+                response = self.client.get('/cards/list/', {'color': color})
+                self.assertEqual(list(response.context['cards']), expected)
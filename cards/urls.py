@@ -1,8 +1,8 @@
 from django.urls import path
 from .views import (
     CardListView, CardCatalogView, CardDetailView,
-    CardAutocompleteView, RandomCardView, CardAssistantView,
-    CommanderIdeasView, ArchetypeFinderView
+    CardAutocompleteView, CardQueryView, CardSearchAPIView, CardExportView, RandomCardView,
+    CardAssistantView, CommanderIdeasView, ArchetypeFinderView
 )
 
 urlpatterns = [
@@ -27,5 +27,8 @@ urlpatterns = [
 
     # API endpoints
     path('api/autocomplete/', CardAutocompleteView.as_view(), name='card_autocomplete'),
+    path('api/query/', CardQueryView.as_view(), name='card_query'),
+    path('api/search/', CardSearchAPIView.as_view(), name='card_search_api'),
+    path('api/export/', CardExportView.as_view(), name='card_export'),
     path('random/', RandomCardView.as_view(), name='card_random'),
 ]
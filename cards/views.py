@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.views.generic import ListView, DetailView
 from django.views import View
-from django.db.models import Q, Count
+from django.db.models import Case, Count, Q, When
 from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
 from .models import Card
+from .colors import color_q
+from .stats import order_by_stat, range_q
+from . import autocomplete, catalog, export, facets, pages, query, results, rules, sampling, similarity, tagging
 
 
 class CardListView(ListView):
@@ -18,15 +22,18 @@ class CardListView(ListView):
 
         search = self.request.GET.get('search', '').strip()
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(oracle_text__icontains=search) |
-                Q(type_line__icontains=search)
+            queryset = queryset.search(
+                search,
+                fields=('name', 'oracle_text', 'type_line', 'back_face_name', 'back_face_oracle_text'),
+                ranked=True
             )
 
         color = self.request.GET.get('color', '').strip().upper()
-        if color:
-            queryset = queryset.filter(colors__icontains=color)
+        if color in ('C', 'COLORLESS'):
+            # Incolor e a mascara 0; no color_q ela incluiria todas as mascaras
+            queryset = queryset.filter(colors_mask=0)
+        elif color:
+            queryset = queryset.filter(color_q(color, field='colors_mask'))
 
         set_code = self.request.GET.get('set', '').strip().lower()
         if set_code:
@@ -36,15 +43,27 @@ class CardListView(ListView):
         if rarity:
             queryset = queryset.filter(rarity=rarity)
 
+        if not search:
+            queryset = queryset.order_by(*catalog.keyset_order('name'))
+
         return queryset
 
+    def paginate_queryset(self, queryset, page_size):
+        """Paginacao por cursor (after=) na ordem por nome; busca ranqueada usa paginas"""
+        self.data_version = catalog.data_version()
+        keyset = None if self.request.GET.get('search', '').strip() else ('name', False)
+        paginator, page = catalog.paginate(
+            queryset, self.request.GET, page_size, self.page_kwarg, self.data_version, keyset, scope='list'
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search'] = self.request.GET.get('search', '')
         context['color'] = self.request.GET.get('color', '')
         context['set'] = self.request.GET.get('set', '')
         context['rarity'] = self.request.GET.get('rarity', '')
-        context['total_cards'] = Card.objects.count()
+        context['total_cards'] = catalog.cached('total-cards', Card.objects.count, self.data_version)
         return context
 
 
@@ -63,122 +82,26 @@ class CardCatalogView(ListView):
             'tab_id': get_tab_id(self.request)
         }
 
-    def get_queryset(self):
-        queryset = Card.objects.all()
-
-        # Busca por nome/texto
-        search = self.request.GET.get('q', '').strip()
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(oracle_text__icontains=search)
-            )
-
-        # Filtro de cores - multiplas cores
-        colors = self.request.GET.getlist('color')
-        color_mode = self.request.GET.get('color_mode', 'include')  # include, exact, at_most
-
-        if colors:
-            if color_mode == 'exact':
-                # Exatamente essas cores
-                color_str = ','.join(sorted(colors))
-                queryset = queryset.filter(color_identity=color_str)
-            elif color_mode == 'at_most':
-                # No maximo essas cores (pode ser subset)
-                for card in queryset:
-                    card_colors = set(card.color_identity.split(',')) if card.color_identity else set()
-                    allowed = set(colors)
-                    if not card_colors.issubset(allowed):
-                        queryset = queryset.exclude(id=card.id)
-            else:
-                # Inclui essas cores (default)
-                for c in colors:
-                    queryset = queryset.filter(color_identity__icontains=c)
-
-        # Filtro colorless
-        if 'C' in colors or self.request.GET.get('colorless'):
-            queryset = queryset.filter(Q(color_identity='') | Q(color_identity__isnull=True))
-
-        # Filtro de tipo
-        card_type = self.request.GET.get('type', '').strip()
-        if card_type:
-            queryset = queryset.filter(type_line__icontains=card_type)
-
-        # Filtro de subtipo
-        subtype = self.request.GET.get('subtype', '').strip()
-        if subtype:
-            queryset = queryset.filter(type_line__icontains=subtype)
-
-        # Filtro de CMC (custo de mana convertido)
-        cmc_min = self.request.GET.get('cmc_min', '').strip()
-        cmc_max = self.request.GET.get('cmc_max', '').strip()
-        if cmc_min:
-            queryset = queryset.filter(cmc__gte=float(cmc_min))
-        if cmc_max:
-            queryset = queryset.filter(cmc__lte=float(cmc_max))
-
-        # Filtro de poder (para criaturas)
-        power_min = self.request.GET.get('power_min', '').strip()
-        power_max = self.request.GET.get('power_max', '').strip()
-        if power_min:
-            try:
-                queryset = queryset.filter(power__gte=str(int(power_min)))
-            except ValueError:
-                pass
-        if power_max:
-            try:
-                queryset = queryset.filter(power__lte=str(int(power_max)))
-            except ValueError:
-                pass
-
-        # Filtro de resistencia (para criaturas)
-        tough_min = self.request.GET.get('tough_min', '').strip()
-        tough_max = self.request.GET.get('tough_max', '').strip()
-        if tough_min:
-            try:
-                queryset = queryset.filter(toughness__gte=str(int(tough_min)))
-            except ValueError:
-                pass
-        if tough_max:
-            try:
-                queryset = queryset.filter(toughness__lte=str(int(tough_max)))
-            except ValueError:
-                pass
-
-        # Filtro de raridade
-        rarity = self.request.GET.getlist('rarity')
-        if rarity:
-            queryset = queryset.filter(rarity__in=rarity)
-
-        # Filtro de set/colecao
-        set_code = self.request.GET.get('set', '').strip().lower()
-        if set_code:
-            queryset = queryset.filter(set_code=set_code)
-
-        # Busca no texto do oracle (keywords)
-        oracle_text = self.request.GET.get('oracle', '').strip()
-        if oracle_text:
-            queryset = queryset.filter(oracle_text__icontains=oracle_text)
-
-        # Ordenacao
-        order = self.request.GET.get('order', 'name')
-        order_dir = self.request.GET.get('dir', 'asc')
+    def get_keyset(self):
+        return catalog.keyset_for(self.request.GET)
 
-        order_fields = {
-            'name': 'name',
-            'cmc': 'cmc',
-            'power': 'power',
-            'toughness': 'toughness',
-            'rarity': 'rarity',
-            'set': 'set_code',
-        }
-
-        if order in order_fields:
-            field = order_fields[order]
-            if order_dir == 'desc':
-                field = f'-{field}'
-            queryset = queryset.order_by(field)
+    def paginate_queryset(self, queryset, page_size):
+        """Pagina + total numa varredura (total em cache por filtros, ver cards/catalog.py)"""
+        self.data_version = catalog.data_version()
+        paginator, page = catalog.paginate(
+            queryset, self.request.GET, page_size, self.page_kwarg, self.data_version, self.get_keyset()
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
 
+    def get_queryset(self):
+        # Filtros e ordenacao compartilhados com a API de busca (cards/catalog.py)
+        self.filter_error = None
+        try:
+            queryset, self.query_error = catalog.filter_cards(self.request.GET)
+        except catalog.FilterError as e:
+            # Ex: cmc_min=abc na URL: pagina sem resultados com o aviso
+            self.filter_error, self.query_error = str(e), None
+            queryset = Card.objects.none()
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -189,11 +112,14 @@ class CardCatalogView(ListView):
 
         # Parametros atuais para manter nos links de paginacao
         context['current_params'] = self.request.GET.copy()
-        if 'page' in context['current_params']:
-            del context['current_params']['page']
+        for param in ('page', 'after'):
+            if param in context['current_params']:
+                del context['current_params'][param]
 
         # Valores atuais dos filtros
         context['q'] = self.request.GET.get('q', '')
+        context['query_error'] = self.query_error
+        context['filter_error'] = self.filter_error
         context['selected_colors'] = self.request.GET.getlist('color')
         context['color_mode'] = self.request.GET.get('color_mode', 'include')
         context['selected_type'] = self.request.GET.get('type', '')
@@ -211,12 +137,15 @@ class CardCatalogView(ListView):
         context['dir'] = self.request.GET.get('dir', 'asc')
         context['view_mode'] = self.request.GET.get('view', 'grid')
 
-        # Estatisticas
-        context['total_cards'] = Card.objects.count()
-        context['result_count'] = self.get_queryset().count()
+        # Estatisticas (o total filtrado vem do paginator; nada aqui refaz a busca)
+        context['total_cards'] = catalog.cached('total-cards', Card.objects.count, self.data_version)
+        context['result_count'] = context['paginator'].count
+        context['result_count_approximate'] = getattr(context['paginator'], 'approximate', False)
 
         # Sets disponiveis (para dropdown)
-        context['available_sets'] = Card.objects.values('set_code', 'set_name').distinct().order_by('set_name')[:100]
+        context['available_sets'] = catalog.cached('available-sets', lambda: list(
+            Card.objects.values('set_code', 'set_name').distinct().order_by('set_name')[:100]
+        ), self.data_version)
 
         # Tipos de carta comuns
         context['card_types'] = [
@@ -224,6 +153,22 @@ class CardCatalogView(ListView):
             'Artifact', 'Planeswalker', 'Land', 'Legendary'
         ]
 
+        # Contagens por faceta do resultado atual (uma query agrupada, em cache por filtros;
+        # sem cache e a segunda varredura da pagina, ver cards/facets.py)
+        counts = catalog.cached(
+            f'catalog-facets:{catalog.filter_key(self.request.GET)}',
+            lambda: facets.facet_counts(self.object_list),
+            self.data_version,
+        )
+        context['facets'] = counts
+        context['type_facets'] = [(t, counts['type'].get(t.lower(), 0)) for t in context['card_types']]
+        context['cmc_facets'] = [
+            (label, low, high, counts['cmc'].get(label, 0)) for label, low, high in facets.CMC_BUCKETS
+        ]
+        context['available_sets'] = [
+            dict(s, count=counts['set'].get(s['set_code'], 0)) for s in context['available_sets']
+        ]
+
         # Subtipos comuns
         context['subtypes'] = [
             'Human', 'Elf', 'Goblin', 'Dragon', 'Zombie', 'Angel', 'Demon',
@@ -242,11 +187,16 @@ class CardDetailView(View):
         player = get_current_player(request)
         tab_id = get_tab_id(request)
 
+        # Impressoes, relacionados e uso em decks vem precomputados (cards/pages.py)
+        page = None
         if card_id:
             card = get_object_or_404(Card, id=card_id)
         elif card_name:
-            # Busca por nome (pode ter multiplas versoes)
-            card = Card.objects.filter(name__iexact=card_name).first()
+            page = pages.page_by_name(card_name)
+            card = page.card if page else None
+            if not card:
+                # Busca por nome (pode ter multiplas versoes)
+                card = Card.objects.filter(name__iexact=card_name).first()
             if not card:
                 # Tenta busca parcial
                 card = Card.objects.filter(name__icontains=card_name).first()
@@ -257,17 +207,7 @@ class CardDetailView(View):
             from django.http import Http404
             raise Http404("Card nao especificado")
 
-        # Outras versoes do mesmo card (reprints)
-        other_versions = Card.objects.filter(name=card.name).exclude(id=card.id).order_by('-set_code')[:10]
-
-        # Cards relacionados (mesmo set ou tipo similar)
-        related_cards = Card.objects.filter(
-            Q(set_code=card.set_code) | Q(type_line__icontains=card.type_line.split()[0] if card.type_line else '')
-        ).exclude(id=card.id).order_by('?')[:8]
-
-        # Decks que usam este card
-        from decks.models import DeckCard
-        decks_using = DeckCard.objects.filter(card=card).select_related('deck', 'deck__owner', 'deck__commander')[:10]
+        page = pages.page_for(card, page)
 
         # Verificar legalidade (simplificado - baseado em se o card existe)
         formats_legal = {
@@ -280,9 +220,11 @@ class CardDetailView(View):
 
         context = {
             'card': card,
-            'other_versions': other_versions,
-            'related_cards': related_cards,
-            'decks_using': decks_using,
+            'other_versions': pages.other_versions(page, card),
+            'printing_count': page.printing_count,
+            'related_cards': page.related,
+            'decks_using': page.top_decks,
+            'deck_count': page.deck_count,
             'formats_legal': formats_legal,
             'player': player,
             'tab_id': tab_id,
@@ -299,18 +241,155 @@ class CardAutocompleteView(View):
         if len(q) < 2:
             return JsonResponse({'results': []})
 
-        cards = Card.objects.filter(name__icontains=q).values(
-            'id', 'name', 'mana_cost', 'type_line', 'image_small'
-        ).distinct()[:15]
+        # Indice em memoria: uma entrada por carta canonica, prefixos primeiro (cards/autocomplete.py)
+        return JsonResponse({'results': autocomplete.lookup(q)})
 
-        return JsonResponse({'results': list(cards)})
+
+class CardQueryView(View):
+    """API de busca com a sintaxe Scryfall (cards/query.py); explain=1 inclui o plano (DEBUG ou staff)"""
+
+    LIMIT = 50
+    MAX_LIMIT = 200
+    FIELDS = ('id', 'name', 'mana_cost', 'cmc', 'type_line', 'set_code', 'rarity', 'image_small')
+
+    def get(self, request):
+        q = request.GET.get('q', '').strip()
+        if not q:
+            return JsonResponse({'error': 'Parametro q obrigatorio'}, status=400)
+        explain = bool(request.GET.get('explain'))
+        if explain and not (settings.DEBUG or request.user.is_staff):
+            # SQL e plano do banco expoem o schema
+            return JsonResponse({'error': 'Acesso restrito'}, status=403)
+        try:
+            parsed = query.parse(q)
+        except query.QueryError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        try:
+            limit = min(max(int(request.GET.get('limit', self.LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            limit = self.LIMIT
+
+        queryset = parsed.apply(Card.objects.all(), ranked=bool(parsed.phrases))
+        if not parsed.phrases:
+            queryset = queryset.order_by(*catalog.keyset_order('name'))
+        rows = list(queryset.values(*self.FIELDS)[:limit + 1])
+        data = {'query': q, 'results': rows[:limit], 'has_more': len(rows) > limit}
+        if explain:
+            data['explain'] = parsed.explain(queryset)
+        return JsonResponse(data)
+
+
+class CardSearchAPIView(View):
+    """API JSON do catalogo: mesmos filtros, fields= (colunas), cursor after= e ETag"""
+
+    LIMIT = 50
+    MAX_LIMIT = 200
+    DEFAULT_FIELDS = ('id', 'name', 'mana_cost', 'cmc', 'type_line', 'set_code', 'rarity', 'image_small')
+
+    def etag(self, request, version):
+        """Mesma query string + mesma versao das cartas = mesma resposta"""
+        import hashlib
+        params = sorted((name, sorted(request.GET.getlist(name))) for name in request.GET)
+        return '"%s"' % hashlib.sha1(repr((version, params)).encode()).hexdigest()
+
+    def get(self, request):
+        from django.http import Http404, HttpResponseNotModified
+        from django.utils.http import parse_etags
+
+        try:
+            fields = catalog.parse_fields(request.GET.get('fields'), self.DEFAULT_FIELDS)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        try:
+            limit = min(max(int(request.GET.get('limit', self.LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            limit = self.LIMIT
+
+        # Repeticao da mesma busca sem mudanca nas cartas: 304 sem rodar a query
+        version = catalog.data_version()
+        etag = self.etag(request, version)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        try:
+            queryset, query_error = catalog.filter_cards(request.GET)
+        except catalog.FilterError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        keyset = catalog.keyset_for(request.GET)
+        # So as colunas pedidas (mais id e o campo do cursor)
+        columns = set(fields) | {'id'}
+        if keyset:
+            columns.add(catalog.KEYSET_FIELDS[keyset[0]])
+        try:
+            paginator, page = catalog.paginate(queryset.only(*columns), request.GET, limit, version=version, keyset=keyset)
+        except catalog.InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Http404 as e:
+            return JsonResponse({'error': str(e)}, status=404)
+
+        next_params = request.GET.copy()
+        for param in ('page', 'after'):
+            next_params.pop(param, None)
+        if page.next_cursor:
+            next_params['after'] = page.next_cursor
+        elif page.has_next():
+            next_params['page'] = page.next_page_number()
+
+        data = {
+            'count': paginator.count,
+            'count_approximate': paginator.approximate,
+            'results': [{field: getattr(card, field) for field in fields} for card in page.object_list],
+            'next_cursor': page.next_cursor,
+            'next': f'{request.path}?{next_params.urlencode()}' if page.has_next() else None,
+        }
+        if query_error:
+            data['query_error'] = query_error
+        response = JsonResponse(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'  # sempre revalidar (barato: 304)
+        return response
+
+
+class CardExportView(View):
+    """Exportacao do catalogo filtrado em NDJSON ou CSV (streaming, memoria constante)"""
+
+    def get(self, request):
+        from django.http import StreamingHttpResponse
+
+        fmt = request.GET.get('format', 'ndjson')
+        if fmt not in export.FORMATS:
+            return JsonResponse({'error': f'Formato invalido: {fmt}'}, status=400)
+        try:
+            fields = catalog.parse_fields(request.GET.get('fields'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        compress = request.GET.get('gzip') in ('1', 'true', 'yes')
+
+        try:
+            queryset, query_error = catalog.filter_cards(request.GET)
+        except catalog.FilterError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        content_type, extension = export.FORMATS[fmt]
+        filename = f'cards.{extension}'
+        if compress:
+            content_type, filename = 'application/gzip', filename + '.gz'
+        response = StreamingHttpResponse(export.stream(queryset, fields, fmt, compress), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if query_error:
+            # Sintaxe invalida: exportou a busca por texto (como o catalogo)
+            response['X-Query-Error'] = query_error
+        return response
 
 
 class RandomCardView(View):
     """Retorna um card aleatorio"""
 
     def get(self, request):
-        card = Card.objects.order_by('?').first()
+        card = sampling.random_card()
         if card:
             from django.shortcuts import redirect
             return redirect('card_detail', card_id=card.id)
@@ -320,211 +399,9 @@ class RandomCardView(View):
 class CardAssistantView(View):
     """Assistente para encontrar cards similares baseado em mecanicas, tipo, cores, etc."""
 
-    # Keywords mecanicos para matching (nome, patterns, peso)
-    # Peso maior = mecanica mais especifica/importante
-    MECHANIC_KEYWORDS = [
-        # ===== CRIATURAS MODIFICADAS (tema especifico) =====
-        ('modified_creatures', ['modified creature', 'modified permanent', 'each modified', 'modified you control'], 15),
-        ('equipment_synergy', ['equipped creature', 'equip cost', 'whenever .* becomes equipped', 'equipment you control', 'equip \\{', 'attach', 'equipped with'], 12),
-        ('aura_synergy', ['enchanted creature', 'enchant creature', 'whenever .* becomes enchanted', 'auras you control', 'aura spell', 'enchanted permanent'], 12),
-        ('counter_plus', ['\\+1/\\+1 counter', 'put .* counter', 'with .* counter', 'enters .* counter', 'additional .* counter'], 10),
-        ('counter_minus', ['-1/-1 counter', 'remove .* counter'], 8),
-        ('counter_other', ['loyalty counter', 'charge counter', 'time counter', 'verse counter', 'lore counter'], 7),
-
-        # ===== TRIGGERS DE ZONA =====
-        ('etb', ['enters the battlefield', 'enters play', 'when .* enters', 'whenever .* enters'], 8),
-        ('etb_tapped', ['enters .* tapped'], 5),
-        ('ltb', ['leaves the battlefield', 'whenever .* leaves'], 7),
-        ('death_trigger', ['when .* dies', 'whenever .* dies', 'whenever another .* dies', 'if .* would die'], 9),
-        ('graveyard_trigger', ['whenever .* put into .* graveyard', 'card is put into your graveyard'], 8),
-        ('cast_trigger', ['whenever you cast', 'when you cast', 'whenever .* casts'], 7),
-        ('spell_trigger', ['whenever .* spell', 'instant or sorcery'], 6),
-
-        # ===== RECURSAO/GRAVEYARD =====
-        ('self_recursion', ['return .* from your graveyard to the battlefield', 'return this card from your graveyard', 'return .* from your graveyard to your hand'], 12),
-        ('creature_recursion', ['return .* creature .* from .* graveyard', 'creature card from your graveyard', 'return target creature card'], 10),
-        ('reanimator', ['put .* from .* graveyard .* onto the battlefield', 'reanimate'], 11),
-        ('graveyard_matters', ['cards in your graveyard', 'for each card in your graveyard', 'graveyard have', 'exile .* from .* graveyard'], 8),
-        ('escape_recursion', ['escape', 'from your graveyard'], 7),
-        ('flashback', ['flashback', 'cast .* from your graveyard'], 8),
-        ('unearth', ['unearth'], 7),
-
-        # ===== COMBATE =====
-        ('attack_trigger', ['whenever .* attacks', 'when .* attacks', 'attacking creature', 'attacks alone', 'attack each', 'must attack'], 8),
-        ('combat_damage', ['deals combat damage', 'combat damage to a player', 'combat damage to an opponent'], 9),
-        ('block_trigger', ['whenever .* blocks', 'when .* blocks', 'blocking creature', 'can block', "can't block"], 7),
-        ('combat_phase', ['beginning of combat', 'end of combat', 'declare attackers', 'declare blockers'], 6),
-        ('extra_combat', ['additional combat', 'extra combat phase'], 10),
-        ('goad', ['goad', 'goaded'], 8),
-        ('battalion', ['battalion', 'attacks with .* other'], 7),
-        ('exalted', ['exalted', 'attacks alone'], 7),
-        ('double_strike', ['double strike'], 8),
-        ('first_strike', ['first strike'], 5),
-        ('vigilance', ['vigilance'], 4),
-        ('haste', ['haste'], 5),
-
-        # ===== EVASAO =====
-        ('flying', ['flying', 'has flying'], 5),
-        ('trample', ['trample'], 5),
-        ('menace', ['menace'], 5),
-        ('unblockable', ["can't be blocked", 'unblockable', 'is unblockable'], 7),
-        ('skulk', ['skulk'], 5),
-        ('shadow', ['shadow'], 6),
-        ('fear_intimidate', ['fear', 'intimidate', "can't be blocked except"], 6),
-        ('reach', ['reach'], 4),
-
-        # ===== DRAW/CARD ADVANTAGE =====
-        ('draw', ['draw a card', 'draw cards', 'draws a card', 'draw two', 'draw three'], 7),
-        ('draw_trigger', ['whenever you draw', 'when you draw', 'draw .* additional'], 9),
-        ('looting', ['draw .* then discard', 'discard .* then draw'], 8),
-        ('rummaging', ['discard .* draw'], 7),
-        ('impulse_draw', ['exile .* top .* you may play', 'exile .* top .* you may cast', 'play .* from exile'], 9),
-        ('card_selection', ['scry', 'look at the top', 'surveil', 'explore'], 6),
-        ('tutor', ['search your library for', 'search your library .* put .* hand'], 9),
-        ('tutor_top', ['search .* library .* put .* top'], 8),
-        ('wheel', ['each player .* draws', 'each player discards .* hand', 'wheel'], 10),
-
-        # ===== RAMP/MANA =====
-        ('land_ramp', ['search .* library .* land', 'land .* onto the battlefield', 'put .* land .* onto'], 8),
-        ('mana_dork', ['add .* mana', 'tap: add', '{t}: add'], 6),
-        ('mana_rock', ['mana of any', 'any color', 'add one mana'], 5),
-        ('treasure', ['treasure token', 'create .* treasure', 'treasures you control'], 7),
-        ('cost_reduction', ['cost .* less', 'costs .* less', 'reduce .* cost', 'without paying'], 8),
-        ('extra_land', ['play .* additional land', 'put .* land .* from your hand'], 8),
-        ('landfall', ['landfall', 'whenever a land enters', 'land enters the battlefield'], 9),
-
-        # ===== REMOVAL =====
-        ('destroy', ['destroy target', 'destroy all', 'destroys'], 6),
-        ('exile_removal', ['exile target', 'exile all', 'exiles'], 7),
-        ('damage_removal', ['deals .* damage to', 'deal .* damage', 'damage to each'], 6),
-        ('bounce', ['return .* to .* owner', "return .* to .* hand", 'bounce'], 6),
-        ('tuck', ['put .* on the bottom', 'shuffle .* into'], 7),
-        ('board_wipe', ['destroy all creature', 'exile all creature', 'all creatures get -', '-X/-X until'], 10),
-        ('spot_removal', ['destroy target creature', 'exile target creature', 'target creature gets -'], 7),
-        ('artifact_removal', ['destroy .* artifact', 'exile .* artifact'], 6),
-        ('enchantment_removal', ['destroy .* enchantment', 'exile .* enchantment'], 6),
-        ('planeswalker_removal', ['destroy .* planeswalker', 'damage to .* planeswalker'], 6),
-        ('fight', ['fight', 'fights'], 6),
-        ('deathtouch', ['deathtouch'], 6),
-
-        # ===== COUNTERSPELLS/CONTROL =====
-        ('counterspell', ['counter target spell', 'counter that spell', 'counter target .* spell'], 9),
-        ('counter_creature', ['counter target creature'], 8),
-        ('counter_noncreature', ['counter target noncreature'], 8),
-        ('tax', ['pay .* more', 'costs .* more', 'unless .* pays'], 7),
-        ('stax', ["can't .* more than", "opponents can't", "each player can't", 'players can.t'], 9),
-        ('control_steal', ['gain control', 'exchange control', 'gains control', 'take control'], 9),
-        ('copy', ['copy', 'copies', 'create a copy', 'becomes a copy', 'clone'], 8),
-        ('redirect', ['change .* target', 'new target'], 6),
-
-        # ===== PROTECTION =====
-        ('hexproof', ['hexproof'], 7),
-        ('shroud', ['shroud'], 6),
-        ('indestructible', ['indestructible', 'gains indestructible'], 8),
-        ('protection', ['protection from', 'has protection'], 7),
-        ('ward', ['ward'], 6),
-        ('regenerate', ['regenerate'], 5),
-        ('totem_armor', ['totem armor'], 7),
-        ('phase_out', ['phase out', 'phases out'], 6),
-
-        # ===== TOKENS =====
-        ('token_creation', ['create .* token', 'creates .* token', 'put .* token', 'tokens onto'], 8),
-        ('token_copy', ['copy of .* creature', 'token .* copy'], 9),
-        ('token_anthem', ['tokens you control', 'each token'], 7),
-        ('populate', ['populate'], 8),
-        ('treasure_tokens', ['treasure', 'create .* treasure'], 7),
-        ('food_tokens', ['food', 'create .* food'], 6),
-        ('clue_tokens', ['clue', 'investigate', 'create .* clue'], 6),
-
-        # ===== LIFE/LIFEGAIN =====
-        ('lifegain', ['gain .* life', 'gains .* life', 'you gain life'], 6),
-        ('lifegain_trigger', ['whenever you gain life', 'when you gain life'], 9),
-        ('lifelink', ['lifelink'], 6),
-        ('life_payment', ['pay .* life', 'lose .* life'], 6),
-        ('drain', ['lose .* life and you gain', 'loses .* life .* you gain', 'each opponent loses'], 8),
-        ('extort', ['extort'], 7),
-
-        # ===== SACRIFICE =====
-        ('sacrifice_cost', ['sacrifice a', 'sacrifices a', 'as an additional cost.*sacrifice', ', sacrifice'], 8),
-        ('sacrifice_trigger', ['whenever you sacrifice', 'whenever .* is sacrificed', 'whenever .* sacrifices'], 10),
-        ('sacrifice_outlet', ['sacrifice another', 'you may sacrifice'], 8),
-        ('aristocrats', ['whenever .* creature .* dies', 'whenever another creature', 'blood artist', 'drain'], 9),
-        ('treasure_sac', ['sacrifice .* treasure', 'sacrifice a treasure'], 6),
-
-        # ===== DISCARD =====
-        ('discard', ['discard a card', 'discards a card', 'discard .* hand', 'discard .* cards'], 6),
-        ('discard_trigger', ['whenever you discard', 'when you discard', 'whenever .* discards'], 8),
-        ('madness', ['madness'], 9),
-        ('opponent_discard', ['target player discards', 'opponent discards', 'each opponent discards'], 8),
-        ('hand_attack', ['discard .* at random', "target opponent's hand", 'look at .* hand'], 7),
-
-        # ===== MILL =====
-        ('mill', ['mill', 'put .* cards .* into .* graveyard', 'cards from the top .* into'], 8),
-        ('self_mill', ['mill yourself', 'your own .* graveyard'], 7),
-        ('opponent_mill', ['target player mills', 'opponent mills', 'each opponent mills'], 7),
-
-        # ===== PUMP/STATS =====
-        ('power_boost', ['gets \\+', 'get \\+', '\\+1/\\+1', '\\+X/\\+X', '\\+2/\\+2'], 5),
-        ('anthem', ['creatures you control get', 'other creatures you control', 'creatures you control have'], 9),
-        ('lord', ['other .* get', 'other .* you control get'], 9),
-        ('power_matters', ['power .* or greater', 'power .* or more', 'with power', 'total power'], 7),
-        ('toughness_matters', ['toughness .* or greater', 'with toughness', 'total toughness'], 6),
-        ('base_stats', ['base power and toughness'], 6),
-
-        # ===== FLICKER/BLINK =====
-        ('flicker', ['exile .* return .* to the battlefield', 'exile .* then return', 'flicker'], 9),
-        ('blink', ['blink', 'exile .* return .* at', 'exile .* return .* next'], 9),
-        ('etb_abuse', ['enters the battlefield .* again', 'reenter'], 8),
-
-        # ===== SPELLSLINGER =====
-        ('spellslinger', ['instant or sorcery', 'noncreature spell', 'whenever you cast .* instant', 'whenever you cast .* sorcery'], 9),
-        ('prowess', ['prowess', 'whenever you cast a noncreature'], 8),
-        ('magecraft', ['magecraft', 'whenever you cast or copy'], 9),
-        ('storm', ['storm'], 10),
-        ('spell_copy', ['copy .* instant', 'copy .* sorcery', 'copy that spell'], 9),
-
-        # ===== TRIBAL =====
-        ('tribal_lord', ['other .* you control', 'each .* you control'], 8),
-        ('tribal_cost', ['.* spells .* cost .* less', '.* you cast cost'], 7),
-        ('changeling', ['changeling', 'is every creature type'], 8),
-        ('party', ['party', 'cleric.*rogue.*warrior.*wizard'], 8),
-
-        # ===== COMMANDER SPECIFIC =====
-        ('commander_matters', ['commander', 'command zone', 'commander tax', 'from the command zone'], 10),
-        ('partner', ['partner'], 8),
-        ('experience', ['experience counter'], 9),
-        ('background', ['background'], 7),
-
-        # ===== MISC THEMES =====
-        ('proliferate', ['proliferate'], 10),
-        ('untap', ['untap', 'untaps', 'doesn\'t untap'], 6),
-        ('tap_ability', ['\\{t\\}:', 'tap .* creature', 'tap target'], 5),
-        ('convoke', ['convoke'], 7),
-        ('affinity', ['affinity'], 8),
-        ('improvise', ['improvise'], 7),
-        ('cascade', ['cascade'], 10),
-        ('suspend', ['suspend'], 8),
-        ('morph', ['morph', 'face down', 'face up', 'megamorph', 'manifest'], 8),
-        ('mutate', ['mutate'], 9),
-        ('transform', ['transform', 'transformed'], 7),
-        ('meld', ['meld'], 8),
-        ('energy', ['energy', '{e}'], 9),
-        ('historic', ['historic', 'legendary .* artifact .* saga'], 7),
-        ('saga', ['saga', 'lore counter'], 7),
-        ('vehicles', ['vehicle', 'crew'], 8),
-        ('planeswalker_synergy', ['planeswalker', 'loyalty', 'activate .* loyalty'], 7),
-        ('ninjutsu', ['ninjutsu'], 9),
-        ('cipher', ['cipher'], 7),
-        ('overload', ['overload'], 7),
-        ('kicker', ['kicker', 'kicked'], 6),
-        ('flashback', ['flashback'], 8),
-        ('buyback', ['buyback'], 7),
-        ('retrace', ['retrace'], 7),
-        ('jump_start', ['jump-start'], 7),
-        ('foretell', ['foretell'], 7),
-        ('adventure', ['adventure'], 8),
-        ('companion', ['companion'], 8),
-    ]
+    # Regras de mecanicas (nome, patterns, peso) e keywords: cards/rules.py
+    MECHANIC_KEYWORDS = rules.MECHANIC_KEYWORDS
+    KEYWORDS = rules.KEYWORDS
 
     def get_player_context(self, request):
         """Helper para obter jogador atual da sessao/tab"""
@@ -535,47 +412,23 @@ class CardAssistantView(View):
         }
 
     def extract_mechanics(self, oracle_text):
-        """Extrai mecanicas do texto do oracle com seus pesos"""
-        import re
-        if not oracle_text:
-            return {}
-
-        text = oracle_text.lower()
-        found_mechanics = {}  # nome -> peso
-
-        for mechanic_name, patterns, weight in self.MECHANIC_KEYWORDS:
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    found_mechanics[mechanic_name] = weight
-                    break
-
-        return found_mechanics
+        """Extrai mecanicas do texto do oracle com seus pesos (Matcher compilado em cards/tagging.py)"""
+        return tagging.extract_mechanics(oracle_text)
 
     def extract_keywords(self, oracle_text):
         """Extrai keywords especificas de MTG que nao estao nas mecanicas principais"""
-        # Keywords que indicam estrategias/archetypes especificos
-        KEYWORDS = [
-            # Habilidades de evasao/combate secundarias
-            'haste', 'vigilance', 'reach', 'deathtouch', 'first strike', 'double strike',
-            'flash', 'defender', 'prowess', 'skulk',
-            # Mechanics de set especificas que indicam sinergias
-            'landfall', 'cascade', 'storm', 'modular', 'persist', 'undying',
-            'evolve', 'exploit', 'fabricate', 'convoke', 'annihilator', 'infect',
-            'extort', 'heroic', 'constellation', 'ferocious', 'raid', 'enrage',
-            'explore', 'ascend', 'surveil', 'afterlife', 'adapt', 'mutate',
-            'escape', 'foretell', 'ward', 'training', 'connive', 'alliance',
-            'toxic', 'incubate', 'backup', 'bargain', 'offspring',
-        ]
-
-        if not oracle_text:
-            return set()
-
-        text = oracle_text.lower()
-        found = set()
-        for kw in KEYWORDS:
-            if kw in text:
-                found.add(kw)
-        return found
+        return tagging.extract_keywords(oracle_text)
+
+    def card_tags(self, card):
+        """(mecanicas, keywords) da carta: tags precomputadas ou regex se ainda nao tagueada"""
+        tags = getattr(card, 'precomputed_tags', None)
+        if tags is None:
+            hits = tagging.oracle_hits(card.oracle_text)
+            tags = card.precomputed_tags = {
+                'mechanic': tagging.extract_mechanics(None, hits),
+                'keyword': dict.fromkeys(tagging.extract_keywords(None, hits), 1),
+            }
+        return tags.get('mechanic', {}), set(tags.get('keyword', {}))
 
     def calculate_similarity(self, reference_card, candidate_card, filters):
         """Calcula score de similaridade entre duas cartas"""
@@ -583,8 +436,8 @@ class CardAssistantView(View):
         reasons = []
 
         # 1. Mecanicas do oracle text (peso baseado na especificidade da mecanica)
-        ref_mechanics = self.extract_mechanics(reference_card.oracle_text)
-        cand_mechanics = self.extract_mechanics(candidate_card.oracle_text)
+        ref_mechanics, ref_keywords = self.card_tags(reference_card)
+        cand_mechanics, cand_keywords = self.card_tags(candidate_card)
 
         # Calcular overlap com pesos
         mechanic_overlap = set(ref_mechanics.keys()) & set(cand_mechanics.keys())
@@ -599,8 +452,6 @@ class CardAssistantView(View):
             reasons.append(f"Mecanicas: {', '.join(mechanic_names)}")
 
         # 2. Keywords de MTG (peso baixo - 15 pontos max, ja que mecanicas cobrem muito)
-        ref_keywords = self.extract_keywords(reference_card.oracle_text)
-        cand_keywords = self.extract_keywords(candidate_card.oracle_text)
         keyword_overlap = ref_keywords & cand_keywords
         if keyword_overlap:
             kw_score = len(keyword_overlap) * 3
@@ -650,23 +501,13 @@ class CardAssistantView(View):
             score += 2
 
         # 6. Power/Toughness similar para criaturas (peso baixo - 5 pontos)
-        if reference_card.power and candidate_card.power:
-            try:
-                ref_power = int(reference_card.power) if reference_card.power.isdigit() else 0
-                cand_power = int(candidate_card.power) if candidate_card.power.isdigit() else 0
-                if abs(ref_power - cand_power) <= 1:
-                    score += 3
-            except:
-                pass
-
-        if reference_card.toughness and candidate_card.toughness:
-            try:
-                ref_tough = int(reference_card.toughness) if reference_card.toughness.isdigit() else 0
-                cand_tough = int(candidate_card.toughness) if candidate_card.toughness.isdigit() else 0
-                if abs(ref_tough - cand_tough) <= 1:
-                    score += 2
-            except:
-                pass
+        if reference_card.power_value is not None and candidate_card.power_value is not None:
+            if abs(reference_card.power_value - candidate_card.power_value) <= 1:
+                score += 3
+
+        if reference_card.toughness_value is not None and candidate_card.toughness_value is not None:
+            if abs(reference_card.toughness_value - candidate_card.toughness_value) <= 1:
+                score += 2
 
         # 7. Texto oracle similar (palavras chave especificas)
         if reference_card.oracle_text and candidate_card.oracle_text:
@@ -682,6 +523,127 @@ class CardAssistantView(View):
 
         return score, reasons
 
+    def attach_tags(self, cards):
+        """Anexa as tags precomputadas (uma query); cartas ainda nao tagueadas caem no regex"""
+        tagged = [c for c in cards if c.tagged_version == tagging.TAGS_VERSION]
+        tag_map = tagging.load_tags([c.id for c in tagged], kinds=('mechanic', 'keyword'))
+        for card in tagged:
+            card.precomputed_tags = tag_map.get(card.id, {})
+
+    def with_reasons(self, selected_card, items, filters):
+        """Motivos do calculate_similarity para as cartas exibidas (mesmo formato do fallback)"""
+        self.attach_tags([item['card'] for item in items])
+        for item in items:
+            _, item['reasons'] = self.calculate_similarity(selected_card, item['card'], filters)
+        return items
+
+    def similar_from_rows(self, selected_card, rows, filters):
+        """Resultado a partir das linhas de CardSimilarity (score guardado)"""
+        items = [{'card': row.similar, 'score': row.score} for row in rows]
+        return self.with_reasons(selected_card, items, filters)
+
+    def rank_similar(self, selected_card, queryset, filters, filtered=True, limit=48):
+        """Top cartas similares via indice NumPy"""
+        index = similarity.get_index()
+        mechanics, keywords = self.card_tags(selected_card)
+        candidate_ids = queryset.values_list('id', flat=True) if filtered else None
+        top = index.top(
+            selected_card, mechanics, keywords,
+            candidate_ids=candidate_ids, exclude_name=selected_card.name, limit=limit,
+        )
+
+        cards = Card.objects.in_bulk([card_id for card_id, _ in top])
+        items = [{'card': cards[card_id], 'score': score} for card_id, score in top if card_id in cards]
+        return self.with_reasons(selected_card, items, filters)
+
+    def rank_similar_python(self, selected_card, queryset, filters, limit=48):
+        """Fallback sem NumPy: score por par nos primeiros 3000 candidatos"""
+        candidates = list(queryset[:3000])
+        self.attach_tags(candidates)
+
+        scored_cards = []
+        seen_names = set()  # Backup para garantir unicidade
+
+        for card in candidates:
+            # Pular se ja vimos essa carta (backup de seguranca)
+            if card.name in seen_names:
+                continue
+            seen_names.add(card.name)
+
+            score, reasons = self.calculate_similarity(selected_card, card, filters)
+            if score > 10:  # Threshold minimo para incluir mais cartas
+                scored_cards.append({
+                    'card': card,
+                    'score': score,
+                    'reasons': reasons
+                })
+
+        # Ordenar por score
+        scored_cards.sort(key=lambda x: x['score'], reverse=True)
+        return scored_cards[:limit]
+
+    def find_similar(self, similar_to, filters):
+        """(carta de referencia, cartas similares); (None, []) se a referencia nao existe"""
+        # Buscar o card de referencia
+        selected_card = (
+            Card.objects.filter(name__iexact=similar_to).first() or
+            Card.objects.search(similar_to, fields=('name', 'back_face_name'), ranked=True).first()
+        )
+        if not selected_card:
+            return None, []
+        # Tags da referencia: as mesmas em todos os caminhos (score e motivos)
+        self.attach_tags([selected_card])
+
+        # Buscar cards candidatos (excluindo o proprio), uma impressao por nome
+        queryset = Card.objects.canonical().exclude(name=selected_card.name)
+
+        # Aplicar filtros opcionais
+        if filters['colors']:
+            queryset = queryset.filter(color_q(filters['colors']))
+
+        if filters['exclude_colors']:
+            queryset = queryset.filter(color_q(filters['exclude_colors'], 'exclude'))
+
+        if filters['type']:
+            queryset = queryset.search(filters['type'], fields=('type_line', 'back_face_type_line'))
+
+        if filters['subtype']:
+            queryset = queryset.search(filters['subtype'], fields=('type_line', 'back_face_type_line'))
+
+        if filters['cmc_min']:
+            queryset = queryset.filter(cmc__gte=float(filters['cmc_min']))
+        if filters['cmc_max']:
+            queryset = queryset.filter(cmc__lte=float(filters['cmc_max']))
+
+        if filters['power_min'] or filters['power_max']:
+            queryset = queryset.filter(range_q('power_value', filters['power_min'], filters['power_max']))
+
+        if filters['rarity']:
+            queryset = queryset.filter(rarity__in=filters['rarity'])
+
+        if filters['oracle']:
+            queryset = queryset.search(filters['oracle'], fields=('oracle_text', 'back_face_oracle_text'))
+
+        # Todas as mecanicas selecionadas (tags precomputadas)
+        if filters['mechanics']:
+            queryset = queryset.with_tags(*filters['mechanics'], kind='mechanic')
+
+        filtered = any(filters.values())
+        # Sem filtros: top-K precomputado (build_similar_cards), uma query
+        stored = None if filtered else similarity.similar_for(selected_card)
+        if stored is not None:
+            return selected_card, self.similar_from_rows(selected_card, stored, filters)
+        if similarity.available():
+            # Catalogo inteiro, vetorizado (cards/similarity.py)
+            return selected_card, self.rank_similar(selected_card, queryset, filters, filtered=filtered)
+        return selected_card, self.rank_similar_python(selected_card, queryset, filters)
+
+    # Parametros GET que mudam o resultado (chave do cache, cards/results.py)
+    RESULT_PARAMS = (
+        'similar_to', 'color', 'type', 'subtype', 'cmc_min', 'cmc_max', 'power_min', 'power_max',
+        'rarity', 'oracle', 'exclude_color', 'mechanic',
+    )
+
     def get(self, request):
         context = self.get_player_context(request)
 
@@ -702,83 +664,14 @@ class CardAssistantView(View):
             'rarity': request.GET.getlist('rarity'),
             'oracle': request.GET.get('oracle', '').strip(),
             'exclude_colors': request.GET.getlist('exclude_color'),
+            'mechanics': request.GET.getlist('mechanic'),
         }
 
         if similar_to:
-            # Buscar o card de referencia
-            selected_card = Card.objects.filter(
-                Q(name__iexact=similar_to) | Q(name__icontains=similar_to)
-            ).first()
-
-            if selected_card:
-                # Buscar cards candidatos (excluindo o proprio e duplicatas por nome)
-                # Usar distinct no nome para evitar multiplas versoes da mesma carta
-                from django.db.models import Min
-
-                # Pegar apenas um ID por nome de carta (o menor, que geralmente e a versao original)
-                unique_card_ids = Card.objects.exclude(
-                    name=selected_card.name
-                ).values('name').annotate(
-                    first_id=Min('id')
-                ).values_list('first_id', flat=True)
-
-                queryset = Card.objects.filter(id__in=unique_card_ids)
-
-                # Aplicar filtros opcionais
-                if filters['colors']:
-                    for c in filters['colors']:
-                        queryset = queryset.filter(color_identity__icontains=c)
-
-                if filters['exclude_colors']:
-                    for c in filters['exclude_colors']:
-                        queryset = queryset.exclude(color_identity__icontains=c)
-
-                if filters['type']:
-                    queryset = queryset.filter(type_line__icontains=filters['type'])
-
-                if filters['subtype']:
-                    queryset = queryset.filter(type_line__icontains=filters['subtype'])
-
-                if filters['cmc_min']:
-                    queryset = queryset.filter(cmc__gte=float(filters['cmc_min']))
-                if filters['cmc_max']:
-                    queryset = queryset.filter(cmc__lte=float(filters['cmc_max']))
-
-                if filters['power_min']:
-                    queryset = queryset.filter(power__gte=filters['power_min'])
-                if filters['power_max']:
-                    queryset = queryset.filter(power__lte=filters['power_max'])
-
-                if filters['rarity']:
-                    queryset = queryset.filter(rarity__in=filters['rarity'])
-
-                if filters['oracle']:
-                    queryset = queryset.filter(oracle_text__icontains=filters['oracle'])
-
-                # Limitar para processamento
-                candidates = queryset[:3000]
-
-                # Calcular similaridade
-                scored_cards = []
-                seen_names = set()  # Backup para garantir unicidade
-
-                for card in candidates:
-                    # Pular se ja vimos essa carta (backup de seguranca)
-                    if card.name in seen_names:
-                        continue
-                    seen_names.add(card.name)
-
-                    score, reasons = self.calculate_similarity(selected_card, card, filters)
-                    if score > 10:  # Threshold minimo para incluir mais cartas
-                        scored_cards.append({
-                            'card': card,
-                            'score': score,
-                            'reasons': reasons
-                        })
-
-                # Ordenar por score
-                scored_cards.sort(key=lambda x: x['score'], reverse=True)
-                similar_cards = scored_cards[:48]  # Top 48
+            # Resultado depende so dos parametros e das cartas (cards/results.py)
+            selected_card, similar_cards = results.cached_result(
+                'assistant', request.GET, self.RESULT_PARAMS, lambda: self.find_similar(similar_to, filters)
+            )
 
         context.update({
             'similar_to': similar_to,
@@ -793,6 +686,7 @@ class CardAssistantView(View):
                 'Human', 'Elf', 'Goblin', 'Dragon', 'Zombie', 'Angel', 'Demon',
                 'Wizard', 'Warrior', 'Knight', 'Equipment', 'Aura', 'Vehicle'
             ],
+            'mechanics': sorted(name for name, _, _ in self.MECHANIC_KEYWORDS),
         })
 
         return render(request, 'cards/card_assistant.html', context)
@@ -801,165 +695,8 @@ class CardAssistantView(View):
 class CommanderIdeasView(View):
     """Pagina para descobrir ideias de comandantes com filtros avancados e deteccao de arquetipos"""
 
-    # Arquetipos de comandantes com patterns de deteccao
-    COMMANDER_ARCHETYPES = [
-        # (nome_exibicao, id, patterns, descricao)
-        ('Voltron', 'voltron', [
-            'equipped creature', 'equip', 'aura', 'enchanted creature',
-            'gets \\+', 'double strike', 'commander deals combat damage',
-            'hexproof', 'indestructible', 'protection from'
-        ], 'Foca em equipar/encantar o comandante para vencer com dano de comandante'),
-
-        ('Aristocrats', 'aristocrats', [
-            'whenever .* dies', 'sacrifice', 'when .* creature .* dies',
-            'blood artist', 'drain', 'lose .* life .* you gain',
-            'death trigger', 'whenever you sacrifice'
-        ], 'Sacrifica criaturas para gerar valor e drenar oponentes'),
-
-        ('Tokens', 'tokens', [
-            'create .* creature token', 'token creatures you control', 'populate',
-            'tokens you control get', 'for each token', 'for each creature token',
-            'creature tokens you control', 'number of creatures you control',
-            'create .* 1/1', 'create .* 2/2', 'army', 'convoke'
-        ], 'Gera muitos tokens para dominar o campo de batalha'),
-
-        ('Spellslinger', 'spellslinger', [
-            'instant or sorcery', 'whenever you cast .* instant', 'whenever you cast .* sorcery',
-            'magecraft', 'prowess', 'copy .* spell', 'storm', 'noncreature spell'
-        ], 'Foca em lancar muitas magicas instantaneas e feiticos'),
-
-        ('Tribal', 'tribal', [
-            'other .* you control get \\+', 'creature of the chosen type',
-            'creatures you control of the chosen type', 'share a creature type',
-            'changeling', 'each creature you control that shares a creature type',
-            'whenever another .* enters', 'creature type of your choice'
-        ], 'Sinergias com um tipo de criatura especifico'),
-
-        ('Control', 'control', [
-            'counter target spell', 'destroy target creature', 'exile target creature',
-            'return target .* to its owner', 'tap target .* doesn\'t untap',
-            "can't attack you", "can't cast .* spells", 'opponents can\'t',
-            'destroy all creatures', 'exile all'
-        ], 'Controla o jogo removendo ameacas e negando acoes'),
-
-        ('Combo', 'combo', [
-            'search your library', 'tutor', 'infinite', 'untap',
-            'whenever .* untaps', 'add .* mana', 'copy', 'extra turn'
-        ], 'Busca pecas de combo para vencer de forma explosiva'),
-
-        ('Reanimator', 'reanimator', [
-            'return .* from .* graveyard', 'reanimate', 'graveyard .* battlefield',
-            'mill', 'cards in your graveyard', 'flashback', 'unearth', 'escape'
-        ], 'Usa o cemiterio como recurso, reanimando criaturas'),
-
-        ('Aggro', 'aggro', [
-            'haste', 'whenever .* attacks', 'attack each combat', 'first strike',
-            'double strike', 'combat damage', 'additional combat', 'can\'t block'
-        ], 'Ataque rapido e agressivo para pressionar oponentes'),
-
-        ('Ramp/Big Mana', 'ramp', [
-            'search your library for .* land', 'put .* land .* onto the battlefield',
-            'add .* for each', 'double .* mana', 'mana of any color',
-            'costs .* less to cast', 'additional land', 'landfall',
-            'whenever a land enters .* add', 'for each land you control'
-        ], 'Acelera mana para jogar ameacas grandes rapidamente'),
-
-        ('Stax', 'stax', [
-            "can't .* more than", "opponents can't", "each player can't",
-            'costs .* more', 'tax', 'sacrifice .* permanent', "don't untap"
-        ], 'Restringe recursos e acoes dos oponentes'),
-
-        ('Group Hug', 'grouphug', [
-            'each player draws', 'each player may draw', 'each opponent draws',
-            'each other player draws', 'players each draw', 'all players draw',
-            'each player puts a land', 'each player gains .* life', 'each player may put',
-            'each player searches', 'opponents draw', 'each player untaps',
-            'whenever an opponent draws .* you', 'gift', 'tempting offer'
-        ], 'Distribui recursos entre todos, ganhando aliados'),
-
-        ('Mill', 'mill', [
-            'mill', 'cards .* into .* graveyard', 'library .* graveyard',
-            'exile .* library', 'cards in .* graveyard'
-        ], 'Vence fazendo oponentes comprarem de biblioteca vazia'),
-
-        ('Lifegain', 'lifegain', [
-            'gain .* life', 'whenever you gain life', 'lifelink',
-            'life .* or more', 'pay .* life', 'life total'
-        ], 'Ganha vida para ativar sinergias e sobreviver'),
-
-        ('+1/+1 Counters', 'counters', [
-            '\\+1/\\+1 counter', 'put .* counter', 'proliferate',
-            'counter on', 'with .* counters', 'modify', 'evolve', 'adapt'
-        ], 'Acumula marcadores +1/+1 para criaturas gigantes'),
-
-        ('Equipment', 'equipment', [
-            'equip', 'equipment', 'equipped creature', 'attach',
-            'for mirrodin', 'living weapon', 'reconfigure'
-        ], 'Sinergias com equipamentos e criaturas equipadas'),
-
-        ('Enchantress', 'enchantress', [
-            'enchantment', 'aura', 'enchanted', 'constellation',
-            'whenever .* enchantment', 'enchant'
-        ], 'Sinergias com encantamentos para gerar valor'),
-
-        ('Lands Matter', 'lands', [
-            'landfall', 'land enters', 'lands you control', 'sacrifice .* land',
-            'land .* graveyard', 'play .* additional land', 'land creature'
-        ], 'Usa terrenos como recurso principal de sinergia'),
-
-        ('Artifacts Matter', 'artifacts', [
-            'artifact', 'artifacts you control', 'metalcraft', 'affinity',
-            'improvise', 'treasure', 'clue', 'food', 'vehicle', 'crew'
-        ], 'Sinergias com artefatos e tokens de artefato'),
-
-        ('Draw/Card Advantage', 'draw', [
-            'whenever you draw', 'whenever .* draws a card', 'draw .* cards',
-            'cards in .* hand', 'no maximum hand size', 'draw two cards',
-            'draw three cards', 'draw cards equal', 'draw that many',
-            'for each card you\'ve drawn', 'second card you draw', 'draw .* then discard'
-        ], 'Foca em comprar muitas cartas para ter opcoes'),
-
-        ('Blink/Flicker', 'blink', [
-            'exile .* return', 'flicker', 'blink', 'enters the battlefield',
-            'etb', 'leave .* battlefield'
-        ], 'Pisca criaturas para reusar triggers de entrada'),
-
-        ('Graveyard', 'graveyard', [
-            'graveyard', 'from .* graveyard', 'mill', 'dredge', 'delve',
-            'escape', 'flashback', 'unearth', 'embalm', 'eternalize'
-        ], 'Usa o cemiterio como extensao da mao'),
-
-        ('Politics', 'politics', [
-            'vote', 'council', 'goad', 'monarch', 'choose .* opponent',
-            'an opponent of your choice', 'target opponent .* target opponent',
-            'deals combat damage to an opponent', 'for each opponent'
-        ], 'Manipula politica de mesa para ganhar vantagem'),
-
-        ('Theft', 'theft', [
-            'gain control', 'control of target', 'steal', 'exchange control',
-            'opponent controls .* you control', 'act of treason'
-        ], 'Rouba permanentes dos oponentes'),
-
-        ('Superfriends', 'superfriends', [
-            'planeswalker', 'loyalty', 'proliferate', 'each planeswalker',
-            'planeswalkers you control'
-        ], 'Foca em planeswalkers como principal estrategia'),
-
-        ('Chaos', 'chaos', [
-            'random', 'coin flip', 'chaos', 'each player .* random',
-            'at random', 'wheel of fortune'
-        ], 'Cria caos no jogo com efeitos aleatorios'),
-
-        ('Infect/Poison', 'infect', [
-            'infect', 'poison counter', 'toxic', 'proliferate',
-            'poisoned', 'corrupted'
-        ], 'Vence com 10 marcadores de veneno'),
-
-        ('Voltron Auras', 'auras', [
-            'enchanted creature', 'aura', 'enchant creature', 'bestow',
-            'totem armor', 'umbra'
-        ], 'Usa auras para tornar o comandante imbativel'),
-    ]
+    # Arquetipos (nome_exibicao, id, patterns, descricao): cards/rules.py
+    COMMANDER_ARCHETYPES = rules.COMMANDER_ARCHETYPES
 
     # Tribos populares para filtro
     POPULAR_TRIBES = [
@@ -981,27 +718,20 @@ class CommanderIdeasView(View):
 
     def detect_archetypes(self, oracle_text, min_matches=1):
         """Detecta arquetipos baseado no oracle text do comandante"""
-        import re
-        if not oracle_text:
-            return []
-
-        text = oracle_text.lower()
-        detected = []
+        return self.archetypes_display(tagging.detect_archetypes(oracle_text, min_matches))
 
-        for name, archetype_id, patterns, description in self.COMMANDER_ARCHETYPES:
-            matches = 0
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    matches += 1
-
-            # Se tem min_matches+ matches, considera como arquetipo
-            if matches >= min_matches:
-                detected.append({
-                    'name': name,
-                    'id': archetype_id,
-                    'description': description,
-                    'strength': min(matches, 5)  # Cap em 5 para indicador visual
-                })
+    def archetypes_display(self, strengths):
+        """{id: forca} -> lista para o template, mais fortes primeiro"""
+        detected = [
+            {
+                'name': name,
+                'id': archetype_id,
+                'description': description,
+                'strength': strengths[archetype_id],  # Cap em 5 para indicador visual
+            }
+            for name, archetype_id, patterns, description in self.COMMANDER_ARCHETYPES
+            if archetype_id in strengths
+        ]
 
         # Ordenar por forca
         detected.sort(key=lambda x: x['strength'], reverse=True)
@@ -1014,6 +744,19 @@ class CommanderIdeasView(View):
                 return patterns
         return []
 
+    def archetype_prefilter_q(self, archetype_id):
+        """Q aproximado (icontains) do arquetipo, usado so quando ainda nao ha tags"""
+        import re
+        archetype_q = Q()
+        for pattern in self.get_archetype_patterns(archetype_id):
+            # Converter regex simples para busca de texto
+            # Remove caracteres regex e faz busca simples
+            simple_pattern = pattern.replace('.*', ' ').replace('\\+', '+')
+            simple_pattern = re.sub(r'[\\^$.|?*+(){}[\]]', ' ', simple_pattern).strip()
+            if simple_pattern and len(simple_pattern) > 2:
+                archetype_q |= Q(oracle_text__icontains=simple_pattern)
+        return archetype_q
+
     def get_color_identity_display(self, color_identity):
         """Retorna nome legivel da identidade de cor"""
         if not color_identity:
@@ -1061,74 +804,27 @@ class CommanderIdeasView(View):
 
         return ', '.join(color_names.get(c, c) for c in colors)
 
-    def get(self, request):
-        from django.db.models import Min
-        import re
-
-        context = self.get_player_context(request)
-
-        # Filtros
-        filters = {
-            'search': request.GET.get('q', '').strip(),
-            'colors': request.GET.getlist('color'),
-            'color_mode': request.GET.get('color_mode', 'include'),  # include, exact, at_most
-            'cmc_min': request.GET.get('cmc_min', ''),
-            'cmc_max': request.GET.get('cmc_max', ''),
-            'power_min': request.GET.get('power_min', ''),
-            'power_max': request.GET.get('power_max', ''),
-            'tough_min': request.GET.get('tough_min', ''),
-            'tough_max': request.GET.get('tough_max', ''),
-            'archetype': request.GET.get('archetype', ''),
-            'tribe': request.GET.get('tribe', ''),
-            'partner': request.GET.get('partner', ''),  # '', 'yes', 'no'
-            'rarity': request.GET.getlist('rarity'),
-            'oracle': request.GET.get('oracle', '').strip(),
-            'order': request.GET.get('order', 'name'),
-            'dir': request.GET.get('dir', 'asc'),
-        }
-
-        # Base query: apenas comandantes (Legendary Creature ou "can be your commander")
-        queryset = Card.objects.filter(
+    def find_commanders(self, filters):
+        """Comandantes (ate 60) que passam nos filtros, com arquetipos para exibicao"""
+        # Base query: apenas comandantes (Legendary Creature ou "can be your commander"),
+        # uma impressao por nome
+        queryset = Card.objects.canonical().filter(
             Q(type_line__icontains='Legendary') & Q(type_line__icontains='Creature') |
             Q(oracle_text__icontains='can be your commander')
         )
 
-        # Deduplicar por nome (pegar apenas uma versao de cada carta)
-        unique_ids = queryset.values('name').annotate(
-            first_id=Min('id')
-        ).values_list('first_id', flat=True)
-
-        queryset = Card.objects.filter(id__in=unique_ids)
-
         # Aplicar filtros
         if filters['search']:
-            queryset = queryset.filter(
-                Q(name__icontains=filters['search']) |
-                Q(oracle_text__icontains=filters['search'])
-            )
+            queryset = queryset.search(filters['search'])
 
         # Filtro de cores
         if filters['colors']:
-            if filters['color_mode'] == 'exact':
-                # Exatamente essas cores
-                color_str = ','.join(sorted(filters['colors']))
-                queryset = queryset.filter(color_identity=color_str)
-            elif filters['color_mode'] == 'at_most':
-                # No maximo essas cores - excluir cores nao selecionadas
-                all_colors = {'W', 'U', 'B', 'R', 'G'}
-                excluded = all_colors - set(filters['colors'])
-                for c in excluded:
-                    queryset = queryset.exclude(color_identity__icontains=c)
-            else:
-                # Inclui essas cores (default)
-                for c in filters['colors']:
-                    queryset = queryset.filter(color_identity__icontains=c)
+            # include (default), exact ou at_most
+            queryset = queryset.filter(color_q(filters['colors'], filters['color_mode']))
 
         # Colorless filter
         if 'C' in filters['colors']:
-            queryset = queryset.filter(
-                Q(color_identity='') | Q(color_identity__isnull=True)
-            )
+            queryset = queryset.filter(color_identity_mask=0)
 
         # CMC
         if filters['cmc_min']:
@@ -1137,18 +833,14 @@ class CommanderIdeasView(View):
             queryset = queryset.filter(cmc__lte=float(filters['cmc_max']))
 
         # Power/Toughness
-        if filters['power_min']:
-            queryset = queryset.filter(power__gte=filters['power_min'])
-        if filters['power_max']:
-            queryset = queryset.filter(power__lte=filters['power_max'])
-        if filters['tough_min']:
-            queryset = queryset.filter(toughness__gte=filters['tough_min'])
-        if filters['tough_max']:
-            queryset = queryset.filter(toughness__lte=filters['tough_max'])
+        queryset = queryset.filter(
+            range_q('power_value', filters['power_min'], filters['power_max']),
+            range_q('toughness_value', filters['tough_min'], filters['tough_max']),
+        )
 
         # Tribo
         if filters['tribe']:
-            queryset = queryset.filter(type_line__icontains=filters['tribe'])
+            queryset = queryset.search(filters['tribe'], fields=('type_line',))
 
         # Partner
         if filters['partner'] == 'yes':
@@ -1166,22 +858,16 @@ class CommanderIdeasView(View):
 
         # Oracle text search
         if filters['oracle']:
-            queryset = queryset.filter(oracle_text__icontains=filters['oracle'])
+            queryset = queryset.search(filters['oracle'], fields=('oracle_text', 'back_face_oracle_text'))
 
-        # Filtro por arquetipo - aplica diretamente no queryset
+        # Filtro por arquetipo - tags precomputadas (exato); antes do tag_cards, aproximacao por icontains
         archetype_filter = filters['archetype']
         if archetype_filter:
-            patterns = self.get_archetype_patterns(archetype_filter)
-            if patterns:
-                # Criar Q objects para cada pattern (usando icontains para simplicidade)
-                archetype_q = Q()
-                for pattern in patterns:
-                    # Converter regex simples para busca de texto
-                    # Remove caracteres regex e faz busca simples
-                    simple_pattern = pattern.replace('.*', ' ').replace('\\+', '+').replace("can't", "can't")
-                    simple_pattern = re.sub(r'[\\^$.|?*+(){}[\]]', ' ', simple_pattern).strip()
-                    if simple_pattern and len(simple_pattern) > 2:
-                        archetype_q |= Q(oracle_text__icontains=simple_pattern)
+            from .models import CardTag
+            if CardTag.objects.filter(kind='archetype').exists():
+                queryset = queryset.with_tags(archetype_filter, kind='archetype')
+            else:
+                archetype_q = self.archetype_prefilter_q(archetype_filter)
                 if archetype_q:
                     queryset = queryset.filter(archetype_q)
 
@@ -1189,28 +875,70 @@ class CommanderIdeasView(View):
         order_fields = {
             'name': 'name',
             'cmc': 'cmc',
-            'power': 'power',
-            'toughness': 'toughness',
+            'power': 'power_value',
+            'toughness': 'toughness_value',
         }
         order_field = order_fields.get(filters['order'], 'name')
-        if filters['dir'] == 'desc':
-            order_field = f'-{order_field}'
-        queryset = queryset.order_by(order_field)
+        if order_field.endswith('_value'):
+            queryset = order_by_stat(queryset, order_field, filters['dir'] == 'desc')
+        else:
+            if filters['dir'] == 'desc':
+                order_field = f'-{order_field}'
+            queryset = queryset.order_by(order_field)
 
-        # Processar comandantes e detectar arquetipos
-        commanders = []
+        # Arquetipos: tags precomputadas; comandantes ainda nao tagueados caem no regex
+        cards = list(queryset[:60])
+        tagged_ids = [c.id for c in cards if c.tagged_version == tagging.TAGS_VERSION]
+        tag_map = tagging.load_tags(tagged_ids, kinds=('archetype',))
+        tagged_ids = set(tagged_ids)
 
-        for card in queryset[:200]:  # Limitar processamento
-            archetypes = self.detect_archetypes(card.oracle_text, min_matches=1)
+        commanders = []
+        for card in cards:
+            if card.id in tagged_ids:
+                archetypes = self.archetypes_display(tag_map.get(card.id, {}).get('archetype', {}))
+            else:
+                archetypes = self.detect_archetypes(card.oracle_text, min_matches=1)
 
             commanders.append({
                 'card': card,
                 'archetypes': archetypes,
                 'color_name': self.get_color_identity_display(card.color_identity),
             })
+        return commanders
+
+    # Parametros GET que mudam o resultado (chave do cache, cards/results.py)
+    RESULT_PARAMS = (
+        'q', 'color', 'color_mode', 'cmc_min', 'cmc_max', 'power_min', 'power_max', 'tough_min', 'tough_max',
+        'archetype', 'tribe', 'partner', 'rarity', 'oracle', 'order', 'dir',
+    )
+
+    def get(self, request):
+        context = self.get_player_context(request)
+
+        # Filtros
+        filters = {
+            'search': request.GET.get('q', '').strip(),
+            'colors': request.GET.getlist('color'),
+            'color_mode': request.GET.get('color_mode', 'include'),  # include, exact, at_most
+            'cmc_min': request.GET.get('cmc_min', ''),
+            'cmc_max': request.GET.get('cmc_max', ''),
+            'power_min': request.GET.get('power_min', ''),
+            'power_max': request.GET.get('power_max', ''),
+            'tough_min': request.GET.get('tough_min', ''),
+            'tough_max': request.GET.get('tough_max', ''),
+            'archetype': request.GET.get('archetype', ''),
+            'tribe': request.GET.get('tribe', ''),
+            'partner': request.GET.get('partner', ''),  # '', 'yes', 'no'
+            'rarity': request.GET.getlist('rarity'),
+            'oracle': request.GET.get('oracle', '').strip(),
+            'order': request.GET.get('order', 'name'),
+            'dir': request.GET.get('dir', 'asc'),
+        }
 
-        # Limitar resultado final
-        commanders = commanders[:60]
+        # Resultado depende so dos parametros e das cartas (cards/results.py)
+        commanders = results.cached_result(
+            'commanders', request.GET, self.RESULT_PARAMS, lambda: self.find_commanders(filters)
+        )
 
         context.update({
             'commanders': commanders,
@@ -1226,572 +954,8 @@ class CommanderIdeasView(View):
 class ArchetypeFinderView(View):
     """Pagina para buscar cartas por arquetipo/tema para montar decks"""
 
-    # Temas/Arquetipos com patterns de busca
-    # (nome_exibicao, id, patterns[], descricao, categoria)
-    # IMPORTANTE: patterns devem ter pelo menos 4 caracteres para evitar falsos positivos
-    DECK_THEMES = [
-        # === Contadores ===
-        ('Energy', 'energy', [
-            'energy counter', 'energy counters', 'energy you have', 'spend energy',
-            'you get {e}', 'pay {e}{e}', 'an energy counter'
-        ], 'Marcadores de energia', 'Contadores'),
-
-        ('+1/+1 Counters', 'plus_counters', [
-            '+1/+1 counter', 'put a +1/+1', 'with +1/+1 counters', 'modify',
-            'evolve', 'adapt', 'proliferate', 'bolster', 'support', 'reinforce',
-            'outlast', 'mentor', 'counters on it', 'counter on each'
-        ], 'Marcadores +1/+1', 'Contadores'),
-
-        ('-1/-1 Counters', 'minus_counters', [
-            '-1/-1 counter', 'put a -1/-1', 'wither', 'persist', 'undying'
-        ], 'Marcadores -1/-1', 'Contadores'),
-
-        ('Poison/Toxic', 'poison', [
-            'poison counter', 'toxic', 'infect', 'corrupted', 'proliferate'
-        ], 'Veneno e toxico', 'Contadores'),
-
-        ('Charge Counters', 'charge', [
-            'charge counter', 'storage counter', 'verse counter'
-        ], 'Marcadores de carga', 'Contadores'),
-
-        ('Oil Counters', 'oil', [
-            'oil counter', 'compleated'
-        ], 'Marcadores de oleo (Phyrexia)', 'Contadores'),
-
-        ('Experience', 'experience', [
-            'experience counter', 'experience counters you have'
-        ], 'Marcadores de experiencia', 'Contadores'),
-
-        # === Tribais - Humanoides ===
-        ('Humans', 'humans', [
-            'human', 'humans you control', 'each human', 'nonhuman'
-        ], 'Humanos', 'Tribal'),
-
-        ('Soldiers', 'soldiers', [
-            'soldier', 'soldiers you control', 'soldier token'
-        ], 'Soldados', 'Tribal'),
-
-        ('Warriors', 'warriors', [
-            'warrior', 'warriors you control', 'warrior token'
-        ], 'Guerreiros', 'Tribal'),
-
-        ('Knights', 'knights', [
-            'knight', 'knights you control', 'knight token'
-        ], 'Cavaleiros', 'Tribal'),
-
-        ('Clerics', 'clerics', [
-            'cleric', 'clerics you control'
-        ], 'Clerigos', 'Tribal'),
-
-        ('Rogues', 'rogues', [
-            'rogue', 'rogues you control'
-        ], 'Ladinos', 'Tribal'),
-
-        ('Wizards', 'wizards', [
-            'wizard', 'wizards you control'
-        ], 'Magos', 'Tribal'),
-
-        ('Shamans', 'shamans', [
-            'shaman', 'shamans you control'
-        ], 'Xamas', 'Tribal'),
-
-        ('Pirates', 'pirates', [
-            'pirate', 'pirates you control', 'pirate token'
-        ], 'Piratas', 'Tribal'),
-
-        ('Ninjas', 'ninjas', [
-            'ninja', 'ninjas you control', 'ninjutsu'
-        ], 'Ninjas', 'Tribal'),
-
-        ('Samurai', 'samurai', [
-            'samurai', 'samurai you control'
-        ], 'Samurais', 'Tribal'),
-
-        ('Assassins', 'assassins', [
-            'assassin', 'assassins you control'
-        ], 'Assassinos', 'Tribal'),
-
-        ('Monks', 'monks', [
-            'monk', 'monks you control'
-        ], 'Monges', 'Tribal'),
-
-        ('Druids', 'druids', [
-            'druid', 'druids you control'
-        ], 'Druidas', 'Tribal'),
-
-        ('Artificers', 'artificers', [
-            'artificer', 'artificers you control'
-        ], 'Artificers', 'Tribal'),
-
-        # === Tribais - Elfos/Fadas ===
-        ('Elves', 'elves', [
-            'elf', 'elves you control', 'elf token', 'elf creature'
-        ], 'Elfos', 'Tribal'),
-
-        ('Faeries', 'faeries', [
-            'faerie', 'faeries you control', 'faerie token'
-        ], 'Fadas', 'Tribal'),
-
-        # === Tribais - Monstros Pequenos ===
-        ('Goblins', 'goblins', [
-            'goblin', 'goblins you control', 'goblin token'
-        ], 'Goblins', 'Tribal'),
-
-        ('Kobolds', 'kobolds', [
-            'kobold', 'kobolds you control'
-        ], 'Kobolds', 'Tribal'),
-
-        ('Rats', 'rats', [
-            'rat', 'rats you control', 'rat token'
-        ], 'Ratos', 'Tribal'),
-
-        ('Squirrels', 'squirrels', [
-            'squirrel', 'squirrels you control', 'squirrel token'
-        ], 'Esquilos', 'Tribal'),
-
-        # === Tribais - Mortos-Vivos ===
-        ('Zombies', 'zombies', [
-            'zombie', 'zombies you control', 'zombie token', 'decayed'
-        ], 'Zumbis', 'Tribal'),
-
-        ('Vampires', 'vampires', [
-            'vampire', 'vampires you control', 'blood token'
-        ], 'Vampiros', 'Tribal'),
-
-        ('Skeletons', 'skeletons', [
-            'skeleton', 'skeletons you control'
-        ], 'Esqueletos', 'Tribal'),
-
-        ('Spirits', 'spirits', [
-            'spirit', 'spirits you control', 'spirit token', 'soulshift'
-        ], 'Espiritos', 'Tribal'),
-
-        ('Horrors', 'horrors', [
-            'horror', 'horrors you control'
-        ], 'Horrores', 'Tribal'),
-
-        # === Tribais - Bestas/Criaturas ===
-        ('Beasts', 'beasts', [
-            'beast', 'beasts you control', 'beast token'
-        ], 'Bestas', 'Tribal'),
-
-        ('Cats', 'cats', [
-            'cat', 'cats you control', 'cat token'
-        ], 'Gatos', 'Tribal'),
-
-        ('Dogs', 'dogs', [
-            'dog', 'dogs you control', 'dog token', 'hound'
-        ], 'Cachorros', 'Tribal'),
-
-        ('Wolves', 'wolves', [
-            'wolf', 'wolves you control', 'wolf token', 'werewolf'
-        ], 'Lobos', 'Tribal'),
-
-        ('Bears', 'bears', [
-            'bear', 'bears you control', 'bear token'
-        ], 'Ursos', 'Tribal'),
-
-        ('Birds', 'birds', [
-            'bird', 'birds you control', 'bird token', 'flying creature'
-        ], 'Passaros', 'Tribal'),
-
-        ('Snakes', 'snakes', [
-            'snake', 'snakes you control', 'snake token'
-        ], 'Serpentes', 'Tribal'),
-
-        ('Spiders', 'spiders', [
-            'spider', 'spiders you control', 'reach'
-        ], 'Aranhas', 'Tribal'),
-
-        ('Insects', 'insects', [
-            'insect', 'insects you control', 'insect token'
-        ], 'Insetos', 'Tribal'),
-
-        # === Tribais - Aquaticos ===
-        ('Merfolk', 'merfolk', [
-            'merfolk', 'merfolk you control', 'islandwalk'
-        ], 'Tritoes', 'Tribal'),
-
-        ('Fish', 'fish', [
-            'fish', 'fishes you control', 'kraken', 'leviathan', 'octopus', 'serpent'
-        ], 'Peixes e criaturas marinhas', 'Tribal'),
-
-        ('Crabs', 'crabs', [
-            'crab', 'crabs you control'
-        ], 'Caranguejos', 'Tribal'),
-
-        # === Tribais - Grandes Criaturas ===
-        ('Dragons', 'dragons', [
-            'dragon', 'dragons you control', 'dragon token'
-        ], 'Dragoes', 'Tribal'),
-
-        ('Angels', 'angels', [
-            'angel', 'angels you control', 'angel token'
-        ], 'Anjos', 'Tribal'),
-
-        ('Demons', 'demons', [
-            'demon', 'demons you control', 'demon token'
-        ], 'Demonios', 'Tribal'),
-
-        ('Giants', 'giants', [
-            'giant', 'giants you control'
-        ], 'Gigantes', 'Tribal'),
-
-        ('Hydras', 'hydras', [
-            'hydra', 'hydras you control', 'x +1/+1 counters'
-        ], 'Hidras', 'Tribal'),
-
-        ('Wurms', 'wurms', [
-            'wurm', 'wurms you control', 'wurm token'
-        ], 'Vermes gigantes', 'Tribal'),
-
-        # === Tribais - Dinossauros/Prehistoricos ===
-        ('Dinosaurs', 'dinosaurs', [
-            'dinosaur', 'dinosaurs you control', 'enrage'
-        ], 'Dinossauros', 'Tribal'),
-
-        # === Tribais - Elementais ===
-        ('Elementals', 'elementals', [
-            'elemental', 'elementals you control', 'elemental token', 'evoke'
-        ], 'Elementais', 'Tribal'),
-
-        ('Phoenixes', 'phoenixes', [
-            'phoenix', 'phoenixes you control', 'return .* from .* graveyard'
-        ], 'Fenix', 'Tribal'),
-
-        # === Tribais - Arvores/Plantas ===
-        ('Treefolk', 'treefolk', [
-            'treefolk', 'treefolk you control'
-        ], 'Homens-arvore', 'Tribal'),
-
-        ('Plants', 'plants', [
-            'plant', 'plants you control', 'saproling'
-        ], 'Plantas e Saprolings', 'Tribal'),
-
-        ('Fungus', 'fungus', [
-            'fungus', 'fungi you control', 'saproling', 'spore counter'
-        ], 'Fungos', 'Tribal'),
-
-        # === Tribais - Construtos ===
-        ('Golems', 'golems', [
-            'golem', 'golems you control'
-        ], 'Golems', 'Tribal'),
-
-        ('Constructs', 'constructs', [
-            'construct', 'constructs you control', 'artifact creature'
-        ], 'Construtos', 'Tribal'),
-
-        ('Thopters', 'thopters', [
-            'thopter', 'thopters you control', 'thopter token'
-        ], 'Thopters', 'Tribal'),
-
-        ('Myrs', 'myrs', [
-            'myr', 'myrs you control', 'myr token'
-        ], 'Myrs', 'Tribal'),
-
-        # === Tribais - Especiais ===
-        ('Slivers', 'slivers', [
-            'sliver', 'slivers you control', 'all slivers'
-        ], 'Fractius', 'Tribal'),
-
-        ('Eldrazi', 'eldrazi', [
-            'eldrazi', 'colorless creature', 'annihilator', 'spawn', 'scion'
-        ], 'Eldrazi', 'Tribal'),
-
-        ('Phyrexians', 'phyrexians', [
-            'phyrexian', 'compleated', 'toxic', 'corrupted', 'oil counter'
-        ], 'Phyrexianos', 'Tribal'),
-
-        ('Changelings', 'changelings', [
-            'changeling', 'all creature types', 'is every creature type'
-        ], 'Metamorfos (todas tribos)', 'Tribal'),
-
-        ('Allies', 'allies', [
-            'ally', 'allies you control', 'rally'
-        ], 'Aliados', 'Tribal'),
-
-        ('Party', 'party', [
-            'full party', 'cleric, rogue, warrior, and wizard', 'party has'
-        ], 'Party (Clerico, Ladino, Guerreiro, Mago)', 'Tribal'),
-
-        # === Artefatos ===
-        ('Equipment', 'equipment', [
-            'equipment', 'equip', 'equipped creature', 'attach', 'living weapon',
-            'reconfigure', 'for mirrodin'
-        ], 'Equipamentos', 'Artefatos'),
-
-        ('Artifact Creatures', 'artifact_creatures', [
-            'artifact creature', 'artifacts you control', 'metalcraft', 'affinity',
-            'improvise', 'modular', 'fabricate'
-        ], 'Criaturas artefato', 'Artefatos'),
-
-        ('Vehicles', 'vehicles', [
-            'vehicle', 'crew', 'vehicles you control'
-        ], 'Veiculos', 'Artefatos'),
-
-        ('Treasures', 'treasures', [
-            'treasure', 'treasure token', 'create a treasure'
-        ], 'Tesouros', 'Artefatos'),
-
-        ('Clues', 'clues', [
-            'clue', 'clue token', 'investigate'
-        ], 'Pistas', 'Artefatos'),
-
-        ('Food', 'food', [
-            'food', 'food token', 'create a food'
-        ], 'Comida', 'Artefatos'),
-
-        ('Blood Tokens', 'blood_tokens', [
-            'blood token', 'create a blood'
-        ], 'Tokens de sangue', 'Artefatos'),
-
-        ('Powerstones', 'powerstones', [
-            'powerstone', 'powerstone token'
-        ], 'Pedras de poder', 'Artefatos'),
-
-        ('Maps', 'maps', [
-            'map token', 'create a map'
-        ], 'Mapas', 'Artefatos'),
-
-        # === Encantamentos ===
-        ('Enchantress', 'enchantress', [
-            'enchantment', 'constellation', 'whenever an enchantment',
-            'enchantments you control'
-        ], 'Sinergias com encantamentos', 'Encantamentos'),
-
-        ('Auras', 'auras', [
-            'aura', 'enchant creature', 'enchanted creature', 'bestow', 'totem armor'
-        ], 'Auras', 'Encantamentos'),
-
-        ('Sagas', 'sagas', [
-            'saga', 'lore counter', 'chapter'
-        ], 'Sagas', 'Encantamentos'),
-
-        ('Curses', 'curses', [
-            'curse', 'enchant player', 'cursed player'
-        ], 'Maldicoes', 'Encantamentos'),
-
-        ('Shrines', 'shrines', [
-            'shrine', 'shrines you control'
-        ], 'Santuarios', 'Encantamentos'),
-
-        ('Rooms', 'rooms', [
-            'room', 'unlock', 'door'
-        ], 'Salas (Duskmourn)', 'Encantamentos'),
-
-        # === Tokens/Aggro ===
-        ('Token Generation', 'tokens', [
-            'create a', 'creature token', 'populate', 'tokens you control'
-        ], 'Geracao de tokens', 'Tokens'),
-
-        ('Going Wide', 'go_wide', [
-            'creatures you control get', 'for each creature you control',
-            'creatures you control have', 'anthem'
-        ], 'Muitas criaturas (Go Wide)', 'Tokens'),
-
-        ('Convoke', 'convoke', [
-            'convoke', 'tap an untapped creature'
-        ], 'Convoke', 'Tokens'),
-
-        # === Cemiterio ===
-        ('Reanimator', 'reanimator', [
-            'return .* from .* graveyard', 'graveyard to the battlefield',
-            'reanimate', 'unearth', 'embalm', 'eternalize'
-        ], 'Reanimar criaturas', 'Cemiterio'),
-
-        ('Self-Mill', 'selfmill', [
-            'mill', 'cards into your graveyard', 'dredge', 'surveil'
-        ], 'Encher o cemiterio', 'Cemiterio'),
-
-        ('Flashback', 'flashback', [
-            'flashback', 'escape', 'retrace', 'aftermath', 'jumpstart',
-            'cast .* from .* graveyard'
-        ], 'Lancar do cemiterio', 'Cemiterio'),
-
-        ('Delve', 'delve', [
-            'delve', 'exile .* from your graveyard'
-        ], 'Delve', 'Cemiterio'),
-
-        # === Combate ===
-        ('Extra Combat', 'extra_combat', [
-            'additional combat', 'extra combat phase', 'untap all creatures'
-        ], 'Fases de combate extras', 'Combate'),
-
-        ('Double Strike', 'double_strike', [
-            'double strike', 'first strike'
-        ], 'Golpe duplo/primeiro', 'Combate'),
-
-        ('Evasion', 'evasion', [
-            'flying', 'trample', 'menace', 'fear', 'intimidate', 'shadow',
-            "can't be blocked", 'unblockable'
-        ], 'Evasao', 'Combate'),
-
-        ('Voltron', 'voltron', [
-            'equipped creature', 'enchanted creature gets', 'commander damage',
-            'hexproof', 'indestructible', 'protection from'
-        ], 'Voltron (1 criatura grande)', 'Combate'),
-
-        ('Attack Triggers', 'attack_triggers', [
-            'whenever .* attacks', 'attacking creature', 'attack each combat',
-            'attack with', 'myriad', 'battle cry'
-        ], 'Triggers de ataque', 'Combate'),
-
-        # === Mana/Ramp ===
-        ('Mana Ramp', 'ramp', [
-            'search your library for .* land', 'put .* land .* onto the battlefield',
-            'add one mana of any', 'land onto the battlefield'
-        ], 'Acelerar mana', 'Mana'),
-
-        ('Mana Dorks', 'mana_dorks', [
-            '{t}: add', 'add one mana', 'tap .* add'
-        ], 'Criaturas que dao mana', 'Mana'),
-
-        ('Lands Matter', 'lands_matter', [
-            'landfall', 'whenever a land enters', 'lands you control',
-            'play an additional land', 'land creature'
-        ], 'Sinergias com terrenos', 'Mana'),
-
-        ('Land Destruction', 'land_destruction', [
-            'destroy target land', 'sacrifice a land', 'land an opponent controls'
-        ], 'Destruir terrenos', 'Mana'),
-
-        # === Magicas ===
-        ('Spellslinger', 'spellslinger', [
-            'instant or sorcery', 'whenever you cast .* instant', 'magecraft',
-            'prowess', 'storm'
-        ], 'Magicas (Spellslinger)', 'Magicas'),
-
-        ('Cantrips', 'cantrips', [
-            'draw a card', 'scry', 'look at the top'
-        ], 'Cantrips', 'Magicas'),
-
-        ('Counterspells', 'counterspells', [
-            'counter target spell', 'counter target'
-        ], 'Anular magicas', 'Magicas'),
-
-        ('Burn', 'burn', [
-            'deals .* damage to any target', 'deals .* damage to each',
-            'damage to target creature or player'
-        ], 'Burn (dano direto)', 'Magicas'),
-
-        ('Copy Spells', 'copy_spells', [
-            'copy target', 'copy that spell', 'cast a copy'
-        ], 'Copiar magicas', 'Magicas'),
-
-        # === Vida ===
-        ('Lifegain', 'lifegain', [
-            'gain .* life', 'whenever you gain life', 'lifelink'
-        ], 'Ganho de vida', 'Vida'),
-
-        ('Life Drain', 'drain', [
-            'each opponent loses', 'lose life and you gain', 'extort'
-        ], 'Drenar vida', 'Vida'),
-
-        ('Life Matters', 'life_matters', [
-            'life total', 'pay .* life', 'your life total is'
-        ], 'Usar vida como recurso', 'Vida'),
-
-        # === Sacrificio ===
-        ('Sacrifice', 'sacrifice', [
-            'sacrifice a creature', 'whenever .* dies', 'when .* dies'
-        ], 'Sacrificar criaturas', 'Sacrificio'),
-
-        ('Aristocrats', 'aristocrats', [
-            'whenever a creature you control dies', 'each opponent loses 1 life',
-            'blood artist'
-        ], 'Aristocrats', 'Sacrificio'),
-
-        ('Treasure Sac', 'treasure_sac', [
-            'sacrifice a treasure', 'sacrifice an artifact'
-        ], 'Sacrificar artefatos', 'Sacrificio'),
-
-        # === Compra/Descarte ===
-        ('Draw Matters', 'draw_matters', [
-            'whenever you draw', 'draw a card', 'no maximum hand size',
-            'for each card you\'ve drawn'
-        ], 'Sinergias de compra', 'Compra'),
-
-        ('Discard Matters', 'discard_matters', [
-            'discard', 'madness', 'whenever you discard', 'hellbent'
-        ], 'Sinergias de descarte', 'Compra'),
-
-        ('Wheels', 'wheels', [
-            'each player discards', 'draw seven', 'wheel'
-        ], 'Rodas (Wheel)', 'Compra'),
-
-        ('Looting', 'looting', [
-            'draw .* then discard', 'discard .* then draw', 'cycling', 'rummage'
-        ], 'Looting/Rummaging', 'Compra'),
-
-        # === Controle ===
-        ('Removal', 'removal', [
-            'destroy target', 'exile target', 'destroy all creatures'
-        ], 'Remocao', 'Controle'),
-
-        ('Theft', 'theft', [
-            'gain control of target', 'control of target', 'exchange control'
-        ], 'Roubar permanentes', 'Controle'),
-
-        ('Blink', 'blink', [
-            'exile .* return .* to the battlefield', 'flicker',
-            'enters the battlefield'
-        ], 'Piscar criaturas', 'Controle'),
-
-        ('Stax', 'stax', [
-            "can't .* more than", "opponents can't", 'costs .* more',
-            'each player can only'
-        ], 'Stax (restringir oponentes)', 'Controle'),
-
-        ('Pillowfort', 'pillowfort', [
-            "can't attack you", "can't be attacked", 'propaganda',
-            'ghostly prison'
-        ], 'Pillowfort (protecao)', 'Controle'),
-
-        # === Especiais ===
-        ('Planeswalkers', 'planeswalkers', [
-            'planeswalker', 'loyalty', 'planeswalkers you control'
-        ], 'Planeswalkers', 'Especiais'),
-
-        ('Copy/Clone', 'copy', [
-            'copy of', 'clone', 'becomes a copy', "that's a copy"
-        ], 'Copiar criaturas', 'Especiais'),
-
-        ('Transform', 'transform', [
-            'transform', 'daybound', 'nightbound', 'disturb'
-        ], 'Transformar', 'Especiais'),
-
-        ('Cascade', 'cascade', [
-            'cascade', 'discover', 'cast .* without paying'
-        ], 'Cascade/Discover', 'Especiais'),
-
-        ('Extra Turns', 'extra_turns', [
-            'extra turn', 'additional turn', 'take an extra turn'
-        ], 'Turnos extras', 'Especiais'),
-
-        ('Topdeck Matters', 'topdeck', [
-            'top of your library', 'look at the top', 'miracle', 'hideaway'
-        ], 'Topo do deck', 'Especiais'),
-
-        ('X Spells', 'x_spells', [
-            'where x is', 'pay x', 'x damage', 'x +1/+1 counters'
-        ], 'Magicas com X', 'Especiais'),
-
-        ('Modal', 'modal', [
-            'choose one', 'choose two', 'choose any number', 'entwine'
-        ], 'Magicas modais', 'Especiais'),
-
-        ('Monarch', 'monarch', [
-            'monarch', 'become the monarch', 'you are the monarch'
-        ], 'Monarca', 'Especiais'),
-
-        ('Initiative', 'initiative', [
-            'initiative', 'take the initiative', 'undercity'
-        ], 'Iniciativa/Undercity', 'Especiais'),
-
-        ('Dungeons', 'dungeons', [
-            'venture into', 'dungeon', 'completed a dungeon'
-        ], 'Dungeons', 'Especiais'),
-    ]
+    # Temas (nome_exibicao, id, patterns[], descricao, categoria): cards/rules.py
+    DECK_THEMES = rules.DECK_THEMES
 
     # Categorias para organizacao
     CATEGORIES = [
@@ -1861,70 +1025,9 @@ class ArchetypeFinderView(View):
 
         return ', '.join(color_names.get(c, c) for c in colors)
 
-    # Padroes de alta prioridade que indicam forte relevancia para o tema
-    HIGH_PRIORITY_PATTERNS = {
-        # Contadores
-        'energy': ['energy counter', '{e}', 'energy you have', 'pay {e}'],
-        'plus_counters': ['+1/+1 counter', 'proliferate', 'modular', 'evolve', 'adapt'],
-        'minus_counters': ['-1/-1 counter', 'wither', 'persist'],
-        'poison': ['poison counter', 'toxic', 'infect', 'corrupted'],
-        'charge': ['charge counter', 'storage counter'],
-        'oil': ['oil counter', 'compleated'],
-        'experience': ['experience counter'],
-
-        # Tipos de carta
-        'artifacts': ['artifact creature', 'artifacts you control', 'artifact enters', 'noncreature artifact'],
-        'equipment': ['equipped creature', 'equip {', 'attach', 'equipment you control'],
-        'enchantments': ['enchantments you control', 'enchantment creature', 'constellation', 'aura'],
-        'vehicles': ['vehicle', 'crew', 'crewed'],
-        'planeswalkers': ['planeswalker', 'loyalty counter', 'loyalty ability'],
-
-        # Zones e recursos
-        'tokens': ['create a token', 'token creature', 'populate', 'tokens you control'],
-        'graveyard': ['from your graveyard', 'graveyard to the battlefield', 'mill', 'flashback', 'unearth'],
-        'sacrifice': ['sacrifice a creature', 'whenever you sacrifice', 'when this creature dies', 'death trigger'],
-        'lifegain': ['whenever you gain life', 'lifelink', 'you gain life equal', 'pay life'],
-        'discard': ['discard a card', 'whenever you discard', 'madness', 'hellbent'],
-        'draw': ['draw a card', 'whenever you draw', 'draw two', 'cards in hand'],
-        'landfall': ['landfall', 'land enters', 'whenever a land'],
-        'ramp': ['search your library for a land', 'add {', 'mana of any color'],
-
-        # Estrategias
-        'spellslinger': ['instant or sorcery', 'magecraft', 'storm', 'prowess', 'cast from exile'],
-        'blink': ['exile, then return', 'flicker', 'enters the battlefield', 'etb'],
-        'reanimator': ['return target creature', 'graveyard to the battlefield', 'reanimate'],
-        'voltron': ['equipped creature', 'enchanted creature', 'aura', 'commander damage'],
-        'aristocrats': ['whenever a creature dies', 'sacrifice a creature', 'blood artist'],
-        'control': ['counter target', 'destroy target', 'exile target'],
-        'aggro': ['haste', 'first strike', 'double strike', 'trample'],
-
-        # Tribais populares (alta prioridade para nomes no type_line)
-        'elves': ['elf', 'elves you control', 'elf creature'],
-        'goblins': ['goblin', 'goblins you control', 'goblin creature'],
-        'zombies': ['zombie', 'zombies you control', 'zombie creature'],
-        'vampires': ['vampire', 'vampires you control', 'blood token'],
-        'dragons': ['dragon', 'dragons you control', 'dragon creature'],
-        'angels': ['angel', 'angels you control', 'angel creature'],
-        'demons': ['demon', 'demons you control', 'demon creature'],
-        'merfolk': ['merfolk', 'merfolk you control', 'islandwalk'],
-        'pirates': ['pirate', 'pirates you control', 'treasure token'],
-        'dinosaurs': ['dinosaur', 'dinosaurs you control', 'enrage'],
-        'slivers': ['sliver', 'slivers you control', 'all slivers'],
-        'humans': ['human', 'humans you control', 'human creature'],
-        'wizards': ['wizard', 'wizards you control', 'wizard creature'],
-        'soldiers': ['soldier', 'soldiers you control', 'soldier token'],
-        'spirits': ['spirit', 'spirits you control', 'soulshift'],
-    }
-
-    # Palavras que indicam que NAO e relevante (falsos positivos)
-    NEGATIVE_PATTERNS = {
-        'energy': ['synergy', 'synergies'],  # "synergy" contem "nergy"
-        'counter': ['counterattack', 'counterspell', 'counter target spell'],  # para themes de +1/+1
-        'elf': ['shelf', 'self', 'itself', 'yourself', 'himself', 'herself'],  # evitar matches falsos
-        'rat': ['rate', 'rated', 'rating', 'pirate'],  # pirate contem "rat"
-        'cat': ['locate', 'dedicated', 'replicate', 'syndicate'],  # evitar matches falsos
-        'ant': ['giant', 'instant', 'enchant', 'want', 'plant'],  # para insect tribal
-    }
+    # Padroes de alta prioridade e falsos positivos por tema: cards/rules.py
+    HIGH_PRIORITY_PATTERNS = rules.HIGH_PRIORITY_PATTERNS
+    NEGATIVE_PATTERNS = rules.NEGATIVE_PATTERNS
 
     # Sinergias entre temas (bonus quando multiplos temas combinam bem)
     THEME_SYNERGIES = {
@@ -1972,114 +1075,35 @@ class ArchetypeFinderView(View):
         ('landfall', 'tokens'): 4,
     }
 
-    def calculate_theme_score(self, card, theme_ids):
-        """Calcula pontuacao de relevancia de uma carta para os temas selecionados"""
-        import re
+    # Bonus de 3 pontos: (tipos na type line, temas que valorizam esses tipos)
+    TYPE_BONUS_THEMES = [
+        # Criaturas sao geralmente mais relevantes para tribais
+        (('creature',), ('humans', 'elves', 'goblins', 'zombies', 'vampires', 'soldiers', 'warriors', 'wizards',
+                         'dragons', 'angels', 'demons', 'pirates', 'dinosaurs', 'merfolk', 'spirits')),
+        (('artifact',), ('artifacts', 'equipment', 'vehicles', 'energy')),
+        (('enchantment',), ('enchantments', 'auras')),
+        (('instant', 'sorcery'), ('spellslinger',)),
+    ]
 
+    def calculate_theme_score(self, card, theme_ids, theme_scores=None):
+        """Calcula pontuacao de relevancia de uma carta para os temas selecionados.
+
+        theme_scores: score por tema ja calculado (tags 'theme'); sem ele roda os regex (cards/tagging.py).
+        """
         if not theme_ids:
             return 0
 
-        oracle = (card.oracle_text or '').lower()
-        type_line = (card.type_line or '').lower()
-        name = (card.name or '').lower()
-        keywords = (card.keywords or '').lower() if hasattr(card, 'keywords') and card.keywords else ''
+        if theme_scores is None:
+            theme_scores = tagging.theme_scores(card, theme_ids)
 
-        # Texto combinado para busca
-        full_text = f"{oracle} {type_line} {name} {keywords}"
+        type_line = (card.type_line or '').lower()
 
         total_score = 0
         themes_matched = []
-        matched_patterns_detail = {}
-
         for theme_id in theme_ids:
-            theme_score = 0
-            patterns_matched = 0
-            high_priority_matched = False
-
-            for theme_name, tid, patterns, desc, cat in self.DECK_THEMES:
-                if tid == theme_id:
-                    # Verificar padroes negativos primeiro
-                    has_negative = False
-                    for neg_key, neg_patterns in self.NEGATIVE_PATTERNS.items():
-                        if neg_key in theme_id:
-                            for neg_pat in neg_patterns:
-                                if neg_pat in oracle:
-                                    has_negative = True
-                                    break
-
-                    if has_negative:
-                        continue
-
-                    # Verificar padroes de alta prioridade
-                    if theme_id in self.HIGH_PRIORITY_PATTERNS:
-                        for hp in self.HIGH_PRIORITY_PATTERNS[theme_id]:
-                            hp_lower = hp.lower()
-                            if hp_lower in oracle or hp_lower in type_line:
-                                theme_score += 8  # Alta prioridade vale muito mais
-                                high_priority_matched = True
-                                patterns_matched += 1
-
-                    for pattern in patterns:
-                        # Limpar pattern - manter texto e simbolos de mana
-                        clean_pattern = pattern.replace('.*', ' ').replace('\\+', '+').replace('\\', '')
-                        clean_pattern = re.sub(r'[^a-zA-Z0-9\s\'/+-{}]', '', clean_pattern).strip().lower()
-
-                        # Exigir pelo menos 4 chars ou simbolo de mana
-                        if len(clean_pattern) < 4 and '{' not in clean_pattern:
-                            continue
-
-                        # Usar word boundary para evitar matches parciais em palavras longas
-                        # Mas permitir matches em frases compostas
-                        pattern_words = clean_pattern.split()
-
-                        # Para patterns de uma palavra, usar match mais estrito
-                        if len(pattern_words) == 1 and len(clean_pattern) < 6:
-                            # Palavra curta - verificar se e palavra completa
-                            word_pattern = r'\b' + re.escape(clean_pattern) + r'\b'
-                            if re.search(word_pattern, oracle):
-                                theme_score += 3
-                                patterns_matched += 1
-                            if re.search(word_pattern, type_line):
-                                theme_score += 5  # Type line match vale mais
-                                patterns_matched += 1
-                        else:
-                            # Frase ou palavra longa - match normal
-                            if clean_pattern in oracle:
-                                theme_score += 3
-                                patterns_matched += 1
-                            if clean_pattern in type_line:
-                                theme_score += 5  # Type line match vale mais (tribais)
-                                patterns_matched += 1
-
-                        # Bonus para match no nome (carta dedicada ao tema)
-                        if clean_pattern in name:
-                            theme_score += 4
-                            patterns_matched += 1
-
-                    # Verificar categoria tribal - bonus se tipo da criatura bate
-                    if cat == 'Tribal':
-                        # Extrair tipo da criatura do theme_id
-                        creature_type = theme_id.rstrip('s')  # Remove 's' plural
-                        type_pattern = r'\b' + re.escape(creature_type) + r'\b'
-                        if re.search(type_pattern, type_line, re.IGNORECASE):
-                            theme_score += 6  # E uma criatura do tipo tribal!
-                            patterns_matched += 1
-
-                    break
-
-            # Bonus por ter multiplos patterns matched do mesmo tema
-            if patterns_matched >= 3:
-                theme_score += patterns_matched * 3
-            elif patterns_matched >= 2:
-                theme_score += patterns_matched * 2
-
-            # Bonus grande se deu match em padrao de alta prioridade
-            if high_priority_matched:
-                theme_score += 5
-
+            theme_score = theme_scores.get(theme_id, 0)
             if theme_score > 0:
                 themes_matched.append(theme_id)
-                matched_patterns_detail[theme_id] = patterns_matched
                 total_score += theme_score
 
         # Bonus para cartas que combinam multiplos temas
@@ -2092,24 +1116,9 @@ class ArchetypeFinderView(View):
                     total_score += bonus
 
         # Bonus por tipo de carta relevante
-        card_type_bonus = 0
-        if 'creature' in type_line:
-            # Criaturas sao geralmente mais relevantes para tribais
-            if any(tid in themes_matched for tid in ['humans', 'elves', 'goblins', 'zombies',
-                   'vampires', 'soldiers', 'warriors', 'wizards', 'dragons', 'angels',
-                   'demons', 'pirates', 'dinosaurs', 'merfolk', 'spirits']):
-                card_type_bonus += 3
-        if 'artifact' in type_line:
-            if any(tid in themes_matched for tid in ['artifacts', 'equipment', 'vehicles', 'energy']):
-                card_type_bonus += 3
-        if 'enchantment' in type_line:
-            if any(tid in themes_matched for tid in ['enchantments', 'auras']):
-                card_type_bonus += 3
-        if 'instant' in type_line or 'sorcery' in type_line:
-            if 'spellslinger' in themes_matched:
-                card_type_bonus += 3
-
-        total_score += card_type_bonus
+        for card_types, bonus_themes in self.TYPE_BONUS_THEMES:
+            if any(t in type_line for t in card_types) and any(tid in themes_matched for tid in bonus_themes):
+                total_score += 3
 
         return total_score
 
@@ -2120,47 +1129,197 @@ class ArchetypeFinderView(View):
                 return patterns
         return []
 
-    def get(self, request):
-        from django.db.models import Min
+    def theme_score_expression(self, theme_ids):
+        """Score de relevancia aos temas em SQL (mesma conta do calculate_theme_score +
+        bonus de texto), a partir das tags 'theme' precomputadas (indice card/kind/tag)"""
+        from django.db.models import F, IntegerField, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce, Length, Trim
+        from .models import CardTag
+
+        def when(condition, then):
+            return Case(When(condition, then=Value(then)), default=Value(0), output_field=IntegerField())
+
+        annotations = {}
+        for i, theme_id in enumerate(theme_ids):
+            annotations[f'theme_{i}'] = Coalesce(Subquery(
+                CardTag.objects.filter(card=OuterRef('pk'), kind='theme', tag=theme_id).values('score')[:1]
+            ), Value(0))
+        column = {theme_id: f'theme_{i}' for i, theme_id in enumerate(theme_ids)}
+
+        def matched(theme_id):
+            return Q(**{f'{column[theme_id]}__gt': 0})
+
+        themes_total = sum((Case(When(matched(t), then=F(column[t])), default=Value(0)) for t in theme_ids), Value(0))
+        matched_count = sum((when(matched(t), 1) for t in theme_ids), Value(0))
+        score = themes_total
+        # Bonus para cartas que combinam multiplos temas (sinergias so existem com 2+)
+        if len(theme_ids) > 1:
+            score = score + Case(When(matched_count__gt=1, then=F('matched_count') * 10), default=Value(0))
+            annotations['matched_count'] = matched_count
+            for (t1, t2), bonus in self.THEME_SYNERGIES.items():
+                if t1 in column and t2 in column:
+                    score = score + when(matched(t1) & matched(t2), bonus)
+        # Bonus por tipo de carta relevante
+        for card_types, bonus_themes in self.TYPE_BONUS_THEMES:
+            themes = [t for t in bonus_themes if t in column]
+            if themes:
+                type_q = Q()
+                for card_type in card_types:
+                    type_q |= Q(type_line__icontains=card_type)
+                any_theme = Q()
+                for t in themes:
+                    any_theme |= matched(t)
+                score = score + when(type_q & any_theme, 3)
+        # Texto longo = mais efeitos; vanilla creature sem sinergia
+        annotations['text_len'] = Coalesce(Length('oracle_text'), Value(0))
+        annotations['trimmed_len'] = Coalesce(Length(Trim('oracle_text')), Value(0))
+        score = score + when(Q(text_len__gt=100), 2) + when(Q(text_len__gt=50, text_len__lte=100), 1)
+        score = score - when(Q(trimmed_len=0, type_line__icontains='creature'), 3)
+        return annotations, score
+
+    def theme_cards(self, queryset, theme_ids, order, direction, limit=100):
+        """Cartas com algum dos temas, acima do score minimo, na ordem pedida.
+
+        Com tags 'theme' precomputadas o score, a ordenacao e o LIMIT rodam no banco;
+        antes do primeiro tag_cards cai no pre-filtro por icontains + regex nas
+        primeiras 500 cartas.
+        """
+        from .models import CardTag
+
+        # Score minimo dinamico: 1 tema = minimo 5, 2 temas = minimo 8, etc.
+        min_score = 5 + (len(theme_ids) - 1) * 3
+        reverse = direction == 'desc'
+        tagged = CardTag.objects.filter(kind='theme', tag__in=theme_ids)
+        if tagged.exists():
+            annotations, score = self.theme_score_expression(theme_ids)
+            if order == 'cmc':
+                ordering = ['-cmc', '-name'] if reverse else ['cmc', 'name']
+            elif order == 'name':
+                ordering = ['-name'] if reverse else ['name']
+            else:
+                # Relevancia (score descendente)
+                ordering = ['-theme_score', 'name']
+            candidates = queryset.filter(id__in=tagged.values('card_id')).annotate(**annotations)
+            return list(candidates.annotate(theme_score=score).filter(
+                theme_score__gte=min_score
+            ).order_by(*ordering)[:limit])
+
+        candidates = list(queryset.filter(self.theme_prefilter_q(theme_ids))[:500])
+        scored_cards = []
+        for card in candidates:
+            score = self.calculate_theme_score(card, theme_ids, tagging.theme_scores(card, theme_ids))
+            text_len = len(card.oracle_text or '')
+            if text_len > 100:
+                score += 2
+            elif text_len > 50:
+                score += 1
+            if not (card.oracle_text or '').strip() and 'creature' in (card.type_line or '').lower():
+                score -= 3
+            if score >= min_score:
+                scored_cards.append((score, card))
+
+        if order == 'cmc':
+            scored_cards.sort(key=lambda x: (x[1].cmc or 0, x[1].name), reverse=reverse)
+        elif order == 'name':
+            scored_cards.sort(key=lambda x: x[1].name, reverse=reverse)
+        else:
+            scored_cards.sort(key=lambda x: (-x[0], x[1].name))
+        return [card for _, card in scored_cards[:limit]]
+
+    def theme_prefilter_q(self, theme_ids):
+        """Q aproximado (icontains) dos temas, usado so quando ainda nao ha tags"""
         import re
 
-        context = self.get_player_context(request)
+        # Lista de todas as tribos para buscar em type_line
+        tribal_themes = [
+            'humans', 'soldiers', 'warriors', 'knights', 'clerics', 'rogues', 'wizards',
+            'shamans', 'pirates', 'ninjas', 'samurai', 'assassins', 'monks', 'druids',
+            'artificers', 'elves', 'faeries', 'goblins', 'kobolds', 'rats', 'squirrels',
+            'zombies', 'vampires', 'skeletons', 'spirits', 'horrors', 'beasts', 'cats',
+            'dogs', 'wolves', 'bears', 'birds', 'snakes', 'spiders', 'insects', 'merfolk',
+            'fish', 'crabs', 'dragons', 'angels', 'demons', 'giants', 'hydras', 'wurms',
+            'dinosaurs', 'elementals', 'phoenixes', 'treefolk', 'plants', 'fungus',
+            'golems', 'constructs', 'thopters', 'myrs', 'slivers', 'eldrazi', 'phyrexians',
+            'changelings', 'allies'
+        ]
 
-        # Filtros
-        filters = {
-            'search': request.GET.get('q', '').strip(),
-            'colors': request.GET.getlist('color'),
-            'color_mode': request.GET.get('color_mode', 'at_most'),
-            'themes': request.GET.getlist('theme'),
-            'card_type': request.GET.get('card_type', ''),
-            'cmc_min': request.GET.get('cmc_min', ''),
-            'cmc_max': request.GET.get('cmc_max', ''),
-            'rarity': request.GET.getlist('rarity'),
-            'order': request.GET.get('order', 'relevance'),  # Default para relevancia
-            'dir': request.GET.get('dir', 'desc'),
+        # Mapeamento de singular para tema tribal
+        tribal_singular = {
+            'humans': 'human', 'soldiers': 'soldier', 'warriors': 'warrior',
+            'knights': 'knight', 'clerics': 'cleric', 'rogues': 'rogue',
+            'wizards': 'wizard', 'shamans': 'shaman', 'pirates': 'pirate',
+            'ninjas': 'ninja', 'assassins': 'assassin', 'monks': 'monk',
+            'druids': 'druid', 'artificers': 'artificer', 'elves': 'elf',
+            'faeries': 'faerie', 'goblins': 'goblin', 'kobolds': 'kobold',
+            'rats': 'rat', 'squirrels': 'squirrel', 'zombies': 'zombie',
+            'vampires': 'vampire', 'skeletons': 'skeleton', 'spirits': 'spirit',
+            'horrors': 'horror', 'beasts': 'beast', 'cats': 'cat', 'dogs': 'dog',
+            'wolves': 'wolf', 'bears': 'bear', 'birds': 'bird', 'snakes': 'snake',
+            'spiders': 'spider', 'insects': 'insect', 'merfolk': 'merfolk',
+            'dragons': 'dragon', 'angels': 'angel', 'demons': 'demon',
+            'giants': 'giant', 'hydras': 'hydra', 'wurms': 'wurm',
+            'dinosaurs': 'dinosaur', 'elementals': 'elemental', 'phoenixes': 'phoenix',
+            'treefolk': 'treefolk', 'plants': 'plant', 'fungus': 'fungus',
+            'golems': 'golem', 'constructs': 'construct', 'thopters': 'thopter',
+            'myrs': 'myr', 'slivers': 'sliver', 'eldrazi': 'eldrazi',
+            'phyrexians': 'phyrexian', 'changelings': 'changeling', 'allies': 'ally',
         }
 
-        # Base query - excluir basic lands e tokens
-        queryset = Card.objects.exclude(
+        # Construir query para cada tema
+        theme_q = Q()
+
+        for theme_id in theme_ids:
+            patterns = self.get_theme_patterns(theme_id)
+            theme_specific_q = Q()
+
+            # Para tribais, adicionar busca no type_line pelo tipo singular
+            if theme_id in tribal_themes:
+                singular = tribal_singular.get(theme_id, theme_id.rstrip('s'))
+                theme_specific_q |= Q(type_line__icontains=singular)
+
+            # Adicionar padroes de alta prioridade primeiro
+            if theme_id in self.HIGH_PRIORITY_PATTERNS:
+                for hp in self.HIGH_PRIORITY_PATTERNS[theme_id]:
+                    hp_clean = hp.replace('.*', ' ').replace('\\+', '+').replace('\\', '')
+                    hp_clean = re.sub(r'[^a-zA-Z0-9\s\'/+-{}]', '', hp_clean).strip()
+                    if hp_clean and (len(hp_clean) >= 3 or '{' in hp_clean):
+                        theme_specific_q |= Q(oracle_text__icontains=hp_clean)
+                        if theme_id in tribal_themes:
+                            theme_specific_q |= Q(type_line__icontains=hp_clean)
+
+            for pattern in patterns:
+                # Limpar pattern para busca SQL - manter texto util e simbolos de mana {X}
+                simple = pattern.replace('.*', ' ').replace('\\+', '+').replace('\\', '')
+                # Preservar {E}, {W}, {U}, etc - sao simbolos de mana importantes
+                simple = re.sub(r'[^a-zA-Z0-9\s\'/+-{}]', '', simple).strip()
+
+                # Exigir pelo menos 4 caracteres para evitar falsos positivos
+                # Ou se for um simbolo de mana especifico como {E}
+                if simple and (len(simple) >= 4 or '{' in simple):
+                    # Buscar no oracle_text
+                    theme_specific_q |= Q(oracle_text__icontains=simple)
+
+                    # Para tribais, buscar tambem no type_line
+                    if theme_id in tribal_themes:
+                        theme_specific_q |= Q(type_line__icontains=simple)
+
+            if theme_specific_q:
+                theme_q |= theme_specific_q
+
+        return theme_q
+
+    def find_cards(self, filters):
+        """Cartas (ate 100) dos filtros, ordenadas por relevancia aos temas ou pelo campo pedido"""
+        # Base query - excluir basic lands e tokens, uma impressao por nome
+        queryset = Card.objects.canonical().exclude(
             type_line__icontains='Basic Land'
         ).exclude(
             type_line__icontains='Token'
         )
 
-        # Deduplicar por nome (pegar versao mais recente)
-        unique_ids = queryset.values('name').annotate(
-            first_id=Min('id')
-        ).values_list('first_id', flat=True)
-
-        queryset = Card.objects.filter(id__in=unique_ids)
-
         # Filtro por nome/texto
         if filters['search']:
-            queryset = queryset.filter(
-                Q(name__icontains=filters['search']) |
-                Q(oracle_text__icontains=filters['search']) |
-                Q(type_line__icontains=filters['search'])
-            )
+            queryset = queryset.search(filters['search'], fields=('name', 'oracle_text', 'type_line'))
 
         # Filtro de cores (para commander identity)
         if filters['colors']:
@@ -2168,26 +1327,14 @@ class ArchetypeFinderView(View):
 
             if 'C' in filters['colors']:
                 # Colorless - sem identidade de cor
-                queryset = queryset.filter(
-                    Q(color_identity='') | Q(color_identity__isnull=True)
-                )
-            elif filters['color_mode'] == 'exact':
-                color_str = ','.join(sorted(color_list))
-                queryset = queryset.filter(color_identity=color_str)
-            elif filters['color_mode'] == 'at_most':
-                # Exclui cores nao selecionadas - para caber na identidade do comandante
-                all_colors = {'W', 'U', 'B', 'R', 'G'}
-                excluded = all_colors - set(color_list)
-                for c in excluded:
-                    queryset = queryset.exclude(color_identity__icontains=c)
+                queryset = queryset.filter(color_identity_mask=0)
             else:
-                # Inclui essas cores
-                for c in color_list:
-                    queryset = queryset.filter(color_identity__icontains=c)
+                # at_most (default aqui): cabe na identidade do comandante
+                queryset = queryset.filter(color_q(color_list, filters['color_mode']))
 
         # Filtro por tipo de carta
         if filters['card_type']:
-            queryset = queryset.filter(type_line__icontains=filters['card_type'])
+            queryset = queryset.search(filters['card_type'], fields=('type_line',))
 
         # CMC
         if filters['cmc_min']:
@@ -2199,140 +1346,42 @@ class ArchetypeFinderView(View):
         if filters['rarity']:
             queryset = queryset.filter(rarity__in=filters['rarity'])
 
-        # Filtro por temas/arquetipos - busca precisa
         if filters['themes']:
-            # Lista de todas as tribos para buscar em type_line
-            tribal_themes = [
-                'humans', 'soldiers', 'warriors', 'knights', 'clerics', 'rogues', 'wizards',
-                'shamans', 'pirates', 'ninjas', 'samurai', 'assassins', 'monks', 'druids',
-                'artificers', 'elves', 'faeries', 'goblins', 'kobolds', 'rats', 'squirrels',
-                'zombies', 'vampires', 'skeletons', 'spirits', 'horrors', 'beasts', 'cats',
-                'dogs', 'wolves', 'bears', 'birds', 'snakes', 'spiders', 'insects', 'merfolk',
-                'fish', 'crabs', 'dragons', 'angels', 'demons', 'giants', 'hydras', 'wurms',
-                'dinosaurs', 'elementals', 'phoenixes', 'treefolk', 'plants', 'fungus',
-                'golems', 'constructs', 'thopters', 'myrs', 'slivers', 'eldrazi', 'phyrexians',
-                'changelings', 'allies'
-            ]
-
-            # Mapeamento de singular para tema tribal
-            tribal_singular = {
-                'humans': 'human', 'soldiers': 'soldier', 'warriors': 'warrior',
-                'knights': 'knight', 'clerics': 'cleric', 'rogues': 'rogue',
-                'wizards': 'wizard', 'shamans': 'shaman', 'pirates': 'pirate',
-                'ninjas': 'ninja', 'assassins': 'assassin', 'monks': 'monk',
-                'druids': 'druid', 'artificers': 'artificer', 'elves': 'elf',
-                'faeries': 'faerie', 'goblins': 'goblin', 'kobolds': 'kobold',
-                'rats': 'rat', 'squirrels': 'squirrel', 'zombies': 'zombie',
-                'vampires': 'vampire', 'skeletons': 'skeleton', 'spirits': 'spirit',
-                'horrors': 'horror', 'beasts': 'beast', 'cats': 'cat', 'dogs': 'dog',
-                'wolves': 'wolf', 'bears': 'bear', 'birds': 'bird', 'snakes': 'snake',
-                'spiders': 'spider', 'insects': 'insect', 'merfolk': 'merfolk',
-                'dragons': 'dragon', 'angels': 'angel', 'demons': 'demon',
-                'giants': 'giant', 'hydras': 'hydra', 'wurms': 'wurm',
-                'dinosaurs': 'dinosaur', 'elementals': 'elemental', 'phoenixes': 'phoenix',
-                'treefolk': 'treefolk', 'plants': 'plant', 'fungus': 'fungus',
-                'golems': 'golem', 'constructs': 'construct', 'thopters': 'thopter',
-                'myrs': 'myr', 'slivers': 'sliver', 'eldrazi': 'eldrazi',
-                'phyrexians': 'phyrexian', 'changelings': 'changeling', 'allies': 'ally',
-            }
-
-            # Construir query para cada tema
-            theme_q = Q()
-
-            for theme_id in filters['themes']:
-                patterns = self.get_theme_patterns(theme_id)
-                theme_specific_q = Q()
-
-                # Para tribais, adicionar busca no type_line pelo tipo singular
-                if theme_id in tribal_themes:
-                    singular = tribal_singular.get(theme_id, theme_id.rstrip('s'))
-                    theme_specific_q |= Q(type_line__icontains=singular)
-
-                # Adicionar padroes de alta prioridade primeiro
-                if theme_id in self.HIGH_PRIORITY_PATTERNS:
-                    for hp in self.HIGH_PRIORITY_PATTERNS[theme_id]:
-                        hp_clean = hp.replace('.*', ' ').replace('\\+', '+').replace('\\', '')
-                        hp_clean = re.sub(r'[^a-zA-Z0-9\s\'/+-{}]', '', hp_clean).strip()
-                        if hp_clean and (len(hp_clean) >= 3 or '{' in hp_clean):
-                            theme_specific_q |= Q(oracle_text__icontains=hp_clean)
-                            if theme_id in tribal_themes:
-                                theme_specific_q |= Q(type_line__icontains=hp_clean)
-
-                for pattern in patterns:
-                    # Limpar pattern para busca SQL - manter texto util e simbolos de mana {X}
-                    simple = pattern.replace('.*', ' ').replace('\\+', '+').replace('\\', '')
-                    # Preservar {E}, {W}, {U}, etc - sao simbolos de mana importantes
-                    simple = re.sub(r'[^a-zA-Z0-9\s\'/+-{}]', '', simple).strip()
-
-                    # Exigir pelo menos 4 caracteres para evitar falsos positivos
-                    # Ou se for um simbolo de mana especifico como {E}
-                    if simple and (len(simple) >= 4 or '{' in simple):
-                        # Buscar no oracle_text
-                        theme_specific_q |= Q(oracle_text__icontains=simple)
-
-                        # Para tribais, buscar tambem no type_line
-                        if theme_id in tribal_themes:
-                            theme_specific_q |= Q(type_line__icontains=simple)
-
-                if theme_specific_q:
-                    theme_q |= theme_specific_q
-
-            if theme_q:
-                queryset = queryset.filter(theme_q)
-
-        # Obter cartas e calcular scores
-        # Limitar busca inicial para performance
-        cards_raw = list(queryset[:500])
-
-        # Calcular score de relevancia para cada carta
-        scored_cards = []
-        for card in cards_raw:
-            score = self.calculate_theme_score(card, filters['themes'])
-
-            # Bonus por ter oracle text relevante (cartas com mais texto geralmente sao mais sinergicas)
-            if card.oracle_text:
-                text_len = len(card.oracle_text)
-                if text_len > 100:
-                    score += 2  # Texto longo = mais efeitos
-                elif text_len > 50:
-                    score += 1
-
-            # Penalidade para vanilla creatures (sem habilidades)
-            if card.oracle_text is None or len(card.oracle_text.strip()) == 0:
-                if 'creature' in (card.type_line or '').lower():
-                    score -= 3  # Vanilla creature sem sinergia
-
-            scored_cards.append({
-                'card': card,
-                'score': score
-            })
-
-        # Ordenacao
-        if filters['order'] == 'relevance' and filters['themes']:
-            # Ordenar por relevancia (score descendente)
-            scored_cards.sort(key=lambda x: (-x['score'], x['card'].name))
-        elif filters['order'] == 'cmc':
-            reverse = filters['dir'] == 'desc'
-            scored_cards.sort(key=lambda x: (x['card'].cmc or 0, x['card'].name), reverse=reverse)
-        elif filters['order'] == 'name':
-            reverse = filters['dir'] == 'desc'
-            scored_cards.sort(key=lambda x: x['card'].name, reverse=reverse)
+            cards = self.theme_cards(queryset, filters['themes'], filters['order'], filters['dir'])
         else:
-            # Default: relevancia se tiver temas, senao nome
-            if filters['themes']:
-                scored_cards.sort(key=lambda x: (-x['score'], x['card'].name))
+            # Sem temas: ordenacao direto no banco
+            reverse = filters['dir'] == 'desc'
+            if filters['order'] == 'cmc':
+                ordering = ['-cmc', '-name'] if reverse else ['cmc', 'name']
+            elif filters['order'] == 'name' and reverse:
+                ordering = ['-name']
             else:
-                scored_cards.sort(key=lambda x: x['card'].name)
+                ordering = ['name']
+            cards = list(queryset.order_by(*ordering)[:100])
+        return cards
 
-        # Filtrar cartas com score baixo se temas foram selecionados (remover falsos positivos)
-        if filters['themes']:
-            # Score minimo dinamico baseado no numero de temas selecionados
-            # 1 tema = minimo 5, 2 temas = minimo 8, etc.
-            min_score = 5 + (len(filters['themes']) - 1) * 3
-            scored_cards = [sc for sc in scored_cards if sc['score'] >= min_score]
+    # Parametros GET que mudam o resultado (chave do cache, cards/results.py)
+    RESULT_PARAMS = ('q', 'color', 'color_mode', 'theme', 'card_type', 'cmc_min', 'cmc_max', 'rarity', 'order', 'dir')
+
+    def get(self, request):
+        context = self.get_player_context(request)
+
+        # Filtros
+        filters = {
+            'search': request.GET.get('q', '').strip(),
+            'colors': request.GET.getlist('color'),
+            'color_mode': request.GET.get('color_mode', 'at_most'),
+            'themes': request.GET.getlist('theme'),
+            'card_type': request.GET.get('card_type', ''),
+            'cmc_min': request.GET.get('cmc_min', ''),
+            'cmc_max': request.GET.get('cmc_max', ''),
+            'rarity': request.GET.getlist('rarity'),
+            'order': request.GET.get('order', 'relevance'),  # Default para relevancia
+            'dir': request.GET.get('dir', 'desc'),
+        }
 
-        # Limitar resultado final
-        cards = [sc['card'] for sc in scored_cards[:100]]
+        # Resultado depende so dos parametros e das cartas (cards/results.py)
+        cards = results.cached_result('archetypes', request.GET, self.RESULT_PARAMS, lambda: self.find_cards(filters))
 
         # Organizar temas por categoria
         themes_by_category = {}
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from cards import pages
 from .models import Deck, DeckCard
 
 
@@ -16,3 +17,15 @@ class DeckAdmin(admin.ModelAdmin):
     raw_id_fields = ['owner', 'commander', 'partner_commander']
     readonly_fields = ['id', 'created_at', 'updated_at']
     inlines = [DeckCardInline]
+
+    def save_related(self, request, form, formsets, change):
+        # Cartas removidas e adicionadas pelo inline: atualiza o uso em decks das paginas
+        names = set(form.instance.cards.values_list('card__name', flat=True))
+        super().save_related(request, form, formsets, change)
+        names.update(form.instance.cards.values_list('card__name', flat=True))
+        pages.refresh_decks(names)
+
+    def delete_model(self, request, obj):
+        names = list(obj.cards.values_list('card__name', flat=True))
+        super().delete_model(request, obj)
+        pages.refresh_decks(names)
@@ -57,3 +57,23 @@ class DeckCard(models.Model):
 
     def __str__(self):
         return f"{self.quantity}x {self.card.name}"
+
+
+class DeckDataVersion(models.Model):
+    """Versao dos decks (linha unica); incrementada quando decks mudam para refazer a popularidade do autocomplete"""
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        cls.objects.get_or_create(pk=1)
+        from django.utils import timezone
+        cls.objects.filter(pk=1).update(version=models.F('version') + 1, updated_at=timezone.now())
+        return cls.current()
+
+    def __str__(self):
+        return f"v{self.version}"
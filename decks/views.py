@@ -6,6 +6,9 @@ from django.http import JsonResponse
 import json
 from accounts.views import get_current_player, get_tab_id
 from cards.models import Card
+from cards.colors import color_q
+from cards import pages, results, rules
+from cards.matcher import Matcher, compiled
 from .models import Deck, DeckCard
 from engine.validators import parse_decklist, validate_commander_deck
 
@@ -222,6 +225,9 @@ class DeckImportView(View):
             if card:
                 DeckCard.objects.create(deck=deck, card=card, quantity=qty)
 
+        # Uso em decks das paginas das cartas (cards/pages.py)
+        pages.refresh_decks(deck.cards.values_list('card__name', flat=True))
+
         redirect_url = f'/decks/{deck.id}/?tab={tab_id}' if tab_id else f'/decks/{deck.id}/'
         return redirect(redirect_url)
 
@@ -329,7 +335,9 @@ class DeckDetailView(View):
         deck = get_object_or_404(Deck, id=deck_id, owner=player)
 
         if request.POST.get('action') == 'delete':
+            names = list(deck.cards.values_list('card__name', flat=True))
             deck.delete()
+            pages.refresh_decks(names)
             redirect_url = f'/decks/?tab={tab_id}' if tab_id else '/decks/'
             return redirect(redirect_url)
 
@@ -340,55 +348,8 @@ class DeckDetailView(View):
 class DeckBuilderView(View):
     """Construtor de Deck Inteligente - sugere cartas baseado no comandante"""
 
-    # Categorias de cartas com patterns para deteccao
-    CARD_CATEGORIES = {
-        'ramp': {
-            'name': 'Ramp',
-            'target': 10,
-            'patterns': [
-                'add .* mana', 'search your library for .* land',
-                'put .* land .* onto the battlefield', 'mana of any',
-                'treasure token', 'sol ring'
-            ],
-            'description': 'Aceleracao de mana'
-        },
-        'removal': {
-            'name': 'Removal',
-            'target': 8,
-            'patterns': [
-                'destroy target', 'exile target', 'destroy all',
-                'deals .* damage to', 'return .* to .* hand'
-            ],
-            'description': 'Remocao de ameacas'
-        },
-        'draw': {
-            'name': 'Card Draw',
-            'target': 10,
-            'patterns': [
-                'draw .* card', 'draws .* card', 'look at the top',
-                'reveal .* draw', 'scry'
-            ],
-            'description': 'Compra de cartas'
-        },
-        'board_wipe': {
-            'name': 'Board Wipes',
-            'target': 3,
-            'patterns': [
-                'destroy all creature', 'exile all creature',
-                'all creatures get -', 'deals .* damage to each creature'
-            ],
-            'description': 'Limpeza de campo'
-        },
-        'protection': {
-            'name': 'Protection',
-            'target': 5,
-            'patterns': [
-                'hexproof', 'indestructible', 'protection from',
-                'counter target spell'
-            ],
-            'description': 'Protecao de permanentes'
-        },
-    }
+    # Categorias de cartas com patterns para deteccao: cards/rules.py
+    CARD_CATEGORIES = rules.DECK_BUILDER_CATEGORIES
 
     # Curva de mana ideal para commander
     IDEAL_MANA_CURVE = {
@@ -402,21 +363,16 @@ class DeckBuilderView(View):
 
     def categorize_card(self, card):
         """Categoriza uma carta baseado em seus patterns"""
-        import re
-        categories = []
-        oracle = (card.oracle_text or '').lower()
-
-        for cat_id, cat_info in self.CARD_CATEGORIES.items():
-            for pattern in cat_info['patterns']:
-                if re.search(pattern, oracle, re.IGNORECASE):
-                    categories.append(cat_id)
-                    break
-        return categories
+        matcher = compiled('deck_builder_categories', lambda: Matcher.from_catalog({
+            cat_id: cat_info['patterns'] for cat_id, cat_info in self.CARD_CATEGORIES.items()
+        }))
+        found = matcher.counts((card.oracle_text or '').lower())
+        return [cat_id for cat_id in self.CARD_CATEGORIES if cat_id in found]
 
     def find_synergy_cards(self, commander, color_identity, limit=20):
         """Encontra cartas que sinergizam com o comandante"""
         import re
-        from django.db.models import Q, Min
+        from django.db.models import Q
 
         synergy_cards = []
         oracle = (commander.oracle_text or '').lower()
@@ -432,25 +388,16 @@ class DeckBuilderView(View):
             if kw in oracle:
                 keywords.append(kw)
 
-        colors = [c.strip() for c in color_identity.split(',') if c.strip()]
-
-        base_q = Q()
-        if colors:
-            for color in ['W', 'U', 'B', 'R', 'G']:
-                if color not in colors:
-                    base_q &= ~Q(color_identity__icontains=color)
+        # Cartas dentro da identidade do comandante (mascara indexada)
+        base_q = color_q(color_identity, 'at_most') if color_identity else Q()
 
         for keyword in keywords[:4]:
             keyword_q = Q(oracle_text__icontains=keyword)
-            cards = Card.objects.filter(base_q & keyword_q).exclude(
-                Q(type_line__icontains='Basic Land') | Q(id=commander.id)
+            cards = Card.objects.canonical().filter(base_q & keyword_q).exclude(
+                Q(type_line__icontains='Basic Land') | Q(name=commander.name)
             )
 
-            unique_ids = cards.values('name').annotate(
-                first_id=Min('id')
-            ).values_list('first_id', flat=True)[:8]
-
-            for card in Card.objects.filter(id__in=unique_ids):
+            for card in cards[:8]:
                 if card not in [s['card'] for s in synergy_cards]:
                     synergy_cards.append({
                         'card': card,
@@ -463,19 +410,14 @@ class DeckBuilderView(View):
     def suggest_by_category(self, category_id, color_identity, exclude_ids, limit=8):
         """Sugere cartas de uma categoria especifica"""
         import re
-        from django.db.models import Q, Min
+        from django.db.models import Q
 
         cat_info = self.CARD_CATEGORIES.get(category_id)
         if not cat_info:
             return []
 
-        colors = [c.strip() for c in color_identity.split(',') if c.strip()]
-
-        base_q = Q()
-        if colors:
-            for color in ['W', 'U', 'B', 'R', 'G']:
-                if color not in colors:
-                    base_q &= ~Q(color_identity__icontains=color)
+        # Cartas dentro da identidade do comandante (mascara indexada)
+        base_q = color_q(color_identity, 'at_most') if color_identity else Q()
 
         pattern_q = Q()
         for pattern in cat_info['patterns']:
@@ -484,19 +426,51 @@ class DeckBuilderView(View):
             if simple and len(simple) > 2:
                 pattern_q |= Q(oracle_text__icontains=simple)
 
-        cards = Card.objects.filter(base_q & pattern_q).exclude(
+        cards = Card.objects.canonical().filter(base_q & pattern_q).exclude(
             Q(type_line__icontains='Basic Land') | Q(id__in=exclude_ids)
         )
 
-        unique_ids = cards.values('name').annotate(
-            first_id=Min('id')
-        ).values_list('first_id', flat=True)[:limit]
-
-        return list(Card.objects.filter(id__in=unique_ids))
+        return list(cards[:limit])
 
-    def get(self, request):
+    def build_suggestions(self, commander_name):
+        """(comandante, identidade de cor, sinergias, sugestoes por categoria) para o nome"""
         from django.db.models import Q
 
+        suggestions = {}
+        synergy_cards = []
+        color_identity = ''
+
+        selected_commander = Card.objects.filter(
+            Q(name__iexact=commander_name) |
+            Q(name__istartswith=commander_name + ' //')
+        ).filter(
+            Q(type_line__icontains='Legendary') & Q(type_line__icontains='Creature') |
+            Q(oracle_text__icontains='can be your commander')
+        ).first()
+
+        if selected_commander:
+            color_identity = selected_commander.color_identity or ''
+            exclude_ids = [selected_commander.id]
+
+            synergy_cards = self.find_synergy_cards(
+                selected_commander, color_identity, limit=20
+            )
+            exclude_ids.extend([s['card'].id for s in synergy_cards])
+
+            for cat_id, cat_info in self.CARD_CATEGORIES.items():
+                cat_cards = self.suggest_by_category(
+                    cat_id, color_identity, exclude_ids, limit=8
+                )
+                suggestions[cat_id] = {
+                    'name': cat_info['name'],
+                    'target': cat_info['target'],
+                    'description': cat_info['description'],
+                    'cards': cat_cards
+                }
+                exclude_ids.extend([c.id for c in cat_cards])
+        return selected_commander, color_identity, synergy_cards, suggestions
+
+    def get(self, request):
         context = self.get_player_context(request)
         if not context['player']:
             return redirect('login')
@@ -508,34 +482,10 @@ class DeckBuilderView(View):
         color_identity = ''
 
         if commander_name:
-            selected_commander = Card.objects.filter(
-                Q(name__iexact=commander_name) |
-                Q(name__istartswith=commander_name + ' //')
-            ).filter(
-                Q(type_line__icontains='Legendary') & Q(type_line__icontains='Creature') |
-                Q(oracle_text__icontains='can be your commander')
-            ).first()
-
-            if selected_commander:
-                color_identity = selected_commander.color_identity or ''
-                exclude_ids = [selected_commander.id]
-
-                synergy_cards = self.find_synergy_cards(
-                    selected_commander, color_identity, limit=20
-                )
-                exclude_ids.extend([s['card'].id for s in synergy_cards])
-
-                for cat_id, cat_info in self.CARD_CATEGORIES.items():
-                    cat_cards = self.suggest_by_category(
-                        cat_id, color_identity, exclude_ids, limit=8
-                    )
-                    suggestions[cat_id] = {
-                        'name': cat_info['name'],
-                        'target': cat_info['target'],
-                        'description': cat_info['description'],
-                        'cards': cat_cards
-                    }
-                    exclude_ids.extend([c.id for c in cat_cards])
+            # Sugestoes dependem so do comandante e das cartas (cards/results.py)
+            selected_commander, color_identity, synergy_cards, suggestions = results.cached_result(
+                'deck-builder', request.GET, ('commander',), lambda: self.build_suggestions(commander_name)
+            )
 
         context.update({
             'commander_name': commander_name,
@@ -579,26 +529,20 @@ class DeckAnalyzerView(View):
         },
     ]
 
+    # Patterns por categoria (qualquer um casando no oracle text): cards/rules.py
+    CATEGORY_PATTERNS = rules.DECK_ANALYZER_CATEGORIES
+
     def get_player_context(self, request):
         tab_id = get_tab_id(request)
         player = get_current_player(request)
         return {'player': player, 'tab_id': tab_id}
 
     def categorize_card(self, card):
-        import re
-        categories = []
-        oracle = (card.oracle_text or '').lower()
-        type_line = (card.type_line or '').lower()
-
-        if re.search(r'add .* mana|search .* land|treasure', oracle):
-            categories.append('ramp')
-        if re.search(r'destroy target|exile target|deals .* damage to', oracle):
-            categories.append('removal')
-        if re.search(r'draw .* card|draws .* card|scry', oracle):
-            categories.append('draw')
-        if re.search(r'destroy all|exile all', oracle):
-            categories.append('board_wipe')
-        if 'land' in type_line:
+        matcher = compiled('deck_analyzer_categories', lambda: Matcher.from_catalog(self.CATEGORY_PATTERNS))
+        found = matcher.counts((card.oracle_text or '').lower())
+        categories = [cat_id for cat_id in self.CATEGORY_PATTERNS if cat_id in found]
+
+        if 'land' in (card.type_line or '').lower():
             categories.append('lands')
 
         return categories
@@ -723,7 +667,7 @@ class ManaBaseGeneratorView(View):
         return color_pips
 
     def suggest_lands(self, colors, color_pips, total_lands=37):
-        from django.db.models import Q, Min
+        from django.db.models import Q
 
         suggestions = {'basics': {}, 'duals': [], 'utility': []}
 
@@ -739,19 +683,13 @@ class ManaBaseGeneratorView(View):
 
         # Buscar duals
         if len(colors) >= 2:
-            dual_q = Q(type_line__icontains='Land')
-            for color in colors[:2]:
-                dual_q &= Q(color_identity__icontains=color)
+            dual_q = Q(type_line__icontains='Land') & color_q(colors[:2])
 
-            duals = Card.objects.filter(dual_q).exclude(
+            duals = Card.objects.canonical().filter(dual_q).exclude(
                 type_line__icontains='Basic'
             )
 
-            unique_ids = duals.values('name').annotate(
-                first_id=Min('id')
-            ).values_list('first_id', flat=True)[:10]
-
-            for card in Card.objects.filter(id__in=unique_ids):
+            for card in duals[:10]:
                 suggestions['duals'].append(card)
 
         # Utility
@@ -936,16 +874,13 @@ class CardComparatorView(View):
         player = get_current_player(request)
         return {'player': player, 'tab_id': tab_id}
 
-    def parse_power_toughness(self, value):
-        """Parse power/toughness value, handling * and other special values"""
-        if not value:
-            return None
-        try:
-            return int(value)
-        except ValueError:
-            if '*' in str(value):
-                return -1  # Variable
-            return None
+    def parse_power_toughness(self, value, number=None):
+        """Power/toughness numerico (campo *_value); -1 para variavel (*), None se nao houver"""
+        if number is not None:
+            return number
+        if value and '*' in str(value):
+            return -1  # Variable
+        return None
 
     def count_keywords(self, oracle_text):
         """Count important keywords in oracle text"""
@@ -993,8 +928,8 @@ class CardComparatorView(View):
         return {
             'card': card,
             'cmc': float(card.cmc) if card.cmc else 0,
-            'power': self.parse_power_toughness(card.power),
-            'toughness': self.parse_power_toughness(card.toughness),
+            'power': self.parse_power_toughness(card.power, card.power_value),
+            'toughness': self.parse_power_toughness(card.toughness, card.toughness_value),
             'keywords': self.count_keywords(oracle),
             'keyword_count': len(self.count_keywords(oracle)),
             'pip_counts': pip_counts,
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_gameobject_is_transformed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='state_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -37,6 +37,9 @@ class Game(models.Model):
     active_player_seat = models.PositiveSmallIntegerField(default=0)
     current_phase = models.CharField(max_length=20, choices=PHASE_CHOICES, default='untap')
 
+    # Sequencia do ultimo estado transmitido (retomada de clientes apos deploy)
+    state_seq = models.PositiveBigIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
 
@@ -2,5 +2,6 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path('metrics/', views.GameMetricsView.as_view(), name='game_metrics'),
     path('<uuid:game_id>/', views.GameView.as_view(), name='game_play'),
 ]
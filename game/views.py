@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views import View
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
+from django.conf import settings
 from accounts.views import get_current_player, get_tab_id
 from .models import Game, GamePlayer, GameObject, GameAction, CommanderDamage
 import random
@@ -421,3 +422,15 @@ class GameView(View):
             game.save()
 
         return JsonResponse({'success': True})
+
+
+class GameMetricsView(View):
+    """Snapshot das metricas do GameConsumer (histogramas por etapa e acao); so staff"""
+
+    def get(self, request):
+        if not getattr(settings, 'GAME_METRICS_ENABLED', False):
+            raise Http404
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Acesso restrito'}, status=403)
+        from realtime.metrics import registry
+        return JsonResponse(registry.snapshot())
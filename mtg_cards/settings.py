@@ -55,6 +55,17 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Drain de partidas (SIGUSR1 antes do deploy)
+GAME_DRAIN_RECONNECT_AFTER = 5  # segundos sugeridos ao cliente para reconectar
+GAME_DRAIN_TIMEOUT = 10  # espera maxima por acoes em andamento
+
+# Fila de saida por socket (clientes lentos recebem resync em vez de travar a mesa)
+GAME_OUTBOX_MAX_SIZE = 64  # mensagens pendentes antes de forcar resync
+GAME_OUTBOX_MAX_AGE = 5.0  # segundos que uma mensagem pode esperar na fila
+
+# Metricas do GameConsumer em /game/metrics/ e overlay ?debug=1 (so staff)
+GAME_METRICS_ENABLED = False
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -137,3 +148,8 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Cache de resultados das paginas de descoberta (cards/results.py)
+CARD_RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+CARD_RESULT_CACHE_DIR = None  # ex: BASE_DIR / 'cache' / 'results' para o nivel em arquivo
+CARD_RESULT_CACHE_MAX_FILES = 2000
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RealtimeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'realtime'
+
+    def ready(self):
+        # Drain por SIGUSR1 vale desde o inicio do processo, nao so apos o primeiro socket
+        from .drain import coordinator
+        coordinator.install_process_handler()
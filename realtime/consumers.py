@@ -2,6 +2,10 @@ import json
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 import random
+from django.conf import settings
+from . import metrics, sessions
+from .outbox import Outbox
+from .drain import coordinator as drain, CLOSE_SERVICE_RESTART
 
 
 class LobbyConsumer(AsyncJsonWebsocketConsumer):
@@ -323,6 +327,13 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
                     await self.send_json({'type': 'error', 'message': result.get('error')})
 
         elif action == 'start_game':
+            if drain.draining:
+                await self.send_json({
+                    'type': 'error',
+                    'message': 'Servidor reiniciando, tente novamente em instantes',
+                    'reconnect_after': drain.reconnect_after
+                })
+                return
             result = await self.do_start_game()
             if result['success']:
                 await self.channel_layer.group_send(
@@ -383,11 +394,32 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
 class GameConsumer(AsyncJsonWebsocketConsumer):
     """Consumer principal do jogo com sincronização em tempo real"""
 
+    # Acoes que alteram o estado da partida (passam por execute_game_action)
+    GAME_ACTIONS = (
+        'move_card', 'tap_card', 'change_life', 'add_counter', 'remove_counter',
+        'next_phase', 'next_turn', 'draw_card', 'shuffle_library', 'concede',
+        'scry', 'look_top', 'put_top', 'put_bottom', 'reveal_card',
+        'shuffle_into', 'reorder_scry', 'set_battlefield_row',
+        'go_to_phase', 'view_library', 'roll_dice', 'set_starting_player',
+        'create_token', 'untap_all', 'flip_card',
+    )
+    # Acoes apenas visuais/sociais (broadcast direto)
+    SOCIAL_ACTIONS = (
+        'chat', 'get_state', 'create_arrows', 'remove_arrow', 'remove_arrows',
+        'clear_arrows', 'sync_stacks', 'send_emote', 'debug_metrics',
+    )
+
     async def connect(self):
         self.game_id = self.scope['url_route']['kwargs']['game_id']
         self.group_name = f'game_{self.game_id}'
         self.player_id = None
         self.tab_id = None
+        self.outbox = Outbox(
+            self._send_now,
+            self._resync,
+            max_size=getattr(settings, 'GAME_OUTBOX_MAX_SIZE', 64),
+            max_age=getattr(settings, 'GAME_OUTBOX_MAX_AGE', 5.0),
+        )
 
         # Pegar player_id da query string (mais confiável)
         query_string = self.scope.get('query_string', b'').decode('utf-8')
@@ -410,16 +442,76 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                 self.player_id = session.get('player_id')
             print(f"[WS Game] Got player_id from session: {self.player_id}")
 
+        # Ultima sequencia de estado vista pelo cliente (reconexao apos deploy)
+        last_seq = query_params.get('last_seq')
+        last_seq = int(last_seq) if last_seq and last_seq.isdigit() else None
+
+        drain.install_signal_handler()
+        self.session = sessions.get_session(self.game_id)
+
+        if drain.draining:
+            await self.accept()
+            await self.send_drain_notice(drain.reconnect_after)
+            return
+
+        await sessions.load_session(self.session)
+        self.session.consumers.add(self)
+
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        self.outbox.start()
 
         # Enviar estado inicial
-        await self.send_game_state()
+        await self.send_game_state(last_seq)
 
     async def disconnect(self, close_code):
+        outbox = getattr(self, 'outbox', None)
+        if outbox is not None:
+            await outbox.stop()
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.consumers.discard(self)
+            if not session.consumers:
+                await sessions.flush_sessions([session])
+                sessions.discard_session(self.game_id)
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
+    async def send_drain_notice(self, reconnect_after):
+        """Avisa o cliente que o servidor vai reiniciar e fecha o socket"""
+        # Entregar o que ja estava na fila antes do aviso
+        await self.outbox.flush(drain.timeout)
+        await self.outbox.stop()
+        await self._send_now({
+            'type': 'server_draining',
+            'reconnect_after': reconnect_after,
+            'seq': self.session.seq
+        })
+        await self.close(code=CLOSE_SERVICE_RESTART)
+
+    async def send_json(self, content, close=False):
+        """Enfileira na fila de saida do socket (ver realtime/outbox.py); close fecha depois de entregar"""
+        self.outbox.put(content)
+        if close:
+            await self.outbox.flush(self.outbox.max_age)
+            await self.outbox.stop()
+            await self.close(close)
+
+    async def _send_now(self, content):
+        await super().send_json(content)
+
+    async def _resync(self):
+        """Cliente ficou para tras: descarta a fila e manda o estado completo atual"""
+        state = await self.get_game_state()
+        await self._send_now({'type': 'resync', 'seq': self.session.seq})
+        if state:
+            await self._send_now({
+                'type': 'game_state',
+                'state': state,
+                'seq': self.session.seq
+            })
+
     @database_sync_to_async
+    @metrics.instrument('get_game_state')
     def get_game_state(self):
         from game.models import Game, GamePlayer, GameObject, GameAction, CommanderDamage
         try:
@@ -565,7 +657,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 
             # Commander damage
             cmd_damage = {}
-            for cd in CommanderDamage.objects.filter(game=game):
+            for cd in CommanderDamage.objects.filter(game=game).select_related('target_player', 'source_player'):
                 key = f"{cd.target_player.seat_position}_{cd.source_player.seat_position}"
                 cmd_damage[key] = cd.damage
 
@@ -588,7 +680,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                 'zones_data': zones_data,
                 'recent_actions': recent_actions,
                 'cmd_damage': cmd_damage,
-                'winner_id': str(game.winner.id) if game.winner else None
+                'winner_id': str(game.winner_id) if game.winner_id else None
             }
         except Game.DoesNotExist:
             return None
@@ -620,9 +712,10 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
             return None
 
     @database_sync_to_async
+    @metrics.instrument('execute_game_action')
     def execute_game_action(self, action, data):
         from game.models import Game, GamePlayer, GameObject, GameAction, CommanderDamage
-        from accounts.models import PlayerProfile
+        from django.db.models import F
         import random
 
         if not self.player_id:
@@ -630,8 +723,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 
         try:
             game = Game.objects.get(id=self.game_id)
-            player = PlayerProfile.objects.get(id=self.player_id)
-            game_player = GamePlayer.objects.get(game=game, player=player)
+            game_player = GamePlayer.objects.select_related('player').get(game=game, player_id=self.player_id)
         except Exception as e:
             return {'success': False, 'error': f'Game or player not found: {e}'}
 
@@ -898,9 +990,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                 game.save()
 
                 # Reset lands played
-                for gp in game.players.all():
-                    gp.lands_played_this_turn = 0
-                    gp.save()
+                game.players.update(lands_played_this_turn=0)
 
                 # Desvirar permanentes do jogador ativo
                 active = alive_players[next_idx]
@@ -974,11 +1064,11 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                     game=game,
                     owner=game_player,
                     zone='library'
-                ))
+                ).only('id', 'zone_position'))
                 random.shuffle(library_cards)
                 for i, card in enumerate(library_cards):
                     card.zone_position = i
-                    card.save()
+                GameObject.objects.bulk_update(library_cards, ['zone_position'])
 
                 GameAction.objects.create(
                     game=game,
@@ -1083,15 +1173,11 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                 card_name = obj.card.name if obj.card else 'Unknown'
 
                 # Shift all library cards down by 1 to make room at position 0
-                library_cards = GameObject.objects.filter(
+                GameObject.objects.filter(
                     game=game,
-                    owner=obj.owner,
+                    owner_id=obj.owner_id,
                     zone='library'
-                ).exclude(id=obj_id).order_by('zone_position')
-
-                for i, card in enumerate(library_cards):
-                    card.zone_position = i + 1
-                    card.save()
+                ).exclude(id=obj_id).update(zone_position=F('zone_position') + 1)
 
                 # Place the card at position 0 (top)
                 obj.zone = 'library'
@@ -1227,11 +1313,11 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                     game=game,
                     owner=game_player,
                     zone='library'
-                ))
+                ).only('id', 'zone_position'))
                 random.shuffle(library_cards)
                 for i, card in enumerate(library_cards):
                     card.zone_position = i
-                    card.save()
+                GameObject.objects.bulk_update(library_cards, ['zone_position'])
 
                 GameAction.objects.create(
                     game=game,
@@ -1260,7 +1346,7 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                     game=game,
                     owner=game_player,
                     zone='library'
-                ).order_by('zone_position'))
+                ).only('id', 'zone_position').order_by('zone_position'))
 
                 # Get IDs of cards being reordered
                 reorder_ids = {item['id'] for item in order}
@@ -1268,30 +1354,20 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                 # Remove reordered cards from the middle of the library
                 remaining_cards = [c for c in library_cards if str(c.id) not in reorder_ids]
 
-                # Calculate new positions: top_cards first, then remaining, then bottom_cards
-                new_position = 0
+                # Reordered cards normally come from the library; fetch any others in one query
+                by_id = {str(c.id): c for c in library_cards}
+                missing = [item['id'] for item in order if item['id'] not in by_id]
+                if missing:
+                    by_id.update((str(c.id), c) for c in GameObject.objects.filter(id__in=missing, game=game))
 
-                # Place top cards first (in order they were added to top)
-                for item in top_cards:
-                    obj = GameObject.objects.filter(id=item['id'], game=game).first()
-                    if obj:
-                        obj.zone_position = new_position
-                        obj.save()
-                        new_position += 1
+                # New order: top_cards first, then remaining, then bottom_cards
+                ordered = [by_id[item['id']] for item in top_cards if item['id'] in by_id]
+                ordered += remaining_cards
+                ordered += [by_id[item['id']] for item in bottom_cards if item['id'] in by_id]
 
-                # Place remaining library cards
-                for card in remaining_cards:
+                for new_position, card in enumerate(ordered):
                     card.zone_position = new_position
-                    card.save()
-                    new_position += 1
-
-                # Place bottom cards last
-                for item in bottom_cards:
-                    obj = GameObject.objects.filter(id=item['id'], game=game).first()
-                    if obj:
-                        obj.zone_position = new_position
-                        obj.save()
-                        new_position += 1
+                GameObject.objects.bulk_update(ordered, ['zone_position'])
 
                 return {'success': True, 'private': True}
 
@@ -1472,7 +1548,24 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
 
     async def receive_json(self, content):
         action = content.get('action')
+        # Acoes desconhecidas vao para 'other' para nao explodir os histogramas
+        label = action if action in self.GAME_ACTIONS or action in self.SOCIAL_ACTIONS else 'other'
+
+        with metrics.action_scope(label) as samples:
+            with metrics.measure('receive_json'):
+                await self.handle_action(action, content)
+
+        if self.session.debug_metrics and action in self.GAME_ACTIONS:
+            await self.channel_layer.group_send(
+                self.group_name,
+                {
+                    'type': 'debug_metrics_update',
+                    'action': action,
+                    'samples': samples
+                }
+            )
 
+    async def handle_action(self, action, content):
         if action == 'chat':
             await self.channel_layer.group_send(
                 self.group_name,
@@ -1484,7 +1577,8 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
             )
 
         elif action == 'get_state':
-            await self.send_game_state()
+            last_seq = content.get('last_seq')
+            await self.send_game_state(last_seq if isinstance(last_seq, int) else None)
 
         # Arrow actions (visual only, no persistence needed)
         elif action == 'create_arrows':
@@ -1560,85 +1654,134 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
                     )
             return
 
-        elif action in ['move_card', 'tap_card', 'change_life', 'add_counter', 'remove_counter',
-                        'next_phase', 'next_turn', 'draw_card', 'shuffle_library', 'concede',
-                        'scry', 'look_top', 'put_top', 'put_bottom', 'reveal_card',
-                        'shuffle_into', 'reorder_scry', 'set_battlefield_row',
-                        'go_to_phase', 'view_library', 'roll_dice', 'set_starting_player',
-                        'create_token', 'untap_all', 'flip_card']:
-            result = await self.execute_game_action(action, content.get('data', {}))
+        elif action == 'debug_metrics':
+            # Overlay de debug: liga/desliga para a partida inteira (so staff, com metricas ligadas)
+            user = self.scope.get('user')
+            if not metrics.enabled() or not getattr(user, 'is_staff', False):
+                await self.send_json({'type': 'error', 'message': 'Metricas de debug indisponiveis'})
+                return
+            self.session.debug_metrics = bool(content.get('enabled'))
+            await self.channel_layer.group_send(
+                self.group_name,
+                {
+                    'type': 'debug_metrics_update',
+                    'action': None,
+                    'enabled': self.session.debug_metrics,
+                    'samples': []
+                }
+            )
 
-            # Send action result to the sender
+        elif action in self.GAME_ACTIONS:
+            if drain.draining:
+                await self.send_json({
+                    'type': 'action_result',
+                    'action': action,
+                    'result': {
+                        'success': False,
+                        'error': 'Servidor reiniciando, reconecte em instantes',
+                        'reconnect_after': drain.reconnect_after
+                    }
+                })
+                return
+
+            # A acao so termina para o drain depois do resultado e do broadcast (que avanca a seq):
+            # senao o drain grava a seq antiga e o cliente retoma sem o ultimo estado
+            drain.action_started()
+            try:
+                result = await self.execute_game_action(action, content.get('data', {}))
+
+                # Send action result to the sender
+                await self.send_json({
+                    'type': 'action_result',
+                    'action': action,
+                    'result': result
+                })
+
+                if result.get('success'):
+                    # Check if it's a private action (only sender sees)
+                    if result.get('private'):
+                        # Send private data only to sender
+                        await self.send_json({
+                            'type': 'private_action',
+                            'action': action,
+                            'data': result
+                        })
+                        # Pode ter mudado o estado (ex: ordem do grimorio) sem broadcast:
+                        # avancar a seq para a reconexao nao responder 'resumed'
+                        self.session.next_seq()
+                    # Check if we need to broadcast a reveal
+                    elif result.get('broadcast_reveal'):
+                        await self.channel_layer.group_send(
+                            self.group_name,
+                            {
+                                'type': 'card_revealed',
+                                'card': result['revealed_card']
+                            }
+                        )
+                        await self.broadcast_game_state()
+                    # Check if we need to broadcast a dice roll
+                    elif result.get('broadcast_dice'):
+                        await self.channel_layer.group_send(
+                            self.group_name,
+                            {
+                                'type': 'dice_rolled',
+                                'player': result['player'],
+                                'sides': result['sides'],
+                                'result': result['result']
+                            }
+                        )
+                        self.session.next_seq()  # a rolagem fica no log (GameAction)
+                    # Check if we need to broadcast starting player
+                    elif result.get('broadcast_starting'):
+                        await self.channel_layer.group_send(
+                            self.group_name,
+                            {
+                                'type': 'starting_player_selected',
+                                'player': result['player'],
+                                'seat': result['seat'],
+                                'roll': result['roll']
+                            }
+                        )
+                        await self.broadcast_game_state()
+                    else:
+                        # Normal broadcast to all players
+                        await self.broadcast_game_state()
+            finally:
+                drain.action_finished()
+
+    async def send_game_state(self, last_seq=None):
+        # Cliente ja tem o estado mais recente (ex: reconexao apos deploy)
+        if last_seq is not None and last_seq == self.session.seq and last_seq > 0:
             await self.send_json({
-                'type': 'action_result',
-                'action': action,
-                'result': result
+                'type': 'resumed',
+                'seq': self.session.seq
             })
+            return
 
-            if result.get('success'):
-                # Check if it's a private action (only sender sees)
-                if result.get('private'):
-                    # Send private data only to sender
-                    await self.send_json({
-                        'type': 'private_action',
-                        'action': action,
-                        'data': result
-                    })
-                # Check if we need to broadcast a reveal
-                elif result.get('broadcast_reveal'):
-                    await self.channel_layer.group_send(
-                        self.group_name,
-                        {
-                            'type': 'card_revealed',
-                            'card': result['revealed_card']
-                        }
-                    )
-                    await self.broadcast_game_state()
-                # Check if we need to broadcast a dice roll
-                elif result.get('broadcast_dice'):
-                    await self.channel_layer.group_send(
-                        self.group_name,
-                        {
-                            'type': 'dice_rolled',
-                            'player': result['player'],
-                            'sides': result['sides'],
-                            'result': result['result']
-                        }
-                    )
-                # Check if we need to broadcast starting player
-                elif result.get('broadcast_starting'):
-                    await self.channel_layer.group_send(
-                        self.group_name,
-                        {
-                            'type': 'starting_player_selected',
-                            'player': result['player'],
-                            'seat': result['seat'],
-                            'roll': result['roll']
-                        }
-                    )
-                    await self.broadcast_game_state()
-                else:
-                    # Normal broadcast to all players
-                    await self.broadcast_game_state()
-
-    async def send_game_state(self):
         state = await self.get_game_state()
         if state:
             await self.send_json({
                 'type': 'game_state',
-                'state': state
+                'state': state,
+                'seq': self.session.seq
             })
 
     async def broadcast_game_state(self):
-        state = await self.get_game_state()
-        if state:
-            await self.channel_layer.group_send(
-                self.group_name,
-                {
-                    'type': 'game_state_update',
-                    'state': state
-                }
-            )
+        with metrics.measure('broadcast_game_state') as extra:
+            state = await self.get_game_state()
+            if state:
+                if metrics.enabled():
+                    # Serializar de novo so para medir: apenas com metricas ligadas
+                    extra['bytes'] = len(json.dumps(state))
+                    extra['fanout'] = len(self.session.consumers)
+                await self.channel_layer.group_send(
+                    self.group_name,
+                    {
+                        'type': 'game_state_update',
+                        'state': state,
+                        'seq': self.session.next_seq()
+                    }
+                )
 
     async def chat_message(self, event):
         await self.send_json({
@@ -1658,7 +1801,17 @@ class GameConsumer(AsyncJsonWebsocketConsumer):
     async def game_state_update(self, event):
         await self.send_json({
             'type': 'game_state',
-            'state': event['state']
+            'state': event['state'],
+            'seq': event.get('seq')
+        })
+
+    async def debug_metrics_update(self, event):
+        """Overlay de debug: tempos/queries de cada etapa da ultima acao"""
+        await self.send_json({
+            'type': 'debug_metrics',
+            'action': event['action'],
+            'enabled': event.get('enabled', True),
+            'samples': event['samples']
         })
 
     async def card_revealed(self, event):
@@ -0,0 +1,99 @@
+"""Modo drain: encerra as conexoes de jogo de forma limpa antes de um deploy.
+
+Enviar SIGUSR1 ao processo do daphne (``kill -USR1 <pid>``) coloca o processo
+em drain: novas partidas sao recusadas, acoes em andamento terminam, a
+sequencia de estado de cada partida e gravada no banco e os clientes recebem
+``server_draining`` com ``reconnect_after`` antes do socket ser fechado.
+Ao reconectar no novo processo o cliente informa ``last_seq`` e retoma dali.
+"""
+import asyncio
+import signal
+import threading
+import time
+
+from django.conf import settings
+
+from . import sessions
+
+DRAIN_SIGNAL = getattr(signal, 'SIGUSR1', None)
+
+# Codigo de fechamento WebSocket para "Service Restart"
+CLOSE_SERVICE_RESTART = 1012
+
+
+class DrainCoordinator:
+    """Controla o estado de drain do processo e as acoes em andamento"""
+
+    def __init__(self):
+        self.draining = False
+        self.in_flight = 0
+        self._signal_installed = False
+
+    @property
+    def reconnect_after(self):
+        return getattr(settings, 'GAME_DRAIN_RECONNECT_AFTER', 5)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'GAME_DRAIN_TIMEOUT', 10)
+
+    def install_signal_handler(self):
+        """Registra o handler de SIGUSR1 no event loop do servidor (uma vez)"""
+        if self._signal_installed or DRAIN_SIGNAL is None:
+            return
+        self._signal_installed = True
+        try:
+            loop = asyncio.get_running_loop()
+            loop.add_signal_handler(DRAIN_SIGNAL, lambda: loop.create_task(self.drain()))
+        except (NotImplementedError, RuntimeError, ValueError) as e:
+            print(f"[WS Drain] Signal handler not installed: {e}")
+
+    def install_process_handler(self):
+        """Registra SIGUSR1 ao subir o processo (RealtimeConfig.ready), antes do
+        primeiro socket de jogo; sem isso o sinal mata o worker com a acao padrao"""
+        if DRAIN_SIGNAL is None or threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(DRAIN_SIGNAL, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            print("[WS Drain] Signal received without a running event loop, ignoring")
+            return
+        loop.call_soon_threadsafe(lambda: loop.create_task(self.drain()))
+
+    def action_started(self):
+        self.in_flight += 1
+
+    def action_finished(self):
+        self.in_flight = max(0, self.in_flight - 1)
+
+    async def wait_idle(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.in_flight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.in_flight == 0
+
+    async def drain(self):
+        if self.draining:
+            return
+        self.draining = True
+        print(f"[WS Drain] Draining: {self.in_flight} actions in flight")
+
+        if not await self.wait_idle(self.timeout):
+            print(f"[WS Drain] Timeout waiting for {self.in_flight} actions")
+
+        active = sessions.all_sessions()
+        flushed = await sessions.flush_sessions(active)
+
+        closed = 0
+        for session in active:
+            for consumer in list(session.consumers):
+                await consumer.send_drain_notice(self.reconnect_after)
+                closed += 1
+
+        print(f"[WS Drain] Flushed {flushed} games, closed {closed} sockets")
+
+
+coordinator = DrainCoordinator()
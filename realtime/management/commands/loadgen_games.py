@@ -0,0 +1,370 @@
+import asyncio
+import contextlib
+import io
+import json
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+
+# Mix de acoes dos bots: (acao, peso)
+ACTION_MIX = [
+    ('draw_card', 10),
+    ('play_land', 12),
+    ('cast', 12),
+    ('tap_card', 25),
+    ('move_to_graveyard', 5),
+    ('add_counter', 10),
+    ('remove_counter', 3),
+    ('change_life', 8),
+    ('next_phase', 8),
+    ('next_turn', 4),
+]
+
+
+def percentile(values, pct):
+    """Percentil por nearest-rank (values ja ordenado)"""
+    if not values:
+        return 0.0
+    idx = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[idx]
+
+
+class QueryCounter:
+    """Conta queries em todas as conexoes (inclusive a thread do database_sync_to_async)"""
+
+    def __init__(self):
+        self.count = 0
+        self.enabled = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.enabled:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def attach(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []  # envio -> action_result do proprio bot
+        self.state_latencies = []  # envio -> primeiro game_state depois do resultado
+        self.state_frames = 0
+        self.actions = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.by_action = {}
+
+    def record(self, action, latency, ok):
+        self.actions += 1
+        if not ok:
+            self.errors += 1
+        self.latencies.append(latency)
+        self.by_action[action] = self.by_action.get(action, 0) + 1
+
+
+class BotClient:
+    """Jogador simulado conectado ao GameConsumer"""
+
+    def __init__(self, communicator, player_id, stats, rng, think_time):
+        self.comm = communicator
+        self.player_id = player_id
+        self.seat = None
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.state = None
+        self.pending = None
+        self.syncing = None
+        self.reader = None
+
+    async def start(self):
+        connected, _ = await self.comm.connect()
+        if not connected:
+            raise RuntimeError('Game socket rejected')
+        self.reader = asyncio.ensure_future(self.read_loop())
+
+    async def read_loop(self):
+        while True:
+            raw = await self.comm.receive_from(timeout=3600)
+            self.stats.bytes_received += len(raw.encode('utf-8'))
+            message = json.loads(raw)
+            msg_type = message.get('type')
+
+            if msg_type == 'game_state':
+                self.stats.state_frames += 1
+                self.state = message['state']
+                if self.seat is None:
+                    self.seat = next(
+                        p['seat_position'] for p in self.state['players'] if p['player_id'] == self.player_id
+                    )
+                if self.syncing:
+                    # Pode ser o broadcast de outro bot: medido a parte, so libera a proxima acao
+                    syncing, self.syncing = self.syncing, None
+                    self.stats.state_latencies.append(time.perf_counter() - syncing['started'])
+                    syncing['done'].set()
+            elif msg_type == 'action_result' and self.pending:
+                result = message.get('result', {})
+                ok = bool(result.get('success'))
+                self.finish(ok, wait_state=ok and not result.get('private'))
+
+    def finish(self, ok, wait_state=False):
+        """Latencia da acao termina no action_result do proprio bot"""
+        pending, self.pending = self.pending, None
+        self.stats.record(pending['action'], time.perf_counter() - pending['started'], ok)
+        if wait_state:
+            # Proxima acao so com o estado novo na mao (ver read_loop)
+            self.syncing = pending
+        else:
+            pending['done'].set()
+
+    def my_zone(self, name):
+        zones = (self.state or {}).get('zones_data', {})
+        return zones.get(str(self.seat), zones.get(self.seat, {})).get(name, [])
+
+    def pick_action(self):
+        weights = [w for _, w in ACTION_MIX]
+        choice = self.rng.choices([a for a, _ in ACTION_MIX], weights=weights)[0]
+        hand = self.my_zone('hand')
+        battlefield = self.my_zone('battlefield')
+
+        if choice == 'play_land':
+            lands = [c for c in hand if 'Land' in (c.get('type_line') or '')]
+            if lands:
+                return 'move_card', {'object_id': self.rng.choice(lands)['id'], 'zone': 'battlefield', 'row': 'lands'}
+            choice = 'draw_card'
+        if choice == 'cast':
+            spells = [c for c in hand if 'Land' not in (c.get('type_line') or '')]
+            if spells:
+                return 'move_card', {'object_id': self.rng.choice(spells)['id'], 'zone': 'battlefield'}
+            choice = 'draw_card'
+        if choice in ('tap_card', 'move_to_graveyard', 'add_counter', 'remove_counter'):
+            if not battlefield:
+                return 'draw_card', {}
+            target = self.rng.choice(battlefield)['id']
+            if choice == 'move_to_graveyard':
+                return 'move_card', {'object_id': target, 'zone': 'graveyard'}
+            if choice == 'tap_card':
+                return 'tap_card', {'object_id': target}
+            return choice, {'object_id': target, 'counter_type': '+1/+1'}
+        if choice == 'change_life':
+            # Dano e ganho de vida alternados para ninguem morrer durante o teste
+            return 'change_life', {'target_seat': self.seat, 'delta': self.rng.choice([-3, -1, 1, 3])}
+        return choice, {}
+
+    async def play(self, n_actions):
+        for _ in range(n_actions):
+            action, data = self.pick_action()
+            done = asyncio.Event()
+            self.pending = {'action': action, 'started': time.perf_counter(), 'done': done}
+            await self.comm.send_json_to({'action': action, 'data': data})
+            await done.wait()
+            if self.think_time:
+                await asyncio.sleep(self.rng.uniform(0, self.think_time * 2))
+
+    async def stop(self):
+        if self.reader:
+            self.reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.reader
+        await self.comm.disconnect()
+
+
+class Command(BaseCommand):
+    help = 'Simula N partidas simultaneas via WebsocketCommunicator e mede capacidade do servidor de jogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=4, help='Partidas simultaneas (default: 4)')
+        parser.add_argument('--players', type=int, default=4, help='Jogadores por partida (default: 4)')
+        parser.add_argument('--actions', type=int, default=50, help='Acoes por jogador (default: 50)')
+        parser.add_argument('--deck-size', type=int, default=99, help='Cartas por deck (default: 99)')
+        parser.add_argument('--think-ms', type=int, default=0, help='Pausa media entre acoes de um bot em ms (default: 0)')
+        parser.add_argument('--seed', type=int, default=None, help='Semente para reproduzir o mix de acoes')
+        parser.add_argument('--json', action='store_true', help='Imprime o relatorio em JSON (baseline de regressao)')
+        parser.add_argument('--verbose', action='store_true', help='Mostra os logs dos consumers')
+
+    def handle(self, *args, **options):
+        # Banco de teste isolado: nunca toca nas partidas reais
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        counter = QueryCounter()
+        connection_created.connect(counter.attach)
+        try:
+            self.stdout.write('Criando jogadores e decks sinteticos...')
+            lobbies = self.create_fixtures(options)
+
+            log = contextlib.nullcontext() if options['verbose'] else contextlib.redirect_stdout(io.StringIO())
+            with log:
+                stats, elapsed = asyncio.run(self.run_games(lobbies, options, counter))
+            self.report(stats, elapsed, counter.count, options)
+        finally:
+            connection_created.disconnect(counter.attach)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def create_fixtures(self, options):
+        from cards.models import Card
+        from accounts.models import PlayerProfile
+        from decks.models import Deck, DeckCard
+        from lobby.models import Lobby, LobbyPlayer
+
+        deck_size = options['deck_size']
+        cards = []
+        for i in range(deck_size):
+            is_land = i % 5 < 2
+            cards.append(Card(
+                scryfall_id=uuid.uuid4(),
+                name=f'Loadgen {"Land" if is_land else "Creature"} {i}',
+                type_line='Basic Land — Forest' if is_land else 'Creature — Elf Druid',
+                mana_cost='' if is_land else '{1}{G}',
+                cmc=0 if is_land else 2,
+                oracle_text='{T}: Add {G}.' if is_land else 'When this creature enters, draw a card.',
+                colors='' if is_land else 'G',
+                color_identity='G',
+                set_code='lgn',
+                set_name='Loadgen',
+                rarity='common',
+                power='' if is_land else '2',
+                toughness='' if is_land else '2',
+            ))
+        Card.objects.bulk_create(cards)
+        cards = list(Card.objects.filter(set_code='lgn'))
+        commander = Card.objects.create(
+            scryfall_id=uuid.uuid4(), name='Loadgen Commander', type_line='Legendary Creature — Elf',
+            mana_cost='{2}{G}', cmc=3, colors='G', color_identity='G', set_code='lgc',
+            set_name='Loadgen', rarity='mythic', power='3', toughness='3',
+        )
+
+        lobbies = []
+        for g in range(options['games']):
+            lobby = Lobby.objects.create(name=f'Loadgen {g}', max_players=max(4, options['players']))
+            players = []
+            for s in range(options['players']):
+                player = PlayerProfile.objects.create(session_key=uuid.uuid4().hex[:40], nickname=f'Bot {g}-{s}')
+                deck = Deck.objects.create(owner=player, name='Loadgen', commander=commander, color_identity='G', is_valid=True)
+                DeckCard.objects.bulk_create([DeckCard(deck=deck, card=c) for c in cards])
+                LobbyPlayer.objects.create(lobby=lobby, player=player)
+                players.append((str(player.id), str(deck.id)))
+            lobbies.append((str(lobby.id), players))
+        return lobbies
+
+    async def run_games(self, lobbies, options, counter):
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+        from realtime.routing import websocket_urlpatterns
+
+        app = URLRouter(websocket_urlpatterns)
+        rng = random.Random(options['seed'])
+        stats = Stats()
+        think_time = options['think_ms'] / 1000
+
+        async def start_game(lobby_id, players):
+            # Fluxo real do lobby: escolher deck, ficar pronto, iniciar
+            comms = []
+            for player_id, deck_id in players:
+                comm = WebsocketCommunicator(app, f'/ws/lobby/{lobby_id}/?player_id={player_id}')
+                await comm.connect()
+                comms.append(comm)
+            for comm, (player_id, deck_id) in zip(comms, players):
+                await comm.send_json_to({'action': 'select_deck', 'deck_id': deck_id})
+                await comm.send_json_to({'action': 'toggle_ready'})
+            await comms[0].send_json_to({'action': 'start_game'})
+            game_id = None
+            while game_id is None:
+                message = await comms[0].receive_json_from(timeout=60)
+                if message.get('type') == 'game_starting':
+                    game_id = message['game_id']
+                elif message.get('type') == 'error':
+                    # Ready dos outros sockets ainda nao processado
+                    await asyncio.sleep(0.05)
+                    await comms[0].send_json_to({'action': 'start_game'})
+            for comm in comms:
+                await comm.disconnect()
+            return game_id
+
+        async def connect_bots(game_id, players):
+            bots = []
+            for player_id, _ in players:
+                comm = WebsocketCommunicator(app, f'/ws/game/{game_id}/?player_id={player_id}')
+                bot = BotClient(comm, player_id, stats, random.Random(rng.random()), think_time)
+                await bot.start()
+                bots.append(bot)
+            return bots
+
+        game_ids = [await start_game(lobby_id, players) for lobby_id, players in lobbies]
+        tables = [await connect_bots(game_id, players) for game_id, (_, players) in zip(game_ids, lobbies)]
+        bots = [bot for table in tables for bot in table]
+
+        # Esperar o estado inicial de todos antes de medir
+        while any(bot.state is None for bot in bots):
+            await asyncio.sleep(0.01)
+
+        stats.bytes_received = 0
+        stats.state_frames = 0
+        counter.count = 0
+        counter.enabled = True
+        started = time.perf_counter()
+        await asyncio.gather(*(bot.play(options['actions']) for bot in bots))
+        elapsed = time.perf_counter() - started
+        counter.enabled = False
+
+        for bot in bots:
+            await bot.stop()
+        return stats, elapsed
+
+    def report(self, stats, elapsed, queries, options):
+        latencies = sorted(stats.latencies)
+        state_latencies = sorted(stats.state_latencies)
+        actions = max(stats.actions, 1)
+        result = {
+            'games': options['games'],
+            'players_per_game': options['players'],
+            'actions': stats.actions,
+            'errors': stats.errors,
+            'elapsed_s': round(elapsed, 3),
+            'actions_per_s': round(stats.actions / elapsed, 1) if elapsed else 0,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50) * 1000, 2),
+                'p95': round(percentile(latencies, 95) * 1000, 2),
+                'p99': round(percentile(latencies, 99) * 1000, 2),
+            },
+            # Ate o primeiro game_state depois do resultado (o proprio broadcast ou o de outro bot)
+            'state_latency_ms': {
+                'p50': round(percentile(state_latencies, 50) * 1000, 2),
+                'p95': round(percentile(state_latencies, 95) * 1000, 2),
+                'p99': round(percentile(state_latencies, 99) * 1000, 2),
+            },
+            'state_frames_per_action': round(stats.state_frames / actions, 1),
+            'bytes_per_action': round(stats.bytes_received / actions),
+            'queries_per_action': round(queries / actions, 1),
+            'action_mix': stats.by_action,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n{result['games']} partidas x {result['players_per_game']} jogadores: "
+            f"{result['actions']} acoes em {result['elapsed_s']}s ({result['errors']} erros)"
+        ))
+        self.stdout.write(f"  Acoes/s:           {result['actions_per_s']}")
+        self.stdout.write(
+            f"  Latencia (ms):     p50={result['latency_ms']['p50']} "
+            f"p95={result['latency_ms']['p95']} p99={result['latency_ms']['p99']} (ate o action_result)"
+        )
+        self.stdout.write(
+            f"  Estado (ms):       p50={result['state_latency_ms']['p50']} "
+            f"p95={result['state_latency_ms']['p95']} p99={result['state_latency_ms']['p99']} "
+            f"(ate o proximo game_state)"
+        )
+        self.stdout.write(f"  game_state/acao:   {result['state_frames_per_action']} (soma de todos os sockets)")
+        self.stdout.write(f"  Bytes/acao:        {result['bytes_per_action']} (soma de todos os sockets)")
+        self.stdout.write(f"  Queries/acao:      {result['queries_per_action']}")
+        mix = ', '.join(f'{k}={v}' for k, v in sorted(stats.by_action.items()))
+        self.stdout.write(f"  Mix:               {mix}")
@@ -0,0 +1,168 @@
+"""Instrumentacao do GameConsumer: histogramas em memoria por etapa e acao.
+
+Cada etapa (``receive_json``, ``execute_game_action``, ``get_game_state``,
+``broadcast_game_state``) registra tempo de parede e, quando roda na thread
+do banco, numero de queries e tempo gasto nelas. O broadcast registra tambem o
+tamanho do payload e o fan-out (sockets do grupo neste processo).
+
+As amostras ficam agrupadas pela acao do cliente que as originou, propagada
+via contextvar (o ``database_sync_to_async`` copia o contexto para a thread).
+O snapshot e servido em ``/game/metrics/`` (so staff). Com
+``GAME_METRICS_ENABLED`` desligado (padrao) nada e medido.
+"""
+import bisect
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+# Limites superiores dos buckets (ms, queries, bytes...): escala 1-2.5-5
+BUCKETS = [
+    b * 10 ** e for e in range(0, 7) for b in (1, 2.5, 5)
+]
+
+_current_action = contextvars.ContextVar('game_metrics_action', default=None)
+_current_samples = contextvars.ContextVar('game_metrics_samples', default=None)
+
+
+def enabled():
+    return getattr(settings, 'GAME_METRICS_ENABLED', False)
+
+
+class Histogram:
+    """Histograma de buckets fixos com count/sum/max"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, pct):
+        """Estimativa pelo limite superior do bucket que contem o percentil"""
+        if not self.count:
+            return 0
+        target = pct / 100 * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(BUCKETS[idx], self.max) if idx < len(BUCKETS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0,
+            'p50': round(self.percentile(50), 3),
+            'p95': round(self.percentile(95), 3),
+            'p99': round(self.percentile(99), 3),
+            'max': round(self.max, 3),
+        }
+
+
+class MetricsRegistry:
+    """Histogramas por (etapa, acao, medida)"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._histograms = {}
+
+    def observe(self, stage, action, **values):
+        for name, value in values.items():
+            if value is None:
+                continue
+            key = (stage, action or 'other', name)
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+        samples = _current_samples.get()
+        if samples is not None:
+            samples.append({'stage': stage, **{k: round(v, 3) for k, v in values.items() if v is not None}})
+
+    def snapshot(self):
+        stages = {}
+        for (stage, action, name), hist in sorted(self._histograms.items()):
+            stages.setdefault(stage, {}).setdefault(action, {})[name] = hist.snapshot()
+        return {
+            'uptime_s': round(time.time() - self.started_at),
+            'stages': stages,
+        }
+
+    def reset(self):
+        self._histograms.clear()
+        self.started_at = time.time()
+
+
+registry = MetricsRegistry()
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+@contextmanager
+def action_scope(action):
+    """Marca a acao do cliente em andamento e coleta as amostras dela"""
+    samples = []
+    action_token = _current_action.set(action)
+    samples_token = _current_samples.set(samples)
+    try:
+        yield samples
+    finally:
+        _current_action.reset(action_token)
+        _current_samples.reset(samples_token)
+
+
+@contextmanager
+def measure(stage, track_queries=False, **extra):
+    """Mede uma etapa; com track_queries conta as queries da conexao da thread atual"""
+    if not enabled():
+        yield extra
+        return
+    recorder = _QueryRecorder() if track_queries else None
+    start = time.perf_counter()
+    try:
+        if recorder is not None:
+            with connection.execute_wrapper(recorder):
+                yield extra
+        else:
+            yield extra
+    finally:
+        values = {'wall_ms': (time.perf_counter() - start) * 1000, **extra}
+        if recorder is not None:
+            values['queries'] = recorder.count
+            values['db_ms'] = recorder.seconds * 1000
+        registry.observe(stage, _current_action.get(), **values)
+
+
+def instrument(stage):
+    """Decorator para funcoes sync que rodam na thread do banco"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage, track_queries=True):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
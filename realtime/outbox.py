@@ -0,0 +1,122 @@
+"""Fila de saida por socket para proteger a mesa de clientes lentos.
+
+Os handlers do grupo apenas enfileiram a mensagem e retornam, assim a fila do
+channel layer de cada socket e consumida no ritmo do servidor e nao no ritmo da
+conexao do jogador. Um writer dedicado envia as mensagens em ordem:
+
+- ``game_state`` pendente e substituido pelo mais recente (so o ultimo importa)
+- se a fila passa de ``max_size`` ou um ``game_state`` na fila passa de
+  ``max_age`` segundos, os estados pendentes sao descartados e o cliente
+  recebe um resync (``on_resync``) com o estado completo atual. Mensagens que
+  o resync nao substitui (chat, action_result...) continuam na fila; se ainda
+  assim ela estiver cheia, as mais antigas saem.
+"""
+import asyncio
+import time
+from collections import deque
+
+# Mensagens que carregam o estado completo e podem ser coalescidas
+COALESCED_TYPES = ('game_state',)
+
+
+class Outbox:
+    """Fila de saida com coalescencia de estado e resync forcado"""
+
+    def __init__(self, send, on_resync, max_size=64, max_age=5.0):
+        self._send = send
+        self._on_resync = on_resync
+        self.max_size = max_size
+        self.max_age = max_age
+        self.queue = deque()
+        self.needs_resync = False
+        self.coalesced = 0
+        self.resyncs = 0
+        self.dropped = 0  # mensagens nao coalesciveis perdidas com a fila cheia
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def put(self, message):
+        # Resync pendente ja vai entregar o estado completo mais recente
+        if self.needs_resync and message.get('type') in COALESCED_TYPES:
+            return
+
+        if message.get('type') in COALESCED_TYPES:
+            before = len(self.queue)
+            self.queue = deque(item for item in self.queue if item[1].get('type') != message['type'])
+            self.coalesced += before - len(self.queue)
+
+        if len(self.queue) >= self.max_size:
+            self._drop_states('queue full')
+            while len(self.queue) >= self.max_size:
+                self.queue.popleft()
+                self.dropped += 1
+        if not (self.needs_resync and message.get('type') in COALESCED_TYPES):
+            self.queue.append((time.monotonic(), message))
+
+        self._idle.clear()
+        self._wakeup.set()
+
+    def _drop_states(self, reason, resync=False):
+        """Descarta so os estados pendentes e pede resync (o resync manda o atual); o resto continua na fila"""
+        before = len(self.queue)
+        self.queue = deque(item for item in self.queue if item[1].get('type') not in COALESCED_TYPES)
+        if before != len(self.queue) or resync:
+            print(f"[WS Outbox] Client behind ({reason}), dropping {before - len(self.queue)} state messages")
+            self.needs_resync = True
+
+    async def flush(self, timeout):
+        """Espera a fila esvaziar (usado antes de fechar o socket)"""
+        if self._task is None:
+            return self._idle.is_set()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _run(self):
+        try:
+            await self._loop()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Socket fechado no meio do envio: o disconnect cuida do resto
+            print(f"[WS Outbox] Writer stopped: {e}")
+            self.queue.clear()
+            self._idle.set()
+
+    async def _loop(self):
+        while True:
+            if not self.queue and not self.needs_resync:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if self.needs_resync:
+                self.needs_resync = False
+                self.resyncs += 1
+                await self._on_resync()
+                continue
+
+            enqueued_at, message = self.queue.popleft()
+            if message.get('type') in COALESCED_TYPES and time.monotonic() - enqueued_at > self.max_age:
+                self._drop_states('stale state', resync=True)
+                continue
+
+            await self._send(message)
@@ -0,0 +1,78 @@
+"""Estado residente das partidas abertas neste processo"""
+from channels.db import database_sync_to_async
+
+
+class GameSession:
+    """Estado em memoria de uma partida: sequencia do estado e sockets conectados"""
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.seq = 0
+        self.persisted_seq = 0
+        self.loaded = False
+        self.consumers = set()
+        self.debug_metrics = False
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    @property
+    def dirty(self):
+        return self.seq != self.persisted_seq
+
+
+_sessions = {}
+
+
+def get_session(game_id):
+    """Retorna (criando se preciso) a sessao residente de uma partida"""
+    session = _sessions.get(game_id)
+    if session is None:
+        session = GameSession(game_id)
+        _sessions[game_id] = session
+    return session
+
+
+def all_sessions():
+    return list(_sessions.values())
+
+
+def discard_session(game_id):
+    _sessions.pop(game_id, None)
+
+
+@database_sync_to_async
+def _read_persisted_seq(game_id):
+    from game.models import Game
+    return Game.objects.filter(id=game_id).values_list('state_seq', flat=True).first() or 0
+
+
+@database_sync_to_async
+def _write_persisted_seqs(seqs):
+    from game.models import Game
+    for game_id, seq in seqs.items():
+        Game.objects.filter(id=game_id).update(state_seq=seq)
+
+
+async def load_session(session):
+    """Reidrata a sequencia a partir do banco na primeira conexao apos o start"""
+    if session.loaded:
+        return
+    persisted = await _read_persisted_seq(session.game_id)
+    # Outro socket pode ter avancado a sequencia enquanto a leitura acontecia
+    session.seq = max(session.seq, persisted)
+    session.persisted_seq = persisted
+    session.loaded = True
+
+
+async def flush_sessions(sessions):
+    """Persiste a sequencia das sessoes com estado ainda nao gravado"""
+    pending = {s.game_id: s.seq for s in sessions if s.loaded and s.dirty}
+    if not pending:
+        return 0
+    await _write_persisted_seqs(pending)
+    for session in sessions:
+        if session.game_id in pending:
+            session.persisted_seq = pending[session.game_id]
+    return len(pending)
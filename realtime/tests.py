@@ -1,3 +1,500 @@
-from django.test import TestCase
+import asyncio
+import json
+import signal
+import uuid
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from accounts.models import PlayerProfile
+from cards.models import Card
+from decks.models import Deck, DeckCard
+from game.models import Game, GamePlayer, GameObject, GameAction, CommanderDamage
+
+from . import drain, metrics
+from .consumers import GameConsumer
+from .outbox import Outbox
+from .routing import websocket_urlpatterns
+
+
+# Tamanho maximo do estado completo da mesa do fixture (4 jogadores no meio da partida)
+STATE_BYTES = 120_000
+
+# Orcamento por acao: (max queries, max bytes de uma mensagem recebida pelo jogador).
+# As queries incluem execute_game_action e o get_game_state do broadcast.
+# Se uma acao nova entrar em GameConsumer.receive_json ela precisa de um orcamento aqui.
+ACTION_BUDGETS = {
+    # Estado do jogo
+    'move_card': (13, STATE_BYTES),
+    'tap_card': (12, STATE_BYTES),
+    'flip_card': (12, STATE_BYTES),
+    'change_life': (12, STATE_BYTES),
+    'add_counter': (12, STATE_BYTES),
+    'remove_counter': (12, STATE_BYTES),
+    'next_phase': (10, STATE_BYTES),
+    'go_to_phase': (10, STATE_BYTES),
+    'untap_all': (10, STATE_BYTES),
+    'draw_card': (12, STATE_BYTES),
+    'shuffle_library': (11, STATE_BYTES),
+    'scry': (5, 2_000),
+    'look_top': (4, 2_000),
+    'view_library': (5, 20_000),
+    'reorder_scry': (6, 1_000),
+    'put_top': (13, STATE_BYTES),
+    'put_bottom': (14, STATE_BYTES),
+    'shuffle_into': (14, STATE_BYTES),
+    'reveal_card': (11, STATE_BYTES),
+    'set_battlefield_row': (10, STATE_BYTES),
+    'create_token': (11, STATE_BYTES),
+    'roll_dice': (4, 1_000),
+    'set_starting_player': (12, STATE_BYTES),
+    'next_turn': (14, STATE_BYTES),
+    'concede': (11, STATE_BYTES),
+    # Visuais/sociais
+    'chat': (0, 1_000),
+    'get_state': (5, STATE_BYTES),
+    'create_arrows': (0, 1_000),
+    'remove_arrow': (0, 1_000),
+    'remove_arrows': (0, 1_000),
+    'clear_arrows': (0, 1_000),
+    'sync_stacks': (0, 1_000),
+    'send_emote': (2, 1_000),
+    'debug_metrics': (0, 1_000),
+}
+
+# Chat enviado depois de cada acao para saber quando ela terminou (chat nao faz queries)
+MARKER = '__budget_marker__'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class GameConsumerBudgetTests(TestCase):
+    """Orcamento de queries e de payload para cada acao do GameConsumer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cards = []
+        for i in range(40):
+            is_land = i % 3 == 0
+            cards.append(Card(
+                scryfall_id=uuid.uuid4(),
+                name=f'Test {"Land" if is_land else "Spell"} {i}',
+                type_line='Basic Land — Forest' if is_land else 'Creature — Elf Warrior',
+                mana_cost='' if is_land else '{2}{G}',
+                cmc=0 if is_land else 3,
+                oracle_text='{T}: Add {G}.' if is_land else 'Trample\nWhen this creature enters, draw a card.',
+                color_identity='G',
+                set_code='tst',
+                set_name='Test Set',
+                rarity='common',
+                power='' if is_land else '3',
+                toughness='' if is_land else '3',
+                image_small=f'https://example.com/small/{i}.jpg',
+                image_normal=f'https://example.com/normal/{i}.jpg',
+            ))
+        cards.append(Card(
+            scryfall_id=uuid.uuid4(), name='Test Werewolf // Test Beast', type_line='Creature — Human Werewolf',
+            oracle_text='At the beginning of each upkeep, transform it.', set_code='tst', set_name='Test Set',
+            rarity='rare', layout='transform', power='2', toughness='2', back_face_name='Test Beast',
+            back_face_type_line='Creature — Werewolf', back_face_power='4', back_face_toughness='4',
+        ))
+        Card.objects.bulk_create(cards)
+        cards = list(Card.objects.filter(set_code='tst').order_by('name'))
+        dfc = next(c for c in cards if c.layout == 'transform')
+        commander = Card.objects.create(
+            scryfall_id=uuid.uuid4(), name='Test Commander', type_line='Legendary Creature — Elf',
+            mana_cost='{2}{G}{G}', cmc=4, color_identity='G', set_code='tsc', set_name='Test', rarity='mythic',
+        )
+
+        cls.game = Game.objects.create(status='active', turn_number=5, current_phase='main1', active_player_seat=0)
+        cls.players = []
+        cls.game_players = []
+        objects = []
+        for seat in range(4):
+            player = PlayerProfile.objects.create(session_key=f'test-{seat}', nickname=f'Player {seat}')
+            deck = Deck.objects.create(owner=player, name='Test Deck', commander=commander, is_valid=True)
+            DeckCard.objects.bulk_create([DeckCard(deck=deck, card=c) for c in cards])
+            gp = GamePlayer.objects.create(game=cls.game, player=player, deck=deck, seat_position=seat)
+            cls.players.append(player)
+            cls.game_players.append(gp)
+
+            objects.append(GameObject(game=cls.game, card=commander, owner=gp, controller=gp,
+                                      zone='command', is_commander=True))
+            # Mesa no meio da partida: 99 cartas espalhadas pelas zonas
+            layout = [('hand', 7), ('battlefield', 15), ('graveyard', 8), ('exile', 3), ('library', 66)]
+            idx = 0
+            for zone, amount in layout:
+                for pos in range(amount):
+                    card = cards[idx % len(cards)]
+                    objects.append(GameObject(
+                        game=cls.game, card=card, owner=gp, controller=gp, zone=zone, zone_position=pos,
+                        battlefield_row='lands' if 'Land' in card.type_line else 'creatures',
+                        counters={'+1/+1': 1} if zone == 'battlefield' and pos % 5 == 0 else {},
+                    ))
+                    idx += 1
+            objects.append(GameObject(game=cls.game, card=dfc, owner=gp, controller=gp, zone='battlefield'))
+            objects.append(GameObject(game=cls.game, owner=gp, controller=gp, zone='battlefield', is_token=True,
+                                      token_name='Saproling', token_type='Creature — Saproling',
+                                      token_power='1', token_toughness='1'))
+        GameObject.objects.bulk_create(objects)
+
+        for target in cls.game_players:
+            for source in cls.game_players:
+                if target != source:
+                    CommanderDamage.objects.create(game=cls.game, target_player=target, source_player=source,
+                                                   commander_card=commander, damage=3)
+        GameAction.objects.bulk_create([
+            GameAction(game=cls.game, action_type='manual', player=cls.game_players[i % 4],
+                       display_text=f'Acao {i}', turn_number=i // 10 + 1, phase='main1')
+            for i in range(60)
+        ])
+
+    def zone_object(self, zone, seat=0, **filters):
+        return str(GameObject.objects.filter(
+            game=self.game, controller=self.game_players[seat], zone=zone, **filters
+        ).order_by('zone_position', 'id').values_list('id', flat=True).first())
+
+    def build_cases(self):
+        """Uma chamada por acao, na ordem em que o jogo permite (concede por ultimo)"""
+        hand = list(GameObject.objects.filter(
+            game=self.game, controller=self.game_players[0], zone='hand'
+        ).values_list('id', flat=True))
+        top3 = list(GameObject.objects.filter(
+            game=self.game, owner=self.game_players[0], zone='library'
+        ).order_by('zone_position').values_list('id', flat=True)[:3])
+        battlefield = self.zone_object('battlefield', is_token=False, card__layout='normal')
+
+        return [
+            ('get_state', {}),
+            ('chat', {'message': 'gg', 'sender': 'Player 0'}),
+            ('debug_metrics', {'enabled': False}),
+            ('create_arrows', {'data': {'arrows': [{'from': battlefield, 'to': 'player-1'}]}}),
+            ('remove_arrow', {'data': {'arrow': {'from': battlefield, 'to': 'player-1'}}}),
+            ('remove_arrows', {'data': {'sourceCardId': battlefield}}),
+            ('clear_arrows', {}),
+            ('sync_stacks', {'data': {'seat': 0, 'stacks': [[battlefield]]}}),
+            ('send_emote', {'data': {'emote': 'gg'}}),
+            ('move_card', {'data': {'object_id': str(hand[0]), 'zone': 'battlefield'}}),
+            ('tap_card', {'data': {'object_id': battlefield}}),
+            ('flip_card', {'data': {'object_id': self.zone_object('battlefield', card__layout='transform')}}),
+            ('change_life', {'data': {'target_seat': 1, 'delta': -3}}),
+            ('add_counter', {'data': {'object_id': battlefield, 'counter_type': '+1/+1'}}),
+            ('remove_counter', {'data': {'object_id': battlefield, 'counter_type': '+1/+1'}}),
+            ('next_phase', {}),
+            ('go_to_phase', {'data': {'phase': 'combat_begin'}}),
+            ('untap_all', {}),
+            ('draw_card', {}),
+            ('scry', {'data': {'count': 3}}),
+            ('look_top', {'data': {'count': 3}}),
+            ('view_library', {}),
+            ('reorder_scry', {'data': {'order': [
+                {'id': str(top3[0]), 'position': 'bottom'},
+                {'id': str(top3[2]), 'position': 'top'},
+                {'id': str(top3[1]), 'position': 'top'},
+            ]}}),
+            ('shuffle_library', {}),
+            ('put_top', {'data': {'object_id': self.zone_object('graveyard')}}),
+            ('put_bottom', {'data': {'object_id': str(hand[1])}}),
+            ('shuffle_into', {'data': {'object_id': self.zone_object('exile')}}),
+            ('reveal_card', {'data': {'object_id': str(hand[2])}}),
+            ('set_battlefield_row', {'data': {'object_id': battlefield, 'row': 'other'}}),
+            ('create_token', {'data': {'token_name': 'Soldier', 'token_type': 'Creature — Soldier', 'count': 2}}),
+            ('roll_dice', {'data': {'sides': 20, 'result': 14}}),
+            ('set_starting_player', {'data': {'seat': 2, 'roll': 19}}),
+            ('next_turn', {}),
+            ('concede', {}),
+        ]
+
+    def run_cases(self, cases):
+        """Executa as acoes pelo websocket e mede queries e maior mensagem de cada uma"""
+        counter = QueryCounter()
+        application = URLRouter(websocket_urlpatterns)
+
+        async def quiet_messages(communicator):
+            # O consumer trata as mensagens em ordem: quando o eco deste chat chega, a acao
+            # anterior (e as queries dela) ja terminou, mesmo numa maquina lenta
+            await communicator.send_json_to({'action': 'chat', 'message': MARKER, 'sender': 'test'})
+            messages = []
+            while True:
+                message = await communicator.receive_from(timeout=10)
+                if json.loads(message).get('message') == MARKER:
+                    return messages
+                messages.append(message)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                application, f'/ws/game/{self.game.id}/?player_id={self.players[0].id}'
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await quiet_messages(communicator)
+
+            results = {}
+            for action, content in cases:
+                counter.count = 0
+                await communicator.send_json_to({'action': action, **content})
+                messages = await quiet_messages(communicator)
+                results[action] = {
+                    'queries': counter.count,
+                    'max_bytes': max((len(m.encode('utf-8')) for m in messages), default=0),
+                    'messages': [json.loads(m) for m in messages],
+                }
+            await communicator.disconnect()
+            return results
+
+        # As funcoes sync do consumer rodam nesta thread, na mesma conexao do teste
+        with connection.execute_wrapper(counter):
+            return async_to_sync(scenario)()
+
+    def test_every_action_has_a_budget(self):
+        listed = set(GameConsumer.GAME_ACTIONS) | set(GameConsumer.SOCIAL_ACTIONS)
+        self.assertEqual(listed, set(ACTION_BUDGETS))
+        self.assertEqual(listed, {action for action, _ in self.build_cases()})
+
+    def test_action_budgets(self):
+        results = self.run_cases(self.build_cases())
+
+        for action, (max_queries, max_bytes) in ACTION_BUDGETS.items():
+            with self.subTest(action=action):
+                result = results[action]
+                failed = [
+                    m for m in result['messages']
+                    if m.get('type') == 'action_result' and not m['result'].get('success')
+                ]
+                self.assertEqual(failed, [], f'{action} falhou no fixture')
+                self.assertLessEqual(
+                    result['queries'], max_queries,
+                    f'{action}: {result["queries"]} queries (orcamento {max_queries})'
+                )
+                self.assertLessEqual(
+                    result['max_bytes'], max_bytes,
+                    f'{action}: mensagem de {result["max_bytes"]} bytes (orcamento {max_bytes})'
+                )
+
+    def test_state_queries_do_not_grow_with_commander_damage(self):
+        """get_game_state nao pode fazer uma query por linha de CommanderDamage"""
+        with_damage = self.run_cases([('get_state', {})])['get_state']['queries']
+        CommanderDamage.objects.filter(game=self.game).delete()
+        without_damage = self.run_cases([('get_state', {})])['get_state']['queries']
+        self.assertEqual(with_damage, without_damage)
+
+
+@skipIf(drain.DRAIN_SIGNAL is None, 'SIGUSR1 indisponivel nesta plataforma')
+class DrainSignalTests(TestCase):
+
+    def test_handler_installed_at_startup(self):
+        """O app ja registrou o SIGUSR1 sem nenhum GameConsumer conectado"""
+        self.assertEqual(signal.getsignal(drain.DRAIN_SIGNAL), drain.coordinator._on_signal)
+
+    def test_signal_schedules_drain_on_running_loop(self):
+        coordinator = drain.DrainCoordinator()
+
+        async def fire():
+            with mock.patch.object(coordinator, 'drain', mock.AsyncMock()) as drained:
+                coordinator._on_signal(drain.DRAIN_SIGNAL, None)
+                await asyncio.sleep(0.01)
+                return drained.await_count
+
+        self.assertEqual(asyncio.run(fire()), 1)
+
+    def test_signal_without_loop_is_ignored(self):
+        drain.DrainCoordinator()._on_signal(drain.DRAIN_SIGNAL, None)
+
+
+class DrainInFlightTests(TestCase):
+    """Drain durante uma acao: a seq gravada inclui o estado que a acao vai mandar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        commander = Card.objects.create(
+            scryfall_id=uuid.uuid4(), name='Drain Commander', type_line='Legendary Creature — Elf',
+            set_code='tst', set_name='Test', rarity='mythic',
+        )
+        card = Card.objects.create(
+            scryfall_id=uuid.uuid4(), name='Drain Spell', type_line='Instant', set_code='tst',
+            set_name='Test', rarity='common',
+        )
+        cls.game = Game.objects.create(status='active', turn_number=1, current_phase='main1', active_player_seat=0)
+        cls.player = PlayerProfile.objects.create(session_key='drain-test', nickname='Drainer')
+        deck = Deck.objects.create(owner=cls.player, name='Drain Deck', commander=commander, is_valid=True)
+        gp = GamePlayer.objects.create(game=cls.game, player=cls.player, deck=deck, seat_position=0)
+        GameObject.objects.bulk_create([
+            GameObject(game=cls.game, card=card, owner=gp, controller=gp, zone='library', zone_position=i)
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        self.addCleanup(setattr, drain.coordinator, 'draining', False)
+        self.addCleanup(setattr, drain.coordinator, 'in_flight', 0)
+
+    def run_with_drain(self, action):
+        """Manda a acao, comeca o drain com o broadcast dela segurado e devolve as mensagens"""
+        application = URLRouter(websocket_urlpatterns)
+        original = GameConsumer.broadcast_game_state
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def slow_broadcast(consumer):
+                await release.wait()
+                await original(consumer)
+
+            communicator = WebsocketCommunicator(application, f'/ws/game/{self.game.id}/?player_id={self.player.id}')
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            initial = await communicator.receive_json_from(timeout=10)
+            with mock.patch.object(GameConsumer, 'broadcast_game_state', slow_broadcast):
+                await communicator.send_json_to({'action': action})
+                result = await communicator.receive_json_from(timeout=10)
+                self.assertEqual(result['type'], 'action_result')
+                draining = asyncio.ensure_future(drain.coordinator.drain())
+                await asyncio.sleep(0.1)
+                release.set()
+                await asyncio.wait_for(draining, 10)
+            messages = []
+            while not await communicator.receive_nothing(timeout=0.1):
+                output = await communicator.receive_output()
+                if output['type'] == 'websocket.send':
+                    messages.append(json.loads(output['text']))
+            await communicator.disconnect()
+            return initial, messages
+
+        return async_to_sync(scenario)()
+
+    def test_flushed_seq_includes_action_in_flight(self):
+        initial, messages = self.run_with_drain('draw_card')
+        state = next(m for m in messages if m['type'] == 'game_state')
+        notice = messages[-1]
+        self.assertEqual(notice['type'], 'server_draining')
+        self.assertEqual(state['seq'], initial['seq'] + 1)
+        self.assertEqual(notice['seq'], state['seq'])
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.state_seq, state['seq'])
+
+    def test_private_and_dice_actions_advance_seq(self):
+        from . import sessions
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/game/{self.game.id}/?player_id={self.player.id}'
+            )
+            await communicator.connect()
+            seqs = [(await communicator.receive_json_from(timeout=10))['seq']]
+            for action, data in (('look_top', {'count': 2}), ('roll_dice', {'sides': 6, 'result': 4})):
+                await communicator.send_json_to({'action': action, 'data': data})
+                self.assertTrue((await communicator.receive_json_from(timeout=10))['result']['success'])
+                while not await communicator.receive_nothing(timeout=0.1):
+                    await communicator.receive_from()
+                seqs.append(sessions.get_session(str(self.game.id)).seq)
+            await communicator.disconnect()
+            return seqs
+
+        self.assertEqual(async_to_sync(scenario)(), [0, 1, 2])
+
+
+class OutboxTests(TestCase):
+
+    def run_outbox(self, messages, max_size=64, max_age=5.0, stale=()):
+        """Enfileira as mensagens (stale = indices envelhecidos) e devolve o que foi enviado"""
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def resync():
+            sent.append({'type': 'resync'})
+
+        async def scenario():
+            outbox = Outbox(send, resync, max_size=max_size, max_age=max_age)
+            for message in messages:
+                outbox.put(message)
+            for i in stale:
+                enqueued_at, message = outbox.queue[i]
+                outbox.queue[i] = (enqueued_at - max_age - 1, message)
+            outbox.start()
+            await outbox.flush(1)
+            await outbox.stop()
+            return outbox
+
+        outbox = asyncio.run(scenario())
+        return sent, outbox
+
+    def test_game_state_is_coalesced(self):
+        sent, outbox = self.run_outbox([
+            {'type': 'game_state', 'seq': 1}, {'type': 'chat'}, {'type': 'game_state', 'seq': 2},
+        ])
+        self.assertEqual(sent, [{'type': 'chat'}, {'type': 'game_state', 'seq': 2}])
+        self.assertEqual(outbox.coalesced, 1)
+
+    def test_full_queue_keeps_chat_and_action_results(self):
+        messages = [{'type': 'chat', 'n': 1}, {'type': 'action_result', 'n': 2}, {'type': 'game_state'}, {'type': 'chat', 'n': 3}]
+        sent, outbox = self.run_outbox(messages, max_size=3)
+        self.assertEqual(sent, [{'type': 'resync'}, {'type': 'chat', 'n': 1}, {'type': 'action_result', 'n': 2}, {'type': 'chat', 'n': 3}])
+        self.assertEqual(outbox.dropped, 0)
+
+    def test_stale_state_resyncs_without_dropping_chat(self):
+        messages = [{'type': 'game_state'}, {'type': 'chat', 'n': 1}, {'type': 'action_result', 'n': 2}]
+        sent, outbox = self.run_outbox(messages, stale=(0, 1))
+        self.assertEqual(sent, [{'type': 'resync'}, {'type': 'chat', 'n': 1}, {'type': 'action_result', 'n': 2}])
+        self.assertEqual(outbox.resyncs, 1)
+
+    def test_queue_stays_bounded(self):
+        sent, outbox = self.run_outbox([{'type': 'chat', 'n': i} for i in range(10)], max_size=4)
+        self.assertEqual(sent, [{'type': 'chat', 'n': n} for n in (6, 7, 8, 9)])
+        self.assertEqual(outbox.dropped, 6)
+
+    def test_send_json_close_closes_after_delivery(self):
+        consumer = GameConsumer()
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def scenario():
+            consumer.outbox = Outbox(send, mock.AsyncMock())
+            consumer.outbox.start()
+            with mock.patch.object(consumer, 'close', mock.AsyncMock()) as close:
+                await consumer.send_json({'type': 'error'}, close=4000)
+                return close
+
+        close = asyncio.run(scenario())
+        self.assertEqual(sent, [{'type': 'error'}])
+        close.assert_awaited_once_with(4000)
+
+
+class MetricsAccessTests(TestCase):
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    def test_disabled_by_default(self):
+        self.assertEqual(self.client.get('/game/metrics/').status_code, 404)
+        with metrics.measure('broadcast_game_state') as extra:
+            extra['bytes'] = 1
+        self.assertEqual(metrics.registry.snapshot()['stages'], {})
+
+    @override_settings(GAME_METRICS_ENABLED=True)
+    def test_staff_only(self):
+        self.assertEqual(self.client.get('/game/metrics/').status_code, 403)
+        user = User.objects.create_user('ops', password='x')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/game/metrics/').status_code, 403)
+        user.is_staff = True
+        user.save()
+        with metrics.measure('broadcast_game_state') as extra:
+            extra['bytes'] = 10
+        response = self.client.get('/game/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stages']['broadcast_game_state']['other']['bytes']['count'], 1)